@@ -50,6 +50,8 @@ import bcamp_setup
 import io
 import os
 import stat
+import time
+import queue
 import atexit
 import shutil
 import socket
@@ -100,6 +102,11 @@ class Gui(tk.Tk):
         self.FileOpsQ = bcamp_api.FileOpsQueue()
         self.CasePoll = bcamp_api.CasePollDaemon(self)
         self.ImportDaemon = bcamp_api.ImportDaemon(self)
+        bcamp_api.DB_MAINT.start()
+        bcamp_api.LOG_INDEX.start()
+        # Search-as-you-type index for the CaseViewer, built in the
+        # background - the DB is searched until it is ready.
+        bcamp_api.CASE_INDEX.start()
         # Register Callback method for "Gui.import_item" changes to 
         # "import_handler()". These will be dictionary objects from
         # the Tk_ImportMenu
@@ -675,6 +682,16 @@ class Tk_SettingsMenu(tk.Toplevel):
             background='#212121',
             foreground='#f5f5f5'
         )
+        self.diagnostics_menu = tk.Button(
+            self.base_btn_frame,
+            text="Diagnostics               ▷",
+            anchor='center',
+            command=self.render_diagnostics,
+            width=30,
+            relief='flat',
+            background='#212121',
+            foreground='#f5f5f5'
+        )
         self.dev_mode_label = tk.Label(
             self.base_btn_frame,
             textvariable=self.mode_str,
@@ -686,7 +703,7 @@ class Tk_SettingsMenu(tk.Toplevel):
     def config_grid(self):
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
-        self.rowconfigure(4, weight=1)
+        self.rowconfigure(5, weight=1)
         self.columnconfigure(1, weight=1)
         # Btn Frame Config
         self.base_btn_frame.grid(
@@ -696,8 +713,10 @@ class Tk_SettingsMenu(tk.Toplevel):
             row=2, column=0, padx=1, pady=1, sticky='ew')
         self.parsing_menu.grid(
             row=3, column=0, padx=1, pady=1, sticky='ew')
+        self.diagnostics_menu.grid(
+            row=4, column=0, padx=1, pady=1, sticky='ew')
         self.dev_mode_label.grid(
-            row=4, column=0, padx=3, pady=3, sticky="sw")
+            row=5, column=0, padx=3, pady=3, sticky="sw")
         # Menu Frame Config
         # Row and Column config found in Nested Frame class...
         self.base_menu_frame.grid(
@@ -719,6 +738,11 @@ class Tk_SettingsMenu(tk.Toplevel):
             child.destroy()
         self.Tk_ParsingRules(self.base_menu_frame)
 
+    def render_diagnostics(self):
+        for child in self.base_menu_frame.winfo_children():
+            child.destroy()
+        self.Tk_Diagnostics(self.base_menu_frame)
+
     def get_mode(self):
         '''
         Sets DevMode string in UI
@@ -1022,6 +1046,170 @@ class Tk_SettingsMenu(tk.Toplevel):
             bcamp_api.update_config('user_texteditor', def_notepad)
 
 
+    class Tk_Diagnostics(tk.Frame):
+        '''
+        Menu to enable the SQL query stats, and view the collected stats.
+        See 'bcamp_api.QueryStats'.
+        '''
+        def __init__(self, master):
+            super().__init__()
+            self.master = master
+            self.enabled_boolVar = tk.BooleanVar()
+            self.enabled_boolVar.set(
+                bcamp_api.get_config('dev_query_stats') == "True")
+            self.slow_ms_strVar = tk.StringVar()
+            self.slow_ms_strVar.set(bcamp_api.get_config('dev_slow_query_ms'))
+
+            # Tk Methods
+            self.config_widgets()
+            self.config_grid()
+            self.refresh_stats()
+
+        def config_widgets(self):
+            self.basebg = "#303030"
+            self.basefg = "#f5f5f5"
+            self.entry_bg = "#10100B"
+            self.entry_fg = "#f5f5f5"
+
+            # [Query Stats Options]
+            self.opts_frame = tk.LabelFrame(
+                self.master,
+                text='SQL Query Stats',
+                background=self.basebg,
+                foreground=self.basefg
+            )
+            self.enabled_check = tk.Checkbutton(
+                self.opts_frame,
+                text="Record time, and rows returned for every SQL statement",
+                variable=self.enabled_boolVar,
+                background=self.basebg,
+                foreground=self.basefg,
+                selectcolor=self.entry_bg,
+                activebackground=self.basebg,
+                activeforeground=self.basefg,
+                anchor="w"
+            )
+            self.slow_ms_label = tk.Label(
+                self.opts_frame,
+                text="Slow Query Threshold (ms) - logged to 'logs\\slow_queries.log'",
+                background=self.basebg,
+                foreground=self.basefg,
+                anchor="w"
+            )
+            self.slow_ms_entry = tk.Entry(
+                self.opts_frame,
+                width=70,
+                relief='flat',
+                textvariable=self.slow_ms_strVar,
+                background=self.entry_bg,
+                foreground=self.entry_fg
+            )
+
+            # [Stats Dump]
+            self.stats_frame = tk.LabelFrame(
+                self.master,
+                text='Collected Stats',
+                background=self.basebg,
+                foreground=self.basefg
+            )
+            self.stats_text = tk.Text(
+                self.stats_frame,
+                width=100,
+                height=20,
+                wrap='none',
+                relief='flat',
+                background=self.entry_bg,
+                foreground=self.entry_fg,
+                font=('Consolas', 9)
+            )
+            self.refresh_btn = tk.Button(
+                self.stats_frame,
+                text="Refresh",
+                command=self.refresh_stats,
+                relief='flat',
+                background=self.entry_bg,
+                foreground=self.entry_fg,
+            )
+            self.reset_btn = tk.Button(
+                self.stats_frame,
+                text="Reset",
+                command=self.reset_stats,
+                relief='flat',
+                background=self.entry_bg,
+                foreground=self.entry_fg,
+            )
+
+            # [BottomBar]
+            self.bbar_frame = tk.Frame(
+                self.master,
+                background=self.basebg,
+            )
+            self.save_btn = tk.Button(
+                self.bbar_frame,
+                text="Save and Apply",
+                background='#badc58',
+                foreground='#111111',
+                relief="flat",
+                command=self.save_settings
+            )
+
+        def config_grid(self):
+            # [Query Stats Options]
+            self.opts_frame.grid(
+                row=1, column=0, padx=3, pady=10, sticky='nsew'
+            )
+            self.opts_frame.grid_columnconfigure(0, weight=1)
+            self.enabled_check.grid(
+                row=0, column=0, padx=3, pady=3, sticky='nsew')
+            self.slow_ms_label.grid(
+                row=1, column=0, padx=3, pady=3, sticky='nsew')
+            self.slow_ms_entry.grid(
+                row=2, column=0, padx=3, pady=2, ipady=2, sticky='new')
+
+            # [Stats Dump]
+            self.stats_frame.grid(
+                row=2, column=0, padx=3, pady=10, sticky='nsew'
+            )
+            self.stats_frame.grid_columnconfigure(0, weight=1)
+            self.stats_text.grid(
+                row=0, column=0, columnspan=3, padx=3, pady=3, sticky='nsew')
+            self.refresh_btn.grid(row=1, column=1, padx=3, pady=3, sticky='e')
+            self.reset_btn.grid(row=1, column=2, padx=3, pady=3, sticky='e')
+
+            # [BottomBar]
+            self.bbar_frame.grid(
+                row=4, column=0, sticky='nsew'
+            )
+            self.bbar_frame.grid_columnconfigure(0, weight=1)
+            self.save_btn.grid(row=0, column=0, padx=1, pady=(20,0), sticky='e')
+
+        def refresh_stats(self):
+            self.stats_text.delete('1.0', 'end')
+            if not bcamp_api.QUERY_STATS.enabled:
+                self.stats_text.insert('end',
+                    "Query stats are disabled, enable them above.\n\n")
+            self.stats_text.insert('end', bcamp_api.QUERY_STATS.format_dump())
+
+        def reset_stats(self):
+            bcamp_api.QUERY_STATS.reset()
+            self.refresh_stats()
+
+        def save_settings(self):
+            '''
+            Updates DB values based on values stored in this menu.
+            '''
+            try:
+                slow_ms = str(float(self.slow_ms_strVar.get()))
+            except ValueError:
+                slow_ms = bcamp_api.get_config('dev_slow_query_ms')
+                self.slow_ms_strVar.set(slow_ms)
+            bcamp_api.update_config('dev_query_stats',
+                str(self.enabled_boolVar.get()))
+            bcamp_api.update_config('dev_slow_query_ms', slow_ms)
+            bcamp_api.configure_query_stats()
+            self.refresh_stats()
+
+
     class Tk_ParsingRules(tk.Frame):
         '''
         Menu to modify user-defined parsing rules for the "SimpleParser" 
@@ -1961,6 +2149,172 @@ class Tk_SettingsMenu(tk.Toplevel):
                 bcamp_api.update_automation(self.target_auto, 'user_options', b_updated_exe_list)
 
 
+class Tk_NotesSearch(tk.Toplevel):
+    '''
+    "Search my notes everywhere" - Searches the case notes and file notes of
+    EVERY case through 'bcamp_api.search_notes'. Double-clicking a result
+    opens that case in the Workbench.
+
+    With a 'source' of 'logs', searches the downloaded logs of every case
+    through 'bcamp_api.search_logs' instead.
+    '''
+
+    def __init__(self, Gui, source='notes', event=None):
+        super().__init__()
+        self.Gui = Gui
+        self.source = source
+        if self.source == 'logs':
+            self.title("Basecamp - Search Logs")
+        else:
+            self.title("Basecamp - Search Notes")
+        self.search_strVar = tk.StringVar()
+        self.status_strVar = tk.StringVar()
+        # {iid: sr_number} of the rendered results.
+        self.results = {}
+        # (search_id, results) of the 'search_thread's, see 'poll_results'.
+        self.result_queue = queue.Queue()
+        self.search_id = 0
+        self.poll_id = None
+
+        self.configure(background="#111111")
+
+        # TK methods
+        self.config_widgets()
+        self.config_grid()
+        self.bind("<Destroy>", self.on_destroy)
+        self.search_entry.focus_set()
+
+    def config_widgets(self):
+        self.search_entry = tk.Entry(
+            self,
+            textvariable=self.search_strVar,
+            bg="#101010",
+            fg="#FFFFFF",
+            insertbackground="#FFFFFF",
+            relief='flat'
+        )
+        self.search_entry.bind('<Return>', self.run_search)
+        self.search_btn = tk.Button(
+            self,
+            text="Search",
+            command=self.run_search,
+            relief='flat',
+            background='#212121',
+            foreground='#f5f5f5'
+        )
+        self.result_tree = ttk.Treeview(
+            self,
+            columns=("path", "snippet"),
+        )
+        self.result_tree.heading('#0', text="SR Number")
+        self.result_tree.heading('path', text="File")
+        if self.source == 'logs':
+            self.result_tree.heading('snippet', text="Log")
+        else:
+            self.result_tree.heading('snippet', text="Notes")
+        self.result_tree.column('#0', width=120, stretch=False)
+        self.result_tree.column('path', width=240)
+        self.result_tree.column('snippet', width=480)
+        self.result_tree.bind('<Double-1>', self.open_result)
+        self.result_tree_ysb = ttk.Scrollbar(
+            self,
+            orient='vertical',
+            command=self.result_tree.yview
+        )
+        self.result_tree.configure(yscrollcommand=self.result_tree_ysb.set)
+        self.status_label = tk.Label(
+            self,
+            textvariable=self.status_strVar,
+            anchor='w',
+            background="#111111",
+            foreground="#525258"
+        )
+
+    def config_grid(self):
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.search_entry.grid(row=0, column=0, padx=3, pady=5, sticky="ew")
+        self.search_btn.grid(row=0, column=1, columnspan=2, padx=3, pady=5,
+            sticky="ew")
+        self.result_tree.grid(row=1, column=0, columnspan=2, padx=(3, 0),
+            sticky="nsew")
+        self.result_tree_ysb.grid(row=1, column=2, sticky="ns")
+        self.status_label.grid(row=2, column=0, columnspan=3, padx=3,
+            sticky="ew")
+
+    def run_search(self, event=None):
+        '''
+        Starts a search of the entry text on a worker thread, so a slow
+        search never freezes the UI. 'poll_results' renders the results
+        once they are queued - results of an older search are dropped.
+        '''
+        self.result_tree.delete(*self.result_tree.get_children())
+        self.results = {}
+        self.search_id += 1
+        self.status_strVar.set("Searching...")
+        threading.Thread(
+            target=self.search_thread,
+            args=(self.search_id, self.search_strVar.get())).start()
+        if self.poll_id == None:
+            self.poll_id = self.after(50, self.poll_results)
+
+    def search_thread(self, search_id, text):
+        '''
+        Runs the DB search of 'text' - NEVER touches Tk, the results are
+        passed back through 'result_queue'.
+        '''
+        results = []
+        try:
+            if self.source == 'logs':
+                results = bcamp_api.search_logs(text)
+            else:
+                results = bcamp_api.search_notes(text)
+        finally:
+            # Always queued, so 'poll_results' stops even if the search fails.
+            self.result_queue.put((search_id, results))
+
+    def poll_results(self):
+        '''
+        Renders the results of the latest search from 'result_queue', and
+        polls again while that search is still running.
+        '''
+        self.poll_id = None
+        while True:
+            try:
+                search_id, results = self.result_queue.get_nowait()
+            except queue.Empty:
+                self.poll_id = self.after(50, self.poll_results)
+                return
+            if search_id == self.search_id:
+                break
+        self.render_results(results)
+
+    def render_results(self, results):
+        for result in results:
+            if result['path'] == None:
+                path = "(Case Notes)"
+            else:
+                path = result['path']
+            iid = self.result_tree.insert('', 'end', text=result['sr_number'],
+                values=(path, result['snippet']))
+            self.results[iid] = result['sr_number']
+        self.status_strVar.set(str(len(results)) + " " + self.source
+            + " found")
+
+    def open_result(self, event=None):
+        iid = self.result_tree.focus()
+        if iid in self.results:
+            self.Gui.Workbench.render_workspace(self.results[iid])
+
+    def on_destroy(self, event):
+        '''
+        Stops the 'poll_results' loop once the window is closed.
+        '''
+        if event.widget == self and self.poll_id != None:
+            self.after_cancel(self.poll_id)
+            self.poll_id = None
+
+
 '''Customized Tk/TcL Classes used through Basecamp Frames'''
 class CustomTk_ButtonHover(tk.Button):
     def __init__(self, master, **kw):
@@ -2109,11 +2463,17 @@ class CustomTk_autoEntry(ttk.Entry):
     To enable autocompletion use set_completion_list(list) to define 
     a list of possible strings to hit.
     To cycle through hits use down and up arrow keys.
+
+    With set_completion_list(list, column), hits come from the typo-tolerant
+    'bcamp_api.suggest_values' of that 'cases' column instead. Near matches
+    that do not start with the typed text are only shown when cycling.
     """
     tk_umlauts=['odiaeresis', 'adiaeresis', 'udiaeresis', 'Odiaeresis', 'Adiaeresis', 'Udiaeresis', 'ssharp']
 
-    def set_completion_list(self, completion_list):
+    def set_completion_list(self, completion_list, column=None):
         self._completion_list = completion_list
+        self._column = column
+        self._typed = ""
         self._hits = []
         self._hit_index = 0
         self.position = 0
@@ -2121,16 +2481,19 @@ class CustomTk_autoEntry(ttk.Entry):
 
     def autocomplete(self, delta=0):
         """autocomplete the Entry, delta may be 0/1/-1 to cycle through possible hits"""
-        if delta: # need to delete selection otherwise we would fix the current position
-            self.delete(self.position, tk.END)
-        else: # set position to end so selection starts where textentry ended
+        if not delta: # set position to end so selection starts where textentry ended
             self.position = len(self.get())
+            self._typed = self.get()
+        typed = self._typed
         # collect hits
         _hits = []
-        for element in self._completion_list:
-            #if element.startswith(self.get().lower()):
-            if element.startswith(self.get()):
-                _hits.append(element)
+        if self._column != None:
+            _hits = bcamp_api.suggest_values(self._column, typed)
+        else:
+            for element in self._completion_list:
+                #if element.startswith(self.get().lower()):
+                if element.startswith(typed):
+                    _hits.append(element)
         # if we have a new hit list, keep this in mind
         if _hits != self._hits:
             self._hit_index = 0
@@ -2140,21 +2503,30 @@ class CustomTk_autoEntry(ttk.Entry):
             self._hit_index = (self._hit_index + delta) % len(self._hits)
         # now finally perform the auto completion
         if self._hits:
-            self.delete(0,tk.END)
-            self.insert(0,self._hits[self._hit_index])
-            self.select_range(self.position,tk.END)
+            hit = self._hits[self._hit_index]
+            if hit.lower().startswith(typed.lower()):
+                self.delete(0,tk.END)
+                self.insert(0,hit)
+                self.select_range(self.position,tk.END)
+            elif delta:
+                # Near match, replaces ALL of the typed text.
+                self.delete(0,tk.END)
+                self.insert(0,hit)
+                self.select_range(0,tk.END)
                         
     def handle_keyrelease(self, event):
         """event handler for the keyrelease event on this widget"""
         if event.keysym == "BackSpace":
             self.delete(self.index(tk.INSERT), tk.END) 
             self.position = self.index(tk.END)
+            self._typed = self.get()
         if event.keysym == "Left":
             if self.position < self.index(tk.END): # delete the selection
                 self.delete(self.position, tk.END)
             else:
                 self.position = self.position-1 # delete one character
                 self.delete(self.position, tk.END)
+            self._typed = self.get()
         if event.keysym == "Right":
             self.position = self.index(tk.END) # go to end (no selection)
         if event.keysym == "Down":
@@ -3768,6 +4140,7 @@ class Tk_CaseViewer(tk.Frame):
         self.master_casetiles = bcamp_api.callbackVar()
         self.master_casetiles.register_callback(self.NEW_on_master_casetiles_update)
         self.search_results = None
+        self.preview_query = ""
         self.casetiles_order_rule = 'default'
         #self.casetiles_order_rule = 'hasbug'
         # NEW TILEORDER
@@ -3888,6 +4261,32 @@ class Tk_CaseViewer(tk.Frame):
             label='Filter: New Customer Uploads',
             command=lambda r='filenotify': self.update_o_rule(r)
         )
+        # Facet menus, filled w/ case counts by 'update_facetmenus'.
+        self.searchmenu.add_separator()
+        self.facetmenus = {}
+        for facet, label in (('account', 'Accounts'), ('product', 'Products'),
+                ('tag', 'Tags'), ('jira_status', 'JIRA Status')):
+            self.facetmenus[facet] = tk.Menu(
+                self.searchmenu,
+                relief='flat',
+                tearoff=False,
+                background=self.basebg,
+                foreground=self.basefg,
+                borderwidth=0,
+            )
+            self.searchmenu.add_cascade(
+                label=label,
+                menu=self.facetmenus[facet]
+            )
+        self.searchmenu.add_separator()
+        self.searchmenu.add_command(
+            label='Search Notes (All Cases)...',
+            command=lambda: Tk_NotesSearch(self.Gui)
+        )
+        self.searchmenu.add_command(
+            label='Search Logs (All Cases)...',
+            command=lambda: Tk_NotesSearch(self.Gui, 'logs')
+        )
 
         # Tooltips
         self.tt_search_run_btn = CustomTk_ToolTip(self.search_run_btn, text='Filter cases by entry value.')
@@ -3931,6 +4330,7 @@ class Tk_CaseViewer(tk.Frame):
         self.search_entry.bind("<FocusOut>", self.reset_search_entry)
         self.filter_subframe.bind("<Configure>", self.update_filtertiles_grid)
         self.search_entry.bind("<Return>", self.run_search)
+        self.search_entry.bind("<KeyRelease>", self.preview_search)
         self.search_entry.bind("<Button-3>", self.draw_searchmenu)
 
     # Casetiles Methods
@@ -3997,19 +4397,20 @@ class Tk_CaseViewer(tk.Frame):
         o_rule = self.casetiles_order_rule
         search_res = self.search_results
 
-        # Check active search filters and generate 'match_tiles' dict.
-        # NOTE: 'match_tiles' and 'new_master_casetiles' have the same schema
-        if search_res == None:
-            print("CaseViewer: Search is NONE, not limiting results.")
-            match_tiles = new_master_casetiles
-        else:
-            '''SEARCH FILTERS APPLIED - NEED TO REMOVE MISSING SR's'''
-            match_tiles = {}
-            for item in new_master_casetiles:
-                #print('->', item)
-                for sr in search_res:
-                    if sr == item:
-                        match_tiles[sr] = new_master_casetiles[item]
+        # Search results are already filtered AND ordered by the 'o_rule'
+        # in the DB, see 'bcamp_api.compile_filterset'.
+        if search_res != None:
+            tilesindex = []
+            index_cnt = 1
+            for sr in search_res:
+                if sr in new_master_casetiles:
+                    tilesindex.append((index_cnt, sr))
+                    index_cnt += 1
+            self.NEW_render_casetiles(tilesindex)
+            return
+
+        print("CaseViewer: Search is NONE, not limiting results.")
+        match_tiles = new_master_casetiles
 
         # Pass 'match_tiles' to the correct 'o_rule' method to get the 
         # resulting 'tileindex' which will be used as the key to render the 
@@ -4369,6 +4770,52 @@ class Tk_CaseViewer(tk.Frame):
             self.rowconfigure(1, weight=0)
             self.master_frame.grid(row=0, column=0, sticky="nsew")
 
+    def preview_search(self, event=None):
+        '''
+        Called on every key typed in the search entry. Narrows the shown
+        CaseTiles to the SR's matching the text so far, using the in-memory
+        'bcamp_api.CASE_INDEX'. The filters are only applied once the user
+        hits <Return>, see 'run_search'.
+        '''
+        query = self.search_strVar.get().strip()
+        if query == self.default_search_str:
+            query = ""
+        if query == self.preview_query:
+            return # Cursor keys, etc.
+        self.preview_query = query
+
+        # Fields, OR, NOT, etc. are only searched on <Return>.
+        words = None
+        if query != "":
+            words = bcamp_api.search_query_words(query)
+        if words == None:
+            # Redraw the current filters.
+            self.master_casetiles.value = self.master_casetiles.value
+            return
+        matches = bcamp_api.CASE_INDEX.search(" ".join(words))
+        if matches == None:
+            return # Index disabled, search on <Return> only.
+        if len(matches) == 0:
+            # Nothing starts w/ the text, show accounts/products spelled
+            # alike, such as "US Bank" for "usbank".
+            for column in ('account', 'product'):
+                for value in bcamp_api.suggest_values(column, query, 3):
+                    matches |= bcamp_api.CASE_INDEX.query(value) or set()
+
+        # Keep the order of the current filters/o_rule.
+        if self.search_results != None:
+            shown = self.search_results
+        else:
+            shown = [item[1] for item in
+                self.NEW_build_tileindex_age(self.master_casetiles.value)]
+        tilesindex = []
+        index_cnt = 1
+        for sr in shown:
+            if sr in matches and sr in self.master_casetiles.value:
+                tilesindex.append((index_cnt, sr))
+                index_cnt += 1
+        self.NEW_render_casetiles(tilesindex)
+
     def run_search(self, event=None):
         '''
         Intialization method to read the user-defined query and return a new
@@ -4381,6 +4828,7 @@ class Tk_CaseViewer(tk.Frame):
         ui_query = self.search_strVar.get()
         # And Clear text from entry widget.
         self.search_strVar.set("")
+        self.preview_query = ""
 
         # Second, parse the raw string from the UI using the API. The returned
         # value already contains exisiting rules.
@@ -4432,7 +4880,8 @@ class Tk_CaseViewer(tk.Frame):
             + new_filterset['tag'] 
             + new_filterset['custom']
         )
-        if search_litmus != []: #empty list, bypass search.
+        # Non-default 'o_rule' are also filtered/ordered by the DB.
+        if search_litmus != [] or new_filterset['o_rule'] != 'default':
             search_results = bcamp_api.search_cases(new_filterset)
             self.search_results = search_results
         else:
@@ -4593,9 +5042,40 @@ class Tk_CaseViewer(tk.Frame):
             self.update_search_pos()
 
     def draw_searchmenu(self, event):
+        self.update_facetmenus()
         self.searchmenu.post(
                 event.x_root + 10, event.y_root + 10)
 
+    def update_facetmenus(self, limit=25):
+        '''
+        Refills the facet menus with the 'limit' values that have the most
+        cases for the current filterset, such as "Need Info (7)". Counts come
+        from 'bcamp_api.FACETS', cached until the next case write.
+        '''
+        counts = bcamp_api.FACETS.counts(self.filterset_callback.value)
+        for facet, menu in self.facetmenus.items():
+            menu.delete(0, 'end')
+            for value, count in counts[facet][:limit]:
+                menu.add_command(
+                    label=str(value) + " (" + str(count) + ")",
+                    command=lambda f=facet, v=value: self.add_facet_filter(f, v)
+                )
+            if counts[facet] == []:
+                menu.add_command(label="(None)", state='disabled')
+
+    def add_facet_filter(self, facet, value):
+        '''
+        Adds 'value' of a facet menu to the current filterset. JIRA status
+        has no filter category, so it is added as a "status:=" search.
+        '''
+        new_set = self.filterset_callback.value
+        if facet == 'jira_status':
+            new_set['custom'].append(
+                'status:=' + bcamp_api.quote_search_term(value))
+        elif value not in new_set[facet]:
+            new_set[facet].append(value)
+        self.filterset_callback.value = new_set
+
     # Refresh_callback method
     def _sb_refresh(self, event=None):
         self.Gui.CasePoll.start_manual_poll()
@@ -5776,10 +6256,8 @@ class Tk_CaseViewer(tk.Frame):
                 relief='flat'
             )
             # Setting auto-complete list
-            account_autofill = bcamp_api.query_cases_distinct('account')
-            product_autofill = bcamp_api.query_cases_distinct('product')
-            self.entry_account.set_completion_list(tuple(account_autofill))
-            self.entry_product.set_completion_list(tuple(product_autofill))
+            self.entry_account.set_completion_list((), 'account')
+            self.entry_product.set_completion_list((), 'product')
 
         def config_grid(self):
             '''
@@ -6913,10 +7391,8 @@ class Tk_ImportMenu(tk.Frame):
 
         # Populating Autofill record
         # Setting auto-complete list
-        account_autofill = bcamp_api.query_cases_distinct('account')
-        product_autofill = bcamp_api.query_cases_distinct('product')
-        self.combox_account.set_completion_list(tuple(account_autofill))
-        self.combox_product.set_completion_list(tuple(product_autofill))
+        self.combox_account.set_completion_list((), 'account')
+        self.combox_product.set_completion_list((), 'product')
 
     def config_grid(self):
         '''
@@ -7682,12 +8158,28 @@ class Tk_FileBrowser(tk.Frame):
     TODO - *RANGE* scanning for .log or .dbg* files needs to be complete. - On hold for beta.
     '''
 
+    # Rows/ms of scan results inserted per mainloop tick, see
+    # 'drain_tree_queue'.
+    TREE_BATCH_ROWS = 500
+    TREE_BATCH_MS = 8
+    # iid prefix of the "Loading..." row of unloaded dirs in a lazy tree.
+    LAZY_PLACEHOLDER = 'lazy_placeholder:'
+
     def __init__(self, master, key_value, FileOpsQ, Tk_CaseWorkbench):
         super().__init__(master=master)
         self.master = master
         self.key_value = key_value
         self.FileOpsQ = FileOpsQ
         self.case_frame = Tk_CaseWorkbench
+        # Set when the FileBrowser is closed, to stop its running scans.
+        self.scan_cancel = threading.Event()
+        # Scan results waiting to be inserted into the trees, and the iids
+        # in 'file_tree', see 'drain_tree_queue'.
+        self.tree_queue = queue.Queue()
+        self.tree_iids = set()
+        self.drain_id = None
+        # Rows rendered from the DB, that a scan has not confirmed yet.
+        self.stale_iids = set()
 
         # Getting install dir path...
         self.RPATH = str(pathlib.Path(__file__).parent.absolute()).rpartition('\\')[0]
@@ -7700,6 +8192,18 @@ class Tk_FileBrowser(tk.Frame):
         self.sr_remote_path = bcamp_api.query_case(self.key_value, "remote_path")
         self.sr_local_path = bcamp_api.query_case(self.key_value, "local_path")
 
+        # Lazy tree - dirs are only loaded when opened, see 'on_tree_open'.
+        # 'loaded_dirs' are the dirs whose children are in 'file_tree', and
+        # 'closed_dirs' the loaded dirs that were closed, oldest first.
+        self.lazy_tree = bcamp_api.get_config('ui_lazy_filetree') == 'True'
+        try:
+            self.node_budget = int(
+                bcamp_api.get_config('ui_filetree_node_budget'))
+        except ValueError:
+            self.node_budget = 20000
+        self.loaded_dirs = set([self.sr_remote_path, self.sr_local_path])
+        self.closed_dirs = {}
+
         # Toggle FavTree Var
         self.show_favTree = bcamp_api.callbackVar()
         self.show_favTree.value = bcamp_api.get_config("ui_render_favtree")
@@ -7717,12 +8221,13 @@ class Tk_FileBrowser(tk.Frame):
 
         # Rendering File's via refresh threads
         #self.render_snapshot(self.key_value)
+        self.drain_tree_queue()
         threading.Thread(
-            target=self.refresh_file_record,
-            args=['remote', True]).start()
+            target=self.open_file_record,
+            args=['remote']).start()
         threading.Thread(
-            target=self.refresh_file_record,
-            args=['local', True]).start()
+            target=self.open_file_record,
+            args=['local']).start()
 
     def config_widgets(self):
         # Colors...
@@ -7827,6 +8332,10 @@ class Tk_FileBrowser(tk.Frame):
             label="Toggle Favorites",
             command=self.toggle_favTree
         )
+        self.options_menu.add_command(
+            label="Toggle Lazy Tree",
+            command=self.toggle_lazy_tree
+        )
 
         # FileTrees Pane - Main Container for Tree Widgets to allow resize.
         self.trees_pane = tk.PanedWindow(
@@ -7893,6 +8402,7 @@ class Tk_FileBrowser(tk.Frame):
             if len(os.listdir(self.sr_local_path)) != 0:
                 self.file_tree.insert('', '0', iid='local_filler_space', tags=('default'))
                 self.file_tree.insert('', '0', iid=self.local_tree, text="Local Files (Downloads)", tags=('dir_color'))
+                self.tree_iids.update(('local_filler_space', self.local_tree))
 
     def config_grid(self):
         # GRID
@@ -7955,11 +8465,14 @@ class Tk_FileBrowser(tk.Frame):
             self.trees_pane.paneconfigure(self.fav_tree_frame, hide=False)
 
     def config_binds(self):
+        self.bind("<Destroy>", self.on_destroy)
         # File Treeview Command Bindings
         self.file_tree.bind("<ButtonRelease-3>", self.popup)
         self.file_tree.bind("<Double-Button-1>", self.on_double_click)
         self.file_tree.bind("<Return>", self.right_click_open_win)
         self.file_tree.bind("<<TreeviewSelect>>", self.toggle_trees_focus)
+        self.file_tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.file_tree.bind("<<TreeviewClose>>", self.on_tree_close)
         
         # Favorite Treeview Command Bindings
         self.fav_tree.bind("<ButtonRelease-3>", self.fav_popup)
@@ -7977,6 +8490,8 @@ class Tk_FileBrowser(tk.Frame):
         self.file_tree.tag_configure('enc_color', background="#0a0a0a", foreground="#66d9e8", font=self.def_font)
         self.file_tree.tag_configure('bin_color', background="#0a0a0a", foreground="#66d9e8", font=self.def_font)
         self.file_tree.tag_configure('img_color', background="#0a0a0a", foreground="#FF5E96", font=self.def_font)
+        # Rows from the DB not yet confirmed by a scan, see 'open_file_record'
+        self.file_tree.tag_configure('stale', foreground="#6b6b6b")
         # Treeview Column Config
         self.file_tree.heading('#0', text="Name",)
         self.file_tree.heading('date', text="Creation Time", anchor='center')
@@ -8022,6 +8537,14 @@ class Tk_FileBrowser(tk.Frame):
             bcamp_api.update_config('ui_render_favtree', "False")
             self.show_favTree.value = "False"
     
+    def toggle_lazy_tree(self, event=None):
+        # Updates the DB value for "ui_lazy_filetree", used by FileBrowsers
+        # opened from now on.
+        if bcamp_api.get_config("ui_lazy_filetree") == "True":
+            bcamp_api.update_config('ui_lazy_filetree', "False")
+        else:
+            bcamp_api.update_config('ui_lazy_filetree', "True")
+
     def render_favTree(self, new_string):
         '''
         Callback function : Checks the DB to render or hide the 
@@ -8164,9 +8687,339 @@ class Tk_FileBrowser(tk.Frame):
 
         #pprint.pprint(bcamp_api.query_all_files(key_value))
                     
-    def refresh_file_record(self, mode, enableParser):
+    def insert_to_tree(self, mode, _path, _record, stale=False):
+        '''
+        Inserts the 'bcamp_api.scan_file_tree' record of '_path' into the
+        'file_tree', as a child of its dir if that is in the tree already.
+        'stale' rows are from the DB, and are greyed out until a scan inserts
+        the same path again.
+
+        Called by 'drain_tree_queue' ONLY, on the main thread. Rows in the
+        tree are tracked in 'self.tree_iids', instead of asking Tk w/
+        'file_tree.exists()' per row.
+        '''
+        if _path in self.tree_iids and (stale or _path not in self.stale_iids):
+            # Already in the tree, from an earlier scan.
+            return
+        _type = _record['type']
+        # Build Var's for Treeview insert
+        # Check *_path* (head,) string via os.path.split
+        split_path = os.path.split(_path)
+        possible_parent = split_path[0] # Head
+        tree_text = split_path[1] # Tail/name
+
+        # formated size string
+        format_size = "{size:.3f} MB"
+        if _type != 'dir':
+            tree_size = format_size.format(size=_record['size'] / (1024*1024))
+        else:
+            tree_size = "..."
+
+        # Formating time String
+        tree_ctime = (datetime.datetime.fromtimestamp(
+                _record['creation_time'])).strftime(self.time_format)
+
+        # Formating Range based on _type
+        tree_range = "" # Default 
+
+        # Setting Tree 'tag' based on type...
+        tree_tag = 'default'
+        if _type == 'dir':
+            tree_tag = 'dir_color'
+        if _type == ".enc":
+            tree_tag = 'enc_color'
+        if _type == ".bin" or _type == ".html" or _type == ".conf" or _type == '.cnf' or _type == ".xml":
+            tree_tag = 'bin_color'
+        if _type == ".zip" or _type == '.gz' or _type == '.tar':
+            tree_tag = 'zip_color'
+        if _type == ".log" or _type == ".dbg":
+            tree_tag = 'log_color'
+        if _type == ".jpeg" or _type == '.png':
+            tree_tag = 'img_color'
+
+        if _path in self.tree_iids:
+            # Confirmed by the scan - refresh the cached values.
+            self.stale_iids.discard(_path)
+            self.file_tree.item(_path,
+                values=(tree_ctime, tree_size, tree_range),
+                tags=(tree_tag))
+            return
+
+        # Insert as child of *possible_parent*, or under the root of 'mode'.
+        if possible_parent in self.tree_iids:
+            tree_root = possible_parent
+        elif self.lazy_tree and possible_parent not in (self.sr_remote_path,
+                self.sr_local_path):
+            # Parent was dropped by 'evict_closed_dirs' since it was queued.
+            return
+        elif mode == 'remote':
+            tree_root = ''
+        else:
+            # Download tree created during __init__ if dir !empty.
+            # Creating it here if it is missing - ex first local file.
+            if self.local_tree not in self.tree_iids:
+                self.file_tree.insert('', '0', iid='local_filler_space', tags=('default'))
+                self.file_tree.insert('', '0', iid=self.local_tree, text="Local Files (Downloads)", tags=('dir_color'))
+                self.tree_iids.update(('local_filler_space', self.local_tree))
+            tree_root = self.local_tree
+
+        if stale:
+            tree_tags = (tree_tag, 'stale')
+            self.stale_iids.add(_path)
+        else:
+            tree_tags = (tree_tag)
+        self.file_tree.insert(tree_root, 
+            'end', 
+            iid=_path, 
+            text=tree_text,
+            values=(tree_ctime, tree_size, tree_range),
+            tags=tree_tags)
+        self.tree_iids.add(_path)
+
+        # Placeholder row, so the dir can be opened to load its children.
+        if self.lazy_tree and _type == 'dir' and _path not in self.loaded_dirs:
+            self.file_tree.insert(_path, 'end',
+                iid=self.LAZY_PLACEHOLDER + _path, text="Loading...",
+                tags=('default'))
+
+    def delete_from_tree(self, _path):
+        '''
+        Removes '_path', and its children, from the 'file_tree'. Called by
+        'drain_tree_queue' ONLY, on the main thread.
+        '''
+        if _path not in self.tree_iids:
+            return
+        def forget(iid):
+            for child in self.file_tree.get_children(iid):
+                forget(child)
+            self.tree_iids.discard(iid)
+            self.stale_iids.discard(iid)
+            self.loaded_dirs.discard(iid)
+            self.closed_dirs.pop(iid, None)
+        forget(_path)
+        self.file_tree.delete(_path)
+
+    def insert_to_favtree(self, _path, _record):
+        '''
+        Very Similar to 'insert_to_tree' with edits to comply
+        with expected "favorites" format from generators.
+
+        Called by 'drain_tree_queue' ONLY, on the main thread.
+        '''
+        _type = _record['type']
+        # Build Var's for Treeview insert
+        split_path = _path.split(self.key_value + "\\", 1)
+        parent = split_path[1].rsplit("\\", 1)
+        
+        # formated size string
+        format_size = "{size:.3f} MB"
+        if _type != 'dir':
+            tree_size = format_size.format(size=_record['size'] / (1024*1024))
+        else:
+            tree_size = "..."
+
+        # Formating time String
+        tree_ctime = (datetime.datetime.fromtimestamp(
+                _record['creation_time'])).strftime(self.time_format)
+
+        # Formating Range based on _type
+        #tree_range = "" # Default 
+        #if _type in self.config_record['range_extensions']:
+        #    # TODO Is this needed here?
+        #    #print("Supported range ext", parent[1])
+        #    pass
+
+        # Setting Tree 'tag' based on type...
+        tree_tag = 'default'
+        if _type == 'dir':
+            tree_tag = 'dir_color'
+        if _type == ".enc":
+            tree_tag = 'enc_color'
+        if _type == ".bin" or _type == ".html":
+            tree_tag = 'bin_color'
+        if _type == ".zip" or _type == '.gz' or _type == '.tar':
+            tree_tag = 'zip_color'
+        if _type == ".log" or _type == ".dbg":
+            tree_tag = 'log_color'
+        if _type == ".jpeg" or _type == '.png':
+            tree_tag = 'img_color'
+
+        for item in self.fav_tree.get_children():
+            lst = self.fav_tree.get_children(item)
+            for item in lst:
+                loc_litmus = self.sr_local_path + "\\" + parent[0] + "\\" + os.path.basename(_path)
+                rem_litmus = self.sr_remote_path + "\\" + parent[0] + "\\" + os.path.basename(_path)
+                if loc_litmus == item:
+                    # DO NOT INSERT TO TREE, LOCAL VAL ALREADY PRES.
+                    return
+                if rem_litmus == item:
+                    # REMOVE FROM TREE AND INSERT LOCAL INSTEAD
+                    try:
+                        self.fav_tree.delete(rem_litmus)
+                    except:
+                        pass
+        
+        if len(parent) == 2:
+            #print("**result**", "\n", "parent_tree:", parent[0], "\n", "fav_tree_text:", parent[1], "\n", "fav_tree_iid:", _path, "\n")
+            # Inserting Files into *self.fav_tree*
+            try:
+                self.fav_tree.insert(
+                    os.path.dirname(_path), 
+                    'end', 
+                    iid=_path, 
+                    text=parent[1],
+                    values=(tree_ctime, tree_size),
+                    tags=(tree_tag))
+            except tk.TclError as e:
+                try:
+                    self.fav_tree.insert(
+                        '', 
+                        'end', 
+                        iid=os.path.dirname(_path), 
+                        text=parent[0],
+                        tags=('dir_color'),
+                        open=True)
+                    self.fav_tree.insert(
+                        os.path.dirname(_path), 
+                        'end', 
+                        iid=_path, 
+                        text=parent[1],
+                        values=(tree_ctime, tree_size),
+                        tags=(tree_tag))
+                except tk.TclError:
+                    #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
+                    pass
+
+        else:
+            #print("**result**", "\n", "parent_tree:", 'none/root', "\n", "fav_tree_text:", parent[0], "\n", "fav_tree_iid:", _path, "\n")
+            # Create New Parent Row
+            try:
+                self.fav_tree.insert(
+                    '', 
+                    'end', 
+                    iid=_path, 
+                    text=parent[0], 
+                    values=(tree_ctime, tree_size), 
+                    tags=(tree_tag))
+            except tk.TclError:
+                #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
+                pass
+
+    def drain_tree_queue(self):
+        '''
+        Inserts the scan results queued by 'refresh_file_record' into the
+        trees, TREE_BATCH_ROWS rows or TREE_BATCH_MS of work per tick of the
+        mainloop, whichever comes first. Large bundles are rendered a batch
+        at a time w/o freezing the UI, and the scan threads never touch Tk.
         '''
-        Threaded generator that scans the either the remote, 
+        start = time.perf_counter()
+        row_count = 0
+        while (row_count < self.TREE_BATCH_ROWS
+                and time.perf_counter() - start < self.TREE_BATCH_MS / 1000):
+            try:
+                action, mode, _path, _record = self.tree_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if action == 'insert':
+                    self.insert_to_tree(mode, _path, _record)
+                elif action == 'cached':
+                    self.insert_to_tree(mode, _path, _record, stale=True)
+                elif action == 'favorite':
+                    self.insert_to_favtree(_path, _record)
+                elif action == 'delete':
+                    self.delete_from_tree(_path)
+                elif action == 'loaded':
+                    if self.file_tree.exists(self.LAZY_PLACEHOLDER + _path):
+                        self.file_tree.delete(self.LAZY_PLACEHOLDER + _path)
+                    self.evict_closed_dirs()
+            except tk.TclError as error:
+                print("Filebrowser: unable to", action, _path, "-", error)
+            row_count += 1
+
+        # Come back right away while rows are waiting.
+        if self.tree_queue.empty():
+            self.drain_id = self.after(50, self.drain_tree_queue)
+        else:
+            self.drain_id = self.after(1, self.drain_tree_queue)
+
+    def on_tree_open(self, event=None):
+        '''
+        Lazy tree - loads the children of the opened dir, if they are not
+        in the tree yet. The dir is listed on the FILE_CRAWLER, and its
+        entries are queued for 'drain_tree_queue' like those of a scan.
+        '''
+        dir_path = self.file_tree.focus()
+        if not self.lazy_tree or dir_path not in self.tree_iids:
+            return
+        self.closed_dirs.pop(dir_path, None)
+        if dir_path in self.loaded_dirs:
+            return
+        self.loaded_dirs.add(dir_path)
+        if dir_path.startswith(os.path.join(self.sr_local_path, "")):
+            mode = 'local'
+        else:
+            mode = 'remote'
+
+        def load_dir(_path):
+            for record in bcamp_api.list_dir_records(mode, _path):
+                self.tree_queue.put(('insert', mode, record['path'], record))
+            self.tree_queue.put(('loaded', mode, _path, None))
+        bcamp_api.FILE_CRAWLER.submit(load_dir, dir_path, self.scan_cancel)
+
+    def on_tree_close(self, event=None):
+        '''
+        Lazy tree - closed dirs keep their children until 'evict_closed_dirs'
+        needs the room.
+        '''
+        dir_path = self.file_tree.focus()
+        if self.lazy_tree and dir_path in self.loaded_dirs:
+            self.closed_dirs[dir_path] = None
+
+    def evict_closed_dirs(self):
+        '''
+        Lazy tree - while 'file_tree' holds more than 'node_budget' rows,
+        drops the children of the dir that was closed longest ago, and puts
+        back its placeholder. It is loaded again when next opened.
+        '''
+        while len(self.tree_iids) > self.node_budget and self.closed_dirs:
+            dir_path = next(iter(self.closed_dirs))
+            del self.closed_dirs[dir_path]
+            if (dir_path not in self.tree_iids
+                    or self.file_tree.item(dir_path, 'open')):
+                continue
+            for child in self.file_tree.get_children(dir_path):
+                if child in self.tree_iids:
+                    self.delete_from_tree(child)
+                else:
+                    self.file_tree.delete(child)
+            self.loaded_dirs.discard(dir_path)
+            self.file_tree.insert(dir_path, 'end',
+                iid=self.LAZY_PLACEHOLDER + dir_path, text="Loading...",
+                tags=('default'))
+
+    def open_file_record(self, mode):
+        '''
+        Threaded method called when the FileBrowser is opened. Renders the
+        files of *mode* saved in the DB right away, greyed out as 'stale',
+        and then reconciles them w/ 'refresh_file_record'. Rows the scan
+        finds are confirmed, and rows of files that are gone are removed,
+        so a slow VPN no longer leaves the FileBrowser empty.
+        '''
+        if mode == 'local' and not os.access(self.sr_local_path, os.R_OK):
+            return # Nothing downloaded.
+        cached_records = bcamp_api.query_file_records(self.key_value, mode)
+        for record in cached_records:
+            if (not self.lazy_tree
+                    or os.path.dirname(record['path']) in self.loaded_dirs):
+                self.tree_queue.put(('cached', mode, record['path'], record))
+        print("Filebrowser:", mode, "-", len(cached_records),
+            "cached files rendered, scanning...")
+        self.refresh_file_record(mode, True)
+
+    def refresh_file_record(self, mode, enableParser, full=False):
+        '''
+        Threaded method that scans the either the remote, 
         local paths in order of nested dir "depth"*. The
         *mode* var determines the target path, and location of found
         files.
@@ -8174,265 +9027,32 @@ class Tk_FileBrowser(tk.Frame):
         mode('remote') - Starts scanning from 'self.remote_path'
         mode('local') - Starts scanning from 'self.local_path'
 
+        Only dirs that changed since the last scan are listed again, unless
+        'full' is set, see 'bcamp_api.scan_file_tree'.
+
         ** The Subdirs of 'FILE1' and 'FILE2' will be inserted 
         into Tree before the Sub/Sub/dirs of 'FILE1' are inserted.
         '''
-        def tree_gen(depth_index):
-            # Temp Container for dir_paths @ 'depth_index'
-            temp_dirs = []
-            # For paths at this *depth_index*
-            for path in dir_depth_list[depth_index]:
-                with os.scandir(path) as scanner:
-                    for dirEntry in scanner:
-                        # Add any dirs paths to temp_dirs
-                        if dirEntry.is_dir():
-                            # Save to temp_dirs for next iteration
-                            temp_dirs.append(dirEntry.path)
-                            # Create record in stream, effort to reduce N*
-                            create_record(dirEntry.path, depth_index)
-                        if dirEntry.is_file():
-                            create_record(dirEntry.path, depth_index)
-
-            # Prevent adding empty temp_dir list for infin loop.
-            if len(temp_dirs) != 0:
-                dir_depth_list.append(temp_dirs)
-                yield temp_dirs
-
-        def create_record(_path, depth_index):
+        def create_record(_path, record):
             '''
-            Used by *tree_gen* to create a dictionary record for
-            Dir paths found.
+            Called by 'bcamp_api.scan_file_tree' for each file and dir
+            found, parents first. Queued for 'drain_tree_queue', which
+            inserts them into the trees on the main thread.
+
+            In a lazy tree, ONLY the entries of loaded dirs are queued.
             '''
-            # Get os.stat values for *path*
-            file_stats = os.stat(_path)
-            # Set 'type'
-            if stat.S_ISDIR(file_stats.st_mode):
-                _type = "dir"
-            else:
-                _type = os.path.splitext(_path)[1]
-                # TODO if type is '.1' or '.2', etc, see if its actually .log here...
-            # Enough data for tree record now, insert here...
-            insert_to_tree(_path, file_stats, _type)
+            if (not self.lazy_tree
+                    or os.path.dirname(_path) in self.loaded_dirs):
+                self.tree_queue.put(('insert', mode, _path, record))
 
             # Determine if file is "favorited"
             if favfiles_list != None:
                 if os.path.basename(_path) in favfiles_list:
-                    # Pass to 'insert_to_favtree' with vars
-                    insert_to_favtree(_path, file_stats, _type)
-
-            new_record = {
-                'name': os.path.basename(_path),
-                'location': mode,
-                'path': _path,
-                'type': _type,
-                'size': file_stats.st_size,
-                'creation_time': file_stats.st_ctime,
-                'modified_time': file_stats.st_mtime,
-                'date_range': None, # Set in "finalize"    
-                'favorite': False,  # Set in "finalize"
-                'notes': None,      # Set in "finalize"
-                'depth_index': depth_index
-            }
-
-            # 'updated_file_record' appeneded to here ONLY
-            updated_file_record[_path] = new_record
-        
-        def insert_to_tree(_path, _stats, _type):
-            # Build Var's for Treeview insert
-            # Check *_path* (head,) string via os.path.split
-            split_path = os.path.split(_path)
-            possible_parent = split_path[0] # Head
-            tree_text = split_path[1] # Tail/name
-
-            # formated size string
-            format_size = "{size:.3f} MB"
-            if _type != 'dir':
-                tree_size = format_size.format(size=_stats.st_size / (1024*1024))
-            else:
-                tree_size = "..."
-
-            # Formating time String
-            tree_ctime = (datetime.datetime.fromtimestamp(
-                    _stats.st_ctime)).strftime(time_format)
-
-            # Formating Range based on _type
-            tree_range = "" # Default 
-            #if _type in self.config_record['range_extensions']:
-            #    #print("Supported range ext", tree_text)
-            #    #TODO calculate range of files...
-            #    pass
-
-            # Setting Tree 'tag' based on type...
-            tree_tag = 'default'
-            if _type == 'dir':
-                tree_tag = 'dir_color'
-            if _type == ".enc":
-                tree_tag = 'enc_color'
-            if _type == ".bin" or _type == ".html" or _type == ".conf" or _type == '.cnf' or _type == ".xml":
-                tree_tag = 'bin_color'
-            if _type == ".zip" or _type == '.gz' or _type == '.tar':
-                tree_tag = 'zip_color'
-            if _type == ".log" or _type == ".dbg":
-                tree_tag = 'log_color'
-            if _type == ".jpeg" or _type == '.png':
-                tree_tag = 'img_color'
-
-            # Determine "root" path for tree based on mode.
-            if mode == 'remote':
-                tree_root = ''
-            elif mode == 'local':
-                # Download tree created during __init__ if dir !empty.
-                # Creating it here if it is missing - ex first local file.
-                if self.file_tree.exists(self.local_tree):
-                    tree_root = self.local_tree
-                else:
-                    self.file_tree.insert('', '0', iid='local_filler_space', tags=('default'))
-                    self.file_tree.insert('', '0', iid=self.local_tree, text="Local Files (Downloads)", tags=('dir_color'))
-                    tree_root = self.local_tree
-            
-            # Inserting Files into *self.file_tree*
-            #dbg("file_tree", self.file_tree) 
-            try:
-                if self.file_tree.exists(possible_parent): 
-                    # Insert as child of *possible_parent*
-                    try:
-                        self.file_tree.insert(possible_parent, 
-                            'end', 
-                            iid=_path, 
-                            text=tree_text,
-                            values=(tree_ctime, tree_size, tree_range),
-                            tags=(tree_tag))
-                    except tk.TclError:
-                        # Passing - Error thrown on dupes which is expected.
-                        #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
-                        pass
-
-                else:
-                    # Create New Parent Row
-                    try:
-                        self.file_tree.insert(
-                            tree_root, 
-                            'end', 
-                            iid=_path, 
-                            text=tree_text, 
-                            values=(tree_ctime, tree_size, tree_range), 
-                            tags=(tree_tag))
-                    except tk.TclError:
-                        #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
-                        pass
-            except tk.TclError:
-                pass
-                #print("No file_tree yo!")
-
-        def insert_to_favtree(_path, _stats, _type):
-            '''
-            Very Similar to 'insert_to_tree' with edits to comply
-            with expected "favorites" format from generators.
-            '''
-            # Build Var's for Treeview insert
-            split_path = _path.split(self.key_value + "\\", 1)
-            parent = split_path[1].rsplit("\\", 1)
-            
-            # formated size string
-            format_size = "{size:.3f} MB"
-            if _type != 'dir':
-                tree_size = format_size.format(size=_stats.st_size / (1024*1024))
-            else:
-                tree_size = "..."
-
-            # Formating time String
-            tree_ctime = (datetime.datetime.fromtimestamp(
-                    _stats.st_ctime)).strftime(time_format)
-
-            # Formating Range based on _type
-            #tree_range = "" # Default 
-            #if _type in self.config_record['range_extensions']:
-            #    # TODO Is this needed here?
-            #    #print("Supported range ext", parent[1])
-            #    pass
-
-            # Setting Tree 'tag' based on type...
-            tree_tag = 'default'
-            if _type == 'dir':
-                tree_tag = 'dir_color'
-            if _type == ".enc":
-                tree_tag = 'enc_color'
-            if _type == ".bin" or _type == ".html":
-                tree_tag = 'bin_color'
-            if _type == ".zip" or _type == '.gz' or _type == '.tar':
-                tree_tag = 'zip_color'
-            if _type == ".log" or _type == ".dbg":
-                tree_tag = 'log_color'
-            if _type == ".jpeg" or _type == '.png':
-                tree_tag = 'img_color'
-
-            for item in self.fav_tree.get_children():
-                lst = self.fav_tree.get_children(item)
-                for item in lst:
-                    loc_litmus = self.sr_local_path + "\\" + parent[0] + "\\" + os.path.basename(_path)
-                    rem_litmus = self.sr_remote_path + "\\" + parent[0] + "\\" + os.path.basename(_path)
-                    if loc_litmus == item:
-                        print("loc")
-                        # DO NOT INSERT TO TREE, LOCAL VAL ALREADY PRES.
-                        return
-                    if rem_litmus == item:
-                        print("rem")
-                        # REMOVE FROM TREE AND INSERT LOCAL INSTEAD
-                        try:
-                            self.fav_tree.delete(rem_litmus)
-                        except:
-                            pass
-            
-            if len(parent) == 2:
-                #print("**result**", "\n", "parent_tree:", parent[0], "\n", "fav_tree_text:", parent[1], "\n", "fav_tree_iid:", _path, "\n")
-                # Inserting Files into *self.fav_tree*
-                try:
-                    self.fav_tree.insert(
-                        os.path.dirname(_path), 
-                        'end', 
-                        iid=_path, 
-                        text=parent[1],
-                        values=(tree_ctime, tree_size),
-                        tags=(tree_tag))
-                except tk.TclError as e:
-                    try:
-                        self.fav_tree.insert(
-                            '', 
-                            'end', 
-                            iid=os.path.dirname(_path), 
-                            text=parent[0],
-                            tags=('dir_color'),
-                            open=True)
-                        self.fav_tree.insert(
-                            os.path.dirname(_path), 
-                            'end', 
-                            iid=_path, 
-                            text=parent[1],
-                            values=(tree_ctime, tree_size),
-                            tags=(tree_tag))
-                    except tk.TclError:
-                        #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
-                        pass
-
-            else:
-                #print("**result**", "\n", "parent_tree:", 'none/root', "\n", "fav_tree_text:", parent[0], "\n", "fav_tree_iid:", _path, "\n")
-                # Create New Parent Row
-                try:
-                    self.fav_tree.insert(
-                        '', 
-                        'end', 
-                        iid=_path, 
-                        text=parent[0], 
-                        values=(tree_ctime, tree_size), 
-                        tags=(tree_tag))
-                except tk.TclError:
-                    #print(mode, "Passing " + os.path.basename(_path) + " : Already in Tree")
-                    pass
+                    self.tree_queue.put(('favorite', mode, _path, record))
 
         # Determine root path pased on *mode*
         if mode == 'remote':
-            if os.access(self.sr_remote_path, os.R_OK):
-                dir_depth_list = [[self.sr_remote_path]]
+            root_path = self.sr_remote_path
             # Update SR DB last_file_count here...
             try:
                 fresh_count = len(os.listdir(self.sr_remote_path))
@@ -8443,14 +9063,10 @@ class Tk_FileBrowser(tk.Frame):
 
         if mode == 'local':
             if os.access(self.sr_local_path, os.R_OK):
-                dir_depth_list = [[self.sr_local_path]]
+                root_path = self.sr_local_path
             else:
                 return
 
-        updated_file_record = {}
-        depth_index = -1
-        time_format = self.time_format
-
         if mode == 'remote' and not os.access(self.sr_remote_path, os.R_OK):
             print("Filebrowser: FATAL - UNABLE TO LOCATE REMOTE FOLDER. CHECK VPN AND TRY AGAIN?")
             return #exit method
@@ -8461,31 +9077,48 @@ class Tk_FileBrowser(tk.Frame):
         for item in favfiles_record:
             favfiles_list.append(item[0])
 
-        # Generator Loop to iterate through files in order of Depth.
-        while True:
-            data = tree_gen(depth_index)
-            depth_index += 1
-            # Recursive call here, if EOF, stopIter thrown.
-            try:
-                next(tree_gen(depth_index))
-            except StopIteration:
-                #print(mode, "Jobs Done!")
-                self.post_task(updated_file_record)
-                return
-
-    def post_task(self, updated_file_record):
+        # Scan files in order of Depth, inserting them into the trees.
+        scan_result = bcamp_api.scan_file_tree(self.key_value, mode,
+            root_path, create_record, full, self.scan_cancel)
+        if scan_result == None:
+            return # FileBrowser was closed.
+        updated_file_record, diff, dir_snapshot = scan_result
+        print("Filebrowser:", mode, "scan -", len(diff['added']), "added,",
+            len(diff['removed']), "removed,", len(diff['modified']),
+            "modified")
+        # Files that are gone are removed from the tree.
+        for _path in diff['removed']:
+            self.tree_queue.put(('delete', mode, _path, None))
+        self.post_task(updated_file_record, mode, dir_snapshot)
+
+    def post_task(self, updated_file_record, mode=None, dir_snapshot=None):
         '''
         This method calls various post file render parsers using the 
         'updated_file_record' dictionary to ensure the latest file structure
         is scanned, and no longer existing files are attempted to be scanned.
 
+        'mode' is the location that was FULLY scanned, records of files that
+        no longer exist there are removed from the DB. The 'dir_snapshot' of
+        that scan is saved with them.
+
         The actual parsers called here are written within the 'bcamp_api' file
         for better organization.
         '''
         # Launching seperate thread to update DB.
         threading.Thread(target=bcamp_api.update_files, 
-                args=(self.key_value, updated_file_record)).start()
+                args=(self.key_value, updated_file_record, mode,
+                    dir_snapshot)).start()
             
+    def on_destroy(self, event):
+        '''
+        Stops the file scans, and the 'drain_tree_queue' loop, of this
+        FileBrowser once it is closed.
+        '''
+        if event.widget == self:
+            self.scan_cancel.set()
+            if self.drain_id != None:
+                self.after_cancel(self.drain_id)
+
     # General Treeview Methods
     def start_tree_refresh(self):
         '''
@@ -11029,24 +11662,18 @@ class Tk_JiraSummary(tk.Frame):
             jira_project = db_srvals[21]
             jira_priority = db_srvals[22]
             jira_resolution = db_srvals[25]
-            # Get Comment Object
-            jira_last_comment = bcamp_api.jira_get_comment_db(self.key_value)
-            # Get IssueLinks
-            jira_issuelinks = bcamp_api.jira_get_issuelinks(self.key_value)
+            # Component/Version lists are stored as JSON.
             try:
-                jira_components = pickle.loads(db_srvals[23])[0]
-                print("compo>", jira_components)
-            except:
+                jira_components = bcamp_api.jira_load_list(db_srvals[23])[0]
+            except (TypeError, IndexError):
                 jira_components = None     #LST
             try:
-                jira_affected_ver = pickle.loads(db_srvals[24])[0]
-                print('jira_affected_ver', jira_affected_ver)
-            except:
+                jira_affected_ver = bcamp_api.jira_load_list(db_srvals[24])[0]
+            except (TypeError, IndexError):
                 jira_affected_ver = None
             try:
-                jira_fix_ver = pickle.loads(db_srvals[26])[0]
-                print('jira_fix_ver', jira_fix_ver)
-            except:
+                jira_fix_ver = bcamp_api.jira_load_list(db_srvals[26])[0]
+            except (TypeError, IndexError):
                 jira_fix_ver = None
             
             # SET TK VALS
@@ -11079,26 +11706,41 @@ class Tk_JiraSummary(tk.Frame):
                 )
 
     def gen_comments(self):
-        commentdb_obj = bcamp_api.jira_get_comment_db(self.key_value)
-        #print("COMMENT DICT>>", commentdb_obj)
-        if commentdb_obj == None:
-            return None
-        else:
-            comment_indx = 0
-            #comments_lst = []
-            for item in commentdb_obj:
-                item_dict = {
-                    'auth_displayname': item['updateAuthor']['displayName'],
-                    'auth_email': item['updateAuthor']['emailAddress'],
-                    'time': item['updated'],
-                    'body': item['body'],
-                }
-                #comments_lst.append(item_dict)
-                comment_widget = self.Tk_CommentTemplate(
-                    self.comment_root_frame, comment_indx, item_dict)
-                comment_widget.grid(row=comment_indx, column=0, columnspan=2, sticky='nsew')
-                comment_indx += 1
-            print("Comment FINAL >", comment_indx)
+        '''
+        Renders the newest 'comment_page_size' comments. Older comments are
+        only read from the DB when "Show older comments" is clicked.
+        '''
+        self.comment_page_size = 20
+        self.comment_indx = 0
+        self.comment_total = bcamp_api.jira_comment_count(self.key_value)
+        self.comment_more_btn = None
+        self.gen_comment_page()
+
+    def gen_comment_page(self):
+        if self.comment_more_btn != None:
+            self.comment_more_btn.destroy()
+            self.comment_more_btn = None
+        comment_page = bcamp_api.jira_get_comments(self.key_value,
+            self.comment_page_size, self.comment_indx)
+        for item_dict in comment_page:
+            comment_widget = self.Tk_CommentTemplate(
+                self.comment_root_frame, self.comment_indx, item_dict)
+            comment_widget.grid(row=self.comment_indx, column=0, columnspan=2, sticky='nsew')
+            self.comment_indx += 1
+
+        # More comments in the DB, add a button to render the next page.
+        if self.comment_indx < self.comment_total:
+            self.comment_more_btn = tk.Button(
+                self.comment_root_frame,
+                text=("Show older comments ("
+                    + str(self.comment_total - self.comment_indx) + " more)"),
+                command=self.gen_comment_page,
+                relief='flat',
+                background=self.basebg,
+                foreground=self.basefg,
+            )
+            self.comment_more_btn.grid(row=self.comment_indx, column=0,
+                columnspan=2, sticky='nsew', pady=5)
 
     def gen_linked_issues(self):
         linkedissues_lst = bcamp_api.jira_get_issuelinks(self.key_value)
@@ -11346,5 +11988,7 @@ if __name__ == "__main__":
     bcamp_api.create_mainlog()
     # Creating "basecamp.db" if not available.
     bcamp_setup.CreateDB()
+    # Enable SQL query stats, if configured.
+    bcamp_api.configure_query_stats()
     # Starting UI
     Gui()
\ No newline at end of file
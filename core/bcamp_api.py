@@ -14,10 +14,13 @@ import requests
 # Public Imports
 import os
 import re
+import sys
+import math
 import stat
 import json
 import time
 import queue
+import bisect
 import ctypes
 import shutil
 import pickle
@@ -25,8 +28,12 @@ import pprint
 import hashlib
 import logging
 import sqlite3
+import weakref
 import pathlib
 import datetime
+import contextlib
+import concurrent.futures
+import collections
 import importlib
 import threading
 import webbrowser
@@ -55,17 +62,764 @@ query needs to be written with identifiers being a variable...
 THIS "query" SHOULD NOT TAKE INPUT FROM USERS. DOING SO WILL EXPOSE THE
 DB TO SQL INJECTION ATTACKS. DONT DROP THE TABLES >:)
 '''
+class QueryStats:
+    '''
+    Opt-in instrumentation for EVERY SQL statement ran through the pooled
+    connections below. When enabled, each statement records its call count,
+    total/p95 time and rows returned - keyed by the statement text with the
+    whitespace collapsed, so each query_x() helper gets ONE entry.
+
+    Statements slower than 'slow_ms' are appended to the slow-query log with
+    their "EXPLAIN QUERY PLAN" output.
+
+    Disabled by default. See 'configure_query_stats' and the 'Diagnostics'
+    page of the Settings menu.
+    '''
+    # Number of recent timings kept per statement for the p95.
+    SAMPLE_SIZE = 1000
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 100.0
+        self.log_path = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def configure(self, enabled, slow_ms=None, log_path=None):
+        self.enabled = enabled
+        if slow_ms != None:
+            self.slow_ms = float(slow_ms)
+        if log_path != None:
+            self.log_path = log_path
+
+    def record(self, db_con, sql, params, seconds, rows):
+        '''
+        Adds a single execution of 'sql' to the stats, and writes it to the
+        slow-query log if it took longer than 'slow_ms'.
+        '''
+        key = " ".join(sql.split())
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat == None:
+                stat = self._stats[key] = {
+                    'calls': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'rows': 0,
+                    'samples': collections.deque(maxlen=self.SAMPLE_SIZE),
+                }
+            stat['calls'] += 1
+            stat['total'] += seconds
+            stat['max'] = max(stat['max'], seconds)
+            stat['rows'] += rows
+            stat['samples'].append(seconds)
+        if (seconds * 1000) >= self.slow_ms:
+            self.log_slow_query(db_con, key, sql, params, seconds, rows)
+
+    def log_slow_query(self, db_con, key, sql, params, seconds, rows):
+        if self.log_path == None:
+            return
+        try:
+            # Plain cursor, so the EXPLAIN isn't instrumented itself.
+            explain_cur = sqlite3.Cursor(db_con)
+            explain_cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[-1] for row in explain_cur.fetchall()]
+            explain_cur.close()
+        except (sqlite3.Error, ValueError):
+            plan = ["(EXPLAIN unavailable)"]
+        entry = "{} [{}] {:.1f} ms, {} rows\n  {}\n  params: {}\n".format(
+            str(datetime.datetime.now()), threading.current_thread().name,
+            seconds * 1000, rows, key, repr(params)[:200])
+        for detail in plan:
+            entry += "  plan: " + detail + "\n"
+        with self._lock:
+            with open(self.log_path, 'a', encoding='utf-8') as log_file:
+                log_file.write(entry)
+
+    def dump(self):
+        '''
+        Returns a list of stat dicts, one per statement, sorted by total
+        time spent in the statement (slowest first).
+        '''
+        with self._lock:
+            items = [(key, dict(stat, samples=sorted(stat['samples'])))
+                for key, stat in self._stats.items()]
+        results = []
+        for key, stat in items:
+            samples = stat['samples']
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            results.append({
+                'sql': key,
+                'calls': stat['calls'],
+                'total_ms': stat['total'] * 1000,
+                'avg_ms': (stat['total'] / stat['calls']) * 1000,
+                'p95_ms': p95 * 1000,
+                'max_ms': stat['max'] * 1000,
+                'rows': stat['rows'],
+            })
+        results.sort(key=lambda stat: stat['total_ms'], reverse=True)
+        return results
+
+    def format_dump(self, limit=None):
+        '''
+        Returns 'dump()' as a plain-text table, with the DB Writer and
+        CaseRecord cache stats appended.
+        '''
+        lines = ["{:>7} {:>10} {:>9} {:>9} {:>8}  {}".format(
+            'calls', 'total ms', 'avg ms', 'p95 ms', 'rows', 'statement')]
+        for stat in self.dump()[:limit]:
+            lines.append("{:>7} {:>10.1f} {:>9.2f} {:>9.2f} {:>8}  {}".format(
+                stat['calls'], stat['total_ms'], stat['avg_ms'],
+                stat['p95_ms'], stat['rows'], stat['sql'][:120]))
+        lines.append("")
+        lines.append("DB Writer: " + str(DB_WRITER.stats()))
+        lines.append("CaseRecord cache: " + str(case_cache_stats()))
+        lines.append("Case search index: " + str(CASE_INDEX.stats()))
+        lines.append("Search cache: " + str(SEARCH_CACHE.stats()))
+        lines.append("Facet counts: " + str(FACETS.stats()))
+        lines.append("DB Maintenance: " + str(DB_MAINT.last_report))
+        lines.append("Log index: " + str(LOG_INDEX.stats()))
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+# Shared stats used by every '_InstrumentedCursor'.
+QUERY_STATS = QueryStats()
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    '''
+    sqlite3.Cursor sub-class handed out by '_PooledConnection' while
+    QUERY_STATS is enabled. The time of a statement includes fetching its
+    rows, so it is recorded on the NEXT execute, or when the cursor is closed.
+    '''
+    _pending = None
+
+    def execute(self, sql, params=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._pending = [sql, params, time.perf_counter() - start, 0]
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._pending = [sql, (), time.perf_counter() - start, 0]
+
+    def fetchone(self):
+        return self._fetch(super().fetchone, True)
+
+    def fetchmany(self, *args):
+        return self._fetch(super().fetchmany, False, *args)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall, False)
+
+    def _fetch(self, fetch, single, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self._pending != None:
+            self._pending[2] += time.perf_counter() - start
+            if single:
+                self._pending[3] += 0 if result == None else 1
+            else:
+                self._pending[3] += len(result)
+        return result
+
+    def _finish(self):
+        if self._pending != None:
+            sql, params, seconds, rows = self._pending
+            self._pending = None
+            if rows == 0 and self.rowcount > 0:
+                rows = self.rowcount # INSERT/UPDATE/DELETE
+            QUERY_STATS.record(self.connection, sql, params, seconds, rows)
+
+    def close(self):
+        self._finish()
+        super().close()
+
+class _PooledConnection(sqlite3.Connection):
+    '''
+    sqlite3.Connection sub-class used by 'DBConnectionPool'. Allows the pool
+    to weakref the connection objects it hands out, and hands out
+    '_InstrumentedCursor's while QUERY_STATS is enabled.
+    '''
+    def cursor(self, factory=None):
+        if factory == None:
+            if QUERY_STATS.enabled:
+                factory = _InstrumentedCursor
+            else:
+                factory = sqlite3.Cursor
+        return super().cursor(factory)
+
+class DBConnectionPool:
+    '''
+    Thread-aware connection manager for the 'basecamp' sqlite DB.
+
+    Every thread (UI, FileOps, CasePoll, Import, etc.) gets its OWN
+    sqlite3 connection which is opened on first use, and then reused by
+    every query that thread makes. This removes the connect/PRAGMA/close
+    overhead from each helper below, which adds up FAST when a filebrowser
+    refresh or a search loops through hundreds of query_x() calls.
+
+    Connections are opened in WAL mode so the UI thread can keep reading
+    while a background thread is writing.
+
+    Usage:
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute(...)
+            result = dbshell.fetchall()
+
+    Changes are committed when the 'with' block exits cleanly, and rolled
+    back if an exception is raised inside of it.
+    '''
+    # PRAGMA's applied to every new connection.
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL;",
+        "PRAGMA synchronous = NORMAL;", # Safe w/ WAL, fsync on checkpoint only.
+        "PRAGMA cache_size = -16000;", # ~16MB page cache per connection.
+        "PRAGMA mmap_size = 268435456;", # 256MB memory-mapped I/O.
+        "PRAGMA temp_store = MEMORY;",
+        "PRAGMA foreign_keys = ON;",
+    )
+
+    def __init__(self, db_path, timeout=30):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Bumped by 'set_path' so other threads drop their old connection.
+        self._generation = 0
+        # Tracks open connections for 'close_all' without keeping the
+        # connections of dead threads alive.
+        self._all_cons = weakref.WeakSet()
+
+    def connect(self):
+        '''
+        Returns a NEW sqlite3 connection to 'db_path' with the PRAGMA's
+        above applied. Not pooled, so .close() it when complete.
+        '''
+        db_con = sqlite3.connect(self.db_path, timeout=self.timeout,
+            factory=_PooledConnection)
+        for pragma in self.PRAGMAS:
+            db_con.execute(pragma)
+        return db_con
+
+    def connection(self):
+        '''
+        Returns the pooled connection for the calling thread, opening it
+        first if required.
+        '''
+        db_con = getattr(self._local, 'con', None)
+        if (db_con is None
+                or getattr(self._local, 'generation', None) != self._generation):
+            if db_con is not None:
+                db_con.close()
+            db_con = self.connect()
+            self._local.con = db_con
+            self._local.generation = self._generation
+            with self._lock:
+                self._all_cons.add(db_con)
+        return db_con
+
+    @contextlib.contextmanager
+    def shell(self):
+        '''
+        Context-Manager that yields a cursor from the calling thread's
+        pooled connection. Commits on a clean exit, rollback on error.
+
+        If the connection is already in a transaction (such as a nested
+        call from within a DBWriterDaemon batch) the outer owner of the
+        transaction commits instead.
+        '''
+        db_con = self.connection()
+        db_cur = db_con.cursor()
+        owner = not db_con.in_transaction
+        try:
+            yield db_cur
+        except:
+            if owner and db_con.in_transaction:
+                db_con.rollback()
+            raise
+        else:
+            if owner and db_con.in_transaction:
+                db_con.commit()
+        finally:
+            db_cur.close()
+
+    def close(self):
+        '''
+        Closes the calling thread's pooled connection, if one is open.
+        '''
+        db_con = getattr(self._local, 'con', None)
+        if db_con is not None:
+            db_con.close()
+            self._local.con = None
+
+    def close_all(self):
+        '''
+        Closes EVERY pooled connection. Threads will open a new one on
+        their next query. Intended for shutdown, and DB file operations
+        such as restoring a backup.
+        '''
+        with self._lock:
+            self._generation += 1
+            cons = list(self._all_cons)
+            self._all_cons = weakref.WeakSet()
+        for db_con in cons:
+            try:
+                db_con.close()
+            except sqlite3.ProgrammingError:
+                pass # Connection owned by another thread, dropped on next use.
+        self._local.con = None
+
+    def set_path(self, db_path):
+        '''
+        Points the pool to a different DB file. Used by 'bcamp_bench' to run
+        the API against a synthetic DB.
+        '''
+        self.close_all()
+        self.db_path = db_path
+
+# Shared pool used by ALL queries below.
+BCAMP_DB = DBConnectionPool(BCAMP_ROOTPATH + "\\core\\basecamp.db")
+
+class DBWriterDaemon:
+    '''
+    Daemon Thread that performs EVERY write to the 'basecamp' DB.
+
+    Write operations are callables that take a 'dbshell' cursor, and are
+    put into a queue with 'submit()', which returns a Future. The worker
+    takes everything waiting in the queue (up to 'max_batch') and runs it
+    in ONE transaction - a "group commit" - so concurrent writers from
+    the UI, FileOps, CasePoll and Import threads share a single fsync and
+    never fight over the write lock. Each op runs in its own SAVEPOINT, so
+    a failing op is rolled back without affecting the others in the batch.
+    An op that is alone in its batch runs w/o one - SQLite journals every
+    statement inside a SAVEPOINT, which makes a bulk write several times
+    slower, and its transaction can simply be rolled back instead.
+
+    Futures are only resolved AFTER the batch is committed, so a caller
+    reading the DB after 'write()' returns will see its changes. Reads
+    stay on each thread's own pooled connection, concurrent under WAL.
+
+    Ops submitted with 'transaction=False' (VACUUM, wal_checkpoint, etc.)
+    are run alone, outside of any transaction.
+    '''
+    def __init__(self, pool, max_batch=256):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.q = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Cursor of the batch in progress, used by nested writes.
+        self._batch_shell = None
+        # Counters for 'stats()'
+        self.ops = 0
+        self.batches = 0
+        self.failed_ops = 0
+        # perf_counter() of the last completed write, see 'idle_for'.
+        self.last_write = time.perf_counter()
+
+    def start(self):
+        '''
+        Starts the worker thread, if it is not running yet.
+        '''
+        with self._start_lock:
+            if self._thread == None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.worker_thread,
+                    name='DBWriter-Daemon',
+                    daemon=True)
+                self._thread.start()
+
+    def submit(self, write_op, transaction=True):
+        '''
+        Queues 'write_op(dbshell)' and returns a concurrent.futures.Future
+        that resolves to the op's return value once it is committed.
+        '''
+        future = concurrent.futures.Future()
+        if threading.current_thread() is self._thread:
+            # Nested write from an op already running in this batch.
+            try:
+                future.set_result(write_op(self._batch_shell))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self.start()
+        self.q.put((write_op, future, transaction))
+        return future
+
+    def write(self, write_op, transaction=True):
+        '''
+        Same as 'submit', but blocks until the op is committed and returns
+        its result - or raises the exception the op raised.
+        '''
+        return self.submit(write_op, transaction).result()
+
+    def idle_for(self):
+        '''
+        Returns the seconds since the last write, or 0 if writes are queued.
+        '''
+        if not self.q.empty():
+            return 0.0
+        return time.perf_counter() - self.last_write
+
+    def flush(self):
+        '''
+        Blocks until every write queued before this call is committed.
+        '''
+        self.write(lambda dbshell: None)
+
+    def worker_thread(self):
+        '''
+        Daemon Thread for DBWriter-Daemon
+        '''
+        while True: # Infin. Loop
+            batch = [self.q.get()]
+            # Group everything else that is already waiting, up to the
+            # first op that must run outside of a transaction.
+            while len(batch) < self.max_batch and batch[-1][2]:
+                try:
+                    batch.append(self.q.get_nowait())
+                except queue.Empty:
+                    break
+            standalone = None
+            if not batch[-1][2]:
+                standalone = batch.pop()
+            if len(batch) > 0:
+                self.run_batch(batch)
+                for item in batch:
+                    self.q.task_done()
+            if standalone != None:
+                self.run_standalone(standalone)
+                self.q.task_done()
+            self.last_write = time.perf_counter()
+
+    def run_batch(self, batch):
+        '''
+        Runs each (write_op, future) of 'batch' in a single transaction.
+        '''
+        db_con = self.pool.connection()
+        dbshell = db_con.cursor()
+        results = []
+        use_savepoints = len(batch) > 1
+        try:
+            dbshell.execute("BEGIN IMMEDIATE;")
+            self._batch_shell = dbshell
+            for write_op, future, transaction in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue # Cancelled by the caller.
+                if use_savepoints:
+                    dbshell.execute("SAVEPOINT write_op;")
+                try:
+                    result = write_op(dbshell)
+                except Exception as e:
+                    if use_savepoints:
+                        dbshell.execute("ROLLBACK TO write_op;")
+                        dbshell.execute("RELEASE write_op;")
+                    elif db_con.in_transaction:
+                        db_con.rollback()
+                    results.append((future, False, e))
+                else:
+                    if use_savepoints:
+                        dbshell.execute("RELEASE write_op;")
+                    results.append((future, True, result))
+            db_con.commit()
+        except Exception as e:
+            # The batch itself failed (locked, disk full, etc.)
+            if db_con.in_transaction:
+                db_con.rollback()
+            for write_op, future, transaction in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self.failed_ops += len(batch)
+            return
+        finally:
+            self._batch_shell = None
+            dbshell.close()
+
+        self.batches += 1
+        for future, success, value in results:
+            self.ops += 1
+            if success:
+                future.set_result(value)
+            else:
+                self.failed_ops += 1
+                future.set_exception(value)
+
+    def run_standalone(self, item):
+        '''
+        Runs a single (write_op, future, False) item with NO transaction
+        opened by the writer.
+        '''
+        write_op, future, transaction = item
+        if not future.set_running_or_notify_cancel():
+            return # Cancelled by the caller.
+        db_con = self.pool.connection()
+        dbshell = db_con.cursor()
+        try:
+            result = write_op(dbshell)
+            if db_con.in_transaction:
+                db_con.commit()
+        except Exception as e:
+            if db_con.in_transaction:
+                db_con.rollback()
+            self.failed_ops += 1
+            future.set_exception(e)
+        else:
+            self.ops += 1
+            self.batches += 1
+            future.set_result(result)
+        finally:
+            dbshell.close()
+
+    def stats(self):
+        return {
+            'ops': self.ops,
+            'batches': self.batches,
+            'failed_ops': self.failed_ops,
+            'ops_per_batch': (self.ops / self.batches) if self.batches else 0.0,
+            'queued': self.q.qsize(),
+        }
+
+# Shared writer used by ALL write queries below.
+DB_WRITER = DBWriterDaemon(BCAMP_DB)
+
+class DBMaintenanceDaemon:
+    '''
+    Daemon Thread that keeps 'basecamp.db' small and the query planner
+    stats fresh. Runs every 'interval' seconds, or soon after 'request()' is
+    called (such as after 'drop_sr' deletes a case) - but ONLY once the DB
+    Writer has been idle for 'idle_secs', so it never competes with imports
+    or file refreshes. Each pass...
+
+        1. Converts an older DB without 'auto_vacuum = INCREMENTAL' with a
+           one-time VACUUM, once enough of it is free pages.
+        2. Refreshes the planner stats - 'ANALYZE' w/ an analysis_limit.
+        3. Merges the segments of the FTS indexes - 'merge', in small steps.
+        4. Frees unused pages - 'PRAGMA incremental_vacuum', in small steps.
+           Runs after every other write of the pass, as ANALYZE and the FTS
+           merges leave free pages of their own.
+        5. Checks the DB - 'PRAGMA quick_check'.
+        6. Moves the WAL into the DB - 'PRAGMA wal_checkpoint(TRUNCATE)'.
+
+    Every write step goes through DB_WRITER, so the UI thread is never
+    blocked. 'last_report' holds the DB size and fragmentation from before
+    and after the last pass.
+    '''
+    def __init__(self, pool, writer, interval=(60 * 60 * 6), idle_secs=10):
+        self.pool = pool
+        self.writer = writer
+        self.interval = interval # 6 Hours
+        self.idle_secs = idle_secs
+        # Pages freed per incremental_vacuum step.
+        self.vacuum_step = 2000
+        # FTS index pages written per 'merge' step.
+        self.merge_step = 500
+        # Free page ratio that triggers the one-time VACUUM conversion.
+        self.convert_ratio = 0.25
+        self.q = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.last_report = None
+
+    def start(self):
+        '''
+        Starts the worker thread, if it is not running yet.
+        '''
+        with self._start_lock:
+            if self._thread == None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.worker_thread,
+                    name='DBMaint-Daemon',
+                    daemon=True)
+                self._thread.start()
+
+    def request(self, reason):
+        '''
+        Asks for a maintenance pass as soon as the DB is idle. Multiple
+        requests made before the pass starts are merged into one.
+        '''
+        self.q.put(reason)
+
+    def worker_thread(self):
+        '''
+        Daemon Thread for DBMaint-Daemon
+        '''
+        while True: # Infin. Loop
+            try:
+                reasons = [self.q.get(timeout=self.interval)]
+            except queue.Empty:
+                reasons = ['schedule']
+            # Wait for the writer to go quiet, merging any new requests.
+            while self.writer.idle_for() < self.idle_secs:
+                time.sleep(1)
+                while not self.q.empty():
+                    reasons.append(self.q.get_nowait())
+            try:
+                self.run(", ".join(sorted(set(reasons))))
+            except sqlite3.Error as e:
+                print("SQLite3: DB Maintenance failed -", e)
+                logging.error("DB Maintenance failed - " + str(e))
+
+    def db_stats(self):
+        '''
+        Returns the size and fragmentation of the DB as a dict.
+        '''
+        with self.pool.shell() as dbshell:
+            dbshell.execute("PRAGMA page_size;")
+            page_size = dbshell.fetchone()[0]
+            dbshell.execute("PRAGMA page_count;")
+            page_count = dbshell.fetchone()[0]
+            dbshell.execute("PRAGMA freelist_count;")
+            freelist_count = dbshell.fetchone()[0]
+            dbshell.execute("PRAGMA auto_vacuum;")
+            auto_vacuum = dbshell.fetchone()[0]
+        wal_bytes = 0
+        if os.access(self.pool.db_path + "-wal", os.R_OK):
+            wal_bytes = os.path.getsize(self.pool.db_path + "-wal")
+        return {
+            'db_bytes': page_size * page_count,
+            'wal_bytes': wal_bytes,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'free_ratio': (freelist_count / page_count) if page_count else 0.0,
+            'auto_vacuum': auto_vacuum, # 0 NONE, 1 FULL, 2 INCREMENTAL
+        }
+
+    def run(self, reason='manual'):
+        '''
+        Runs ONE maintenance pass on the calling thread, and returns the
+        report - also saved to 'last_report'.
+        '''
+        start = time.perf_counter()
+        before = self.db_stats()
+
+        # 1. Convert an older DB to 'auto_vacuum = INCREMENTAL'.
+        vacuum = 'none'
+        if before['auto_vacuum'] != 2 and (before['free_ratio']
+                >= self.convert_ratio):
+            vacuum = 'full'
+            def vacuum_op(dbshell):
+                # Only takes effect with the VACUUM that follows.
+                dbshell.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+                dbshell.execute("VACUUM;")
+            self.writer.write(vacuum_op, transaction=False)
+
+        # 2. Refresh planner stats, 'analysis_limit' keeps large tables fast.
+        def analyze_op(dbshell):
+            dbshell.execute("PRAGMA analysis_limit = 1000;")
+            dbshell.execute("ANALYZE;")
+        self.writer.write(analyze_op)
+
+        # 3. Merge the FTS index segments.
+        self.merge_fts()
+
+        # 4. Return free pages to the file system, the last write of the pass
+        # so the report below sees what is left.
+        stats = self.db_stats()
+        if stats['auto_vacuum'] == 2 and stats['freelist_count'] > 0:
+            if vacuum == 'none':
+                vacuum = 'incremental'
+            self.incremental_vacuum()
+
+        # 5. Integrity check, read-only.
+        with self.pool.shell() as dbshell:
+            dbshell.execute("PRAGMA quick_check;")
+            check = [row[0] for row in dbshell.fetchall()]
+        if check != ['ok']:
+            print("SQLite3: quick_check FAILED -", check[:10])
+            logging.error("DB quick_check FAILED - " + str(check[:10]))
+
+        # 6. Checkpoint, and truncate the WAL file.
+        def checkpoint_op(dbshell):
+            dbshell.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            return dbshell.fetchone()
+        checkpoint = self.writer.write(checkpoint_op, transaction=False)
+
+        after = self.db_stats()
+        report = {
+            'reason': reason,
+            'time': str(datetime.datetime.now()),
+            'seconds': time.perf_counter() - start,
+            'vacuum': vacuum,
+            'quick_check': 'ok' if check == ['ok'] else check[:10],
+            'checkpoint_busy': checkpoint[0],
+            'before': before,
+            'after': after,
+        }
+        self.last_report = report
+        msg = ("DB Maintenance ({}): {:.1f} KB -> {:.1f} KB, free pages "
+            "{:.1%} -> {:.1%}, WAL {:.1f} KB -> {:.1f} KB, vacuum {}, "
+            "quick_check {}, {:.2f} sec").format(reason,
+            before['db_bytes'] / 1024, after['db_bytes'] / 1024,
+            before['free_ratio'], after['free_ratio'],
+            before['wal_bytes'] / 1024, after['wal_bytes'] / 1024,
+            vacuum, report['quick_check'], report['seconds'])
+        print("SQLite3:", msg)
+        logging.info(msg)
+        return report
+
+    def incremental_vacuum(self):
+        '''
+        Frees ALL free pages in 'vacuum_step' sized writes, so other writes
+        queued in the meantime aren't stuck behind one long transaction.
+        '''
+        def vacuum_op(dbshell):
+            # Frees one page per row, fetchall() runs it to completion.
+            dbshell.execute("PRAGMA incremental_vacuum("
+                + str(self.vacuum_step) + ");")
+            dbshell.fetchall()
+            dbshell.execute("PRAGMA freelist_count;")
+            return dbshell.fetchone()[0]
+        freelist_count = None
+        while True:
+            remaining = self.writer.write(vacuum_op)
+            if remaining == 0 or remaining == freelist_count:
+                break # Done, or nothing left that can be freed.
+            freelist_count = remaining
+
+    def merge_fts(self):
+        '''
+        Merges the segments of 'cases_fts' and 'notes_fts' into one b-tree
+        each, in 'merge_step' sized writes. The triggers add a segment (and
+        delete markers) on every write to 'cases', 'tags' or the notes, and
+        EVERY MATCH reads all of them - a fragmented index is several times
+        slower to search, even for a few hundred cases.
+        '''
+        for table in ('cases_fts', 'notes_fts'):
+            # A negative page count starts a merge of ALL segments, positive
+            # ones continue it.
+            pages = -self.merge_step
+            while True:
+                def merge_op(dbshell):
+                    changes = dbshell.connection.total_changes
+                    dbshell.execute("INSERT INTO " + table + " (" + table
+                        + ", rank) VALUES ('merge', (?));", [pages])
+                    return dbshell.connection.total_changes - changes
+                # Less than 2 changes, nothing was left to merge.
+                if self.writer.write(merge_op) < 2:
+                    break
+                pages = self.merge_step
+
+# Shared maintenance daemon, started by the UI.
+DB_MAINT = DBMaintenanceDaemon(BCAMP_DB, DB_WRITER)
+
 def open_dbshell():
     '''
     Opens a connection to the 'basecamp' sqllite DB and returns
     the 'cursor', and the connection.
 
     *NOTE: .close() the connection obj when complete.
+    *NOTE: Kept for compatibility, new code should use 'BCAMP_DB.shell()'
     '''
-    RPATH = str(pathlib.Path(__file__).parent.absolute()).rpartition('\\')[0]
-    db_path = RPATH + "\\core\\basecamp.db"
     # Connecting to sqlite DB
-    db_con = sqlite3.connect(db_path)
+    db_con = BCAMP_DB.connect()
     db_cur = db_con.cursor()
     return db_cur, db_con
 
@@ -99,105 +853,369 @@ def gen_bcamp_config():
     user_texteditor = "Logviewer"
 
     # Second, Execute the actual SQLite3 query.
-    dbshell, dbcon = open_dbshell()
-
-    dbshell.execute('''INSERT INTO bcamp_config (
-        version,
-        root_path,
-        remote_root,
-        download_root,
-        time_zone,
-        time_format,
-        dev_mode,
-        notepad_path,
-        ui_start_res,
-        ui_render_top_menu,
-        ui_caseviewer_location,
-        ui_render_caseviewer,
-        ui_caseviewer_search_location,
-        ui_render_caseviewer_search,
-        ui_render_favtree,
-        user_texteditor)
-        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);''',
-        (version,
-        root_path,
-        remote_root,
-        download_root,
-        time_zone,
-        time_format,
-        dev_mode,
-        notepad_path,
-        ui_start_res,
-        ui_render_top_menu,
-        ui_caseviewer_location,
-        ui_render_caseviewer,
-        ui_caseviewer_search_location,
-        ui_render_caseviewer_search,
-        ui_render_favtree,
-        user_texteditor))
-
-    dbcon.commit() # Save changes
-    dbcon.close() # Close connection
+    def write_op(dbshell):
+        dbshell.execute('''INSERT INTO bcamp_config (
+            version,
+            root_path,
+            remote_root,
+            download_root,
+            time_zone,
+            time_format,
+            dev_mode,
+            notepad_path,
+            ui_start_res,
+            ui_render_top_menu,
+            ui_caseviewer_location,
+            ui_render_caseviewer,
+            ui_caseviewer_search_location,
+            ui_render_caseviewer_search,
+            ui_render_favtree,
+            user_texteditor)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);''',
+            (version,
+            root_path,
+            remote_root,
+            download_root,
+            time_zone,
+            time_format,
+            dev_mode,
+            notepad_path,
+            ui_start_res,
+            ui_render_top_menu,
+            ui_caseviewer_location,
+            ui_render_caseviewer,
+            ui_caseviewer_search_location,
+            ui_render_caseviewer_search,
+            ui_render_favtree,
+            user_texteditor))
+    DB_WRITER.write(write_op)
+    # Drop any previously cached config row.
+    BCAMP_CONFIG.invalidate()
+
+class ConfigCache:
+    '''
+    Process-wide, in-memory copy of the 1st/ONLY row in the config table.
+
+    The row is loaded ONCE on the first 'get', and every read after is served
+    from memory. 'set' writes to the DB first, and then drops the cached row
+    while holding the lock, so any thread calling 'get' after 'set' returns
+    reloads it - and sees the new value.
+    '''
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._values = None
+        self._db_path = None
+
+    def load(self):
+        '''
+        (Re)loads the config row from the DB. Each column is read w/ the same
+        "ORDER BY <col> ASC LIMIT 1" rule the uncached 'get_config' used.
+        '''
+        with self._lock:
+            with BCAMP_DB.shell() as dbshell:
+                dbshell.execute("PRAGMA table_info(bcamp_config);")
+                columns = [row[1] for row in dbshell.fetchall()]
+                dbshell.execute("SELECT EXISTS(SELECT 1 FROM bcamp_config);")
+                row_exists = dbshell.fetchone()[0]
+                if not row_exists:
+                    return None # Nothing to cache, yet.
+                dbshell.execute("SELECT " + ", ".join(
+                    ["(SELECT " + col + " FROM bcamp_config ORDER BY " + col
+                    + " ASC LIMIT 1)" for col in columns]) + ";")
+                result = dbshell.fetchone()
+            self._values = dict(zip(columns, result))
+            self._db_path = BCAMP_DB.db_path
+            return self._values
+
+    def get(self, column):
+        values = self._values
+        if values is None or self._db_path != BCAMP_DB.db_path:
+            values = self.load()
+        if values is None or column not in values:
+            # Not cached, let SQLite3 return the value or raise the error.
+            with BCAMP_DB.shell() as dbshell:
+                dbshell.execute("SELECT " + column + """
+                    FROM bcamp_config ORDER BY """ + column + """ ASC LIMIT 1;""")
+                result = dbshell.fetchone()
+            return result[0]
+        return values[column]
+
+    def set(self, column, value):
+        # The write runs on the DB_WRITER thread, which may need 'get' (and
+        # so the lock) to finish the ops queued before this one - the lock
+        # is only taken once the write is done. The row is reloaded rather
+        # than patched, as two threads setting the same column may finish
+        # their writes and patches in a different order.
+        def write_op(dbshell):
+            dbshell.execute("UPDATE bcamp_config SET " + column + " = (?)",
+                (value,))
+        DB_WRITER.write(write_op)
+        self.invalidate()
+
+    def invalidate(self):
+        '''
+        Drops the cached row, next 'get' will reload it from the DB.
+        '''
+        with self._lock:
+            self._values = None
+
+# Shared config cache used by 'get_config' and 'update_config'
+BCAMP_CONFIG = ConfigCache()
+
+def configure_query_stats():
+    '''
+    Applies the 'dev_query_stats' and 'dev_slow_query_ms' config values to
+    QUERY_STATS. Called on start-up, and by the Settings menu.
+    '''
+    RPATH = str(pathlib.Path(__file__).parent.absolute()).rpartition('\\')[0]
+    QUERY_STATS.configure(
+        get_config('dev_query_stats') == "True",
+        get_config('dev_slow_query_ms'),
+        RPATH + '\\logs\\slow_queries.log')
+    print("SQLite3: query stats enabled =", QUERY_STATS.enabled,
+        "- slow query threshold", QUERY_STATS.slow_ms, "ms")
 
 def get_config(column):
     '''
     Returns the value of 'column' from the 1st/ONLY row in the config table.
+
+    *NOTE: Served from 'BCAMP_CONFIG', the DB is only read on first use.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + """
-        FROM bcamp_config ORDER BY """ + column + """ ASC LIMIT 1;""")
-    result = dbshell.fetchone()
-    dbcon.close()
-    return result[0] # Results are tuples, but we expect ONLY 1 value here.
+    return BCAMP_CONFIG.get(column)
 
 def update_config(column, value):
     '''
-    Updates the first/only row of the config table.
+    Updates the first/only row of the config table, and the cached value in
+    'BCAMP_CONFIG'.
     '''
-    dbshell, dbcon = open_dbshell()
-    
-    dbshell.execute("UPDATE bcamp_config SET " + column + " = (?)", (value,))
-    dbcon.commit() # save changes
-    dbcon.close()
+    BCAMP_CONFIG.set(column, value)
     print("SQLite3: *bcamp_config*:", column, "=", value)
 
 # ["case"] Table Queries
+# Columns of the 'cases' table, in schema order. See bcamp_setup.cases_schema
+CASE_COLUMNS = ('sr_number', 'remote_path', 'local_path', 'pinned',
+    'product', 'account', 'notes', 'bug_id', 'workspace', 'files_table',
+    'import_time', 'last_ran_time', 'last_file_count', 'jira_title',
+    'jira_status', 'jira_updated', 'jira_description', 'jira_sr_owner',
+    'jira_comments', 'jira_last_comment_time', 'jira_linkedissues',
+    'jira_project', 'jira_priority', 'jira_components', 'jira_affected_ver',
+    'jira_resolution', 'jira_fix_ver', 'jira_notify_flag', 'file_notify_flag')
+# Position of each column in a 'cases' row.
+CASE_COLUMN_INDEX = {column: index for index, column
+    in enumerate(CASE_COLUMNS)}
+
+class CaseRecord:
+    '''
+    Compact object holding ALL columns of a single row in the cases table,
+    loaded with one query. Columns are read as attributes such as
+    'record.remote_path'.
+
+    Setting a column attribute marks it as "dirty", and 'save()' writes only
+    the dirty columns back to the DB. The dirty values are kept on the
+    record, the (cached) row tuple is never changed.
+    '''
+    __slots__ = ('_row', '_dirty')
+
+    def __init__(self, row):
+        self._row = row
+        self._dirty = {}
+
+    def __repr__(self):
+        return "<CaseRecord " + str(self.sr_number) + ">"
+
+    @property
+    def dirty(self):
+        return frozenset(self._dirty)
+
+    def save(self):
+        '''
+        Writes the dirty columns to the cases table, and invalidates the
+        cached record.
+        '''
+        if len(self._dirty) == 0:
+            return
+        update_case_fields(self.sr_number, dict(self._dirty))
+        self._dirty.clear()
+
+def case_record_column(index, column):
+    '''
+    Returns the property of 'column' for CaseRecord - its dirty value if it
+    was set, else the value in the row.
+    '''
+    def get_column(self):
+        if column in self._dirty:
+            return self._dirty[column]
+        return self._row[index]
+    def set_column(self, value):
+        self._dirty[column] = value
+    return property(get_column, set_column)
+
+for index, column in enumerate(CASE_COLUMNS):
+    setattr(CaseRecord, column, case_record_column(index, column))
+
+class CaseRecordCache:
+    '''
+    Thread-safe LRU cache of the cases rows keyed by 'sr_number'.
+
+    The rows are kept as tuples, and 'get' returns a NEW CaseRecord of the
+    row on every call - two callers editing the same SR each have their own
+    record, and only see the other's changes once they are saved.
+
+    Every write to the cases table through the API invalidates the entry of
+    that SR, so the next 'get' reloads it. Like the ConfigCache, the rows are
+    dropped when 'BCAMP_DB' is pointed to another DB. 'stats()' returns the
+    hit/miss counters.
+    '''
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._records = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._db_path = None
+        # Bumped on invalidate, so a load that raced a write is not cached.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key_val):
+        '''
+        Returns a new CaseRecord of 'key_val', or None if the SR does not
+        exist.
+        '''
+        row = self.get_row(key_val)
+        if row == None:
+            return None
+        return CaseRecord(row)
+
+    def get_row(self, key_val):
+        '''
+        Returns the cached row tuple of 'key_val' (see CASE_COLUMNS), or None
+        if the SR does not exist.
+        '''
+        with self._lock:
+            if self._db_path != BCAMP_DB.db_path:
+                # Rows of another DB, the same SR may not even exist here.
+                self._generation += 1
+                self._records.clear()
+                self._db_path = BCAMP_DB.db_path
+            row = self._records.get(key_val)
+            if row != None:
+                self._records.move_to_end(key_val)
+                self.hits += 1
+                return row
+            self.misses += 1
+            generation = self._generation
+
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT " + ", ".join(CASE_COLUMNS)
+                + " FROM cases WHERE sr_number = (?);", (key_val,))
+            row = dbshell.fetchone()
+        if row == None:
+            return None
+        row = tuple(row)
+
+        with self._lock:
+            if generation == self._generation:
+                self._records[key_val] = row
+                while len(self._records) > self.max_size:
+                    self._records.popitem(last=False)
+        return row
+
+    def invalidate(self, key_val=None):
+        '''
+        Drops 'key_val' from the cache, or ALL records if key_val is None.
+        '''
+        with self._lock:
+            self._generation += 1
+            if key_val == None:
+                self._records.clear()
+            else:
+                self._records.pop(key_val, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'size': len(self._records),
+                'max_size': self.max_size,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+# Shared CaseRecord cache used by 'get_case_record' and 'query_case'
+CASE_CACHE = CaseRecordCache()
+
+def get_case_record(key_val):
+    '''
+    Returns a CaseRecord with ALL columns for 'key_val' from the cache, or
+    None if the SR does not exist.
+
+    *NOTE: Each call returns a new record. Changes made to it are only seen
+    by other callers once 'save()' is called.
+    '''
+    return CASE_CACHE.get(key_val)
+
+def case_cache_stats():
+    '''
+    Returns the hit/miss counters of the CaseRecord cache.
+    '''
+    return CASE_CACHE.stats()
 
 def drop_sr(key_val):
     '''
     Drops all related tables and rows for 'key_val'
     '''
-    files_table = query_case(key_val, 'files_table')
-    dbshell, dbcon = open_dbshell()
-    # Delete filesX table
-    if files_table != None:
-        dbshell.execute('DROP TABLE ' + files_table + ';')
-    # Delete row in cases.
-    dbshell.execute('DELETE FROM cases WHERE sr_number = (?)', (key_val,))
-    # Remove tags
-    dbshell.execute('DELETE FROM tags WHERE sr_number = (?)', (key_val,))
-    dbcon.commit() # save changes
-    dbcon.close() # close connection to DB.
+    def write_op(dbshell):
+        # Delete file records
+        dbshell.execute('DELETE FROM files WHERE sr_number = (?)', (key_val,))
+        dbshell.execute('DELETE FROM dir_snapshots WHERE sr_number = (?)',
+            (key_val,))
+        # Delete row in cases.
+        dbshell.execute('DELETE FROM cases WHERE sr_number = (?)', (key_val,))
+        # Remove tags
+        dbshell.execute('DELETE FROM tags WHERE sr_number = (?)', (key_val,))
+        # Remove JIRA comments/links
+        dbshell.execute('DELETE FROM jira_comments WHERE sr_number = (?)',
+            (key_val,))
+        dbshell.execute('DELETE FROM jira_links WHERE sr_number = (?)',
+            (key_val,))
+    DB_WRITER.write(write_op)
+    CASE_CACHE.invalidate(key_val)
+    CASE_INDEX.remove(key_val)
+    for value_index in VALUE_INDEXES.values():
+        value_index.invalidate()
+    # Give the free pages back once the DB is idle.
+    DB_MAINT.request('drop_sr')
 
 def query_case(key_val, column):
     '''
     Returns the value of 'column' from the 'key_val' row in the cases table.
-    '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM cases WHERE sr_number = (?);", 
-        (key_val,))
-    result = dbshell.fetchone()
-    dbcon.close()
+
+    *NOTE: Served from the CaseRecord cache.
+    '''
+    if column in CASE_COLUMN_INDEX:
+        row = CASE_CACHE.get_row(key_val)
+        if row != None:
+            return row[CASE_COLUMN_INDEX[column]]
+    # Not cached, let SQLite3 return the value or raise the error.
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + " FROM cases WHERE sr_number = (?);", 
+            (key_val,))
+        result = dbshell.fetchone()
     return result[0] # Results are tuples, but we expect ONLY 1 value here.
 
 def query_cases(column):
     '''
     Returns ALL values in 'column' in the cases table.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM cases;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + " FROM cases;")
+        result = dbshell.fetchall()
 
     return result # Results are tuples.
 
@@ -205,11 +1223,10 @@ def query_all_sr(key_val):
     '''
     Returns the value of all columns from 'key_val' row in the cases table.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM cases WHERE sr_number = (?);", 
-        (key_val,))
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + ", ".join(CASE_COLUMNS)
+            + " FROM cases WHERE sr_number = (?);", (key_val,))
+        result = dbshell.fetchall()
     return result[0] # Results is a tuple in order of SQL column index
 
 def query_cases_distinct(column):
@@ -217,10 +1234,9 @@ def query_cases_distinct(column):
     Returns unique values in 'column' in the cases table. Duplicates are
     removed from the result.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT DISTINCT " + column + " FROM cases;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT DISTINCT " + column + " FROM cases;")
+        result = dbshell.fetchall()
     return_list = []
     for value in result:
         if value[0] != None: # Omit NONE values from list.
@@ -231,12 +1247,11 @@ def query_case_exist(key_val):
     '''
     Returns a bool if 'key_val' exist in the cases table.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("""SELECT EXISTS(
-        SELECT 1 FROM cases WHERE sr_number=(?));""", 
-        (key_val,))
-    result = dbshell.fetchone()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT EXISTS(
+            SELECT 1 FROM cases WHERE sr_number=(?));""", 
+            (key_val,))
+        result = dbshell.fetchone()
     # Formatting result to True/False Bool.
     if result[0] == 1:
         return True
@@ -247,125 +1262,138 @@ def query_bugs():
     '''
     Returns a list of sets containing (SR Num, JIRA-ID/None)
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT sr_number, bug_id FROM cases;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number, bug_id FROM cases;")
+        result = dbshell.fetchall()
     return result # Results are tuples.
 
 def query_cases_simple_export():
     '''
     Returns a list of sets containing (SR Num, Account, Product) sets
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT sr_number, product, account, pinned FROM cases;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number, product, account, pinned FROM cases;")
+        result = dbshell.fetchall()
     return result # Results are tuples.
 
 def update_case(key_val, column, value):
     '''
     Updates a single column value for a key_value in the cases table.
     '''
-    dbshell, dbcon = open_dbshell()
-    # Update Cases table
-    dbshell.execute("UPDATE cases SET "
-        + column + """ = (?)
-        WHERE sr_number = (?);""",
-        (value, key_val))
+    update_case_fields(key_val, {column: value})
+
+def update_case_fields(key_val, fields):
+    '''
+    Updates each {column: value} of 'fields' for key_val in the cases table
+    in one UPDATE, and invalidates the cached CaseRecord.
+    '''
+    columns = list(fields)
+    def write_op(dbshell):
+        # Update Cases table
+        dbshell.execute("UPDATE cases SET "
+            + ", ".join([column + " = (?)" for column in columns])
+            + " WHERE sr_number = (?);",
+            [fields[column] for column in columns] + [key_val])
+    DB_WRITER.write(write_op)
+    CASE_CACHE.invalidate(key_val)
+    indexed = {column: fields[column] for column in columns
+        if column in CaseSearchIndex.FIELDS}
+    if indexed != {}:
+        CASE_INDEX.update(key_val, indexed)
+    for column in VALUE_INDEXES:
+        if column in fields:
+            VALUE_INDEXES[column].invalidate()
 
-    dbcon.commit() # Save changes
-    dbcon.close() # Close connection
-    print("SQLite3: *cases*:", key_val, "->", column, "updated.")
+    print("SQLite3: *cases*:", key_val, "->", ", ".join(columns), "updated.")
 
 def update_case_record(key_val, new_values):
     '''
     Updates the cases table for key_val when a case record is modified, 
     as well as the tags table for key_val.
     '''
-    dbshell, dbcon = open_dbshell()
-    # Update Cases table
-    dbshell.execute("""UPDATE cases SET
-        account = (?),
-        product = (?),
-        bug_id = (?),
-        pinned = (?)
-        WHERE sr_number = (?);""",
-        (new_values['account_string'],
-        new_values['product_string'],
-        new_values['bug_string'],
-        new_values['important_bool'],
-        key_val))
-
-    # Update Tags Table
-    # First, drop all exisiting tags for kay_val.
-    dbshell.execute("DELETE from tags WHERE sr_number = (?)",
-        (key_val,))
+    def write_op(dbshell):
+        # Update Cases table
+        dbshell.execute("""UPDATE cases SET
+            account = (?),
+            product = (?),
+            bug_id = (?),
+            pinned = (?)
+            WHERE sr_number = (?);""",
+            (new_values['account_string'],
+            new_values['product_string'],
+            new_values['bug_string'],
+            new_values['important_bool'],
+            key_val))
+
+        # Update Tags Table
+        # First, drop all exisiting tags for kay_val.
+        dbshell.execute("DELETE from tags WHERE sr_number = (?)",
+            (key_val,))
     
-    # Then update record with new values
-    if new_values['tags_list'] != None:
-        for tag in new_values['tags_list']:
-            dbshell.execute("""INSERT INTO tags(
-                tag,
-                sr_number) 
-                VALUES (?,?);""",
-                (tag, key_val))
-
-    dbcon.commit() # Save changes
-    dbcon.close() # Close connection
+        # Then update record with new values
+        if new_values['tags_list'] != None:
+            for tag in new_values['tags_list']:
+                dbshell.execute("""INSERT INTO tags(
+                    tag,
+                    sr_number) 
+                    VALUES (?,?);""",
+                    (tag, key_val))
+    DB_WRITER.write(write_op)
+
+    CASE_CACHE.invalidate(key_val)
+    CASE_INDEX.update(key_val, {
+        'account': new_values['account_string'],
+        'product': new_values['product_string'],
+        'bug_id': new_values['bug_string'],
+        'tags': new_values['tags_list'],
+    })
+    for value_index in VALUE_INDEXES.values():
+        value_index.invalidate()
     print("SQLite3: *bcamp_tags*: updated for", key_val)
 
 def parse_filter_search(raw_query, cur_filterset):
     '''
-    Seperates words by spaces unless they are encapsulated with ('),
-    and returns the results as a list.
+    Adds the search query 'raw_query' to the 'custom' filters of
+    'cur_filterset', and returns it.
+
+    Plain words each become a filter, strings encapsulated w/ (') or (")
+    are kept together. Queries using fields, OR, NOT/-, or () groups are
+    added as ONE filter, see 'compile_search_query'. Invalid queries are
+    searched as plain text.
     '''
-    # Will be populated when the raw_query is parsed.
-    query_list = [] 
-    # Used for multiple strings seperated from the strip method to compile the
-    # full string back together for a clean query when the "expected" format
-    # is not used.
-    temp_str = ""
     stripped_query = raw_query.strip() # Remove leading whitespace
+    if stripped_query == "":
+        return cur_filterset
+
+    words = search_query_words(stripped_query)
+    if words != None:
+        query_list = [quote_search_term(word) for word in words]
+    else:
+        try:
+            parse_search_query(stripped_query)
+            query_list = [stripped_query]
+        except ValueError as error:
+            print("Search: invalid query -", error, "- searching as text.")
+            query_list = [quote_search_term(stripped_query)]
 
-    # Seperate each string into a list.
-    q_items = stripped_query.split(" ") 
-
-    # And then iterate,format and append results to query_list
-    long_str_flag = False # sets if item -> temp_str [OR] -> query_list
-    for item in q_items:
-        if long_str_flag == False:
-            # Checking if this is a single query, or a long string 
-            # encapsulated by "'" that must be compiled
-            if "'" == item[0]:
-                # Start of new long string, clear previous compilation.
-                temp_str = "" 
-                temp_str = item.replace("'", "") # remove leading "'"
-                # Setting long_str mode to redirect results to the temp str 
-                # until we see an exit "'" to close the string.
-                long_str_flag = True
-            else: 
-                # Simply add as a 'custom' item in query_list.
-                formatted_query = item
-                query_list.append(formatted_query)
-
-        elif long_str_flag == True:
-            # Checking for an exit character
-            if "'" == item[-1]:
-                temp_str = temp_str + " " + item.replace("'", "")
-                # Setting long_str mode to redirect results to the temp str 
-                # until we see an exit "'" to close the string.
-                formatted_query = temp_str
-                query_list.append(formatted_query)
-                long_str_flag = False #exit long str mode on next iter in for.
-            else:
-                # item needs to be added to temp_str.
-                temp_str = temp_str + " " +  item
-    
     cur_filterset['custom'] = cur_filterset['custom'] + query_list
 
     return cur_filterset
 
+def quote_search_term(term):
+    '''
+    Returns 'term' quoted if required, so 'parse_search_query' reads it as
+    ONE plain text term.
+    '''
+    if (re.search(r"[\s():'\"]", term) == None and not term.startswith("-")
+            and term not in ('OR', 'AND', 'NOT')):
+        return term
+    if '"' not in term:
+        return '"' + term + '"'
+    if "'" not in term:
+        return "'" + term + "'"
+    return '"' + term.replace('"', '') + '"'
+
 ## [ Casetiles Query ]
 def dbget_case_casetiles():
     '''
@@ -386,11 +1414,10 @@ def dbget_case_casetiles():
     ]
     '''
 
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute('''SELECT sr_number, pinned, account, product, bug_id, 
-        jira_status, jira_notify_flag, file_notify_flag FROM cases;''')
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute('''SELECT sr_number, pinned, account, product, bug_id, 
+            jira_status, jira_notify_flag, file_notify_flag FROM cases;''')
+        result = dbshell.fetchall()
     # Format results from [(data)] to Dict format.
     return_var = []
     for item in result:
@@ -409,335 +1436,1257 @@ def dbget_case_casetiles():
     return return_var
 
 ## [ Search Engine found in CaseViewer ]
+# Columns of the 'cases_fts' full-text index, see 'CreateDB.migrate_cases_fts'.
+# 'tags' holds ALL tags of an SR, seperated by spaces.
+CASES_FTS_COLUMNS = ('sr_number', 'account', 'product', 'bug_id', 'tags',
+    'notes', 'jira_title', 'jira_description')
+# The columns that are full-text indexed. 'sr_number' is UNINDEXED - every
+# SR number shares trigrams such as '000', so digit strings matched most of
+# the index. SR numbers are matched w/ LIKE on the 'sr_number' index of
+# 'cases' instead, see 'cases_fts_filter'.
+CASES_FTS_TEXT_COLUMNS = CASES_FTS_COLUMNS[1:]
+
+# Rows for 'cases_fts', as (case_id, *CASES_FTS_COLUMNS) from 'cases'.
+CASES_FTS_SELECT = """SELECT case_id, sr_number, account, product, bug_id,
+    (SELECT group_concat(tag, ' ') FROM tags
+        WHERE tags.sr_number = cases.sr_number),
+    notes, jira_title, jira_description FROM cases"""
+
+# Every sub-query run by 'search_cases'. Each must be backed by an index,
+# see 'CreateDB.migrate_search_indexes' and the 'plans' benchmark.
+SEARCH_QUERIES = {
+    'account': "SELECT sr_number FROM cases WHERE account = (?);",
+    'product': "SELECT sr_number FROM cases WHERE product = (?);",
+    'tag': "SELECT sr_number FROM tags WHERE tag = (?);",
+    # Scans the small UNIQUE index of 'sr_number', not the table.
+    'sr_number': "SELECT sr_number FROM cases WHERE sr_number LIKE (?);",
+    # Ranked, account/product/bug/tag matches first.
+    'custom': """SELECT sr_number FROM cases_fts WHERE cases_fts MATCH (?)
+        ORDER BY bm25(cases_fts, 0.0, 5.0, 5.0, 5.0, 5.0, 1.0, 2.0, 1.0);""",
+    # Terms too short for the trigram index.
+    'custom_short': "SELECT sr_number FROM cases_fts WHERE "
+        + " OR ".join([column + " LIKE ?1"
+            for column in CASES_FTS_TEXT_COLUMNS])
+        + " ORDER BY rowid;",
+}
+
+# {(db_path, table): tokenizer} of the FTS tables, see 'cases_fts_tokenizer'.
+CASES_FTS_TOKENIZER = {}
+
+def cases_fts_tokenizer(table='cases_fts'):
+    '''
+    Returns the tokenizer 'table' ('cases_fts' or 'notes_fts') was created
+    with - 'trigram', or 'unicode61' on older SQLite builds.
+    '''
+    tokenizer = CASES_FTS_TOKENIZER.get((BCAMP_DB.db_path, table))
+    if tokenizer == None:
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute("""SELECT sql FROM sqlite_master
+                WHERE name = (?);""", (table,))
+            result = dbshell.fetchone()
+        if result != None and 'trigram' in result[0]:
+            tokenizer = 'trigram'
+        else:
+            tokenizer = 'unicode61'
+        CASES_FTS_TOKENIZER[(BCAMP_DB.db_path, table)] = tokenizer
+    return tokenizer
+
+def search_custom_term(term):
+    '''
+    Returns the SR's where 'term' is found in any of the CASES_FTS_COLUMNS,
+    SR number matches first, then the best 'cases_fts' matches.
+
+    With the 'trigram' tokenizer, any part of a word matches, as w/ the
+    "LIKE '%term%'" searches this replaced. With 'unicode61', words
+    starting with 'term' match. Unlike those searches, 'term' is also found
+    in the notes, JIRA title and JIRA description of a case, and matches
+    PART of an SR number instead of only the whole SR number.
+    '''
+    term = term.strip()
+    if term == "":
+        return []
+    # Quoted as an FTS5 "string", so '-', ':', etc. aren't query syntax.
+    phrase = '"' + term.replace('"', '""') + '"'
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute(SEARCH_QUERIES['sr_number'], ('%' + term + '%',))
+        result = [row[0] for row in dbshell.fetchall()]
+        if cases_fts_tokenizer() == 'trigram':
+            if len(term) < 3:
+                dbshell.execute(SEARCH_QUERIES['custom_short'],
+                    ('%' + term + '%',))
+            else:
+                dbshell.execute(SEARCH_QUERIES['custom'], (phrase,))
+        else:
+            dbshell.execute(SEARCH_QUERIES['custom'], (phrase + "*",))
+        sr_matches = set(result)
+        return result + [row[0] for row in dbshell.fetchall()
+            if row[0] not in sr_matches]
+
+def rebuild_cases_fts():
+    '''
+    Rebuilds ALL rows of 'cases_fts' from 'cases' and 'tags', keyed by the
+    'case_id' of each case. Repairs the index if it was ever out of
+    sync, a VACUUM keeps the 'case_id' of every case.
+    '''
+    def write_op(dbshell):
+        dbshell.execute("DELETE FROM cases_fts;")
+        dbshell.execute("INSERT INTO cases_fts (rowid, "
+            + ", ".join(CASES_FTS_COLUMNS) + ") " + CASES_FTS_SELECT + ";")
+    DB_WRITER.write(write_op)
+
+# Rows for 'notes_fts' from the notes of 'files' and 'cases', see
+# 'CreateDB.migrate_notes_fts' for the rowid scheme.
+NOTES_FTS_INSERT = """INSERT INTO notes_fts (rowid, sr_number, path, notes)
+    SELECT file_id * 2, sr_number, path, notes FROM files
+        WHERE notes IS NOT NULL AND trim(notes) != ''
+    UNION ALL
+    SELECT case_id * 2 + 1, sr_number, NULL, notes FROM cases
+        WHERE notes IS NOT NULL AND trim(notes) != ''"""
+
+def notes_snippet(notes, term, width=60):
+    '''
+    Returns ~'width' chars of 'notes' either side of the first 'term', on a
+    single line for the search results.
+    '''
+    position = notes.lower().find(term.lower())
+    if position == -1:
+        position = 0
+    start = max(0, position - width)
+    end = min(len(notes), position + len(term) + width)
+    snippet = " ".join(notes[start:end].split())
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(notes):
+        snippet = snippet + "..."
+    return snippet
+
+def search_notes(text, limit=100):
+    '''
+    "Search my notes everywhere" - Returns up to 'limit' case AND file notes
+    of every SR that contain 'text', best matches first, as dicts of
+    'sr_number', 'path' (None for the case notes) and 'snippet'.
+    '''
+    text = text.strip()
+    if text == "":
+        return []
+    phrase = '"' + text.replace('"', '""') + '"'
+    with BCAMP_DB.shell() as dbshell:
+        if cases_fts_tokenizer('notes_fts') == 'trigram' and len(text) < 3:
+            dbshell.execute("""SELECT sr_number, path, notes FROM notes_fts
+                WHERE notes LIKE (?) ORDER BY rowid LIMIT (?);""",
+                ('%' + text + '%', limit))
+        else:
+            if cases_fts_tokenizer('notes_fts') != 'trigram':
+                phrase = phrase + "*"
+            dbshell.execute("""SELECT sr_number, path, notes FROM notes_fts
+                WHERE notes_fts MATCH (?) ORDER BY bm25(notes_fts)
+                LIMIT (?);""", (phrase, limit))
+        result = dbshell.fetchall()
+    return [{'sr_number': row[0], 'path': row[1],
+        'snippet': notes_snippet(row[2], text)} for row in result]
+
+def rebuild_notes_fts():
+    '''
+    Rebuilds ALL rows of 'notes_fts' from 'files' and 'cases'. Repairs the
+    index if it was ever out of sync, a VACUUM keeps the 'file_id' and
+    'case_id' the rows are keyed by.
+    '''
+    def write_op(dbshell):
+        dbshell.execute("DELETE FROM notes_fts;")
+        dbshell.execute(NOTES_FTS_INSERT + ";")
+    DB_WRITER.write(write_op)
+
+# Extra WHERE clause for each CaseViewer 'o_rule', matching the
+# 'CaseViewer.NEW_build_tileindex_*' methods. Every rule orders pinned cases
+# first, then by age (rowid).
+FILTERSET_ORDER_RULES = {
+    'default': None,
+    'hasbug': "bug_id IS NOT NULL",
+    'nobug': "bug_id IS NULL",
+    'jiraneedinfo': "jira_status = 'Need Info'",
+    'jiranotify': "jira_notify_flag = 1",
+    'filenotify': "file_notify_flag = 1",
+}
+
+def cases_fts_match(term, columns=None):
+    '''
+    Returns the FTS5 MATCH expression for 'term' in 'columns' (default ALL
+    CASES_FTS_TEXT_COLUMNS), or None if 'term' is too short for the trigram
+    tokenizer and must be found w/ LIKE instead.
+    '''
+    phrase = '"' + term.replace('"', '""') + '"'
+    if cases_fts_tokenizer() == 'trigram':
+        if len(term) < 3:
+            return None
+    else:
+        phrase = phrase + "*"
+    if columns != None:
+        phrase = "{" + " ".join(columns) + "} : " + phrase
+    return phrase
+
+def cases_fts_filter(term, columns=None):
+    '''
+    Returns a (sql, params) condition on 'cases' that is True when 'term' is
+    found in 'columns' of the 'cases_fts' row of the case. By default, in
+    ALL of them or the SR number - the same matches as 'search_custom_term',
+    w/o the ranking.
+    '''
+    if columns == None:
+        fts_columns = CASES_FTS_TEXT_COLUMNS
+        match = cases_fts_match(term)
+    else:
+        fts_columns = columns
+        match = cases_fts_match(term, columns)
+    if match == None:
+        sql = ("cases.case_id IN (SELECT rowid FROM cases_fts WHERE "
+            + " OR ".join([column + " LIKE ?" for column in fts_columns])
+            + ")")
+        params = ['%' + term + '%'] * len(fts_columns)
+    else:
+        sql = ("cases.case_id IN (SELECT rowid FROM cases_fts "
+            "WHERE cases_fts MATCH (?))")
+        params = [match]
+    if columns == None:
+        sql = "(cases.sr_number LIKE (?) OR " + sql + ")"
+        params = ['%' + term + '%'] + params
+    return sql, params
+
+## [ Search Query Language ]
+# Fields of the CaseViewer search, as "field:value". A 'fts' field matches
+# 'value' anywhere in its 'cases_fts' columns, "field:=value" only matches
+# the exact value of 'column'. 'date' and 'int' fields also take the
+# ranges "field:>value", ":>=", ":<", ":<=". The fields of VALUE_INDEXES
+# take "field:~value", matching values spelled alike, see 'suggest_values'.
+# 'logs:' matches the words in the downloaded logs of an SR, see 'search_logs'.
+SEARCH_FIELDS = {
+    'account': {'type': 'fts', 'fts': ('account',), 'column': 'account'},
+    'product': {'type': 'fts', 'fts': ('product',), 'column': 'product'},
+    'tag': {'type': 'fts', 'fts': ('tags',), 'column': None},
+    'bug': {'type': 'fts', 'fts': ('bug_id',), 'column': 'bug_id'},
+    'sr': {'type': 'text', 'column': 'sr_number'},
+    'notes': {'type': 'fts', 'fts': ('notes',), 'column': 'notes'},
+    'jira': {'type': 'fts', 'fts': ('jira_title', 'jira_description'),
+        'column': 'jira_title'},
+    'status': {'type': 'text', 'column': 'jira_status'},
+    'imported': {'type': 'date', 'column': 'import_time'},
+    'files': {'type': 'int', 'column': 'last_file_count'},
+    'logs': {'type': 'logs', 'column': 'sr_number'},
+}
+SEARCH_OPERATORS = ('>=', '<=', '>', '<', '=', '~')
+
+def tokenize_search_query(text):
+    '''
+    Splits a search query into a list of tokens...
+
+        ('(',) / (')',) / ('OR',) / ('AND',) / ('NOT',)
+        ('term', field, operator, value) - field/operator are None for text.
+
+    Strings quoted w/ ' or " are kept as one value. A leading '-' is NOT.
+    '''
+    tokens = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char.isspace():
+            index += 1
+        elif char in "()":
+            tokens.append((char,))
+            index += 1
+        elif char == "-" and index + 1 < len(text) and (
+                not text[index + 1].isspace()):
+            tokens.append(('NOT',))
+            index += 1
+        else:
+            # Read a word, or a quoted string.
+            field = None
+            operator = None
+            if char not in "'\"":
+                end = index
+                while end < len(text) and not (text[end].isspace()
+                        or text[end] in "()"):
+                    end += 1
+                word = text[index:end]
+                if word in ('OR', 'AND', 'NOT'):
+                    tokens.append((word,))
+                    index = end
+                    continue
+                name, colon, value = word.partition(":")
+                if colon == "" or name.lower() not in SEARCH_FIELDS:
+                    tokens.append(('term', None, None, word))
+                    index = end
+                    continue
+                field = name.lower()
+                for op in SEARCH_OPERATORS:
+                    if value.startswith(op):
+                        operator = op
+                        value = value[len(op):]
+                        break
+                if value == "" or value[0] not in "'\"":
+                    tokens.append(('term', field, operator, value))
+                    index = end
+                    continue
+                # field:"quoted value"
+                index = end - len(value)
+                char = text[index]
+            # Quoted - until the closing quote, or the end of the query.
+            end = text.find(char, index + 1)
+            if end == -1:
+                end = len(text)
+            tokens.append(('term', field, operator, text[index + 1:end]))
+            index = end + 1
+    return tokens
+
+def parse_search_query(text):
+    '''
+    Parses a CaseViewer search query into a tree of...
+
+        ('and', [nodes]) / ('or', [nodes]) / ('not', node)
+        ('term', field, operator, value)
+
+    Words are AND'd unless joined by OR, which binds tighter than the
+    implied AND - "a b OR c" is "a AND (b OR c)". Groups use (). Raises a
+    ValueError for invalid queries.
+    '''
+    tokens = tokenize_search_query(text)
+    position = [0]
+
+    def peek():
+        if position[0] < len(tokens):
+            return tokens[position[0]]
+        return (None,)
+
+    def advance():
+        token = peek()
+        position[0] += 1
+        return token
+
+    def parse_and():
+        nodes = []
+        while peek()[0] not in (None, ')'):
+            if peek()[0] == 'AND':
+                advance()
+                continue
+            nodes.append(parse_or())
+        if nodes == []:
+            raise ValueError("expected a search term")
+        if len(nodes) == 1:
+            return nodes[0]
+        return ('and', nodes)
+
+    def parse_or():
+        nodes = [parse_unary()]
+        while peek()[0] == 'OR':
+            advance()
+            nodes.append(parse_unary())
+        if len(nodes) == 1:
+            return nodes[0]
+        return ('or', nodes)
+
+    def parse_unary():
+        token = advance()
+        if token[0] == 'NOT':
+            return ('not', parse_unary())
+        if token[0] == '(':
+            node = parse_and()
+            if advance()[0] != ')':
+                raise ValueError("missing ')'")
+            return node
+        if token[0] == 'term':
+            return check_term(token)
+        raise ValueError("unexpected '" + str(token[0]) + "'")
+
+    def check_term(token):
+        field, operator, value = token[1], token[2], token[3].strip()
+        if value == "":
+            raise ValueError("empty search term")
+        if field == None:
+            return ('term', None, None, value)
+        field_type = SEARCH_FIELDS[field]['type']
+        if field_type == 'logs' and operator != None:
+            raise ValueError("'logs:' only takes text, such as "
+                "logs:\"access denied\"")
+        if operator == '~':
+            if field not in VALUE_INDEXES:
+                raise ValueError("'~' only works with 'account:' or "
+                    "'product:'")
+        elif operator not in (None, '=') and field_type not in (
+                'date', 'int'):
+            raise ValueError("'" + operator + "' needs a date or number, "
+                "such as 'imported:' or 'files:'")
+        if field_type == 'int' and not value.isdigit():
+            raise ValueError("'" + field + ":' needs a number")
+        if field_type == 'date' and re.match(
+                r"^\d{4}(-\d{2}(-\d{2})?)?$", value) == None:
+            raise ValueError("'" + field + ":' needs a date as YYYY-MM-DD")
+        return ('term', field, operator, value)
+
+    node = parse_and()
+    if peek()[0] != None:
+        raise ValueError("unexpected '" + str(peek()[0]) + "'")
+    return node
+
+def search_query_words(text):
+    '''
+    Returns the plain words of a search query, or None if it uses fields or
+    operators - or is not a valid query.
+    '''
+    try:
+        node = parse_search_query(text)
+    except ValueError:
+        return None
+    if node[0] == 'and':
+        nodes = node[1]
+    else:
+        nodes = [node]
+    words = []
+    for node in nodes:
+        if node[0] != 'term' or node[1] != None:
+            return None
+        words.append(node[3])
+    return words
+
+def compile_search_query(text):
+    '''
+    Compiles a search query into ONE (sql, params) condition on 'cases'.
+
+    Trees of 'fts' field terms, and their AND/OR groups, are merged into a
+    single 'cases_fts' MATCH. Everything else is a condition on 'cases'
+    backed by its indexes where one exists - including un-fielded terms,
+    which also match the SR number, see 'cases_fts_filter'.
+    '''
+    def compile_node(node):
+        # Returns ('fts', match) or ('sql', sql, params)
+        kind = node[0]
+        if kind == 'term':
+            return compile_term(node[1], node[2], node[3])
+        if kind == 'not':
+            sql, params = to_sql(compile_node(node[1]))
+            # A NULL column, such as 'bug_id', is "not" a match.
+            return ('sql', "NOT IFNULL((" + sql + "), 0)", params)
+        parts = [compile_node(child) for child in node[1]]
+        joiner = " " + kind.upper() + " "
+        if all(part[0] == 'fts' for part in parts):
+            return ('fts', "(" + joiner.join([part[1] for part in parts])
+                + ")")
+        sql = []
+        params = []
+        for part in parts:
+            part_sql, part_params = to_sql(part)
+            sql.append(part_sql)
+            params += part_params
+        return ('sql', "(" + joiner.join(sql) + ")", params)
+
+    def compile_term(field, operator, value):
+        if field == None:
+            return ('sql',) + cases_fts_filter(value)
+        spec = SEARCH_FIELDS[field]
+        column = "cases." + str(spec['column'])
+        if spec['type'] == 'fts':
+            if operator == None:
+                match = cases_fts_match(value, spec['fts'])
+                if match == None:
+                    return ('sql',) + cases_fts_filter(value, spec['fts'])
+                return ('fts', match)
+            if operator == '~':
+                values = suggest_values(field, value)
+                if values == []:
+                    return ('sql', "0", [])
+                return ('sql', column + " IN (" + ", ".join(["?"] * len(values))
+                    + ")", values)
+            if field == 'tag':
+                return ('sql', """EXISTS (SELECT 1 FROM tags
+                    WHERE tags.sr_number = cases.sr_number AND tag = (?))""",
+                    [value])
+            return ('sql', column + " = (?)", [value])
+        if spec['type'] == 'logs':
+            # The log index is in the 'bcamp_logs.db' sidecar.
+            sr_numbers = search_log_srs(value)
+            if sr_numbers == []:
+                return ('sql', "0", [])
+            return ('sql', column + " IN (" + ", ".join(["?"] * len(sr_numbers))
+                + ")", sr_numbers)
+        if spec['type'] == 'text':
+            if operator == None:
+                return ('sql', column + " LIKE (?)", ['%' + value + '%'])
+            return ('sql', column + " = (?)", [value])
+        if spec['type'] == 'date':
+            if operator in (None, '='):
+                return ('sql', column + " LIKE (?)", [value + '%'])
+            # 'import_time' is "YYYY-MM-DD HH:MM:SS", so "<=" must include
+            # the whole day.
+            if operator in ('<=', '>'):
+                value = value + '\uffff'
+            return ('sql', column + " " + operator + " (?)", [value])
+        # 'int'
+        if operator == None:
+            operator = '='
+        return ('sql', "CAST(" + column + " AS INTEGER) " + operator + " (?)",
+            [int(value)])
+
+    def to_sql(part):
+        if part[0] == 'fts':
+            return ("cases.case_id IN (SELECT rowid FROM cases_fts "
+                "WHERE cases_fts MATCH (?))", [part[1]])
+        return part[1], part[2]
+
+    return to_sql(compile_node(parse_search_query(text)))
+
+def compile_filterset(f_set):
+    '''
+    Compiles a CaseViewer filterset into ONE parameterized query, returned as
+    (query, params). The query returns the matching SR's in the order the
+    CaseViewer renders them for the filterset's 'o_rule'.
+
+    - Values within 'account', 'product' or 'tag' are OR'd, e.g. a case
+    matches when it has ANY of the tags.
+    - Each 'custom' string is a search query that must match, see
+    'compile_search_query'.
+    - The categories are AND'd together.
+    '''
+    where, params = filterset_where(f_set)
+    query = "SELECT sr_number FROM cases"
+    if where != []:
+        query = query + "\n    WHERE " + "\n    AND ".join(where)
+    query = query + "\n    ORDER BY pinned = 1 DESC, rowid;"
+    return query, params
+
+def filterset_where(f_set):
+    '''
+    Returns the ([conditions], params) on 'cases' of a filterset, AND'd by
+    'compile_filterset'. Missing categories don't filter, so 'FacetCounts'
+    can compile each category on its own.
+    '''
+    where = []
+    params = []
+    for column in ('account', 'product'):
+        values = f_set.get(column, [])
+        if values != []:
+            where.append(column + " IN (" + ", ".join(["?"] * len(values))
+                + ")")
+            params += values
+    tags = f_set.get('tag', [])
+    if tags != []:
+        where.append("""EXISTS (SELECT 1 FROM tags
+            WHERE tags.sr_number = cases.sr_number
+            AND tag IN (""" + ", ".join(["?"] * len(tags)) + "))")
+        params += tags
+    for term in f_set.get('custom', []):
+        term = term.strip()
+        # Blank strings, such as from double spaces, don't filter.
+        if term != "":
+            try:
+                sql, term_params = compile_search_query(term)
+            except ValueError:
+                sql, term_params = cases_fts_filter(term)
+            where.append(sql)
+            params += term_params
+    o_rule = FILTERSET_ORDER_RULES[f_set.get('o_rule', 'default')]
+    if o_rule != None:
+        where.append(o_rule)
+    return where, params
+
 def search_cases(f_set):
     '''
     Parses the f_set provided from the CaseViewer.cur_filterset, searches
     through the DB for the items defined, and returns a CaseViewer_index list
     of the cases that should be shown that match
 
-    For specs. on the search engine behind User text into the Search entry,
-    see the 'custom_search' sub-method. 
+    The filterset is compiled into a single query, see 'compile_filterset',
+    so the results are already in the order of the 'o_rule'. Results are
+    cached in SEARCH_CACHE until the next write to 'cases' or 'tags'.
     '''
-    def account_search(target):
-        dbshell, dbcon = open_dbshell()
-        dbshell.execute("SELECT sr_number FROM cases WHERE account = (?);",
-            (target,))
-        raw_result = dbshell.fetchall()
-        dbcon.close()
-        # format results.
-        f_res = []
-        for item in raw_result:
-            f_res.append(item[0])
-        return f_res
-
-    def product_search(target):
-        dbshell, dbcon = open_dbshell()
-        dbshell.execute("SELECT sr_number FROM cases WHERE product = (?);",
-            (target,))
-        raw_result = dbshell.fetchall()
-        dbcon.close()
-        # format results.
-        f_res = []
-        for item in raw_result:
-            f_res.append(item[0])
-        return f_res
-        
-    def tag_search(target):
-        dbshell, dbcon = open_dbshell()
-        dbshell.execute("SELECT sr_number FROM tags WHERE tag = (?);",
-            (target,))
-        raw_result = dbshell.fetchall()
-        dbcon.close()
-        # format results.
-        f_res = []
-        for item in raw_result:
-            f_res.append(item[0])
-        return f_res
-
-    def custom_search(target):
-        '''
-        Search sub-method utilized for user-defined strings. This combines the
-        logic of the account, product, and tag search methods with changes the
-        actual queries used and some extra parsers methods. The "c_x_search"
-        variants use the SQLite3 'LIKE' exception, to return items that are 
-        partial string matches as well. 
-        '''
-        # [ SPECIAL SEARCH METHODS ONLY FOR CUSTOM STRINGS ]
-        ### SR Search for user SR submissions to return the submitted item.
-        def c_account_search(target):
-            dbshell, dbcon = open_dbshell()
-            dbshell.execute("SELECT sr_number FROM cases WHERE account LIKE ?;",
-                ('%'+target+'%',))
-            raw_result = dbshell.fetchall()
-            dbcon.close()
-            # format results.
-            f_res = []
-            for item in raw_result:
-                f_res.append(item[0])
-            return f_res
-
-        def c_product_search(target):
-            dbshell, dbcon = open_dbshell()
-            dbshell.execute("SELECT sr_number FROM cases WHERE product LIKE ?;",
-                ('%'+target+'%',))
-            raw_result = dbshell.fetchall()
-            dbcon.close()
-            # format results.
-            f_res = []
-            for item in raw_result:
-                f_res.append(item[0])
-            return f_res
-            
-        def c_tag_search(target):
-            dbshell, dbcon = open_dbshell()
-            dbshell.execute("SELECT sr_number FROM tags WHERE tag LIKE ?;",
-                ('%'+target+'%',))
-            raw_result = dbshell.fetchall()
-            dbcon.close()
-            # format results.
-            f_res = []
-            for item in raw_result:
-                f_res.append(item[0])
-            return f_res
-
-        def sr_search(target):
-            dbshell, dbcon = open_dbshell()
-            dbshell.execute("SELECT sr_number FROM cases WHERE sr_number = (?);",
-                (target,))
-            raw_result = dbshell.fetchall()
-            dbcon.close()
-            # format results.
-            f_res = []
-            for item in raw_result:
-                f_res.append(item[0])
-            return f_res
-
-        def jira_search(target):
-            dbshell, dbcon = open_dbshell()
-            dbshell.execute("SELECT sr_number FROM cases WHERE bug_id LIKE ?;",
-                ('%'+target+'%',))
+    seq = search_seq()
+    result = SEARCH_CACHE.get(f_set, seq)
+    if result == None:
+        query, params = compile_filterset(f_set)
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute(query, params)
             raw_result = dbshell.fetchall()
-            dbcon.close()
-            # format results.
-            f_res = []
-            for item in raw_result:
-                f_res.append(item[0])
-            return f_res
-    
-        # [ /SPECIAL SEARCH METHODS ONLY FOR CUSTOM STRINGS ]        
-
-        # DRIVER CODE FOR 'custom_search'
-        # Send sample to each search module, and collect the results.
-        print("$>", target)
-        account_return = c_account_search(target)
-        product_return = c_product_search(target)
-        tag_return = c_tag_search(target)
-        sr_return = sr_search(target)
-        jira_return = jira_search(target)
-
-        # Then add the list together to get a aggregate list of SR's.
-        aggregate_list = (
-            account_return 
-            + product_return 
-            + tag_return 
-            + sr_return
-            + jira_return
-        )
+        # format results.
+        result = [item[0] for item in raw_result]
+        SEARCH_CACHE.put(f_set, seq, result)
+    # A copy, as the CaseViewer may change the list.
+    return list(result)
 
-        print("$aggr_lst", aggregate_list)
-        # Finally, return result to be filtered through...
-        return aggregate_list
-    
-    def filter_results(a_lst, p_lst, t_lst, c_lst):
+def filterset_key(f_set):
+    '''
+    Returns a canonical, hashable form of a filterset. Filtersets that
+    match the same cases - the same values in another order, or blank
+    'custom' strings - return the same key.
+    '''
+    key = []
+    for category in ('account', 'product', 'tag', 'custom'):
+        values = [value.strip() for value in f_set.get(category, [])]
+        key.append(tuple(sorted(set(value for value in values
+            if value != ""))))
+    key.append(f_set.get('o_rule', 'default'))
+    return tuple(key)
+
+def change_seq():
+    '''
+    Returns the 'change_seq' counter of the DB, bumped by triggers on EVERY
+    write to 'cases' or 'tags', see 'CreateDB.migrate_change_seq'.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT seq FROM change_seq WHERE name = 'cases';")
+        return dbshell.fetchone()[0]
+
+def search_seq():
+    '''
+    Returns the version of everything a search result depends on - the DB's
+    'change_seq', and the 'bcamp_logs.db' writes for "logs:" searches.
+    '''
+    return (change_seq(), LOG_INDEX.seq)
+
+class FilterSetCache:
+    '''
+    LRU cache of results per 'filterset_key', up to 'max_entries'. Each
+    result is kept w/ the 'search_seq' it was computed at, and is only
+    served while that is unchanged - so a write from ANY thread, even one
+    that skipped the API helpers, is never served stale.
+    '''
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Counters for 'stats()'
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, f_set, seq):
+        '''
+        Returns the cached result of 'f_set' at 'seq', or None.
+        '''
+        key = filterset_key(f_set)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry != None and entry[0] == seq:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry != None:
+                del self._cache[key]
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, f_set, seq, result):
         '''
-        Returns a list of SR's that exist in ALL search results.
+        Caches 'result' of 'f_set', computed at 'seq'.
+        '''
+        key = filterset_key(f_set)
+        with self._lock:
+            self._cache[key] = (seq, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
+
+# Results of 'search_cases' for the CaseViewer.
+SEARCH_CACHE = FilterSetCache()
+
+## [ Facet Counts ]
+# Facets of the CaseViewer filter menu, see 'FacetCounts'.
+FACET_NAMES = ('account', 'product', 'tag', 'jira_status')
+
+class FacetCounts:
+    '''
+    Grouped case counts for each account, product, tag and JIRA status of a
+    filterset - the "Need Info (7)" of the CaseViewer filter menu. Every
+    facet is counted in ONE aggregate query.
 
-        a_lst = Account Result List.
-        p_list = Product Result List.
-        t_lst = Tag Result List.
-        c_lst = Custom Result List.
+    Values within 'account', 'product' and 'tag' are OR'd by the search, so
+    each of those facets is counted w/o its own filter - the count is how
+    many cases that value adds to the results. 'jira_status' is counted
+    within the current results.
+
+    Results are cached in a FilterSetCache of up to 'max_entries'
+    filtersets, until the next write to 'cases' or 'tags'.
+    '''
+    def __init__(self, max_entries=32):
+        self.cache = FilterSetCache(max_entries)
+
+    def query(self, f_set):
         '''
-        def noneIsInfinite(value):
-            if value is None:
-                return float("inf")
-            else:
-                return value
-
-        # First, get lengths of all result_list.
-        a_len = len(a_lst)
-        p_len = len(p_lst)
-        t_len = len(t_lst)
-        c_len = len(c_lst)
-
-        # Then check if the lengths are greater <= 1. Any list length that is
-        # 0 should be converted to None vals.``
-        if a_len == 0:
-            a_len = None
-        if p_len == 0:
-            p_len = None
-        if t_len == 0:
-            t_len = None
-        if c_len == 0:
-            c_len = None        
-        length_set = [a_len, p_len, t_len, c_len]  
-
-        # Determine which lst is the Smallest. 
-        min_val = min(length_set, key=noneIsInfinite)
-        min_index = length_set.index(min_val)
-        if min_index == 0:
-            smallest_set = a_lst
-        if min_index == 1:
-            smallest_set = p_lst
-        if min_index == 2:
-            smallest_set = t_lst
-        if min_index == 3:
-            smallest_set = c_lst
-
-        # Iterate through 'smallest_set' and compare items to items in
-        # sister list. 
-        return_list = []
-        for item in smallest_set:
-            # Account Test
-            if a_len != None:
-                if item in a_lst:
-                    a_litmus = True
-                else:
-                    a_litmus = False
-            else:
-                # Return true, set excluded.
-                a_litmus = True
+        Returns (sql, params) of the aggregate query for 'f_set'. The cases
+        matching the 'custom' and 'o_rule' filters are found ONCE, w/ a flag
+        for each OR'd category, and every facet is grouped from those.
+        '''
+        params = []
+        flags = []
+        for category in ('account', 'product', 'tag'):
+            where, where_params = filterset_where({category:
+                f_set.get(category, [])})
+            flags.append((" AND ".join(where) or "1") + " AS "
+                + category + "_ok")
+            params += where_params
+        where, where_params = filterset_where({
+            'custom': f_set.get('custom', []),
+            'o_rule': f_set.get('o_rule', 'default')})
+        params += where_params
+        sql = ("WITH facet_cases AS (SELECT sr_number, account, product, "
+            "jira_status, " + ", ".join(flags) + " FROM cases")
+        if where != []:
+            sql = sql + " WHERE " + " AND ".join(where)
+        sql = sql + ")\n" + """SELECT 'account', account, count(*) FROM facet_cases
+    WHERE product_ok AND tag_ok AND account IS NOT NULL GROUP BY account
+UNION ALL
+SELECT 'product', product, count(*) FROM facet_cases
+    WHERE account_ok AND tag_ok AND product IS NOT NULL GROUP BY product
+UNION ALL
+SELECT 'tag', tags.tag, count(*) FROM facet_cases
+    JOIN tags ON tags.sr_number = facet_cases.sr_number
+    WHERE account_ok AND product_ok GROUP BY tags.tag
+UNION ALL
+SELECT 'jira_status', jira_status, count(*) FROM facet_cases
+    WHERE account_ok AND product_ok AND tag_ok AND jira_status IS NOT NULL
+    GROUP BY jira_status;"""
+        return sql, params
+
+    def counts(self, f_set):
+        '''
+        Returns {facet: [(value, count)]} for 'f_set', most cases first.
+        '''
+        seq = search_seq()
+        result = self.cache.get(f_set, seq)
+        if result != None:
+            return result
+        sql, params = self.query(f_set)
+        result = {facet: [] for facet in FACET_NAMES}
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute(sql, params)
+            for facet, value, count in dbshell.fetchall():
+                result[facet].append((value, count))
+        for values in result.values():
+            values.sort(key=lambda item: (-item[1], str(item[0]).lower()))
+        self.cache.put(f_set, seq, result)
+        return result
 
-            # product Test
-            if p_len != None:
-                if item in p_lst:
-                    p_litmus = True
-                else:
-                    p_litmus = False
+    def invalidate(self):
+        '''
+        Drops ALL cached counts.
+        '''
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+# Shared facet counts used by the CaseViewer.
+FACETS = FacetCounts()
+
+class CaseSearchIndex:
+    '''
+    In-memory inverted index of {token: set(SR's)} for search-as-you-type in
+    the CaseViewer. Tokens are the words of the 'account', 'product',
+    'bug_id', 'sr_number' and tags of each case, lowercased.
+
+    Built once by 'build()' - on a thread of its own through 'start()' -
+    then kept current by 'new_import', 'update_case_record',
+    'update_case_fields', 'insert_tags' and 'drop_sr'. 'query()' returns the
+    SR's where EVERY word typed is the start of a token, and 'search()' the
+    same from the DB until the index is ready.
+
+    'max_bytes' caps the memory held, see 'memory_usage'. Past it, the index
+    is disabled and 'query()' returns None, so the caller searches the DB.
+    '''
+    FIELDS = ('sr_number', 'account', 'product', 'bug_id', 'tags')
+
+    def __init__(self, max_bytes=80 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.ready = False
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        # {sr_number: {field: value}} as indexed, used to remove old tokens.
+        self._cases = {}
+        self._postings = {}
+        # Sorted keys of '_postings' for prefix lookups.
+        self._tokens = []
+        self.entries = 0
+        # Bytes of the tokens, postings and fields - kept as they change, so
+        # 'memory_usage' never has to walk the index.
+        self._item_bytes = 0
+
+    @staticmethod
+    def tokenize(value):
+        '''
+        Returns the tokens of a field value - the full value, and each of its
+        words, lowercased. "TSNS-12345" -> {'tsns-12345', 'tsns', '12345'}
+        '''
+        if value == None:
+            return set()
+        value = str(value).lower().strip()
+        if value == "":
+            return set()
+        tokens = set(re.findall(r"[0-9a-z]+", value))
+        tokens.add(value)
+        return tokens
+
+    def case_tokens(self, fields):
+        tokens = set()
+        for field in self.FIELDS:
+            if field == 'tags':
+                for tag in fields['tags']:
+                    tokens |= self.tokenize(tag)
             else:
-                # Return true, set excluded.
-                p_litmus = True
+                tokens |= self.tokenize(fields[field])
+        return tokens
 
-            # Tag Test
-            if t_len != None:
-                if item in t_lst:
-                    t_litmus = True
-                else:
-                    t_litmus = False
-            else:
-                # Return true, set excluded.
-                t_litmus = True
+    def load_cases(self):
+        '''
+        Returns {sr_number: {field: value}} for ALL cases in the DB.
+        '''
+        cases = {}
+        for tile in dbget_case_casetiles():
+            cases[tile[0]] = {
+                'sr_number': tile[0],
+                'account': tile[2],
+                'product': tile[3],
+                'bug_id': tile[4],
+                'tags': sorted(query_tags(tile[0])),
+            }
+        return cases
 
-            #  Custom Test
-            if c_len != None:
-                if item in c_lst:
-                    c_litmus = True
-                else:
-                    c_litmus = False
+    def start(self):
+        '''
+        Builds the index on a new thread. 'query()' returns None until it is
+        ready, and 'search()' searches the DB instead.
+        '''
+        threading.Thread(target=self.build, name='CaseSearchIndex',
+            daemon=True).start()
+
+    def build(self, attempts=3):
+        '''
+        (Re)builds the index from ALL cases in the DB. Writes made while the
+        cases are loaded are NOT applied to the index, so it is loaded again
+        if the DB's 'change_seq' moved in the meantime.
+        '''
+        start = time.perf_counter()
+        for attempt in range(attempts):
+            seq = change_seq()
+            cases = self.load_cases()
+            with self._lock:
+                # Held while checking, so any later write is applied by
+                # 'update' once the index is ready.
+                if seq != change_seq() and attempt < attempts - 1:
+                    continue
+                self._clear()
+                self.enabled = True
+                for sr_number, fields in cases.items():
+                    self._add(sr_number, fields)
+                self._check_budget()
+                self.ready = True
+                break
+        print("CaseSearchIndex: indexed", len(cases), "cases,", self.entries,
+            "entries in", round((time.perf_counter() - start) * 1000, 1), "ms")
+
+    def _add(self, sr_number, fields):
+        self._cases[sr_number] = fields
+        self._item_bytes += sys.getsizeof(fields)
+        for token in self.case_tokens(fields):
+            postings = self._postings.get(token)
+            if postings == None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+                self._item_bytes += sys.getsizeof(token)
             else:
-                # Return true, set excluded.
-                c_litmus = True
-            
-            # Test if a,p,t,c litmus is true. 
-            if a_litmus and p_litmus and t_litmus and c_litmus:
-                print("ADDING...", item, " to RESULTS.")
-                return_list.append(item)
+                self._item_bytes -= sys.getsizeof(postings)
+            postings.add(sr_number)
+            self._item_bytes += sys.getsizeof(postings)
+            self.entries += 1
+
+    def _remove(self, sr_number):
+        fields = self._cases.pop(sr_number, None)
+        if fields == None:
+            return None
+        self._item_bytes -= sys.getsizeof(fields)
+        for token in self.case_tokens(fields):
+            postings = self._postings[token]
+            self._item_bytes -= sys.getsizeof(postings)
+            postings.discard(sr_number)
+            self.entries -= 1
+            if len(postings) == 0:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+                self._item_bytes -= sys.getsizeof(token)
             else:
-                # Item not in all list, to not add to results.
-                pass
-            
-        return return_list
-
-    account_res = []
-    product_res = []
-    tag_res = []
-    temp_custom_sets = []
-    custom_res = []
-
-    # Iterate through each key in the 'f_set' and see val to sub-methods to
-    # crawl through the DB.
-
-    for item in f_set['account']:
-        sr_set = account_search(item)
-        # Formatting sr_set list into result list
-        for item in sr_set:
-            account_res.append(item)
-
-    for item in f_set['product']:
-        sr_set = product_search(item)
-        # Formatting sr_set list into result list
-        for item in sr_set:
-            product_res.append(item)
-
-    for item in f_set['tag']:
-        sr_set = tag_search(item)
-        # Formatting sr_set list into result list
-        for item in sr_set:
-            tag_res.append(item)
-
-    for item in f_set['custom']:
-        sr_set = custom_search(item)
-        # Save results from all custom string matches to be filtered.
-        temp_custom_sets.append(sr_set)
-
-    if len(temp_custom_sets) > 1:
-        # Pre-filter custom results if user gives multiple strings.
-        # Get largest lst in temp_custom_sets, returns as (index, lst)
-        source_tup = max(enumerate(temp_custom_sets), key = lambda tup: len(tup[1]))
-        # Remove largest item from temp_sets.
-        temp_custom_sets.pop(source_tup[0])
-        # Only return matches that exist in both source_tup and iter lst.
-        for lst in temp_custom_sets:
-            for item in lst:
-                print("\n*****\n$item....", item)
-                print("$lst....", lst)
-                print("$...SOURCE", source_tup[1], "\n*****")
-                if item in source_tup[1]: # item in largest list.
-                    custom_res.append(item) 
-    elif len(temp_custom_sets) == 1: # Only single items in temp_set.
-        ## Formatting sr_set list into result list
-        for item in sr_set:
-            custom_res.append(item)
-
-    print("** SEARCH RESULTS **")
-    print("account>", account_res)
-    print("product>", product_res)
-    print("tag>", tag_res)
-    print("custom>", custom_res)
-
-    # Checking results from ALL search list above, and appending SR's that are
-    # present in all list. 
-    
-    # First, determine what result set is the SMALLEST, we will iterate through
-    # this list and compare it to the others for the fastest comparison.
+                self._item_bytes += sys.getsizeof(postings)
+        return fields
+
+    def _memory_usage(self):
+        return (self._item_bytes + sys.getsizeof(self._postings)
+            + sys.getsizeof(self._tokens) + sys.getsizeof(self._cases))
+
+    def _check_budget(self):
+        size = self._memory_usage()
+        if size > self.max_bytes:
+            print("CaseSearchIndex: over budget (" + str(size), ">",
+                str(self.max_bytes) + " bytes), disabled.")
+            self._clear()
+            self.enabled = False
+
+    def update(self, sr_number, fields, create=False):
+        '''
+        Re-indexes 'sr_number' with the changed {field: value} of 'fields'.
+        Unknown SR's are only added when 'create' is True, such as on import.
+        '''
+        with self._lock:
+            if not (self.ready and self.enabled):
+                return
+            old_fields = self._remove(sr_number)
+            if old_fields == None:
+                if not create:
+                    return
+                old_fields = {'sr_number': sr_number, 'account': None,
+                    'product': None, 'bug_id': None, 'tags': []}
+            new_fields = dict(old_fields)
+            for field in self.FIELDS:
+                if field in fields:
+                    new_fields[field] = fields[field]
+            if new_fields['tags'] == None:
+                new_fields['tags'] = []
+            new_fields['tags'] = sorted(set(new_fields['tags']))
+            self._add(sr_number, new_fields)
+            self._check_budget()
+
+    def remove(self, sr_number):
+        with self._lock:
+            if self.ready and self.enabled:
+                self._remove(sr_number)
+
+    def query(self, text):
+        '''
+        Returns the set of SR's matching ALL words of 'text', or None if the
+        index is not available.
+        '''
+        with self._lock:
+            if not (self.ready and self.enabled):
+                return None
+            result = None
+            # Longest (most selective) words first.
+            for word in sorted(text.lower().split(), key=len, reverse=True):
+                matches = set()
+                index = bisect.bisect_left(self._tokens, word)
+                while (index < len(self._tokens)
+                        and self._tokens[index].startswith(word)):
+                    matches |= self._postings[self._tokens[index]]
+                    index += 1
+                if result == None:
+                    result = matches
+                else:
+                    result &= matches
+                if len(result) == 0:
+                    break
+            if result == None:
+                return set(self._cases)
+            return result
 
-    return filter_results(account_res, product_res, tag_res, custom_res)
+    def search(self, text):
+        '''
+        'query()', or the same words searched in the DB while the index is
+        still being built. Returns None only if the index is disabled.
+        '''
+        result = self.query(text)
+        if result != None or not self.enabled:
+            return result
+        return set(search_cases({'account': [], 'product': [], 'tag': [],
+            'custom': [quote_search_term(word) for word in text.split()],
+            'o_rule': 'default'}))
+
+    def check(self):
+        '''
+        Compares the index against the DB, and returns a list of the SR's
+        that are missing, stale, or should no longer be indexed.
+        '''
+        cases = self.load_cases()
+        with self._lock:
+            if not (self.ready and self.enabled):
+                return []
+            mismatched = set(cases) ^ set(self._cases)
+            for sr_number, fields in cases.items():
+                if self._cases.get(sr_number, fields) != fields:
+                    mismatched.add(sr_number)
+            # And the postings must match the indexed fields.
+            postings = {}
+            for sr_number, fields in self._cases.items():
+                for token in self.case_tokens(fields):
+                    postings.setdefault(token, set()).add(sr_number)
+            for token in set(postings) | set(self._postings):
+                mismatched |= (postings.get(token, set())
+                    ^ self._postings.get(token, set()))
+            if self._tokens != sorted(self._postings):
+                print("CaseSearchIndex: token list out of order!")
+        return sorted(mismatched)
+
+    def memory_usage(self):
+        '''
+        Returns the approx. size of the index in bytes - the containers, each
+        token and its postings set, and the indexed fields of each case. The
+        SR strings are shared w/ the rest of the API, and not counted.
+        '''
+        with self._lock:
+            return self._memory_usage()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'ready': self.ready,
+                'cases': len(self._cases),
+                'tokens': len(self._postings),
+                'entries': self.entries,
+                'bytes': self._memory_usage(),
+                'max_bytes': self.max_bytes,
+            }
+
+# Search-as-you-type index of the CaseViewer, started by the Gui on startup.
+CASE_INDEX = CaseSearchIndex()
+
+class TrigramIndex:
+    '''
+    Typo-tolerant lookup of the distinct values of a 'cases' column, such
+    as 'account'. Values are compared by their trigrams after dropping case,
+    spaces and punctuation - so "US Bank", "USBank" and "us-bank" are the
+    same, and "US Bnak" is close.
+
+    Each trigram maps to an int used as a bitset of the values holding it,
+    so a lookup counts the shared trigrams of ALL values w/ a few big-int
+    operations per trigram, instead of a loop over the values.
+
+    Loaded from 'query_cases_distinct' on the first lookup, and again after
+    'invalidate()'.
+    '''
+    def __init__(self, column):
+        self.column = column
+        self.ready = False
+        self._lock = threading.Lock()
+        self._values = []
+        # {trigram: bitset of value indexes}
+        self._masks = {}
+        # {trigram count: bitset of value indexes}
+        self._length_masks = {}
+        # Sorted (normalized value, value index) for prefix lookups.
+        self._sorted = []
+
+    @staticmethod
+    def normalize(value):
+        return re.sub(r"[^0-9a-z]", "", str(value).lower())
+
+    @staticmethod
+    def trigrams(normalized, complete=True):
+        '''
+        Returns the set of trigrams of a normalized value, padded like
+        "  usbank ". A value still being typed is not 'complete', and has no
+        trigram for its end.
+        '''
+        padded = "  " + normalized + (" " if complete else "")
+        return set(padded[index:index + 3]
+            for index in range(len(padded) - 2))
+
+    def build(self, values=None):
+        if values == None:
+            values = query_cases_distinct(self.column)
+        values = list(dict.fromkeys(values))
+        # Collect the value indexes of each trigram, then pack them into ints.
+        postings = {}
+        lengths = {}
+        sorted_values = []
+        for index, value in enumerate(values):
+            normalized = self.normalize(value)
+            grams = self.trigrams(normalized)
+            for gram in grams:
+                postings.setdefault(gram, []).append(index)
+            lengths.setdefault(len(grams), []).append(index)
+            sorted_values.append((normalized, index))
+        sorted_values.sort()
+        with self._lock:
+            self._values = values
+            self._masks = {gram: self._pack(indexes, len(values))
+                for gram, indexes in postings.items()}
+            self._length_masks = {length: self._pack(indexes, len(values))
+                for length, indexes in lengths.items()}
+            self._sorted = sorted_values
+            self.ready = True
+
+    @staticmethod
+    def _pack(indexes, size):
+        bits = bytearray((size + 7) // 8)
+        for index in indexes:
+            bits[index >> 3] |= 1 << (index & 7)
+        return int.from_bytes(bits, 'little')
+
+    def add(self, value):
+        '''
+        Adds a new distinct value, such as the account of a new import.
+        '''
+        with self._lock:
+            if not self.ready or value == None or value in self._values:
+                return
+            index = len(self._values)
+            bit = 1 << index
+            normalized = self.normalize(value)
+            grams = self.trigrams(normalized)
+            self._values.append(value)
+            for gram in grams:
+                self._masks[gram] = self._masks.get(gram, 0) | bit
+            self._length_masks[len(grams)] = (
+                self._length_masks.get(len(grams), 0) | bit)
+            bisect.insort(self._sorted, (normalized, index))
+
+    def invalidate(self):
+        with self._lock:
+            self.ready = False
+
+    def lookup(self, text, limit=10, threshold=0.3):
+        '''
+        Returns up to 'limit' [(value, score)], best first. Values starting
+        w/ 'text' score 1.0 - then the rest by the Jaccard similarity of
+        their trigrams, if at least 'threshold'.
+        '''
+        if not self.ready:
+            self.build()
+        query = self.normalize(text)
+        with self._lock:
+            results = []
+            # Prefix matches first, shortest first.
+            position = bisect.bisect_left(self._sorted, (query, -1))
+            prefix = []
+            while (position < len(self._sorted)
+                    and self._sorted[position][0].startswith(query)):
+                prefix.append(self._sorted[position][1])
+                position += 1
+            prefix.sort(key=lambda index: (len(self._values[index]),
+                self._values[index]))
+            found = 0
+            for index in prefix[:limit]:
+                results.append((self._values[index], 1.0))
+                found |= 1 << index
+            if len(results) >= limit or query == "":
+                return results
+
+            # Bit-sliced counters - bit 'i' of the number of query trigrams
+            # held by each value is in 'slices[i]'.
+            grams = self.trigrams(query, complete=False)
+            slices = []
+            for gram in grams:
+                carry = self._masks.get(gram, 0)
+                for bit in range(len(slices)):
+                    if carry == 0:
+                        break
+                    slices[bit], carry = slices[bit] ^ carry, slices[bit] & carry
+                if carry != 0:
+                    slices.append(carry)
+            everything = (1 << len(self._values)) - 1
+
+            def at_least(count):
+                # Bitset of the values holding >= 'count' query trigrams.
+                if count >= (1 << len(slices)):
+                    return 0
+                greater = 0
+                equal = everything
+                for bit in reversed(range(len(slices))):
+                    if (count >> bit) & 1:
+                        equal &= slices[bit]
+                    else:
+                        greater |= equal & slices[bit]
+                        equal &= ~slices[bit]
+                return greater | equal
+
+            # Every (shared, value length) pair has a fixed score, so the
+            # best pairs are read first until 'limit' values are found.
+            pairs = []
+            for length in self._length_masks:
+                for shared in range(1, min(len(grams), length) + 1):
+                    score = shared / (len(grams) + length - shared)
+                    if score >= threshold:
+                        pairs.append((score, shared, length))
+            pairs.sort(reverse=True)
+            exactly = {}
+            group_score = None
+            group = []
+            for score, shared, length in pairs:
+                if score != group_score:
+                    if len(results) + len(group) >= limit:
+                        break
+                    results += [(value, group_score)
+                        for value in sorted(group)]
+                    group_score = score
+                    group = []
+                if shared not in exactly:
+                    exactly[shared] = at_least(shared) & ~at_least(shared + 1)
+                mask = exactly[shared] & self._length_masks[length] & ~found
+                while mask != 0:
+                    low = mask & -mask
+                    group.append(self._values[low.bit_length() - 1])
+                    mask ^= low
+            results += [(value, group_score) for value in sorted(group)]
+            return results[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {'column': self.column, 'ready': self.ready,
+                'values': len(self._values), 'trigrams': len(self._masks)}
+
+# Typo-tolerant autocomplete of the 'account' and 'product' columns.
+VALUE_INDEXES = {
+    'account': TrigramIndex('account'),
+    'product': TrigramIndex('product'),
+}
+
+def suggest_values(column, text, limit=10, threshold=0.3):
+    '''
+    Returns up to 'limit' known values of 'column' ('account' or 'product')
+    for 'text' - values starting w/ it first, then near matches such as
+    "USBank" for "US Bank".
+    '''
+    return [value for value, score in
+        VALUE_INDEXES[column].lookup(text, limit, threshold)]
 
 # ["tags"] Table Queries
 def insert_tags(key_val, tag):
     '''
     Adds new tags to the tags table for key_val. tag/sr_number must be unique.
     '''
-    dbshell, dbcon = open_dbshell()
-    # Delete all previous tags
-    dbshell.execute("DELETE FROM tags WHERE sr_number = (?);", (key_val))
-    # Add new tags, which contains the old tags by default.
-    dbshell.execute("""INSERT INTO tags(
-                tag,
-                sr_number) 
-                VALUES (?,?);""",
-                (tag, key_val))
-    dbcon.commit()
-    dbcon.close()
+    def write_op(dbshell):
+        # Delete all previous tags
+        dbshell.execute("DELETE FROM tags WHERE sr_number = (?);", (key_val,))
+        # Add new tags, which contains the old tags by default.
+        dbshell.execute("""INSERT INTO tags(
+                    tag,
+                    sr_number) 
+                    VALUES (?,?);""",
+                    (tag, key_val))
+    DB_WRITER.write(write_op)
+    CASE_INDEX.update(key_val, {'tags': [tag]})
 
 def query_tags(key_val):
     '''
     Returns all tags for key_val
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT tag FROM tags WHERE sr_number = (?);", 
-        (key_val,))
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT tag FROM tags WHERE sr_number = (?);", 
+            (key_val,))
+        result = dbshell.fetchall()
     return_list = []
     for value in result:
         return_list.append(value[0])
@@ -747,6 +2696,466 @@ def query_tags(key_val):
 '''
 [Case Import/Backups]
 '''
+## [ Log Index ]
+# Sidecar DB of 'LogIndexDaemon', kept out of 'basecamp.db' as it grows with
+# the downloaded bundles. Safe to delete, it is rebuilt from the logs.
+LOG_DB = DBConnectionPool(BCAMP_ROOTPATH + "\\core\\bcamp_logs.db")
+
+# File types indexed from each SR's downloads folder.
+LOG_INDEX_TYPES = ('.log', '.dbg', '.txt')
+
+class LogIndexDaemon:
+    '''
+    Daemon Thread that indexes the CONTENT of the .log, .dbg and .txt files
+    in each SR's downloads folder ('local_path') into the 'bcamp_logs.db'
+    sidecar, so 'search_logs' can tell which SR's already have an error
+    string in their logs without opening them one by one.
+
+    Files are read in 'chunk_bytes' pieces, cut at a line break. Each chunk
+    is a row of 'log_fts', a contentless FTS5 table - only the tokens are
+    stored, the text stays in the log file. 'log_chunks' maps each row back
+    to its file and byte offset.
+
+    Runs every 'interval' seconds over ALL cases, or soon after 'request()'
+    is called for an SR (such as after a download or unpack). Indexing is...
+
+        - Incremental - 'log_files' holds the size, modified time and
+          'indexed_bytes' of each file. Unchanged files are skipped, and a
+          file that grew (logs are appended to) is indexed from where the
+          last pass stopped. A file that shrank or was replaced is indexed
+          again from the start.
+        - Resumable - 'indexed_bytes' is committed with the chunks it
+          covers, so a pass that is interrupted (or Basecamp closing) picks
+          up where it left off.
+        - Throttled - reads at most 'max_bytes_per_sec', and waits while the
+          DB Writer is busy, so imports and file refreshes come first.
+    '''
+    def __init__(self, pool, interval=(60 * 30), chunk_bytes=32768,
+            max_bytes_per_sec=(8 * 1024 * 1024), idle_secs=2):
+        self.pool = pool
+        self.interval = interval # 30 Minutes
+        self.chunk_bytes = chunk_bytes
+        self.max_bytes_per_sec = max_bytes_per_sec # None to disable.
+        self.idle_secs = idle_secs
+        # Chunks committed per transaction.
+        self.batch_chunks = 64
+        # Bytes hashed from the start of a file, to tell a replaced file
+        # from one that was appended to.
+        self.head_bytes = 4096
+        self.q = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._throttle_start = None
+        self._throttle_bytes = 0
+        self.last_report = None
+        # Bumped on every write, see 'search_seq'.
+        self.seq = 0
+
+    def start(self):
+        '''
+        Starts the worker thread, if it is not running yet.
+        '''
+        with self._start_lock:
+            if self._thread == None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.worker_thread,
+                    name='LogIndex-Daemon',
+                    daemon=True)
+                self._thread.start()
+
+    def request(self, sr_number):
+        '''
+        Asks for the logs of 'sr_number' to be (re)indexed. Requests made
+        before the pass starts are merged into one.
+        '''
+        self.q.put(sr_number)
+
+    def worker_thread(self):
+        '''
+        Daemon Thread for LogIndex-Daemon
+        '''
+        self.create_schema()
+        sr_numbers = None # First pass covers ALL cases.
+        while True: # Infin. Loop
+            try:
+                self.run(sr_numbers)
+            except (sqlite3.Error, OSError) as e:
+                print("SQLite3: Log Index failed -", e)
+                logging.error("Log Index failed - " + str(e))
+            try:
+                sr_numbers = set([self.q.get(timeout=self.interval)])
+                while not self.q.empty():
+                    sr_numbers.add(self.q.get_nowait())
+            except queue.Empty:
+                sr_numbers = None
+
+    def create_schema(self):
+        '''
+        Creates the sidecar tables, if they do not exist yet.
+        '''
+        with self.pool.shell() as dbshell:
+            dbshell.execute("""CREATE TABLE IF NOT EXISTS log_files (
+                file_id INTEGER PRIMARY KEY,
+                sr_number TEXT NOT NULL,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                modified_time REAL NOT NULL,
+                encoding TEXT,
+                head_bytes INTEGER NOT NULL DEFAULT 0,
+                head_hash TEXT,
+                indexed_bytes INTEGER NOT NULL DEFAULT 0
+            );""")
+            dbshell.execute("""CREATE INDEX IF NOT EXISTS idx_log_files_sr
+                ON log_files (sr_number);""")
+            # AUTOINCREMENT - a chunk_id is never reused, as 'log_fts' keeps
+            # the tokens of deleted chunks until 'reset'.
+            dbshell.execute("""CREATE TABLE IF NOT EXISTS log_chunks (
+                chunk_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_id INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );""")
+            dbshell.execute("""CREATE INDEX IF NOT EXISTS idx_log_chunks_file
+                ON log_chunks (file_id);""")
+            dbshell.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS log_fts
+                USING fts5(text, content='', tokenize='unicode61');""")
+            dbshell.execute("""CREATE TABLE IF NOT EXISTS log_index_info (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );""")
+
+    def run(self, sr_numbers=None):
+        '''
+        Runs ONE indexing pass on the calling thread for 'sr_numbers', or
+        ALL cases if None, and returns a report - also saved to
+        'last_report'.
+        '''
+        start = time.perf_counter()
+        with BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT sr_number, local_path FROM cases;")
+            cases = dict(dbshell.fetchall())
+        if sr_numbers == None:
+            self.drop_missing(set(cases))
+            sr_numbers = cases
+        self.compact()
+        report = {'files': 0, 'bytes': 0}
+        for sr_number in sorted(sr_numbers):
+            local_path = cases.get(sr_number)
+            if local_path == None:
+                continue
+            for file_row in self.pending_files(sr_number, local_path):
+                report['bytes'] += self.index_file(*file_row)
+                report['files'] += 1
+        report['seconds'] = time.perf_counter() - start
+        report['time'] = str(datetime.datetime.now())
+        self.last_report = report
+        if report['files'] > 0:
+            print("SQLite3: Log Index - {} files, {:.1f} MB indexed in "
+                "{:.1f} sec".format(report['files'],
+                report['bytes'] / 1048576, report['seconds']))
+        return report
+
+    def scan_dir(self, local_path):
+        '''
+        Returns {path: (size, modified_time)} of the LOG_INDEX_TYPES files
+        under 'local_path'.
+        '''
+        found = {}
+        for root, dirs, files in os.walk(local_path):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in LOG_INDEX_TYPES:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    file_stat = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (file_stat.st_size, file_stat.st_mtime)
+        return found
+
+    def file_head(self, path, length):
+        '''
+        Returns the sha1 of the first 'length' bytes of 'path'.
+        '''
+        with open(path, 'rb') as log_file:
+            return hashlib.sha1(log_file.read(length)).hexdigest()
+
+    def pending_files(self, sr_number, local_path):
+        '''
+        Syncs 'log_files' of 'sr_number' with its downloads folder, and
+        returns the (file_id, path, encoding, indexed_bytes) of each file
+        with content that is not indexed yet.
+        '''
+        found = self.scan_dir(local_path)
+        with self.pool.shell() as dbshell:
+            dbshell.execute("""SELECT file_id, path, size, modified_time,
+                encoding, head_bytes, head_hash, indexed_bytes FROM log_files
+                WHERE sr_number = (?);""", (sr_number,))
+            stored = {row[1]: row for row in dbshell.fetchall()}
+
+        pending = []
+        for path, (size, modified_time) in sorted(found.items()):
+            row = stored.pop(path, None)
+            if row == None:
+                with self.pool.shell() as dbshell:
+                    dbshell.execute("""INSERT INTO log_files (sr_number, path,
+                        size, modified_time) VALUES (?, ?, ?, ?);""",
+                        (sr_number, path, size, modified_time))
+                    pending.append((dbshell.lastrowid, path, None, 0))
+                continue
+            file_id, encoding, indexed_bytes = row[0], row[4], row[7]
+            if (size, modified_time) != (row[2], row[3]):
+                replaced = size < indexed_bytes
+                if not replaced and row[5] > 0:
+                    try:
+                        replaced = self.file_head(path, row[5]) != row[6]
+                    except OSError:
+                        continue
+                if replaced:
+                    self.drop_chunks([file_id])
+                    encoding, indexed_bytes = None, 0
+                with self.pool.shell() as dbshell:
+                    dbshell.execute("""UPDATE log_files SET size = (?),
+                        modified_time = (?), indexed_bytes = (?)
+                        WHERE file_id = (?);""", (size, modified_time,
+                        indexed_bytes, file_id))
+            if indexed_bytes < size:
+                pending.append((file_id, path, encoding, indexed_bytes))
+
+        # Files no longer in the downloads folder.
+        if stored != {}:
+            self.drop_files([row[0] for row in stored.values()])
+        return pending
+
+    def index_file(self, file_id, path, encoding, offset):
+        '''
+        Indexes 'path' from byte 'offset' to its end, and returns the bytes
+        read. 'indexed_bytes' is committed every 'batch_chunks' chunks.
+        '''
+        total = 0
+        try:
+            log_file = open(path, 'rb')
+        except OSError:
+            return total
+        with log_file:
+            if encoding == None:
+                head = log_file.read(self.head_bytes)
+                if head.startswith(b'\xff\xfe'):
+                    encoding = 'utf-16-le'
+                    offset = max(offset, 2) # Skip the BOM
+                else:
+                    encoding = 'utf-8'
+                with self.pool.shell() as dbshell:
+                    dbshell.execute("""UPDATE log_files SET encoding = (?),
+                        head_bytes = (?), head_hash = (?)
+                        WHERE file_id = (?);""", (encoding, len(head),
+                        hashlib.sha1(head).hexdigest(), file_id))
+            line_break = "\n".encode(encoding)
+            log_file.seek(offset)
+            chunks = []
+            while True:
+                data = log_file.read(self.chunk_bytes)
+                if data == b'':
+                    break
+                if len(data) == self.chunk_bytes:
+                    # Cut at the last line break, the rest starts the next
+                    # chunk. A line longer than a chunk is split.
+                    cut = data.rfind(line_break)
+                    while cut > 0 and cut % len(line_break) != 0:
+                        cut = data.rfind(line_break, 0, cut)
+                    if cut > 0:
+                        data = data[:cut + len(line_break)]
+                        log_file.seek(offset + len(data))
+                if len(line_break) == 2 and len(data) % 2 == 1:
+                    data = data[:-1]
+                    log_file.seek(offset + len(data))
+                    if data == b'':
+                        break
+                chunks.append((offset, len(data),
+                    data.decode(encoding, errors='replace')))
+                offset += len(data)
+                total += len(data)
+                self.throttle(len(data))
+                if len(chunks) >= self.batch_chunks:
+                    self.write_chunks(file_id, chunks, offset)
+                    chunks = []
+            self.write_chunks(file_id, chunks, offset)
+        return total
+
+    def write_chunks(self, file_id, chunks, indexed_bytes):
+        '''
+        Adds 'chunks' [(offset, length, text)] of 'file_id' to the index,
+        and moves its 'indexed_bytes' to the end of them - in ONE
+        transaction, so an interrupted pass never skips or repeats a chunk.
+        '''
+        with self.pool.shell() as dbshell:
+            for offset, length, text in chunks:
+                dbshell.execute("""INSERT INTO log_chunks (file_id, offset,
+                    length) VALUES (?, ?, ?);""", (file_id, offset, length))
+                dbshell.execute("INSERT INTO log_fts (rowid, text) "
+                    "VALUES (?, ?);", (dbshell.lastrowid, text))
+            dbshell.execute("""UPDATE log_files SET indexed_bytes = (?)
+                WHERE file_id = (?);""", (indexed_bytes, file_id))
+        self.seq += 1
+
+    def throttle(self, nbytes):
+        '''
+        Sleeps as required to keep reads under 'max_bytes_per_sec', and
+        while the DB Writer is busy.
+        '''
+        while (DB_WRITER.idle_for() < self.idle_secs
+                and threading.current_thread() is self._thread):
+            time.sleep(0.5)
+        if self.max_bytes_per_sec == None:
+            return
+        now = time.perf_counter()
+        if self._throttle_start == None or now - self._throttle_start > 1.0:
+            self._throttle_start = now
+            self._throttle_bytes = 0
+        self._throttle_bytes += nbytes
+        ahead = (self._throttle_bytes / self.max_bytes_per_sec
+            - (now - self._throttle_start))
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def drop_chunks(self, file_ids):
+        '''
+        Deletes the chunks of 'file_ids'. A contentless 'log_fts' can't
+        delete rows, so their tokens stay until 'compact', and are ignored
+        by 'search_logs' as they no longer join to 'log_chunks'.
+        '''
+        with self.pool.shell() as dbshell:
+            dropped = 0
+            for file_id in file_ids:
+                dbshell.execute("DELETE FROM log_chunks WHERE file_id = (?);",
+                    (file_id,))
+                dropped += dbshell.rowcount
+            dbshell.execute("""INSERT INTO log_index_info (name, value)
+                VALUES ('dead_chunks', (?)) ON CONFLICT (name)
+                DO UPDATE SET value = value + excluded.value;""", (dropped,))
+        self.seq += 1
+
+    def drop_files(self, file_ids):
+        '''
+        Removes 'file_ids' and their chunks from the index.
+        '''
+        self.drop_chunks(file_ids)
+        with self.pool.shell() as dbshell:
+            dbshell.executemany("DELETE FROM log_files WHERE file_id = (?);",
+                [(file_id,) for file_id in file_ids])
+
+    def drop_missing(self, sr_numbers):
+        '''
+        Removes the files of SR's that are no longer in 'sr_numbers'.
+        '''
+        with self.pool.shell() as dbshell:
+            dbshell.execute("SELECT file_id, sr_number FROM log_files;")
+            file_ids = [row[0] for row in dbshell.fetchall()
+                if row[1] not in sr_numbers]
+        if file_ids != []:
+            self.drop_files(file_ids)
+
+    def compact(self, min_dead=10000):
+        '''
+        Once more chunks are dead than alive, empties 'log_fts' and marks
+        every file as not indexed - the pass that follows indexes them
+        again, and the dead tokens are gone.
+        '''
+        with self.pool.shell() as dbshell:
+            dbshell.execute("""SELECT value FROM log_index_info
+                WHERE name = 'dead_chunks';""")
+            result = dbshell.fetchone()
+            dead = 0 if result == None else result[0]
+            dbshell.execute("SELECT count(*) FROM log_chunks;")
+            live = dbshell.fetchone()[0]
+        if dead < min_dead or dead < live:
+            return False
+        with self.pool.shell() as dbshell:
+            dbshell.execute("INSERT INTO log_fts (log_fts) "
+                "VALUES ('delete-all');")
+            dbshell.execute("DELETE FROM log_chunks;")
+            dbshell.execute("""UPDATE log_files SET indexed_bytes = 0,
+                encoding = NULL, head_bytes = 0, head_hash = NULL;""")
+            dbshell.execute("""UPDATE log_index_info SET value = 0
+                WHERE name = 'dead_chunks';""")
+        self.seq += 1
+        return True
+
+    def stats(self):
+        '''
+        Returns the results of the last pass.
+        '''
+        return {
+            'running': self._thread != None and self._thread.is_alive(),
+            'queued': self.q.qsize(),
+            'last_pass': self.last_report,
+        }
+
+# Shared log indexer, started by the UI.
+LOG_INDEX = LogIndexDaemon(LOG_DB)
+
+def search_logs(text, limit=50, max_chunks=5000):
+    '''
+    Returns up to 'limit' log files of ANY SR that contain 'text', as dicts
+    of 'sr_number', 'path' and 'snippet', from the 'LogIndexDaemon' index.
+
+    The index matches whole words, case-insensitive, so each hit is checked
+    against the log file itself and the snippet is read from it. At most
+    'max_chunks' matching chunks are checked, which keeps very common
+    strings fast.
+    '''
+    text = text.strip()
+    if text == "":
+        return []
+    phrase = '"' + text.replace('"', '""') + '"'
+    results = []
+    seen = set()
+    try:
+        with LOG_DB.shell() as dbshell:
+            dbshell.execute("""SELECT log_files.sr_number, log_files.path,
+                log_files.encoding, log_chunks.offset, log_chunks.length
+                FROM log_fts
+                JOIN log_chunks ON log_chunks.chunk_id = log_fts.rowid
+                JOIN log_files ON log_files.file_id = log_chunks.file_id
+                WHERE log_fts MATCH (?) LIMIT (?);""", (phrase, max_chunks))
+            rows = dbshell.fetchall()
+    except sqlite3.OperationalError:
+        return [] # No index yet, or nothing to match in 'text'.
+    for sr_number, path, encoding, offset, length in rows:
+        if path in seen:
+            continue
+        try:
+            with open(path, 'rb') as log_file:
+                log_file.seek(offset)
+                chunk = log_file.read(length).decode(encoding,
+                    errors='replace')
+        except OSError:
+            continue
+        if text.lower() not in chunk.lower():
+            continue
+        seen.add(path)
+        results.append({'sr_number': sr_number, 'path': path,
+            'snippet': notes_snippet(chunk, text)})
+        if len(results) >= limit:
+            break
+    return results
+
+def search_log_srs(text):
+    '''
+    Returns the SR's with logs that contain the words of 'text', from the
+    index alone - used by the 'logs:' field of the search query language.
+    '''
+    phrase = '"' + text.strip().replace('"', '""') + '"'
+    try:
+        with LOG_DB.shell() as dbshell:
+            dbshell.execute("""SELECT DISTINCT log_files.sr_number
+                FROM log_fts
+                JOIN log_chunks ON log_chunks.chunk_id = log_fts.rowid
+                JOIN log_files ON log_files.file_id = log_chunks.file_id
+                WHERE log_fts MATCH (?);""", (phrase,))
+            return [row[0] for row in dbshell.fetchall()]
+    except sqlite3.OperationalError:
+        return []
+
 class ImportDaemon:
     '''
     Daemon Thread that handles single or multiple imports without hanging UI.
@@ -828,8 +3237,8 @@ class ImportDaemon:
 
 def new_import(new_import_dict, FileOpsQ):
     '''
-    Creates a new row in the 'basecamp.cases' table, and generates the filesX
-    table if the imported SR has uploads and/or local files. This is only 
+    Creates a new row in the 'basecamp.cases' table, and adds rows to the
+    'files' table if the imported SR has uploads and/or local files. This is only 
     populated with the files from the "root" directories, to optimize import
     time. The nested dirs, and files will be scanned and added shortly in the
     Workspace methods.
@@ -1017,112 +3426,71 @@ def new_import(new_import_dict, FileOpsQ):
 
     # Complete case record from UI's partial 'new_import_dict'
     case = finalize_import_data(new_import_dict)
-    # Open sqlite3 cursor
-    dbshell, dbcon = open_dbshell()
-    # Add 'case' values to 'cases' table in 'basecamp.db'
-    dbshell.execute("""INSERT INTO cases (
-        sr_number, 
-        pinned, 
-        product, 
-        account, 
-        bug_id,
-        workspace, 
-        notes,
-        remote_path,
-        local_path,
-        import_time,
-        last_ran_time,
-        jira_status,
-        jira_notify_flag)
-        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);""",
-        (case['sr_number'], 
-        case['pinned'],
-        case['product'],
-        case['account'],
-        case['bug_id'],
-        case['workspace'],
-        case['notes'],
-        case['remote_path'],
-        case['local_path'],
-        case['import_time'],
-        case['last_ran_time'],
-        case['jira_status'],
-        case['jira_notify_flag']))
-
-    # Generate New imports FilesX Table.
-    table_id, files_table_query = create_files_table(case['sr_number'])
-    dbshell.execute(files_table_query)
-    # Update case record with files_table string.
-    dbshell.execute("UPDATE cases SET files_table = (?) WHERE sr_number = (?)",
-        (table_id, case['sr_number']))
+    def write_op(dbshell):
+        # Add 'case' values to 'cases' table in 'basecamp.db'
+        dbshell.execute("""INSERT INTO cases (
+            sr_number, 
+            pinned, 
+            product, 
+            account, 
+            bug_id,
+            workspace, 
+            notes,
+            remote_path,
+            local_path,
+            import_time,
+            last_ran_time,
+            jira_status,
+            jira_notify_flag)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);""",
+            (case['sr_number'], 
+            case['pinned'],
+            case['product'],
+            case['account'],
+            case['bug_id'],
+            case['workspace'],
+            case['notes'],
+            case['remote_path'],
+            case['local_path'],
+            case['import_time'],
+            case['last_ran_time'],
+            case['jira_status'],
+            case['jira_notify_flag']))
+
+        # File records are stored in the shared 'files' table.
+        dbshell.execute("UPDATE cases SET files_table = (?) WHERE sr_number = (?)",
+            ('files', case['sr_number']))
  
-    # Then populate it with results from set_files_snapshot here.
-    # Remote files...
-    if case['files']['remote'] != None:
-        for file in case['files']['remote']:
-            dbshell.execute("INSERT INTO " +  table_id + """(
-                    name,
-                    location,
-                    path,
-                    type,
-                    size,
-                    creation_time,
-                    modified_time,
-                    date_range,
-                    favorite,
-                    notes,
-                    depth_index)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?);""",
-                (file,
-                "remote",
-                case['files']['remote'][file]['path'],
-                case['files']['remote'][file]['type'],
-                case['files']['remote'][file]['size'],
-                case['files']['remote'][file]['creation_time'],
-                case['files']['remote'][file]['modified_time'],
-                case['files']['remote'][file]['date_range'],
-                case['files']['remote'][file]['favorite'],
-                case['files']['remote'][file]['notes'],
-                case['files']['remote'][file]['depth_index']))
-
-    # And Local files...
-    if case['files']['local'] != None:
-        for file in case['files']['local']:
-            dbshell.execute("INSERT INTO " +  table_id + """(
-                    name,
-                    location,
-                    path,
-                    type,
-                    size,
-                    creation_time,
-                    modified_time,
-                    date_range,
-                    favorite,
-                    notes,
-                    depth_index)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?);""",
-                (file,
-                "remote",
-                case['files']['local'][file]['path'],
-                case['files']['local'][file]['type'],
-                case['files']['local'][file]['size'],
-                case['files']['local'][file]['creation_time'],
-                case['files']['local'][file]['modified_time'],
-                case['files']['local'][file]['date_range'],
-                case['files']['local'][file]['favorite'],
-                case['files']['local'][file]['notes'],
-                case['files']['local'][file]['depth_index']))
+        # Then populate it with results from set_files_snapshot here.
+        # Remote files...
+        if case['files']['remote'] != None:
+            upsert_file_rows(dbshell, case['sr_number'],
+                case['files']['remote'], 'remote')
+
+        # And Local files...
+        if case['files']['local'] != None:
+            upsert_file_rows(dbshell, case['sr_number'],
+                case['files']['local'], 'local')
     
-    # If tags were added, append them to "tags" table
-    if case['tags'] != None:
-        for tag in case['tags']:
-            # insert into tags table w/ sr appended (case['sr_number'])
-            dbshell.execute("""INSERT INTO tags (tag, sr_number)
-                VALUES (?, ?);""", (tag, case['sr_number']))
-
-    # Finally, close connection
-    dbcon.commit()
-    dbcon.close()
+        # If tags were added, append them to "tags" table
+        if case['tags'] != None:
+            for tag in case['tags']:
+                # insert into tags table w/ sr appended (case['sr_number'])
+                dbshell.execute("""INSERT INTO tags (tag, sr_number)
+                    VALUES (?, ?);""", (tag, case['sr_number']))
+
+    # Finally, commit everything through the DB Writer, in ONE transaction.
+    DB_WRITER.write(write_op)
+
+    CASE_CACHE.invalidate(case['sr_number'])
+    CASE_INDEX.update(case['sr_number'], {
+        'account': case['account'],
+        'product': case['product'],
+        'bug_id': case['bug_id'],
+        'tags': case['tags'],
+    }, create=True)
+    for column, value_index in VALUE_INDEXES.items():
+        value_index.add(case[column])
 
     # Last, check if user defined download during import, and take action.
     try:
@@ -1342,6 +3710,13 @@ class FileOpsQueue:
             # Exit and go to next item in Queue if any.
             self.q.task_done()
 
+            # Downloads and unpacks add files to the SR's downloads folder.
+            name_parts = item.name.split("::")
+            if name_parts[0] == "download":
+                LOG_INDEX.request(name_parts[1])
+            elif name_parts[-1].strip() != "remote_refresh":
+                LOG_INDEX.request(name_parts[0])
+
             # Reduce queue_size by 1 if NOT refresh thread.
             root_item_name = ((item.name).rsplit(":")[2]).strip()
             if root_item_name != "local_refresh" or root_item_name != "remote_refresh":
@@ -1546,8 +3921,9 @@ class FileOpsQueue:
             '''
             # Defining Vars based on key_val.
             file_name = os.path.basename(iid)
-            remote_path = query_case(key_val, 'remote_path')
-            local_path = query_case(key_val, 'local_path')
+            case = get_case_record(key_val)
+            remote_path = case.remote_path
+            local_path = case.local_path
             full_remote_path = remote_path + "\\" + os.path.splitext(file_name)[0]
             full_local_path = local_path + "\\" + file_name
 
@@ -1618,8 +3994,9 @@ class FileOpsQueue:
             '''
                         # Defining Vars based on key_val.
             file_name = os.path.basename(iid)
-            remote_path = query_case(key_val, 'remote_path')
-            local_path = query_case(key_val, 'local_path')
+            case = get_case_record(key_val)
+            remote_path = case.remote_path
+            local_path = case.local_path
             full_remote_path = remote_path + "\\" + os.path.splitext(file_name)[0]
             full_local_path = local_path + "\\" + file_name
 
@@ -2026,45 +4403,45 @@ class Automations:
         # re-enabled following scan.
         prev_enabled_autos, prev_disabled_autos = get_automations_w_opts()
 
-        # Open connection to DB
-        dbshell, dbcon = open_dbshell()
-        dbshell.execute('''DELETE FROM bcamp_automations;''')
-        print("SQLite3: 'bcamp_automations' Purged for Refresh.")
-        # Iterate through list of Automation Details stored in dict...
+        # Scan the extensions folder BEFORE queuing the write, so the DB
+        # Writer isn't held up by disk I/O.
         avail_automations = self.scan_automations()
-        for auto in avail_automations:
-            # Execute the actual SQLite3 query for each item in list.
-            try:
-                dbshell.execute('''INSERT INTO bcamp_automations (
-                    name,
-                    enabled,
-                    version,
-                    exe_path,
-                    exe_sha256,
-                    downloadFirst,
-                    author,
-                    description,
-                    extensions,
-                    user_options,
-                    type)
-                    VALUES (?,?,?,?,?,?,?,?,?,?,?);''',
-                    (
-                    auto['name'],
-                    auto['enabled'],
-                    auto['version'],
-                    auto['exe_path'],
-                    auto['exe_sha256'],
-                    auto['downloadFirst'],
-                    auto['author'],
-                    auto['description'],
-                    auto['extensions'],
-                    auto['user_options'],
-                    auto['type']
-                    ))
-            except sqlite3.IntegrityError:
-                pass # Thrown for unique constraint failues/Dupes
-        dbcon.commit() # Save changes
-        dbcon.close() # Close connection
+        def write_op(dbshell):
+            dbshell.execute('''DELETE FROM bcamp_automations;''')
+            print("SQLite3: 'bcamp_automations' Purged for Refresh.")
+            # Iterate through list of Automation Details stored in dict...
+            for auto in avail_automations:
+                # Execute the actual SQLite3 query for each item in list.
+                try:
+                    dbshell.execute('''INSERT INTO bcamp_automations (
+                        name,
+                        enabled,
+                        version,
+                        exe_path,
+                        exe_sha256,
+                        downloadFirst,
+                        author,
+                        description,
+                        extensions,
+                        user_options,
+                        type)
+                        VALUES (?,?,?,?,?,?,?,?,?,?,?);''',
+                        (
+                        auto['name'],
+                        auto['enabled'],
+                        auto['version'],
+                        auto['exe_path'],
+                        auto['exe_sha256'],
+                        auto['downloadFirst'],
+                        auto['author'],
+                        auto['description'],
+                        auto['extensions'],
+                        auto['user_options'],
+                        auto['type']
+                        ))
+                except sqlite3.IntegrityError:
+                    pass # Thrown for unique constraint failues/Dupes
+        DB_WRITER.write(write_op)
 
         # Now, get automations once more and enable items that still exist in
         # the extensions folder.
@@ -2097,10 +4474,9 @@ def dump_automations():
     '''
     Returns all rows and columns within the Automations table
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM bcamp_automations;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT * FROM bcamp_automations;")
+        result = dbshell.fetchall()
     return result    
 
 def get_automations_w_opts():
@@ -2111,26 +4487,24 @@ def get_automations_w_opts():
     Returned list only contain the "name" of each Automation.
     '''
     # Create connection to DB
-    dbshell, dbcon = open_dbshell()
-
-    # Get enabled autos...
-    dbshell.execute("SELECT name, user_options FROM bcamp_automations WHERE enabled = (?);", 
-        ('True',))
-    enabled_result = dbshell.fetchall()
-    #enabled_return = []
-    #for item in enabled_result:
-    #    enabled_return.append(item[0])
-
-    # Get disabled autos...
-    dbshell.execute("SELECT name, user_options FROM bcamp_automations WHERE enabled = (?);", 
-        ('False',))
-    disabled_result = dbshell.fetchall()
-    #disabled_return = []
-    #for item in disabled_result:
-    #    disabled_return.append(item[0])
-
-    # Close connection to DB and return results.
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        # Get enabled autos...
+        dbshell.execute("SELECT name, user_options FROM bcamp_automations WHERE enabled = (?);", 
+            ('True',))
+        enabled_result = dbshell.fetchall()
+        #enabled_return = []
+        #for item in enabled_result:
+        #    enabled_return.append(item[0])
+
+        # Get disabled autos...
+        dbshell.execute("SELECT name, user_options FROM bcamp_automations WHERE enabled = (?);", 
+            ('False',))
+        disabled_result = dbshell.fetchall()
+        #disabled_return = []
+        #for item in disabled_result:
+        #    disabled_return.append(item[0])
+
+        # Close connection to DB and return results.
     return enabled_result, disabled_result # Results are tuples
 
 def get_automations():
@@ -2141,26 +4515,24 @@ def get_automations():
     Returned list only contain the "name" of each Automation.
     '''
     # Create connection to DB
-    dbshell, dbcon = open_dbshell()
-
-    # Get enabled autos...
-    dbshell.execute("SELECT name FROM bcamp_automations WHERE enabled = (?);", 
-        ('True',))
-    enabled_result = dbshell.fetchall()
-    enabled_return = []
-    for item in enabled_result:
-        enabled_return.append(item[0])
-
-    # Get disabled autos...
-    dbshell.execute("SELECT name FROM bcamp_automations WHERE enabled = (?);", 
-        ('False',))
-    disabled_result = dbshell.fetchall()
-    disabled_return = []
-    for item in disabled_result:
-        disabled_return.append(item[0])
-
-    # Close connection to DB and return results.
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        # Get enabled autos...
+        dbshell.execute("SELECT name FROM bcamp_automations WHERE enabled = (?);", 
+            ('True',))
+        enabled_result = dbshell.fetchall()
+        enabled_return = []
+        for item in enabled_result:
+            enabled_return.append(item[0])
+
+        # Get disabled autos...
+        dbshell.execute("SELECT name FROM bcamp_automations WHERE enabled = (?);", 
+            ('False',))
+        disabled_result = dbshell.fetchall()
+        disabled_return = []
+        for item in disabled_result:
+            disabled_return.append(item[0])
+
+        # Close connection to DB and return results.
     return enabled_return, disabled_return # Results are tuples
 
 def query_automation(target_auto, column):
@@ -2168,11 +4540,10 @@ def query_automation(target_auto, column):
     Returns a single column from the Automations table for the defined
     target automations.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM bcamp_automations WHERE name = (?);", 
-        (target_auto,))
-    result = dbshell.fetchone()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + " FROM bcamp_automations WHERE name = (?);", 
+            (target_auto,))
+        result = dbshell.fetchone()
     return result[0] # Results are tuples, but we expect ONLY 1 value here.
 
 def update_automation(target_auto, column, value):
@@ -2180,11 +4551,9 @@ def update_automation(target_auto, column, value):
     Updates a column value for a specific target automation with the new 
     'value' variable
     '''
-    dbshell, dbcon = open_dbshell()
-    
-    dbshell.execute("UPDATE bcamp_automations SET " + column + " = (?) WHERE name = (?)", (value, target_auto))
-    dbcon.commit() # save changes
-    dbcon.close()
+    def write_op(dbshell):
+        dbshell.execute("UPDATE bcamp_automations SET " + column + " = (?) WHERE name = (?)", (value, target_auto))
+    DB_WRITER.write(write_op)
     #print("SQLite3: *bcamp_automations*:",target_auto, column, "=", value)
 
 
@@ -2333,7 +4702,8 @@ class CasePollDaemon:
         '''
         #Count the number of files or dirs present at root only.
         #Getting key_val root path
-        rootpath = query_case(key_val, 'remote_path')
+        case = get_case_record(key_val)
+        rootpath = case.remote_path
             #Counting...
         try:
             fresh_count = len(os.listdir(rootpath))
@@ -2344,7 +4714,7 @@ class CasePollDaemon:
         # NOTE, 'last_file_cnt' will return None for SR's that havent been 
         # launched in the workbench yet. These will be excepted before the
         # return comparison.
-        og_count = query_case(key_val, 'last_file_count')
+        og_count = case.last_file_count
         if og_count == None:
             og_count = fresh_count
 
@@ -2609,127 +4979,159 @@ def jira_update_db(key_val, JiraIssue):
     description = The actual description set by the TSE.
     sr_owner = The Owner of the SR linked to the ISSUE.
     key = The 'Reference' ID, such as 'TSNS-271092'
-    comments = Last Comment JSON - Pickled into DB.
+    comments = ALL comments - Only new/edited ones are written to the
+        'jira_comments' table.
     last_comment_time = Timestamp from the most recent comment
-    '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute('''UPDATE cases SET 
-        jira_title = (?),
-        jira_status = (?),
-        jira_updated = (?),
-        jira_description = (?),
-        jira_sr_owner = (?),
-        jira_comments = (?),
-        jira_last_comment_time = (?),
-        jira_linkedissues = (?),
-        jira_project = (?),
-        jira_priority = (?),
-        jira_components = (?),
-        jira_affected_ver = (?),
-        jira_resolution = (?),
-        jira_fix_ver= (?)
-        WHERE sr_number = (?)''',
-        (
-        JiraIssue.title,
-        JiraIssue.status,
-        JiraIssue.updated,
-        JiraIssue.description,
-        JiraIssue.sr_owner,
-        pickle.dumps(JiraIssue.comments),
-        JiraIssue.last_comment_time,
-        pickle.dumps(JiraIssue.linkedissues),
-        JiraIssue.project,
-        JiraIssue.priority,
-        pickle.dumps(JiraIssue.components),
-        pickle.dumps(JiraIssue.affected_ver),
-        JiraIssue.resolution,
-        pickle.dumps(JiraIssue.fix_ver),
-        key_val
+    linkedissues = Saved to the 'jira_links' table.
+    components, affected_ver, fix_ver = JSON lists, see 'jira_load_list'.
+    '''
+    comment_rows = [jira_comment_row(key_val, index, comment)
+        for index, comment in enumerate(JiraIssue.comments or [])]
+    link_rows = [(key_val, link['key'], link['title'], link['status'])
+        for link in JiraIssue.linkedissues or []]
+
+    def write_op(dbshell):
+        # Comments, only write new or edited comments.
+        dbshell.execute("""SELECT comment_id, comment_index, updated
+            FROM jira_comments WHERE sr_number = (?);""", (key_val,))
+        stored = {row[0]: row[1:] for row in dbshell.fetchall()}
+        changed_rows = [row for row in comment_rows
+            if stored.get(row[1]) != (row[2], row[6])]
+        dbshell.executemany("""INSERT INTO jira_comments (
+            sr_number, comment_id, comment_index, author, author_email,
+            created, updated, body)
+            VALUES (?,?,?,?,?,?,?,?)
+            ON CONFLICT(sr_number, comment_id) DO UPDATE SET
+                comment_index = excluded.comment_index,
+                author = excluded.author,
+                author_email = excluded.author_email,
+                updated = excluded.updated,
+                body = excluded.body;""", changed_rows)
+        current_ids = set([row[1] for row in comment_rows])
+        dbshell.executemany("""DELETE FROM jira_comments
+            WHERE sr_number = (?) AND comment_id = (?);""",
+            [(key_val, comment_id) for comment_id in stored
+                if comment_id not in current_ids])
+
+        # Linked Issues, rarely more than a few - replaced as a set.
+        dbshell.execute("""SELECT link_key, title, status FROM jira_links
+            WHERE sr_number = (?);""", (key_val,))
+        if set(dbshell.fetchall()) != set([row[1:] for row in link_rows]):
+            dbshell.execute("DELETE FROM jira_links WHERE sr_number = (?);",
+                (key_val,))
+            dbshell.executemany("""INSERT INTO jira_links (
+                sr_number, link_key, title, status)
+                VALUES (?,?,?,?);""", link_rows)
+
+        dbshell.execute('''UPDATE cases SET 
+            jira_title = (?),
+            jira_status = (?),
+            jira_updated = (?),
+            jira_description = (?),
+            jira_sr_owner = (?),
+            jira_last_comment_time = (?),
+            jira_project = (?),
+            jira_priority = (?),
+            jira_components = (?),
+            jira_affected_ver = (?),
+            jira_resolution = (?),
+            jira_fix_ver= (?)
+            WHERE sr_number = (?)''',
+            (
+            JiraIssue.title,
+            JiraIssue.status,
+            JiraIssue.updated,
+            JiraIssue.description,
+            JiraIssue.sr_owner,
+            JiraIssue.last_comment_time,
+            JiraIssue.project,
+            JiraIssue.priority,
+            json.dumps(JiraIssue.components),
+            json.dumps(JiraIssue.affected_ver),
+            JiraIssue.resolution,
+            json.dumps(JiraIssue.fix_ver),
+            key_val
+            )
         )
+        return len(changed_rows)
+    new_comments = DB_WRITER.write(write_op)
+    CASE_CACHE.invalidate(key_val)
+    print("SQLite3: *Cases* JIRA values updated for", key_val, "-",
+        new_comments, "new/edited comments")
+
+def jira_comment_row(key_val, comment_index, comment):
+    '''
+    Returns a 'jira_comments' row for a comment dict from the JIRA API.
+    '''
+    author = comment.get('updateAuthor') or comment.get('author') or {}
+    return (
+        key_val,
+        str(comment['id']),
+        comment_index,
+        author.get('displayName'),
+        author.get('emailAddress'),
+        comment.get('created'),
+        comment.get('updated'),
+        comment.get('body'),
     )
-    dbcon.commit() # Save Changes.
-    dbcon.close()
-    print("SQLite3: *Cases* JIRA values updated for", key_val)
-
-def jira_get_comment_db(key_val):
-    '''
-    {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/issue/3146519/comment/5645871', 
-    'id': '5645871', 
-    'author': 
-        {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/user?username=csaopaul', 
-        'name': 'csaopaul', 
-        'key': 'csaopaul', 
-        'emailAddress': 'Claudio_SaoPaulo@McAfee.com', 
-        'avatarUrls': {'48x48': 'https://jira-lvs.prod.mcafee.com/secure/useravatar?avatarId=10122', (etc...)
-        'displayName': 'SaoPaulo, Claudio (Enterprise)', 
-        'active': True, 
-        'timeZone': 'America/Los_Angeles'
-        }, 
-    'body': 'NSM BUGScrub 10/07/2021: A BUG was created.\r\n\r\nEngineering will provide an update earlier next week.', 
-    'updateAuthor': 
-        {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/user?username=csaopaul', 
-        'name': 'csaopaul', 
-        'key': 'csaopaul', 
-        'emailAddress': 
-        'Claudio_SaoPaulo@McAfee.com', 
-        'avatarUrls': {'48x48': 'https://jira-lvs.prod.mcafee.com/secure/useravatar?avatarId=10122', (etc...)
-        'displayName': 'SaoPaulo, Claudio (Enterprise)', 
-        'active': True, 
-        'timeZone': 'America/Los_Angeles'}, 
-        'created': '2021-10-07T06:07:29.766-0700', 
-        'updated': '2021-10-07T06:07:29.766-0700'
-        }
+
+def jira_load_list(value):
+    '''
+    Returns the list stored in a JSON 'jira_x' list column of 'cases', such
+    as 'jira_components' - or None if not set.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT jira_comments FROM cases WHERE sr_number = (?);", 
-        (key_val,))
-    result = dbshell.fetchone()[0]
-    dbcon.close()
+    if value == None:
+        return None
     try:
-        decoded = pickle.loads(result)
-        return decoded
-    except:
+        return json.loads(value)
+    except (TypeError, ValueError):
         return None
 
+def jira_get_comments(key_val, limit=20, offset=0):
+    '''
+    Returns a page of the JIRA comments for 'key_val', NEWEST first, as a
+    list of dicts w/ the 'auth_displayname', 'auth_email', 'time' and 'body'
+    keys the Tk_JiraSummary comments use.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT author, author_email, updated, body
+            FROM jira_comments WHERE sr_number = (?)
+            ORDER BY comment_index DESC LIMIT (?) OFFSET (?);""",
+            (key_val, limit, offset))
+        result = dbshell.fetchall()
+    comments = []
+    for row in result:
+        comments.append({
+            'auth_displayname': row[0],
+            'auth_email': row[1],
+            'time': row[2],
+            'body': row[3],
+        })
+    return comments
+
+def jira_comment_count(key_val):
+    '''
+    Returns the number of JIRA comments saved for 'key_val'.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT COUNT(*) FROM jira_comments WHERE sr_number = (?);",
+            (key_val,))
+        return dbshell.fetchone()[0]
+
 def jira_get_issuelinks(key_val):
     '''
-    {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/issue/3146519/comment/5645871', 
-    'id': '5645871', 
-    'author': 
-        {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/user?username=csaopaul', 
-        'name': 'csaopaul', 
-        'key': 'csaopaul', 
-        'emailAddress': 'Claudio_SaoPaulo@McAfee.com', 
-        'avatarUrls': {'48x48': 'https://jira-lvs.prod.mcafee.com/secure/useravatar?avatarId=10122', (etc...)
-        'displayName': 'SaoPaulo, Claudio (Enterprise)', 
-        'active': True, 
-        'timeZone': 'America/Los_Angeles'
-        }, 
-    'body': 'NSM BUGScrub 10/07/2021: A BUG was created.\r\n\r\nEngineering will provide an update earlier next week.', 
-    'updateAuthor': 
-        {'self': 'https://jira-lvs.prod.mcafee.com/rest/api/2/user?username=csaopaul', 
-        'name': 'csaopaul', 
-        'key': 'csaopaul', 
-        'emailAddress': 
-        'Claudio_SaoPaulo@McAfee.com', 
-        'avatarUrls': {'48x48': 'https://jira-lvs.prod.mcafee.com/secure/useravatar?avatarId=10122', (etc...)
-        'displayName': 'SaoPaulo, Claudio (Enterprise)', 
-        'active': True, 
-        'timeZone': 'America/Los_Angeles'}, 
-        'created': '2021-10-07T06:07:29.766-0700', 
-        'updated': '2021-10-07T06:07:29.766-0700'
-        }
+    Returns a list of the linked issues for 'key_val', as dicts with the
+    'key', 'title' and 'status' of each linked issue - or None if there
+    are none.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT jira_linkedissues FROM cases WHERE sr_number = (?);", 
-        (key_val,))
-    result = dbshell.fetchone()[0]
-    dbcon.close()
-    if result != None:
-        dec_res = pickle.loads(result)
-    else:
-        dec_res = None
-    return dec_res
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT link_key, title, status FROM jira_links
+            WHERE sr_number = (?) ORDER BY rowid;""", (key_val,))
+        result = dbshell.fetchall()
+    if len(result) == 0:
+        return None
+    return [{'key': row[0], 'title': row[1], 'status': row[2]}
+        for row in result]
 
 
 '''
@@ -2752,7 +5154,7 @@ def generate_file_record(self, key_val):
     '''
     Threaded generator that scans the remote, local paths in order of nested
     dir "depth"*. The resulting dictionary object is then sent to the
-    'update_files' method to update the 'files_X' x = key_val in the DB.
+    'update_files' method to update the 'files' table for key_val in the DB.
 
     dir depth : The Subdirs of 'FILE1' and 'FILE2' will be inserted into Tree 
     before the Sub/Sub/dirs of 'FILE1' are inserted.
@@ -3047,7 +5449,7 @@ def generate_file_record(self, key_val):
     # #            print("Local dir finished scanning")
     
     # At this point, the "new_file_record" dictionary object contains all
-    # information needed to update the "files_X" DB table.
+    # information needed to update the "files" DB table.
     # Updating DB on seperate thread for performance optimization.
     threading.Thread(target=update_files, 
     args=(self.key_value, new_file_record)).start()
@@ -3080,18 +5482,19 @@ def open_in_windows(file_path):
     except OSError:
         print("*bcamp_api*: WINDOWS ERROR - No default application associated.")
 
-def refresh_filetrees(key_val, FileBrowser):
+def refresh_filetrees(key_val, FileBrowser, full=False):
     '''
     Refreshes the File-Trees with an independent thread not in the FileOpsQ.
+    With 'full', every dir is listed again, see 'scan_file_tree'.
     '''
     remote_refresh_thread = threading.Thread(
             target=FileBrowser.refresh_file_record,
-            args=('remote', False),
+            args=('remote', False, full),
             name=(FileBrowser.key_value + "::remote_refresh")
         )
     local_refresh_thread = threading.Thread(
             target=FileBrowser.refresh_file_record,
-            args=('local', False),
+            args=('local', False, full),
             name=(FileBrowser.key_value + "::remote_refresh")
         )
     # Starting threads together.
@@ -3140,33 +5543,116 @@ def upload_all_files(key_val, FileOpsQ, FileBrowser):
         )
         FileOpsQ.put(refresh_thread)
 
-# ["files_X"] Table Queries 
-def create_files_table(key_val):
-    '''
-    Creates a filesX table for 'key_val'. Default Schema defined here.
-    '''
-    table_name = "files" + str(key_val).replace('-', '')
-    query = "CREATE TABLE IF NOT EXISTS " + table_name + """(
-                            name TEXT NOT NULL,
-                            location TEXT NOT NULL,
-                            path TEXT NOT NULL,
-                            type TEXT NOT NULL,
-                            size TEXT NOT NULL,
-                            creation_time TEXT NOT NULL,
-                            modified_time TEXT NOT NULL,
-                            date_range TEXT,
-                            favorite TEXT NOT NULL,
-                            notes TEXT,
-                            depth_index TEXT NOT NULL,
-                            UNIQUE(path, location) ON CONFLICT IGNORE
-            ); """
-    return table_name, query
-
-def update_files(key_val, updated_record):
-    '''
-    Converts 'file_vals' dictionary to a row in 'key_vals' filesX table.
-
-    [filesX Schema]
+# ["files"] Table Queries 
+# Column order of the rows returned by the 'files' queries below. This matches
+# the old per-SR filesX tables, so callers indexing the result tuples (such as
+# file_tup[2] for 'path') did not need to change.
+FILES_COLUMNS = """name, location, path, type, size, creation_time,
+    modified_time, date_range, favorite, notes, depth_index"""
+
+# Bulk UPSERT used by 'update_files' and 'new_import'. Existing rows only have
+# their stat values refreshed, so 'notes' and 'favorite' are kept. Rows that
+# did not change are skipped by the WHERE clause to avoid needless writes.
+FILES_UPSERT = """INSERT INTO files (
+    sr_number,
+    name,
+    location,
+    path,
+    type,
+    size,
+    creation_time,
+    modified_time,
+    date_range,
+    favorite,
+    notes,
+    depth_index)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT(sr_number, location, path) DO UPDATE SET
+        name = excluded.name,
+        type = excluded.type,
+        size = excluded.size,
+        creation_time = excluded.creation_time,
+        modified_time = excluded.modified_time,
+        depth_index = excluded.depth_index
+    WHERE files.size IS NOT excluded.size
+        OR files.modified_time IS NOT excluded.modified_time
+        OR files.creation_time IS NOT excluded.creation_time
+        OR files.depth_index IS NOT excluded.depth_index
+        OR files.type IS NOT excluded.type
+        OR files.name IS NOT excluded.name;"""
+
+def upsert_file_rows(dbshell, key_val, file_record, location=None):
+    '''
+    Writes every entry of 'file_record' for key_val to the 'files' table with
+    a single executemany() call on the given 'dbshell'. The dict key is
+    stored as the file 'name'. If 'location' is given, it overrides the
+    'location' value of each entry.
+
+    *NOTE: Does NOT commit, the caller owns the transaction.
+    '''
+    rows = []
+    for file in file_record:
+        record = file_record[file]
+        rows.append((key_val,
+            file,
+            location if location != None else record['location'],
+            record['path'],
+            record['type'],
+            record['size'],
+            record['creation_time'],
+            record['modified_time'],
+            record['date_range'],
+            record['favorite'],
+            record['notes'],
+            record['depth_index']))
+    dbshell.executemany(FILES_UPSERT, rows)
+    return len(rows)
+
+def file_record_changed(stored_row, file, record):
+    '''
+    Returns True if 'record' differs from the 'stored_row' of the same file
+    (name, type, size, creation_time, modified_time, depth_index), or if
+    the file is new (stored_row is None).
+
+    Times are compared with a small tolerance, SQLite3 stores REAL values
+    as TEXT w/ 15 significant digits in the 'files' table. Most rows are
+    unchanged and match their TEXT values exactly, which is checked first.
+    '''
+    if stored_row == None:
+        return True
+    if stored_row == (file, record['type'], str(record['size']),
+            str(record['creation_time']), str(record['modified_time']),
+            record['depth_index']):
+        return False
+    name, _type, size, ctime, mtime, depth_index = stored_row
+    try:
+        return (name != file
+            or _type != record['type']
+            or int(size) != int(record['size'])
+            or int(depth_index) != int(record['depth_index'])
+            or abs(float(mtime) - float(record['modified_time'])) > 0.001
+            or abs(float(ctime) - float(record['creation_time'])) > 0.001)
+    except (TypeError, ValueError):
+        return True
+
+def update_files(key_val, updated_record, prune_location=None,
+        dir_snapshot=None):
+    '''
+    Converts the 'updated_record' dictionary to rows in the 'files' table
+    for key_val, in ONE transaction. The stored rows are read first, and only
+    new or changed files are written with a bulk UPSERT, so refreshing an SR
+    where nothing changed is a single SELECT.
+
+    If 'prune_location' ('remote' or 'local') is given, 'updated_record' is
+    treated as a COMPLETE scan of that location, and rows of files that are
+    no longer present are deleted.
+
+    The 'dir_snapshot' of a 'scan_file_tree' is saved in the same
+    transaction. Its scan already compared 'updated_record' to the stored
+    rows, so only the rows in its 'diff' are written or deleted.
+
+    [files Schema]
+        sr_number TEXT NOT NULL,
         name TEXT NOT NULL,
         location TEXT NOT NULL,
         path TEXT NOT NULL,
@@ -3174,57 +5660,440 @@ def update_files(key_val, updated_record):
         size TEXT NOT NULL,
         creation_time TEXT NOT NULL,
         modified_time TEXT NOT NULL,
-        date_range TEXT NOT NULL,
+        date_range TEXT,
         favorite TEXT NOT NULL,
-        notes TEXT NOT NULL
-        ? ADD DEPTH VAL?
-    '''
-    # Get file_table of key_val
-    table_id = query_case(key_val, 'files_table')
-    dbshell, dbcon = open_dbshell()
-    for file in updated_record:
-        dbshell.execute("INSERT INTO " + table_id + """(
-            name,
-            location, 
-            path, 
-            type, 
-            size, 
-            creation_time,
-            modified_time, 
-            date_range,
-            favorite,
-            notes,
-            depth_index)
-            VALUES (?,?,?,?,?,?,?,?,?,?,?);""",
-            (file,
-            updated_record[file]['location'],
-            updated_record[file]['path'],
-            updated_record[file]['type'],
-            updated_record[file]['size'],
-            updated_record[file]['creation_time'],
-            updated_record[file]['modified_time'],
-            updated_record[file]['date_range'],
-            updated_record[file]['favorite'],
-            updated_record[file]['notes'],
-            updated_record[file]['depth_index'],))
-
-    dbcon.commit() # Save changes
-    dbcon.close() # Close connection
-    print(key_val, "*files* table updated in DB")
+        notes TEXT,
+        depth_index INTEGER NOT NULL
+    '''
+    def write_diff(dbshell):
+        diff = dir_snapshot['diff']
+        changed_record = {}
+        for file in diff['added'] + diff['modified']:
+            changed_record[file] = updated_record[file]
+        upsert_file_rows(dbshell, key_val, changed_record)
+        removed_rows = [(key_val, dir_snapshot['location'], path)
+            for path in diff['removed']]
+        dbshell.executemany("""DELETE FROM files
+            WHERE sr_number = (?) AND location = (?) AND path = (?);""",
+            removed_rows)
+        write_dir_snapshot(dbshell, key_val, dir_snapshot)
+        return changed_record, removed_rows
+
+    def write_op(dbshell):
+        if dir_snapshot != None:
+            return write_diff(dbshell)
+        # Read inside the writer's transaction, so the stored rows can't
+        # change between this SELECT and the UPSERT below.
+        dbshell.execute("""SELECT location, path, name, type, size,
+            creation_time, modified_time, depth_index FROM files
+            WHERE sr_number = (?);""", (key_val,))
+        stored_rows = {}
+        for row in dbshell.fetchall():
+            stored_rows[(row[0], row[1])] = row[2:]
+
+        # Only write rows that are new, or have changed.
+        changed_record = {}
+        for file in updated_record:
+            record = updated_record[file]
+            stored_row = stored_rows.get((record['location'], record['path']))
+            if file_record_changed(stored_row, file, record):
+                changed_record[file] = record
+        upsert_file_rows(dbshell, key_val, changed_record)
+
+        # Remove rows of files that were not found in the scan.
+        removed_rows = []
+        if prune_location != None:
+            current_paths = set()
+            for file in updated_record:
+                current_paths.add(updated_record[file]['path'])
+            for location, path in stored_rows:
+                if location == prune_location and path not in current_paths:
+                    removed_rows.append((key_val, location, path))
+            dbshell.executemany("""DELETE FROM files
+                WHERE sr_number = (?) AND location = (?) AND path = (?);""",
+                removed_rows)
+        return changed_record, removed_rows
+    changed_record, removed_rows = DB_WRITER.write(write_op)
+
+    print(key_val, "*files* table updated in DB -", len(changed_record),
+        "rows written,", len(removed_rows), "removed")
+    if len(removed_rows) >= 1000:
+        DB_MAINT.request('update_files')
 
 def update_file(key_val, column, file_name, value):
     '''
     Updates a SINGLE value for file in key_val.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("UPDATE " + table_name + " SET " + column + " = (?) WHERE path = (?)", (value, file_name))
-    dbcon.commit() # Save changes
-    dbcon.close() # Close connection
+    def write_op(dbshell):
+        dbshell.execute("UPDATE files SET " + column + """ = (?)
+            WHERE sr_number = (?) AND path = (?);""",
+            (value, key_val, file_name))
+    DB_WRITER.write(write_op)
     print(key_val, "*files* table updated in DB")
 
+## [ Incremental File Scans ]
+# Dirs, and files, w/ an mtime this close (secs) to the scan that saw them
+# are NOT trusted on the next rescan - NAS and FAT mtimes have a 2 sec.
+# resolution, and a file still being written (such as a download) updates
+# its own mtime, but not its dir's.
+FILE_SCAN_RACY_SECS = 2
+
+def query_dir_snapshots(key_val, location):
+    '''
+    Returns the saved {dir path: (mtime, scan_time, [(name, is_dir)])} of
+    key_val's dirs in 'location', see 'scan_file_tree'.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT path, mtime, scan_time, children
+            FROM dir_snapshots WHERE sr_number = (?) AND location = (?);""",
+            (key_val, location))
+        rows = dbshell.fetchall()
+    snapshots = {}
+    for path, mtime, scan_time, children in rows:
+        snapshots[path] = (mtime, scan_time,
+            [(name, bool(is_dir)) for name, is_dir in json.loads(children)])
+    return snapshots
+
+class ParallelCrawler:
+    '''
+    Thread pool that lists the dirs of a 'scan_file_tree' concurrently. On
+    an SMB share every os.scandir/os.stat waits on a network round trip,
+    so listing one dir at a time leaves the CPU idle.
+
+    No more than 'per_share' calls run against the same share at once, for
+    ALL scans together - a busy case doesn't flood the NAS, while the local
+    downloads folder is crawled at the same time.
+    '''
+    def __init__(self, max_workers=16, per_share=8):
+        self.max_workers = max_workers
+        self.per_share = per_share
+        self.executor = None
+        self.share_limits = {}
+        self.lock = threading.Lock()
+
+    def share_of(self, path):
+        '''
+        Returns the share of 'path' - '\\\\server\\share' for UNC paths, the
+        drive letter for local ones.
+        '''
+        return os.path.splitdrive(path)[0].lower()
+
+    def share_limit(self, path):
+        share = self.share_of(path)
+        with self.lock:
+            if share not in self.share_limits:
+                self.share_limits[share] = threading.BoundedSemaphore(
+                    self.per_share)
+            return self.share_limits[share]
+
+    def submit(self, func, path, cancel=None):
+        '''
+        Runs 'func(path)' on the pool, and returns its Future. Once
+        'cancel' (a threading.Event) is set, queued calls return None
+        w/o running.
+        '''
+        with self.lock:
+            if self.executor == None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='FileCrawler')
+        return self.executor.submit(self.run_limited, func, path, cancel)
+
+    def run_limited(self, func, path, cancel):
+        if cancel != None and cancel.is_set():
+            return None
+        with self.share_limit(path):
+            if cancel != None and cancel.is_set():
+                return None
+            return func(path)
+
+FILE_CRAWLER = ParallelCrawler()
+
+def stat_file_record(location, path, file_stats, depth_index):
+    '''
+    Returns the file record of 'path' from its 'file_stats', as saved in
+    the 'files' table by 'update_files'.
+    '''
+    if stat.S_ISDIR(file_stats.st_mode):
+        _type = "dir"
+    else:
+        _type = os.path.splitext(path)[1]
+    return {
+        'name': os.path.basename(path),
+        'location': location,
+        'path': path,
+        'type': _type,
+        'size': file_stats.st_size,
+        'creation_time': file_stats.st_ctime,
+        'modified_time': file_stats.st_mtime,
+        'date_range': None, # Set in "finalize"
+        'favorite': False,  # Set in "finalize"
+        'notes': None,      # Set in "finalize"
+        'depth_index': depth_index
+    }
+
+def list_dir_records(location, dir_path, depth_index=0):
+    '''
+    Lists ONLY 'dir_path', and returns the records of its entries, in the
+    format of 'scan_file_tree'. Used by the lazy FileBrowser tree to load
+    a dir when it is opened. Returns [] if 'dir_path' can't be read.
+    '''
+    records = []
+    try:
+        with os.scandir(dir_path) as scanner:
+            for dir_entry in scanner:
+                try:
+                    file_stats = dir_entry.stat()
+                except OSError:
+                    continue
+                records.append(stat_file_record(location, dir_entry.path,
+                    file_stats, depth_index))
+    except OSError as error:
+        print("FileScan: unable to list", dir_path, "-", error)
+    return records
+
+def scan_file_tree(key_val, location, root_path, on_entry=None, full=False,
+        cancel=None, crawler=None):
+    '''
+    Scans the 'root_path' folder of key_val in order of nested dir "depth"
+    (the Subdirs of 'FILE1' and 'FILE2' are found before the Sub/Sub/dirs of
+    'FILE1') and returns (file_record, diff, dir_snapshot).
+
+    The mtime and child list of each dir is saved in 'dir_snapshots'. On a
+    rescan, a dir whose mtime has not changed is NOT listed again - its
+    children are read from the 'files' table instead, so a tree where
+    nothing changed costs ONE os.stat per dir. A dir's mtime only changes
+    when entries are added, removed or renamed in it, so a file changed in
+    place is only found if it was still being written during the last scan
+    (see FILE_SCAN_RACY_SECS), or w/ 'full', which lists every dir again.
+
+    Dirs are fetched concurrently by the 'crawler' (default FILE_CRAWLER),
+    but their entries are handled in the same order as a walk of one dir
+    at a time.
+
+    - 'on_entry(path, record)' is called for each entry, parents first.
+    - 'file_record' is {path: record} of the WHOLE tree, for 'update_files'.
+    - 'diff' is {'added': [paths], 'removed': [paths], 'modified': [paths]}
+        compared to the 'files' table.
+    - 'dir_snapshot' is passed to 'update_files', which saves it w/ the
+        'diff' in ONE transaction, so the two can't disagree.
+
+    Returns None if 'cancel' (a threading.Event) is set during the scan.
+    '''
+    if crawler == None:
+        crawler = FILE_CRAWLER
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT path, name, type, size, creation_time,
+            modified_time, depth_index FROM files
+            WHERE sr_number = (?) AND location = (?);""",
+            (key_val, location))
+        stored_rows = {}
+        for row in dbshell.fetchall():
+            stored_rows[row[0]] = row[1:]
+    snapshots = query_dir_snapshots(key_val, location)
+
+    file_record = {}
+    diff = {'added': [], 'removed': [], 'modified': []}
+    new_snapshots = []
+    seen_dirs = set()
+
+    def stat_record(path, file_stats, depth_index):
+        return stat_file_record(location, path, file_stats, depth_index)
+
+    def stored_record(path, row, name=None):
+        _type, size, ctime, mtime, depth_index = row[1:]
+        return {
+            'name': name or os.path.basename(path),
+            'location': location,
+            'path': path,
+            'type': _type,
+            'size': int(size),
+            'creation_time': float(ctime),
+            'modified_time': float(mtime),
+            'date_range': None,
+            'favorite': False,
+            'notes': None,
+            'depth_index': int(depth_index)
+        }
+
+    def add_entry(path, record, stored=False):
+        file_record[path] = record
+        # Records read from 'stored_rows' can't differ from them.
+        if not stored:
+            stored_row = stored_rows.get(path)
+            if stored_row == None:
+                diff['added'].append(path)
+            elif file_record_changed(stored_row, path, record):
+                diff['modified'].append(path)
+        if on_entry != None:
+            on_entry(path, record)
+
+    # [ Crawler threads ] - ONLY file system calls, on the read-only
+    # 'stored_rows' and 'snapshots'.
+    def fetch_snapshot(dir_path):
+        '''
+        Returns ('snapshot', children, racy_stats) if 'dir_path' is
+        unchanged since its snapshot, else None. 'racy_stats' are fresh
+        os.stat's of the files that were still being written then.
+        '''
+        snapshot = snapshots.get(dir_path)
+        if full or snapshot == None:
+            return None
+        mtime, scan_time, children = snapshot
+        try:
+            if os.stat(dir_path).st_mtime != mtime:
+                return None
+        except OSError:
+            return None
+        if mtime >= scan_time - FILE_SCAN_RACY_SECS:
+            return None
+        prefix = os.path.join(dir_path, "")
+        racy_stats = {}
+        for name, is_dir in children:
+            row = stored_rows.get(prefix + name)
+            if row == None:
+                return None
+            try:
+                if (not is_dir
+                        and float(row[4]) >= scan_time - FILE_SCAN_RACY_SECS):
+                    racy_stats[name] = os.stat(prefix + name)
+            except (OSError, TypeError, ValueError):
+                return None
+        return ('snapshot', children, racy_stats)
+
+    def fetch_dir(dir_path):
+        '''
+        Returns the result of 'fetch_snapshot', or lists 'dir_path' and
+        returns ('listed', dir_stats, scan_time, [(path, stats)]), or
+        ('error', error) if it can't be read.
+        '''
+        result = fetch_snapshot(dir_path)
+        if result != None:
+            return result
+        scan_time = time.time()
+        try:
+            dir_stats = os.stat(dir_path)
+            entries = []
+            with os.scandir(dir_path) as scanner:
+                for dir_entry in scanner:
+                    try:
+                        # Served from the dir listing on Windows, w/o an
+                        # extra round trip to the NAS per file.
+                        file_stats = dir_entry.stat()
+                    except OSError:
+                        # Broken links, or files removed mid-scan.
+                        continue
+                    entries.append((dir_entry.path, file_stats))
+        except OSError as error:
+            return ('error', error)
+        return ('listed', dir_stats, scan_time, entries)
+
+    # [ Scanning thread ] - applies the fetched dirs in order.
+    def apply_snapshot(dir_path, depth_index, children, racy_stats):
+        mtime, scan_time = snapshots[dir_path][:2]
+        prefix = os.path.join(dir_path, "")
+        for name, is_dir in children:
+            path = prefix + name
+            if name in racy_stats:
+                add_entry(path, stat_record(path, racy_stats[name],
+                    depth_index))
+                continue
+            record = stored_record(path, stored_rows[path], name)
+            stored = record['depth_index'] == depth_index
+            record['depth_index'] = depth_index
+            add_entry(path, record, stored)
+        # Files that were still being written are settled once a scan sees
+        # them unchanged, so save a new 'scan_time' for the dir.
+        if len(racy_stats) != 0:
+            new_snapshots.append((dir_path, mtime, time.time(), children))
+        return children
+
+    def apply_listing(dir_path, depth_index, dir_stats, scan_time, entries):
+        children = []
+        for path, file_stats in entries:
+            record = stat_record(path, file_stats, depth_index)
+            add_entry(path, record)
+            children.append((os.path.basename(path), record['type'] == 'dir'))
+        new_snapshots.append((dir_path, dir_stats.st_mtime, scan_time,
+            children))
+
+        # The dir's own entry is from the 'files' table if its parent was
+        # unchanged, but it has a new mtime.
+        old_record = file_record.get(dir_path)
+        if (old_record != None
+                and old_record['modified_time'] != dir_stats.st_mtime):
+            record = stat_record(dir_path, dir_stats,
+                old_record['depth_index'])
+            file_record[dir_path] = record
+            if (dir_path not in diff['modified'] and file_record_changed(
+                    stored_rows.get(dir_path), dir_path, record)):
+                diff['modified'].append(dir_path)
+        return children
+
+    # Breadth first - the subdirs of a dir are queued as soon as it is
+    # handled, so the crawler never waits for a whole depth to finish, and
+    # the FIFO keeps the order of a walk one depth at a time.
+    pending = collections.deque([(root_path, 0,
+        crawler.submit(fetch_dir, root_path, cancel))])
+    try:
+        while len(pending) != 0:
+            dir_path, depth_index, future = pending.popleft()
+            result = future.result()
+            if cancel != None and cancel.is_set():
+                print("FileScan:", key_val, location, "scan cancelled")
+                return None
+            seen_dirs.add(dir_path)
+            if result[0] == 'snapshot':
+                children = apply_snapshot(dir_path, depth_index, *result[1:])
+            elif result[0] == 'listed':
+                children = apply_listing(dir_path, depth_index, *result[1:])
+            else:
+                # Unreadable (for now) - keep what is stored below it, so a
+                # NAS hiccup doesn't remove its files from the DB.
+                print("FileScan: unable to list", dir_path, "-", result[1])
+                prefix = os.path.join(dir_path, "")
+                for path, row in stored_rows.items():
+                    if path.startswith(prefix):
+                        file_record[path] = stored_record(path, row)
+                        seen_dirs.add(path)
+                continue
+            for name, is_dir in children:
+                if is_dir:
+                    path = os.path.join(dir_path, name)
+                    pending.append((path, depth_index + 1,
+                        crawler.submit(fetch_dir, path, cancel)))
+    finally:
+        for dir_path, depth_index, future in pending:
+            future.cancel()
+
+    for path in stored_rows:
+        if path not in file_record:
+            diff['removed'].append(path)
+    dir_snapshot = {
+        'location': location,
+        'diff': diff,
+        'write': new_snapshots,
+        'drop': [path for path in snapshots if path not in seen_dirs],
+    }
+    return file_record, diff, dir_snapshot
+
+def write_dir_snapshot(dbshell, key_val, dir_snapshot):
+    '''
+    Saves the 'dir_snapshot' of a 'scan_file_tree' on the given 'dbshell'.
+
+    *NOTE: Does NOT commit, the caller owns the transaction.
+    '''
+    location = dir_snapshot['location']
+    dbshell.executemany("""INSERT OR REPLACE INTO dir_snapshots (sr_number,
+        location, path, mtime, scan_time, children)
+        VALUES (?,?,?,?,?,?);""", [(key_val, location, path, mtime,
+        scan_time, json.dumps([[name, int(is_dir)] for name, is_dir
+        in children])) for path, mtime, scan_time, children
+        in dir_snapshot['write']])
+    dbshell.executemany("""DELETE FROM dir_snapshots
+        WHERE sr_number = (?) AND location = (?) AND path = (?);""",
+        [(key_val, location, path) for path in dir_snapshot['drop']])
+
 def query_all_files(key_val):
     '''
     Returns ALL rows and values for each file in key_val in order of file
@@ -3232,136 +6101,110 @@ def query_all_files(key_val):
     in ANY parent file. Tk_Filebrowser handles putting the correct files under
     the right parent tree.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
     # DB contents
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM " + table_name + " ORDER BY depth_index ASC, type DESC;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + FILES_COLUMNS + """ FROM files
+            WHERE sr_number = (?)
+            ORDER BY depth_index ASC, type DESC;""",
+            (key_val,))
+        result = dbshell.fetchall()
     return result # Results are tuples containing all columns per tuple.
 
+def query_file_records(key_val, location):
+    '''
+    Returns the saved records of key_val's files in 'location', in the
+    format of 'scan_file_tree' and in order of 'depth_index', so parents come
+    before their children. Lets the FileBrowser render the last known tree
+    before the folder is scanned again.
+    '''
+    columns = [column.strip() for column in FILES_COLUMNS.split(",")]
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + FILES_COLUMNS + """ FROM files
+            WHERE sr_number = (?) AND location = (?)
+            ORDER BY depth_index ASC, type DESC;""",
+            (key_val, location))
+        rows = dbshell.fetchall()
+    records = []
+    for row in rows:
+        record = dict(zip(columns, row))
+        record['size'] = int(record['size'])
+        record['creation_time'] = float(record['creation_time'])
+        record['modified_time'] = float(record['modified_time'])
+        records.append(record)
+    return records
+
 def query_all_files_column(key_val, column):
     '''
     Returns a list of the value found in 'column' for a target 'key_val' 
-    in the 'filesX' table of the DB.
-    '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM " + table_name + " ;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    in the 'files' table of the DB.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + " FROM files WHERE sr_number = (?);",
+            (key_val,))
+        result = dbshell.fetchall()
     # Correct result formatting into a direct list obj.
     final_result = []
     for item in result:
         final_result.append(item[0])
 
-    return final_result # Results are tuples containing all columns per tuple.
+    return final_result
 
-def query_all_files_local(key_val, column):
+def query_all_files_location(key_val, column, location, depth=None):
     '''
     Returns a list of the value found in 'column' for a target 'key_val' 
-    in the 'filesX' table of the DB filtered by local files ONLY.
-    '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " 
-        + column 
-        + " FROM " 
-        + table_name 
-        + " WHERE location = (?) ;",
-        ('local',))
-    result = dbshell.fetchall()
-    dbcon.close()
+    in the 'files' table of the DB filtered by 'location', and optionally by
+    the 'depth' index. Backed by the (sr_number, location, depth_index) index.
+    '''
+    with BCAMP_DB.shell() as dbshell:
+        if depth == None:
+            dbshell.execute("SELECT " + column + """ FROM files
+                WHERE sr_number = (?) AND location = (?);""",
+                (key_val, location))
+        else:
+            dbshell.execute("SELECT " + column + """ FROM files
+                WHERE sr_number = (?) AND location = (?) AND depth_index = (?);""",
+                (key_val, location, depth))
+        result = dbshell.fetchall()
     # Correct result formatting into a direct list obj.
     final_result = []
     for item in result:
         final_result.append(item[0])
 
-    return final_result # Results are tuples containing all columns per tuple.
+    return final_result
 
-def query_all_files_remote(key_val, column):
+def query_all_files_local(key_val, column):
     '''
     Returns a list of the value found in 'column' for a target 'key_val' 
-    in the 'filesX' table of the DB filtered by remote files ONLY.
-    '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " 
-        + column 
-        + " FROM " 
-        + table_name 
-        + " WHERE location = (?) ;",
-        ('remote',))
-    result = dbshell.fetchall()
-    dbcon.close()
-    # Correct result formatting into a direct list obj.
-    final_result = []
-    for item in result:
-        final_result.append(item[0])
+    in the 'files' table of the DB filtered by local files ONLY.
+    '''
+    return query_all_files_location(key_val, column, 'local')
 
-    return final_result # Results are tuples containing all columns per tuple.
+def query_all_files_remote(key_val, column):
+    '''
+    Returns a list of the value found in 'column' for a target 'key_val' 
+    in the 'files' table of the DB filtered by remote files ONLY.
+    '''
+    return query_all_files_location(key_val, column, 'remote')
 
 def query_all_files_local_depth(key_val, column, depth):
     '''
     Returns a list of the value found in 'column' for a target 'key_val' 
-    in the 'filesX' table of the DB filtered by local files and provided
+    in the 'files' table of the DB filtered by local files and provided
     depth index.
 
     depth=0 returns root local files.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " 
-        + column 
-        + " FROM " 
-        + table_name 
-        + " WHERE location = (?) AND depth_index = (?);",
-        ('local', depth))
-    result = dbshell.fetchall()
-    dbcon.close()
-    # Correct result formatting into a direct list obj.
-    final_result = []
-    for item in result:
-        final_result.append(item[0])
-
-    return final_result # Results are tuples containing all columns per tuple.
+    return query_all_files_location(key_val, column, 'local', depth)
 
 def query_all_files_remote_depth(key_val, column, depth):
     '''
     Returns a list of the value found in 'column' for a target 'key_val' 
-    in the 'filesX' table of the DB filtered by remote files and provided
+    in the 'files' table of the DB filtered by remote files and provided
     depth index.
 
     depth=0 returns root remote files.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " 
-        + column 
-        + " FROM " 
-        + table_name 
-        + " WHERE location = (?) AND depth_index = (?);",
-        ('remote', depth))
-    result = dbshell.fetchall()
-    dbcon.close()
-    # Correct result formatting into a direct list obj.
-    final_result = []
-    for item in result:
-        final_result.append(item[0])
-
-    return final_result # Results are tuples containing all columns per tuple.
+    return query_all_files_location(key_val, column, 'remote', depth)
 
 def query_all_files_formatted(key_val):
     '''
@@ -3374,44 +6217,33 @@ def query_all_files_formatted(key_val):
 
     The formatted variant returns the results as a python dict object.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    # DB contents
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM " + table_name + " ORDER BY depth_index ASC, type DESC;")
-    result = dbshell.fetchall()
-    dbcon.close()
-    return result # Results are tuples containing all columns per tuple.
+    return query_all_files(key_val)
 
 def query_file(key_val, column, file_name):
     '''
     Returns a SINGLE value for file in key_val.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM " + table_name + " WHERE path = (?)", (file_name,))
-    result = dbshell.fetchone()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + """ FROM files
+            WHERE sr_number = (?) AND path = (?);""",
+            (key_val, file_name))
+        result = dbshell.fetchone()
     if result == None:
         return result
     return result[0] # Results are tuples containing all columns per tuple.
 
 def query_dump_notes(key_val, column):
     '''
-    Returns a all rows* using a filter.
-
-    dbshell.execute("SELECT " + column + " FROM " + table_name + " WHERE = (?)", sql_filter)
+    Returns a all rows* of 'key_val' that have notes. 'column' of "*"
+    returns the FILES_COLUMNS.
     '''
-    # Remove "-" from key_val
-    form_key_val = str(key_val).replace("-", "")
-    table_name = "files" + form_key_val
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM " + table_name + " WHERE notes IS NOT NULL")
-    result = dbshell.fetchall()
-    dbcon.close()
+    if column == "*":
+        column = FILES_COLUMNS
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + """ FROM files
+            WHERE sr_number = (?) AND notes IS NOT NULL;""",
+            (key_val,))
+        result = dbshell.fetchall()
     return result # Results are tuples containing all columns per tuple.
 
 # ["favorite_files"] Table Queries
@@ -3419,10 +6251,9 @@ def get_fav_files():
     '''
     Returns all files and paths with the favorite_files table.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM bcamp_favfiles;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT * FROM bcamp_favfiles;")
+        result = dbshell.fetchall()
     return result
 
 def add_fav_file(key_val, file_path):
@@ -3440,13 +6271,11 @@ def add_fav_file(key_val, file_path):
     root_path = dir_path.replace(key_val, '', 1) # Only remove key_val once.
 
     # Add to SQLite3 "favorite_files" table.
-    dbshell, dbcon = open_dbshell()
-    
-    dbshell.execute("""INSERT INTO bcamp_favfiles (file_name, root_path) 
-        VALUES (?,?);""", (fname, root_path))
+    def write_op(dbshell):
+        dbshell.execute("""INSERT INTO bcamp_favfiles (file_name, root_path) 
+            VALUES (?,?);""", (fname, root_path))
+    DB_WRITER.write(write_op)
 
-    dbcon.commit() # save changes
-    dbcon.close()
     print("SQLite3: *bcamp_favfiles*:", fname, "added to DB.")
 
 def remove_fav_file(file_path):
@@ -3455,10 +6284,9 @@ def remove_fav_file(file_path):
     table.
     '''
     fname = os.path.basename(file_path)
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("DELETE FROM bcamp_favfiles WHERE file_name = (?);", (fname,))
-    dbcon.commit() # save changes
-    dbcon.close()
+    def write_op(dbshell):
+        dbshell.execute("DELETE FROM bcamp_favfiles WHERE file_name = (?);", (fname,))
+    DB_WRITER.write(write_op)
 
 
 '''
@@ -3774,11 +6602,10 @@ def query_parser(rule_id, column):
     Returns a single column from the Automations table for the defined
     target automations.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT " + column + " FROM bcamp_parser WHERE id = (?);", 
-        (rule_id,))
-    result = dbshell.fetchone()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + column + " FROM bcamp_parser WHERE id = (?);", 
+            (rule_id,))
+        result = dbshell.fetchone()
     return result[0] # Results are tuples, but we expect ONLY 1 value here.
 
 def update_parser(rule_id, column, value):
@@ -3786,21 +6613,18 @@ def update_parser(rule_id, column, value):
     Updates a column value for a specific parsing rule with the new 
     'value' variable
     '''
-    dbshell, dbcon = open_dbshell()
-    
-    dbshell.execute("UPDATE bcamp_parser SET " + column + " = (?) WHERE id = (?)", (value, rule_id))
-    dbcon.commit() # save changes
-    dbcon.close()
+    def write_op(dbshell):
+        dbshell.execute("UPDATE bcamp_parser SET " + column + " = (?) WHERE id = (?)", (value, rule_id))
+    DB_WRITER.write(write_op)
     print("SQLite3: *bcamp_parser*:", rule_id, column, "=", value)
 
 def dump_parser():
     '''
     Returns ALL records in the 'bcamp_parser' table as a python dict Obj.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("SELECT * FROM bcamp_parser;")
-    result = dbshell.fetchall()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT * FROM bcamp_parser;")
+        result = dbshell.fetchall()
 
     # Extracting Ruleset parameters for each rule.
     # all values are strings, even if saved as int. 
@@ -3829,24 +6653,23 @@ def create_parser_rule(rule_dict):
     DB query that takes values from the UI, and populates a new row in the
     'bcamp_parser' table
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute("""INSERT INTO bcamp_parser(
-                id,
-                type,
-                return,
-                target,
-                rule) 
-                VALUES (?,?,?,?,?);""",
-                (
-                rule_dict['id'], 
-                rule_dict['type'],
-                rule_dict['return'],
-                rule_dict['target'],
-                rule_dict['rule']
+    def write_op(dbshell):
+        dbshell.execute("""INSERT INTO bcamp_parser(
+                    id,
+                    type,
+                    return,
+                    target,
+                    rule) 
+                    VALUES (?,?,?,?,?);""",
+                    (
+                    rule_dict['id'], 
+                    rule_dict['type'],
+                    rule_dict['return'],
+                    rule_dict['target'],
+                    rule_dict['rule']
+                    )
                 )
-            )
-    dbcon.commit() # Save Changes
-    dbcon.close()
+    DB_WRITER.write(write_op)
 
     print("SQLite3: *bcamp_parser* updated!")
 
@@ -3855,20 +6678,19 @@ def update_parser_rule(rule_id, rule_dict):
     Updates all columns for a specific rule_id based on what was configured
     within the UI by the user.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute('''UPDATE bcamp_parser SET
-        type = (?),
-        return = (?),
-        target = (?),
-        rule = (?) WHERE id = (?)''',
-        (rule_dict['type'],
-        rule_dict['return'],
-        rule_dict['target'],
-        rule_dict['rule'],
-        rule_id)
-        )
-    dbcon.commit() # save changes
-    dbcon.close()
+    def write_op(dbshell):
+        dbshell.execute('''UPDATE bcamp_parser SET
+            type = (?),
+            return = (?),
+            target = (?),
+            rule = (?) WHERE id = (?)''',
+            (rule_dict['type'],
+            rule_dict['return'],
+            rule_dict['target'],
+            rule_dict['rule'],
+            rule_id)
+            )
+    DB_WRITER.write(write_op)
     print("SQLite3: *bcamp_parser*:", rule_id, "updated with new values.")
 
 def del_parser_rule(rule_id):
@@ -3877,11 +6699,10 @@ def del_parser_rule(rule_id):
     'bcamp_parser' table. Used mainly by settings menu when users delete rules
     from their ruleset.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute('''DELETE FROM bcamp_parser WHERE id = (?)''',
-        (rule_id,))
-    dbcon.commit() # Save Changes
-    dbcon.close()
+    def write_op(dbshell):
+        dbshell.execute('''DELETE FROM bcamp_parser WHERE id = (?)''',
+            (rule_id,))
+    DB_WRITER.write(write_op)
     print("SQLite3: *bcamp_parser* rule", rule_id, "deleted!")
 
 def get_max_prule():
@@ -3889,10 +6710,9 @@ def get_max_prule():
     Convenience method to return the highest value in the 'id' column of the
     'bcamp_parser' table for new rule generation.
     '''
-    dbshell, dbcon = open_dbshell()
-    dbshell.execute('''SELECT MAX(id) FROM bcamp_parser''')
-    result = dbshell.fetchone()
-    dbcon.close()
+    with BCAMP_DB.shell() as dbshell:
+        dbshell.execute('''SELECT MAX(id) FROM bcamp_parser''')
+        result = dbshell.fetchone()
 
     return result[0]
 
@@ -4273,8 +7093,9 @@ def scrub_fpath(file_path, key_val):
     '''
     # Determine 'clean_path' - This is the parent file *AFTER* the 
     # remote/local dir.
-    r_root = query_case(key_val, 'remote_path')
-    l_root = query_case(key_val, 'local_path')
+    case = get_case_record(key_val)
+    r_root = case.remote_path
+    l_root = case.local_path
     print("$.scrub", file_path)
 
     if r_root in file_path:
@@ -4300,12 +7121,13 @@ def check_newfiles(key_val):
     If the result is '>' than the "last_file_count", this method returns True. 
     '''
     #First, store the "last_file_count" number from the DB.
-    og_count = query_case(key_val, 'last_file_count')
+    case = get_case_record(key_val)
+    og_count = case.last_file_count
     print("$\nog>", og_count)
 
     #Second, count the number of files or dirs present at root only.
         #Getting key_val root path
-    rootpath = query_case(key_val, 'remote_path')
+    rootpath = case.remote_path
         #Counting...
     try:
         fresh_count = len(os.listdir(rootpath))
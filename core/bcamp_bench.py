@@ -0,0 +1,2967 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Welcome to 'bcamp_bench.py'. This module contains benchmarks for the DB and
+API layer of Basecamp. Every benchmark runs against a SYNTHETIC 'basecamp.db'
+created in a temp. directory, so the prod. DB is never touched.
+
+Usage:
+    python bcamp_bench.py <benchmark> [--cases N] [--calls N]
+    python bcamp_bench.py all
+    python bcamp_bench.py suite [--scales 500,2000,5000] [--files N]
+        [--json results.json] [--compare baseline.json]
+    python bcamp_bench.py gen --cases N [--files N] [--db-dir DIR]
+
+'suite' times the CaseViewer search/render path on SKEWED synthetic DB's of
+several sizes, see 'create_synthetic_db', and saves the results as JSON to
+compare against later runs. 'gen' only builds a synthetic DB, and keeps it.
+'''
+#Private Imports
+import bcamp_api
+import bcamp_setup
+
+#Public Imports
+import io
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import types
+import pickle
+import random
+import shutil
+import sqlite3
+import argparse
+import datetime
+import platform
+import contextlib
+import tempfile
+import threading
+
+'''
+[ Synthetic DB ]
+'''
+BENCH_ACCOUNTS = ['US Bank', 'TelBank', 'Acme Corp', 'Globex', 'Initech',
+    'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Ent', 'Cyberdyne']
+BENCH_PRODUCTS = ['MWG', 'ePO', 'NSM', 'ENS', 'DLP', 'ATD', 'SIEM']
+BENCH_TAGS = ['escalated', 'perf', 'crash', 'upgrade', 'hotfix', 'ssl',
+    'memleak', 'proxy', 'auth', 'logging']
+BENCH_JIRA_STATUS = [None, 'Open', 'In Progress', 'Need Info', 'Closed']
+
+def gen_sr_number(index):
+    '''
+    Returns a fake 13 character SR number such as '4-00000000042'
+    '''
+    return "4-" + str(index).zfill(11)
+
+def create_bench_db(case_count=500, db_dir=None, seed=1):
+    '''
+    Creates a new 'basecamp.db' w/ the default schema in 'db_dir' (or a new
+    temp. dir.), points 'bcamp_api.BCAMP_DB' to it, and populates the cases
+    and tags tables with 'case_count' synthetic cases.
+
+    Returns the path of the new DB.
+    '''
+    if db_dir == None:
+        db_dir = tempfile.mkdtemp(prefix='bcamp_bench_')
+    db_path = os.path.join(db_dir, 'basecamp.db')
+    bcamp_setup.CreateDB(db_path)
+
+    rand = random.Random(seed)
+    case_rows = []
+    tag_rows = []
+    for index in range(case_count):
+        sr_number = gen_sr_number(index)
+        bug_id = None
+        if rand.random() < 0.3:
+            bug_id = 'TSNS-' + str(rand.randint(100000, 999999))
+        case_rows.append((
+            sr_number,
+            "\\\\bench\\remote\\" + sr_number,
+            "\\\\bench\\downloads\\" + sr_number,
+            int(rand.random() < 0.1),
+            rand.choice(BENCH_PRODUCTS),
+            rand.choice(BENCH_ACCOUNTS),
+            bug_id,
+            str(rand.randint(0, 500)),
+            rand.choice(BENCH_JIRA_STATUS) if bug_id != None else None,
+            int(rand.random() < 0.05),
+            int(rand.random() < 0.05),
+        ))
+        for tag in rand.sample(BENCH_TAGS, rand.randint(0, 3)):
+            tag_rows.append((tag, sr_number))
+
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.executemany("""INSERT INTO cases (
+            sr_number,
+            remote_path,
+            local_path,
+            pinned,
+            product,
+            account,
+            bug_id,
+            last_file_count,
+            jira_status,
+            jira_notify_flag,
+            file_notify_flag)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?);""", case_rows)
+        dbshell.executemany("INSERT INTO tags (tag, sr_number) VALUES (?,?);",
+            tag_rows)
+    # The FTS segments of the inserts are merged by the first DB_MAINT pass
+    # of an in-use DB.
+    bcamp_api.DB_MAINT.merge_fts()
+    return db_path
+
+def gen_file_records(sr_number, file_count, location='remote', seed=1):
+    '''
+    Returns a synthetic file record for 'sr_number' in the same format the
+    FileBrowser passes to 'bcamp_api.update_files'. Files are spread across
+    a few nested dirs with depth_index 0-3.
+    '''
+    rand = random.Random(str(seed) + sr_number)
+    root = "\\\\bench\\" + location + "\\" + sr_number
+    dirs = [(root, -1)]
+    records = {}
+    for index in range(file_count):
+        parent, parent_depth = rand.choice(dirs)
+        is_dir = parent_depth < 2 and rand.random() < 0.1
+        name = ("dir" if is_dir else "file") + str(index)
+        path = parent + "\\" + name + ("" if is_dir else ".log")
+        if is_dir:
+            dirs.append((path, parent_depth + 1))
+        records[path] = {
+            'location': location,
+            'path': path,
+            'type': 'dir' if is_dir else '.log',
+            'size': 0 if is_dir else rand.randint(100, 10000000),
+            'creation_time': 1600000000 + index,
+            'modified_time': 1600000000 + index,
+            'date_range': None,
+            'favorite': False,
+            'notes': None,
+            'depth_index': parent_depth + 1,
+        }
+    return records
+
+'''
+[ Helpers ]
+'''
+def timed(func, calls):
+    '''
+    Runs 'func' for 'calls' iterations and returns the elapsed seconds.
+    '''
+    start = time.perf_counter()
+    for index in range(calls):
+        func(index)
+    return time.perf_counter() - start
+
+def timed_threads(func, calls, thread_count):
+    '''
+    Same as 'timed', but splits 'calls' across 'thread_count' threads to
+    mimic the UI, FileOps, CasePoll and Import threads querying together.
+    '''
+    per_thread = calls // thread_count
+    threads = []
+    for index in range(thread_count):
+        threads.append(threading.Thread(target=timed,
+            args=(func, per_thread)))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def print_results(title, results):
+    '''
+    Prints a [(label, seconds, calls)] list as a simple table.
+    '''
+    print("\n[", title, "]")
+    for label, seconds, calls in results:
+        print("  {:<40} {:>9.1f} ms total {:>9.1f} us/call".format(
+            label, seconds * 1000, (seconds / calls) * 1000000))
+
+'''
+[ Benchmarks ]
+'''
+def bench_connections(case_count, calls):
+    '''
+    Compares the old 'connect -> query -> close' pattern used by every
+    bcamp_api query against the thread-aware 'BCAMP_DB' pool. Uses the
+    same single row SELECT as 'bcamp_api.query_case'.
+    '''
+    db_path = create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    query = "SELECT remote_path FROM cases WHERE sr_number = (?);"
+
+    def per_call_connect(index):
+        db_con = sqlite3.connect(db_path)
+        dbshell = db_con.cursor()
+        dbshell.execute(query, (sr_numbers[index % case_count],))
+        dbshell.fetchone()
+        db_con.close()
+
+    def pooled(index):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute(query, (sr_numbers[index % case_count],))
+            dbshell.fetchone()
+
+    results = [
+        ('per-call connect (1 thread)', timed(per_call_connect, calls), calls),
+        ('BCAMP_DB pool (1 thread)', timed(pooled, calls), calls),
+        ('per-call connect (4 threads)',
+            timed_threads(per_call_connect, calls, 4), calls),
+        ('BCAMP_DB pool (4 threads)', timed_threads(pooled, calls, 4), calls),
+    ]
+    print_results("Connections - " + str(calls) + " query_case() calls",
+        results)
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_config(case_count, calls):
+    '''
+    Compares the uncached 'get_config' SELECT against 'bcamp_api.get_config'
+    served from 'BCAMP_CONFIG', including a write-through 'update_config'.
+    '''
+    create_bench_db(case_count)
+    columns = ['download_root', 'remote_root', 'time_format', 'dev_mode',
+        'user_texteditor']
+
+    def uncached(index):
+        column = columns[index % len(columns)]
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT " + column + """
+                FROM bcamp_config ORDER BY """ + column + """ ASC LIMIT 1;""")
+            dbshell.fetchone()
+
+    def cached(index):
+        bcamp_api.get_config(columns[index % len(columns)])
+
+    results = [
+        ('uncached SELECT (1 thread)', timed(uncached, calls), calls),
+        ('BCAMP_CONFIG (1 thread)', timed(cached, calls), calls),
+        ('uncached SELECT (4 threads)', timed_threads(uncached, calls, 4),
+            calls),
+        ('BCAMP_CONFIG (4 threads)', timed_threads(cached, calls, 4), calls),
+    ]
+    print_results("Config - " + str(calls) + " get_config() calls", results)
+
+    # Write-through check, a read after the write must return the new value.
+    bcamp_api.update_config('time_format', r"%d/%m/%y")
+    assert bcamp_api.get_config('time_format') == r"%d/%m/%y"
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_files_table(case_count, calls, files_per_case=200):
+    '''
+    Compares the old per-SR "filesX" tables against the single, indexed
+    'files' table for the FileBrowser/Parser queries, using 'case_count'
+    SRs with 'files_per_case' file records each.
+    '''
+    # New layout, populated through the API.
+    create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    all_records = {}
+    for sr_number in sr_numbers:
+        all_records[sr_number] = gen_file_records(sr_number, files_per_case)
+        bcamp_api.update_files(sr_number, all_records[sr_number])
+
+    # Old layout, one table per SR in a second DB.
+    legacy_pool = bcamp_api.DBConnectionPool(os.path.join(
+        tempfile.mkdtemp(prefix='bcamp_bench_'), 'legacy.db'))
+    with legacy_pool.shell() as dbshell:
+        for sr_number in sr_numbers:
+            table_name = "files" + sr_number.replace('-', '')
+            dbshell.execute("CREATE TABLE " + table_name + """(
+                name TEXT NOT NULL, location TEXT NOT NULL,
+                path TEXT NOT NULL, type TEXT NOT NULL, size TEXT NOT NULL,
+                creation_time TEXT NOT NULL, modified_time TEXT NOT NULL,
+                date_range TEXT, favorite TEXT NOT NULL, notes TEXT,
+                depth_index TEXT NOT NULL,
+                UNIQUE(path, location) ON CONFLICT IGNORE);""")
+            records = all_records[sr_number]
+            dbshell.executemany("INSERT INTO " + table_name
+                + " VALUES (?,?,?,?,?,?,?,?,?,?,?);",
+                [(path, rec['location'], path, rec['type'], rec['size'],
+                rec['creation_time'], rec['modified_time'], rec['date_range'],
+                rec['favorite'], rec['notes'], rec['depth_index'])
+                for path, rec in records.items()])
+    paths = [(sr_number, path) for sr_number in sr_numbers
+        for path in list(all_records[sr_number])[:5]]
+
+    def legacy_depth(index):
+        sr_number = sr_numbers[index % case_count]
+        with legacy_pool.shell() as dbshell:
+            dbshell.execute("SELECT path FROM files" + sr_number.replace('-', '')
+                + " WHERE location = (?) AND depth_index = (?);", ('remote', 0))
+            dbshell.fetchall()
+
+    def new_depth(index):
+        bcamp_api.query_all_files_remote_depth(
+            sr_numbers[index % case_count], 'path', 0)
+
+    def legacy_file(index):
+        sr_number, path = paths[index % len(paths)]
+        with legacy_pool.shell() as dbshell:
+            dbshell.execute("SELECT notes FROM files" + sr_number.replace('-', '')
+                + " WHERE path = (?)", (path,))
+            dbshell.fetchone()
+
+    def new_file(index):
+        sr_number, path = paths[index % len(paths)]
+        bcamp_api.query_file(sr_number, 'notes', path)
+
+    def legacy_cold_open(index):
+        # New connection, so the schema of every table is parsed again.
+        db_con = legacy_pool.connect()
+        db_con.execute("SELECT count(*) FROM files"
+            + sr_numbers[index % case_count].replace('-', '')).fetchone()
+        db_con.close()
+
+    def new_cold_open(index):
+        db_con = bcamp_api.BCAMP_DB.connect()
+        db_con.execute("SELECT count(*) FROM files WHERE sr_number = (?)",
+            (sr_numbers[index % case_count],)).fetchone()
+        db_con.close()
+
+    def legacy_cross_case(index):
+        with legacy_pool.shell() as dbshell:
+            for sr_number in sr_numbers:
+                dbshell.execute("SELECT count(*) FROM files"
+                    + sr_number.replace('-', '') + " WHERE notes IS NOT NULL;")
+                dbshell.fetchone()
+
+    def new_cross_case(index):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("""SELECT sr_number, count(*) FROM files
+                WHERE notes IS NOT NULL GROUP BY sr_number;""")
+            dbshell.fetchall()
+
+    cold_calls = max(calls // 100, 1)
+    cross_calls = max(calls // 500, 1)
+    results = [
+        ('filesX - root depth query', timed(legacy_depth, calls), calls),
+        ('files - root depth query', timed(new_depth, calls), calls),
+        ('filesX - query_file()', timed(legacy_file, calls), calls),
+        ('files - query_file()', timed(new_file, calls), calls),
+        ('filesX - connect + 1st query', timed(legacy_cold_open, cold_calls),
+            cold_calls),
+        ('files - connect + 1st query', timed(new_cold_open, cold_calls),
+            cold_calls),
+        ('filesX - notes across all SRs', timed(legacy_cross_case,
+            cross_calls), cross_calls),
+        ('files - notes across all SRs', timed(new_cross_case, cross_calls),
+            cross_calls),
+    ]
+    print_results("Files Table - " + str(case_count) + " SRs x "
+        + str(files_per_case) + " files", results)
+    legacy_pool.close_all()
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_file_upsert(case_count, calls, files_per_case=20000):
+    '''
+    Compares the old row-by-row INSERT in 'update_files' against the bulk
+    UPSERT for an SR with 'files_per_case' extracted files. Times the first
+    write, and a refresh where 10% of the files grew and 5% were deleted,
+    then checks the stored records match the last scan.
+
+    The old refresh conflicts on every row and writes nothing, so it is
+    also timed doing the same writes as the bulk refresh, one statement per
+    file. The bulk refresh w/o a scan diff reads and compares EVERY stored
+    row first - the FileBrowser passes the diff of 'scan_file_tree'
+    instead, which is timed last.
+    '''
+    create_bench_db(case_count)
+    sr_number = gen_sr_number(0)
+    records = gen_file_records(sr_number, files_per_case)
+
+    # Refreshed scan, some files grew and some were removed.
+    rand = random.Random(2)
+    refreshed = {}
+    for path, record in records.items():
+        roll = rand.random()
+        if roll < 0.05:
+            continue # Deleted
+        record = dict(record)
+        if roll < 0.15 and record['type'] != 'dir':
+            record['size'] = record['size'] + 4096
+            record['modified_time'] = record['modified_time'] + 60
+        refreshed[path] = record
+
+    def row_by_row(file_record):
+        # The pre-bulk 'update_files', one execute() per file.
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            for file in file_record:
+                record = file_record[file]
+                dbshell.execute("""INSERT INTO files (sr_number, name,
+                    location, path, type, size, creation_time, modified_time,
+                    date_range, favorite, notes, depth_index)
+                    VALUES (?,?,?,?,?,?,?,?,?,?,?,?);""",
+                    (sr_number, file, record['location'], record['path'],
+                    record['type'], record['size'], record['creation_time'],
+                    record['modified_time'], record['date_range'],
+                    record['favorite'], record['notes'],
+                    record['depth_index']))
+
+    def row_by_row_writes(file_record):
+        # The same writes as 'update_files', one execute() per file.
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            for file in file_record:
+                record = file_record[file]
+                dbshell.execute("""UPDATE files SET name = (?), type = (?),
+                    size = (?), creation_time = (?), modified_time = (?),
+                    depth_index = (?) WHERE sr_number = (?)
+                    AND location = (?) AND path = (?);""",
+                    (file, record['type'], record['size'],
+                    record['creation_time'], record['modified_time'],
+                    record['depth_index'], sr_number, record['location'],
+                    record['path']))
+            dbshell.execute("""SELECT path FROM files
+                WHERE sr_number = (?) AND location = 'remote';""",
+                (sr_number,))
+            for row in dbshell.fetchall():
+                if row[0] not in file_record:
+                    dbshell.execute("""DELETE FROM files WHERE sr_number = (?)
+                        AND location = 'remote' AND path = (?);""",
+                        (sr_number, row[0]))
+
+    def clear_files():
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("DELETE FROM files;")
+
+    # The diff 'scan_file_tree' would return for the refresh.
+    diff = {'added': [], 'removed': [], 'modified': []}
+    for path in records:
+        if path not in refreshed:
+            diff['removed'].append(path)
+        elif refreshed[path]['size'] != records[path]['size']:
+            diff['modified'].append(path)
+    dir_snapshot = {'location': 'remote', 'diff': diff, 'write': [],
+        'drop': []}
+
+    results = []
+    results.append(('row-by-row - first write',
+        timed(lambda index: row_by_row(records), 1), len(records)))
+    results.append(('row-by-row - refresh',
+        timed(lambda index: row_by_row(refreshed), 1), len(refreshed)))
+    # Old path can not update or remove rows, count the stale ones.
+    stale = count_stale_rows(sr_number, refreshed)
+    results.append(('row-by-row - refresh, same writes',
+        timed(lambda index: row_by_row_writes(refreshed), 1),
+        len(refreshed)))
+    assert count_stale_rows(sr_number, refreshed) == 0
+    clear_files()
+    results.append(('bulk upsert - first write',
+        timed(lambda index: bcamp_api.update_files(sr_number, records,
+        'remote'), 1), len(records)))
+    results.append(('bulk upsert - refresh',
+        timed(lambda index: bcamp_api.update_files(sr_number, refreshed,
+        'remote'), 1), len(refreshed)))
+    results.append(('bulk upsert - refresh, no changes',
+        timed(lambda index: bcamp_api.update_files(sr_number, refreshed,
+        'remote'), 1), len(refreshed)))
+    stale_bulk = count_stale_rows(sr_number, refreshed)
+    clear_files()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.update_files(sr_number, records, 'remote')
+    results.append(('bulk upsert - refresh from scan diff',
+        timed(lambda index: bcamp_api.update_files(sr_number, refreshed,
+        'remote', dir_snapshot), 1), len(refreshed)))
+    assert count_stale_rows(sr_number, refreshed) == 0
+    print_results("File Upsert - " + str(files_per_case) + " files", results)
+    print("  stale rows after refresh: row-by-row", stale, "/ bulk upsert",
+        stale_bulk)
+    bcamp_api.BCAMP_DB.close_all()
+
+def count_stale_rows(sr_number, file_record):
+    '''
+    Returns the number of rows for sr_number that do not match 'file_record'
+    (wrong size/mtime, or files that no longer exist).
+    '''
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT path, size, modified_time FROM files
+            WHERE sr_number = (?);""", (sr_number,))
+        rows = dbshell.fetchall()
+    stale = 0
+    for path, size, modified_time in rows:
+        if path not in file_record:
+            stale += 1
+        elif (str(file_record[path]['size']) != str(size) or
+                str(file_record[path]['modified_time']) != str(modified_time)):
+            stale += 1
+    return stale
+
+def bench_case_cache(case_count, calls):
+    '''
+    Compares 'scrub_fpath' (called by SimpleParser for EVERY file) using the
+    old two query_case() round trips against the CaseRecord cache, and
+    reports the cache hit/miss counters.
+    '''
+    create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    # SimpleParser walks all files of ONE SR at a time.
+    file_paths = []
+    for sr_number in sr_numbers[:10]:
+        for index in range(calls // 10):
+            file_paths.append((sr_number, "\\\\bench\\remote\\"
+                + sr_number + "\\logs\\file" + str(index) + ".log"))
+
+    def column_queries(index):
+        sr_number, file_path = file_paths[index % len(file_paths)]
+        for column in ('remote_path', 'local_path'):
+            with bcamp_api.BCAMP_DB.shell() as dbshell:
+                dbshell.execute("SELECT " + column
+                    + " FROM cases WHERE sr_number = (?);", (sr_number,))
+                dbshell.fetchone()[0]
+
+    def cached(index):
+        sr_number, file_path = file_paths[index % len(file_paths)]
+        bcamp_api.scrub_fpath(file_path, sr_number)
+
+    bcamp_api.CASE_CACHE.invalidate()
+    bcamp_api.CASE_CACHE.reset_stats()
+    with contextlib.redirect_stdout(io.StringIO()): # scrub_fpath prints.
+        results = [
+            ('query_case x2 per file', timed(column_queries, calls), calls),
+            ('scrub_fpath w/ CaseRecord cache', timed(cached, calls), calls),
+        ]
+    print_results("CaseRecord Cache - " + str(calls) + " files", results)
+    print("  cache:", bcamp_api.case_cache_stats())
+
+    # Write-through check, a read after update_case must see the new value.
+    bcamp_api.update_case(sr_numbers[0], 'notes', 'bench')
+    assert bcamp_api.get_case_record(sr_numbers[0]).notes == 'bench'
+    record = bcamp_api.get_case_record(sr_numbers[0])
+    other = bcamp_api.get_case_record(sr_numbers[0])
+    record.notes = 'bench-dirty'
+    # Each caller has its own record and dirty columns.
+    assert other.notes == 'bench' and other.dirty == frozenset()
+    other.product = 'bench-product'
+    record.save()
+    assert bcamp_api.query_case(sr_numbers[0], 'notes') == 'bench-dirty'
+    assert bcamp_api.query_case(sr_numbers[0], 'product') != 'bench-product'
+    other.save()
+    assert bcamp_api.get_case_record(sr_numbers[0]).notes == 'bench-dirty'
+    assert bcamp_api.query_case(sr_numbers[0], 'product') == 'bench-product'
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_writer(case_count, calls, thread_count=4):
+    '''
+    Stress test for the DB Writer. First compares 'thread_count' threads
+    committing their own UPDATEs against the same UPDATEs grouped by
+    DB_WRITER, then runs import, poll, refresh and read threads TOGETHER
+    and checks that no write failed, and that every write landed.
+    '''
+    create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    errors = []
+
+    def direct_commit(index):
+        try:
+            with bcamp_api.BCAMP_DB.shell() as dbshell:
+                dbshell.execute("UPDATE cases SET last_file_count = (?) "
+                    "WHERE sr_number = (?);",
+                    (index, sr_numbers[index % case_count]))
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    def grouped_commit(index):
+        def write_op(dbshell):
+            dbshell.execute("UPDATE cases SET last_file_count = (?) "
+                "WHERE sr_number = (?);",
+                (index, sr_numbers[index % case_count]))
+        try:
+            bcamp_api.DB_WRITER.write(write_op)
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    def submitted(calls):
+        # Callers that don't need to wait on each write, such as FileOps
+        # refreshing 'last_file_count', hold the Future instead.
+        def write_op(dbshell, index):
+            dbshell.execute("UPDATE cases SET last_file_count = (?) "
+                "WHERE sr_number = (?);",
+                (index, sr_numbers[index % case_count]))
+        futures = []
+        for index in range(calls):
+            futures.append(bcamp_api.DB_WRITER.submit(
+                lambda dbshell, index=index: write_op(dbshell, index)))
+        for future in futures:
+            future.result()
+
+    stats_before = bcamp_api.DB_WRITER.stats()
+    start = time.perf_counter()
+    timed_threads(lambda index: submitted(calls // thread_count // 10),
+        10 * thread_count, thread_count)
+    submit_secs = time.perf_counter() - start
+    stats = bcamp_api.DB_WRITER.stats()
+
+    results = [
+        ('commit per write (' + str(thread_count) + ' threads)',
+            timed_threads(direct_commit, calls, thread_count), calls),
+        ('DB_WRITER group commit (' + str(thread_count) + ' threads)',
+            timed_threads(grouped_commit, calls, thread_count), calls),
+        ('DB_WRITER submit + Futures (' + str(thread_count) + ' threads)',
+            submit_secs, calls),
+    ]
+    print_results("DB Writer - " + str(calls) + " UPDATEs", results)
+    print("  submit + Futures: {} ops in {} batches".format(
+        stats['ops'] - stats_before['ops'],
+        stats['batches'] - stats_before['batches']))
+
+    # Mixed workload, like the Import, CasePoll, FileOps and UI threads.
+    import_count = max(calls // 50, 10)
+    poll_count = max(calls // 10, 10)
+    refresh_count = max(calls // 100, 5)
+    import_srs = [gen_sr_number(case_count + index)
+        for index in range(import_count)]
+    read_stop = threading.Event()
+    reads = [0]
+
+    def run(func, count):
+        for index in range(count):
+            try:
+                func(index)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    def do_import(index):
+        bcamp_api.new_import({
+            'sr_number': import_srs[index],
+            'pinned': 0,
+            'tags_list': ['bench'],
+            'account': 'Bench Account',
+            'customs_list': None,
+            'workspace': None,
+            'product': 'MWG',
+            'bug_id': None,
+            'notes': None,
+            'download_flag': 0,
+            }, None)
+
+    def do_poll(index):
+        sr_number = sr_numbers[index % case_count]
+        bcamp_api.update_case(sr_number, 'last_file_count', index)
+        bcamp_api.jira_update_db(sr_number, bcamp_api.JiraIssue(
+            'Bench Issue', 'Poll ' + str(index), str(time.time()), '',
+            'bench', 'TSNS-' + str(index), [], None, [], 'P3', [], [],
+            None, [], 'TSNS'))
+
+    def do_refresh(index):
+        sr_number = sr_numbers[index % case_count]
+        bcamp_api.update_files(sr_number,
+            gen_file_records(sr_number, 500, seed=index), 'remote')
+
+    def do_read():
+        while not read_stop.is_set():
+            sr_number = sr_numbers[reads[0] % case_count]
+            bcamp_api.query_case(sr_number, 'jira_status')
+            bcamp_api.query_all_files_column(sr_number, 'path')
+            reads[0] += 1
+
+    writers = [
+        threading.Thread(target=run, args=(do_import, import_count)),
+        threading.Thread(target=run, args=(do_poll, poll_count)),
+        threading.Thread(target=run, args=(do_refresh, refresh_count)),
+    ]
+    reader = threading.Thread(target=do_read)
+    stats_before = bcamp_api.DB_WRITER.stats()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()): # API calls print.
+        reader.start()
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        read_stop.set()
+        reader.join()
+    elapsed = time.perf_counter() - start
+    stats = bcamp_api.DB_WRITER.stats()
+    ops = stats['ops'] - stats_before['ops']
+    batches = stats['batches'] - stats_before['batches']
+
+    print("\n[ DB Writer - import/poll/refresh/read together ]")
+    print("  {} imports, {} polls, {} refreshes, {} reads in {:.1f} ms".format(
+        import_count, poll_count, refresh_count, reads[0], elapsed * 1000))
+    print("  {} write ops in {} batches ({:.1f} ops/batch)".format(
+        ops, batches, ops / batches if batches else 0.0))
+    print("  'database is locked' or other write errors:", len(errors))
+
+    # Every write must have landed.
+    assert not errors, errors[:5]
+    for sr_number in import_srs:
+        assert bcamp_api.query_case_exist(sr_number)
+    last_poll = poll_count - 1
+    assert bcamp_api.query_case(sr_numbers[last_poll % case_count],
+        'jira_status') == 'Poll ' + str(last_poll)
+    last_refresh = refresh_count - 1
+    refresh_sr = sr_numbers[last_refresh % case_count]
+    assert count_stale_rows(refresh_sr, gen_file_records(refresh_sr, 500,
+        seed=last_refresh)) == 0
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_query_plans(case_count, calls):
+    '''
+    Times each query that uses an index added by the schema migrations, with
+    and without it. The FTS5 sub-queries don't use them, and are timed by
+    'bench_fts'. The query plans are checked by 'tests/test_query_plans.py'.
+    '''
+    db_path = create_bench_db(case_count)
+    # (name, query, params) of the queries backed by the migration indexes.
+    index_queries = [
+        ('account', bcamp_api.SEARCH_QUERIES['account'],
+            (BENCH_ACCOUNTS[0],)),
+        ('product', bcamp_api.SEARCH_QUERIES['product'],
+            (BENCH_PRODUCTS[0],)),
+        ('tags of an SR', "SELECT tag FROM tags WHERE sr_number = (?);",
+            (gen_sr_number(case_count // 2),)),
+    ]
+    def run_query(query, params):
+        def run(index):
+            with bcamp_api.BCAMP_DB.shell() as dbshell:
+                dbshell.execute(query, params)
+                dbshell.fetchall()
+        return run
+
+    indexed = [timed(run_query(query, params), calls)
+        for name, query, params in index_queries]
+    # Drop the migration indexes to compare with a version 1 DB.
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        for index_name in ('idx_cases_account', 'idx_cases_product',
+                'idx_tags_sr_number'):
+            dbshell.execute("DROP INDEX " + index_name + ";")
+    bcamp_api.BCAMP_DB.close_all()
+    results = []
+    for (name, query, params), indexed_time in zip(index_queries, indexed):
+        results.append((name + " - indexed", indexed_time, calls))
+        results.append((name + " - unindexed", timed(run_query(query,
+            params), calls), calls))
+    print_results("indexed queries - " + str(case_count) + " cases", results)
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_query_stats(case_count, calls):
+    '''
+    Measures the overhead of QUERY_STATS on a mixed read workload, checks
+    that slow statements reach the slow-query log w/ their query plan, and
+    prints the collected stats - the same dump shown in Settings >
+    Diagnostics.
+    '''
+    db_path = create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    for sr_number in sr_numbers[:10]:
+        bcamp_api.update_files(sr_number, gen_file_records(sr_number, 200))
+
+    def workload(index):
+        sr_number = sr_numbers[index % 10]
+        bcamp_api.query_cases('sr_number')
+        bcamp_api.query_tags(sr_number)
+        bcamp_api.query_all_files_remote_depth(sr_number, 'path', 0)
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute(bcamp_api.SEARCH_QUERIES['account'],
+                (BENCH_ACCOUNTS[index % len(BENCH_ACCOUNTS)],))
+            dbshell.fetchall()
+        bcamp_api.search_custom_term(BENCH_PRODUCTS[index
+            % len(BENCH_PRODUCTS)])
+
+    log_path = os.path.join(os.path.dirname(db_path), 'slow_queries.log')
+    with contextlib.redirect_stdout(io.StringIO()): # update_files prints.
+        bcamp_api.QUERY_STATS.configure(False)
+        disabled = timed(workload, calls)
+        bcamp_api.QUERY_STATS.reset()
+        bcamp_api.QUERY_STATS.configure(True, 1000000, log_path)
+        enabled = timed(workload, calls)
+    print_results("Query Stats - " + str(calls) + " x 5 queries", [
+        ('QUERY_STATS disabled', disabled, calls),
+        ('QUERY_STATS enabled', enabled, calls),
+    ])
+
+    # With a 0 ms threshold, every statement is a "slow" query.
+    bcamp_api.QUERY_STATS.configure(True, 0)
+    workload(0)
+    with open(log_path, encoding='utf-8') as log_file:
+        slow_log = log_file.read()
+    assert 'plan: SEARCH cases USING COVERING INDEX idx_cases_account' in slow_log
+    assert 'plan: SCAN cases_fts VIRTUAL TABLE' in slow_log
+    bcamp_api.QUERY_STATS.configure(False, 100)
+
+    stats = bcamp_api.QUERY_STATS.dump()
+    assert stats[0]['calls'] >= calls
+    print("\n[ Query Stats - dump ]")
+    print(bcamp_api.QUERY_STATS.format_dump(limit=10))
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_maintenance(case_count, calls, files_per_case=500):
+    '''
+    Fills the files table for 'case_count' SRs, drops most of them with
+    'drop_sr', and reports the DB size/fragmentation before and after a
+    DBMaintenanceDaemon pass - first on a DB without auto_vacuum (one-time
+    VACUUM conversion), then again on the converted DB (incremental). The
+    max. read latency seen by a reader thread during each pass is reported
+    to show that reads aren't blocked.
+    '''
+    create_bench_db(case_count)
+    sr_numbers = [gen_sr_number(index) for index in range(case_count)]
+    maint = bcamp_api.DB_MAINT
+
+    # Start from an older DB, without 'auto_vacuum'.
+    def no_auto_vacuum(dbshell):
+        dbshell.execute("PRAGMA auto_vacuum = NONE;")
+        dbshell.execute("VACUUM;")
+    bcamp_api.DB_WRITER.write(no_auto_vacuum, transaction=False)
+
+    def fill_and_drop():
+        for sr_number in sr_numbers:
+            bcamp_api.update_files(sr_number,
+                gen_file_records(sr_number, files_per_case))
+        for sr_number in sr_numbers[:int(case_count * 0.8)]:
+            bcamp_api.drop_sr(sr_number)
+        # Drop the requests made by drop_sr, the pass is ran directly.
+        while not maint.q.empty():
+            maint.q.get_nowait()
+
+    def run_pass():
+        max_read = [0.0]
+        stop = threading.Event()
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                bcamp_api.query_cases('sr_number')
+                max_read[0] = max(max_read[0], time.perf_counter() - start)
+        read_thread = threading.Thread(target=reader)
+        read_thread.start()
+        try:
+            report = maint.run('bench')
+        finally:
+            stop.set()
+            read_thread.join()
+        return report, max_read[0]
+
+    print("\n[ DB Maintenance -", case_count, "SRs x", files_per_case,
+        "files, 80% dropped ]")
+    for label in ('no auto_vacuum', 'incremental'):
+        with contextlib.redirect_stdout(io.StringIO()): # API calls print.
+            fill_and_drop()
+            report, max_read = run_pass()
+        before, after = report['before'], report['after']
+        print("  {:<15} {:>8.1f} KB -> {:>8.1f} KB  free {:>6.1%} -> {:>6.1%}"
+            "  vacuum={:<11} check={} {:.2f} sec, max read {:.1f} ms".format(
+            label, before['db_bytes'] / 1024, after['db_bytes'] / 1024,
+            before['free_ratio'], after['free_ratio'], report['vacuum'],
+            report['quick_check'], report['seconds'], max_read * 1000))
+        assert report['quick_check'] == 'ok'
+        assert after['freelist_count'] == 0
+        assert after['auto_vacuum'] == 2
+        assert after['wal_bytes'] == 0 or report['checkpoint_busy']
+
+    # The daemon itself runs a requested pass once the writer is idle.
+    maint.idle_secs = 1
+    maint.start()
+    last_report = maint.last_report
+    with contextlib.redirect_stdout(io.StringIO()):
+        maint.request('bench')
+        deadline = time.time() + 30
+        while maint.last_report is last_report and time.time() < deadline:
+            time.sleep(0.1)
+    assert maint.last_report is not last_report, "Maintenance never ran"
+    print("  daemon pass ran for request:", maint.last_report['reason'])
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_jira_comments(count, seed=1):
+    '''
+    Returns 'count' comment dicts in the format of the JIRA API.
+    '''
+    rand = random.Random(seed)
+    comments = []
+    for index in range(count):
+        author = {
+            'self': 'https://jira.bench/rest/api/2/user?username=user'
+                + str(index % 7),
+            'name': 'user' + str(index % 7),
+            'emailAddress': 'user' + str(index % 7) + '@bench.local',
+            'avatarUrls': {'48x48': 'https://jira.bench/avatar/' + str(index)},
+            'displayName': 'User, Bench ' + str(index % 7),
+            'active': True,
+            'timeZone': 'America/Los_Angeles',
+        }
+        timestamp = '2021-10-{:02d}T06:07:29.766-0700'.format(1 + index % 28)
+        comments.append({
+            'self': 'https://jira.bench/rest/api/2/issue/1/comment/'
+                + str(100000 + index),
+            'id': str(100000 + index),
+            'author': author,
+            'body': " ".join(rand.choice(BENCH_TAGS) for word in range(120)),
+            'updateAuthor': author,
+            'created': timestamp,
+            'updated': timestamp,
+        })
+    return comments
+
+def bench_jira(case_count, calls, comment_count=300):
+    '''
+    Compares opening the JIRA summary of a case w/ a 'comment_count' comment
+    bug - the old pickled blob vs. the first page of 'jira_comments' - and
+    checks that 'jira_update_db' only writes new comments. Then checks the
+    migration of pickled blobs from a version 4 DB.
+    '''
+    db_path = create_bench_db(case_count)
+    sr_number = gen_sr_number(0)
+    comments = gen_jira_comments(comment_count)
+    links = [{'key': 'NSPMGR-' + str(index), 'title': 'Linked ' + str(index),
+        'status': 'Open'} for index in range(3)]
+
+    def jira_issue(comments):
+        return bcamp_api.JiraIssue('Bench Issue', 'Open', '2021-10-07',
+            'Description', 'bench', 'TSNS-1', comments,
+            comments[-1]['updated'], links, 'P3', [{'name': 'UI'}],
+            [{'name': '10.1'}], None, [{'name': '10.2'}], 'TSNS')
+
+    # Old format, the full history pickled onto the cases row.
+    def legacy_blob(dbshell):
+        dbshell.execute("UPDATE cases SET jira_comments = (?) "
+            "WHERE sr_number = (?);", (pickle.dumps(comments), sr_number))
+    bcamp_api.DB_WRITER.write(legacy_blob)
+
+    def legacy_open(index):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT jira_comments FROM cases "
+                "WHERE sr_number = (?);", (sr_number,))
+            pickle.loads(dbshell.fetchone()[0])
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        bcamp_api.jira_update_db(sr_number, jira_issue(comments))
+        first_write = time.perf_counter()
+        bcamp_api.jira_update_db(sr_number, jira_issue(comments))
+        unchanged = time.perf_counter() - first_write
+        comments.append(gen_jira_comments(comment_count + 1)[-1])
+        first_write = time.perf_counter()
+        bcamp_api.jira_update_db(sr_number, jira_issue(comments))
+        one_new = time.perf_counter() - first_write
+    log = output.getvalue().splitlines()
+    assert log[0].endswith(str(comment_count) + " new/edited comments"), log
+    assert log[1].endswith("- 0 new/edited comments"), log
+    assert log[2].endswith("- 1 new/edited comments"), log
+
+    def paged_open(index):
+        bcamp_api.jira_comment_count(sr_number)
+        bcamp_api.jira_get_comments(sr_number, 20, 0)
+
+    print_results("JIRA Summary - open a " + str(comment_count)
+        + " comment bug", [
+        ('pickle.loads full history', timed(legacy_open, calls), calls),
+        ('jira_comments, newest 20', timed(paged_open, calls), calls),
+        ('jira_update_db, no new comments', unchanged, 1),
+        ('jira_update_db, 1 new comment', one_new, 1),
+    ])
+    newest = bcamp_api.jira_get_comments(sr_number, 1, 0)[0]
+    assert newest['body'] == comments[-1]['body']
+    assert bcamp_api.jira_comment_count(sr_number) == comment_count + 1
+    assert len(bcamp_api.jira_get_issuelinks(sr_number)) == len(links)
+
+    # Migration from a version 4 DB with pickled blobs.
+    migrate_sr = gen_sr_number(1)
+    def version_4(dbshell):
+        dbshell.execute("""UPDATE cases SET jira_comments = (?),
+            jira_linkedissues = (?), jira_components = (?)
+            WHERE sr_number = (?);""", (pickle.dumps(comments[:50]),
+            pickle.dumps(links), pickle.dumps([{'name': 'UI'}]), migrate_sr))
+        dbshell.execute("PRAGMA user_version = 4;")
+    bcamp_api.DB_WRITER.write(version_4)
+    bcamp_api.BCAMP_DB.close_all()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_setup.CreateDB(db_path)
+    assert bcamp_api.jira_comment_count(migrate_sr) == 50
+    assert bcamp_api.jira_get_issuelinks(migrate_sr) == links
+    assert bcamp_api.jira_load_list(bcamp_api.query_case(migrate_sr,
+        'jira_components')) == [{'name': 'UI'}]
+    assert bcamp_api.query_case(migrate_sr, 'jira_comments') == None
+    print("  migration: 50 pickled comments moved to 'jira_comments'")
+    bcamp_api.BCAMP_DB.close_all()
+
+# The 5 queries run per CaseViewer custom search before 'cases_fts'.
+LEGACY_CUSTOM_QUERIES = [
+    ("SELECT sr_number FROM cases WHERE account LIKE ?;", True),
+    ("SELECT sr_number FROM cases WHERE product LIKE ?;", True),
+    ("SELECT sr_number FROM tags WHERE tag LIKE ?;", True),
+    ("SELECT sr_number FROM cases WHERE sr_number = (?);", False),
+    ("SELECT sr_number FROM cases WHERE bug_id LIKE ?;", True),
+]
+
+def legacy_custom_search(term):
+    '''
+    The custom search w/o 'cases_fts' - a "LIKE '%term%'" per column.
+    '''
+    result = []
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        for query, like in LEGACY_CUSTOM_QUERIES:
+            dbshell.execute(query, ('%' + term + '%' if like else term,))
+            result += [row[0] for row in dbshell.fetchall()]
+    return result
+
+def fts_row(sr_number):
+    '''
+    Returns the 'cases_fts' row of 'sr_number' as a dict, or None.
+    '''
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT " + ", ".join(bcamp_api.CASES_FTS_COLUMNS)
+            + " FROM cases_fts WHERE rowid = (SELECT rowid FROM cases"
+            + " WHERE sr_number = (?));", (sr_number,))
+        row = dbshell.fetchone()
+    if row == None:
+        return None
+    return dict(zip(bcamp_api.CASES_FTS_COLUMNS, row))
+
+def bench_fts(case_count, calls):
+    '''
+    Compares the CaseViewer custom search - the legacy LIKE queries vs. ONE
+    'cases_fts' query - and checks the new results hold every legacy result.
+    Each term is timed on its own, the trigram index wins on rare terms and
+    loses on digit strings such as SR numbers, where '000' is in every row.
+    Then checks the triggers keep 'cases_fts' in sync w/ case edits, tags,
+    JIRA titles and dropped SR's.
+    '''
+    db_path = create_bench_db(case_count)
+    print("\n[ cases_fts - tokenizer '"
+        + bcamp_api.cases_fts_tokenizer() + "' ]")
+    terms = [BENCH_ACCOUNTS[0], BENCH_ACCOUNTS[1][:4].lower(),
+        BENCH_PRODUCTS[1], BENCH_TAGS[0][2:6], gen_sr_number(7), 'TSNS-1',
+        '00000000042', 'no such term']
+    for term in terms:
+        legacy = set(legacy_custom_search(term))
+        new = bcamp_api.search_custom_term(term)
+        assert legacy <= set(new), (term, legacy - set(new))
+        print("  {:<14} legacy {:>5}   cases_fts {:>5}".format(term,
+            len(legacy), len(new)))
+    # Short terms fall back to a LIKE scan of 'cases_fts'.
+    assert set(legacy_custom_search('ss')) <= set(
+        bcamp_api.search_custom_term('ss'))
+
+    def search(func, term):
+        def run(index):
+            func(term)
+        return run
+
+    results = []
+    term_calls = max(1, calls // len(terms))
+    for term in terms:
+        for name, func in (('5 x LIKE', legacy_custom_search),
+                ('cases_fts', bcamp_api.search_custom_term)):
+            results.append((term + " - " + name, timed(search(func, term),
+                term_calls), term_calls))
+    print_results("custom search - " + str(case_count) + " cases", results)
+    results = []
+    for name, func in (('5 x LIKE (legacy)', legacy_custom_search),
+            ('cases_fts MATCH', bcamp_api.search_custom_term)):
+        def search_all(index):
+            func(terms[index % len(terms)])
+        results.append((name, timed(search_all, calls), calls))
+    print_results("custom search, all terms - " + str(case_count) + " cases",
+        results)
+
+    # Triggers
+    sr_number = gen_sr_number(3)
+    bcamp_api.update_case_record(sr_number, {
+        'account_string': 'Zanzibar Freight',
+        'product_string': 'ePO',
+        'bug_string': 'TSNS-777',
+        'important_bool': False,
+        'tags_list': ['quokka'],
+    })
+    assert bcamp_api.search_custom_term('zanzibar') == [sr_number]
+    assert bcamp_api.search_custom_term('quokka') == [sr_number]
+    bcamp_api.insert_tags(sr_number, 'wombat')
+    assert fts_row(sr_number)['tags'] == 'wombat'
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.jira_update_db(sr_number, bcamp_api.JiraIssue(
+            'Proxy drops keepalive', 'Open', '2021-10-07', 'Description',
+            'bench', 'TSNS-777', [], None, [], 'P3', [], [], None, [],
+            'TSNS'))
+    assert bcamp_api.search_custom_term('keepalive') == [sr_number]
+    bcamp_api.drop_sr(sr_number)
+    assert fts_row(sr_number) == None
+    assert bcamp_api.search_custom_term('zanzibar') == []
+
+    # 'rebuild_cases_fts' must leave the index as the triggers did.
+    before = {sr: fts_row(sr) for sr in
+        [gen_sr_number(index) for index in range(0, case_count, 97)]}
+    bcamp_api.rebuild_cases_fts()
+    for sr, row in before.items():
+        assert fts_row(sr) == row, sr
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT count(*) FROM cases_fts;")
+        assert dbshell.fetchone()[0] == case_count - 1
+
+    # The rows are keyed by 'case_id', an INTEGER PRIMARY KEY that a VACUUM
+    # never renumbers - even w/ the gap left by the dropped SR.
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("PRAGMA table_info(cases);")
+        assert ('case_id', 'INTEGER', 1) in [(row[1], row[2], row[5])
+            for row in dbshell.fetchall()]
+    def vacuum_op(dbshell):
+        dbshell.execute("VACUUM;")
+    bcamp_api.DB_WRITER.write(vacuum_op, transaction=False)
+    for sr, row in before.items():
+        assert fts_row(sr) == row, sr
+    print("  triggers + rebuild + VACUUM: in sync")
+    bcamp_api.BCAMP_DB.close_all()
+
+BENCH_NOTES = ['Customer rebooted the proxy, issue persists.',
+    'Certificate expired on the ePO server - renewed 10/07.',
+    'Timeout in agent handler logs, see line 4021.',
+    'Waiting on a memory dump from the customer.',
+    'Escalated to TSNS, repro in the lab.']
+
+def legacy_notes_search(term):
+    '''
+    Searches every note the only way possible before 'notes_fts' - one
+    'query_dump_notes' (and one 'query_case') per SR - and returns the
+    matching (sr_number, path) pairs.
+    '''
+    term = term.lower()
+    found = set()
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases;")
+        sr_numbers = [row[0] for row in dbshell.fetchall()]
+    for sr_number in sr_numbers:
+        notes = bcamp_api.query_case(sr_number, 'notes')
+        if notes != None and term in notes.lower():
+            found.add((sr_number, None))
+        for path, notes in bcamp_api.query_dump_notes(sr_number,
+                'path, notes'):
+            if term in notes.lower():
+                found.add((sr_number, path))
+    return found
+
+def bench_notes(case_count, calls, files_per_case=40):
+    '''
+    Compares "search my notes everywhere" - a 'query_dump_notes' per SR vs.
+    ONE 'notes_fts' query - and checks both find the same notes. Then checks
+    the triggers keep 'notes_fts' in sync as the notes UI saves, and that
+    'rebuild_notes_fts' leaves it unchanged.
+    '''
+    db_path = create_bench_db(case_count)
+    rand = random.Random(13)
+    file_notes = []
+    case_notes = []
+    for index in range(case_count):
+        sr_number = gen_sr_number(index)
+        records = gen_file_records(sr_number, files_per_case)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bcamp_api.update_files(sr_number, records)
+        for path in rand.sample(sorted(records), 2):
+            file_notes.append((rand.choice(BENCH_NOTES) + "\n" + path,
+                sr_number, path))
+        if rand.random() < 0.3:
+            case_notes.append((rand.choice(BENCH_NOTES), sr_number))
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.executemany("""UPDATE files SET notes = (?)
+            WHERE sr_number = (?) AND path = (?);""", file_notes)
+        dbshell.executemany("UPDATE cases SET notes = (?) "
+            "WHERE sr_number = (?);", case_notes)
+        dbshell.execute("SELECT count(*) FROM notes_fts;")
+        indexed = dbshell.fetchone()[0]
+    assert indexed == len(file_notes) + len(case_notes), indexed
+    print("\n[ notes_fts - " + str(indexed) + " notes, tokenizer '"
+        + bcamp_api.cases_fts_tokenizer('notes_fts') + "' ]")
+
+    terms = ['proxy', 'CERTIFICATE', 'handler logs', 'file1', 'no such note']
+    for term in terms:
+        results = bcamp_api.search_notes(term, limit=1000000)
+        assert set((result['sr_number'], result['path'])
+            for result in results) == legacy_notes_search(term), term
+        for result in results:
+            assert term.lower() in result['snippet'].lower(), result
+    print("  search_notes matches a scan of every SR, e.g.",
+        bcamp_api.search_notes('handler', 1)[0])
+
+    def legacy(index):
+        legacy_notes_search(terms[index % len(terms)])
+    def indexed_search(index):
+        bcamp_api.search_notes(terms[index % len(terms)])
+    legacy_calls = max(1, calls // 100)
+    print_results("notes search - " + str(case_count) + " cases", [
+        ('query_dump_notes per SR', timed(legacy, legacy_calls),
+            legacy_calls),
+        ('notes_fts MATCH', timed(indexed_search, calls), calls),
+    ])
+
+    # Triggers - Tk_FileNotes/Tk_CaseNotes save through these.
+    def found(term):
+        return [(result['sr_number'], result['path'])
+            for result in bcamp_api.search_notes(term)]
+    sr_number = gen_sr_number(5)
+    path = sorted(gen_file_records(sr_number, files_per_case))[3]
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.update_file(sr_number, 'notes', path, 'Quokka sighting')
+        assert found('quokka') == [(sr_number, path)]
+        bcamp_api.update_file(sr_number, 'notes', path, 'Wombat sighting')
+        assert found('quokka') == [] and found('wombat') == [(sr_number,
+            path)]
+        bcamp_api.update_file(sr_number, 'notes', path, None)
+        assert found('wombat') == []
+        bcamp_api.update_case(sr_number, 'notes', 'Quokka case notes')
+        assert found('quokka') == [(sr_number, None)]
+        bcamp_api.update_file(sr_number, 'notes', path, 'Quokka file notes')
+        bcamp_api.drop_sr(sr_number)
+    assert found('quokka') == []
+
+    # 'rebuild_notes_fts' must leave the index as the triggers did.
+    def notes_rows():
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT rowid, sr_number, path, notes "
+                "FROM notes_fts ORDER BY rowid;")
+            return dbshell.fetchall()
+    before = notes_rows()
+    bcamp_api.rebuild_notes_fts()
+    assert notes_rows() == before
+    # A VACUUM keeps the 'file_id' of every file, even w/ the gap left by
+    # the dropped SR.
+    def vacuum_op(dbshell):
+        dbshell.execute("VACUUM;")
+    bcamp_api.DB_WRITER.write(vacuum_op, transaction=False)
+    assert notes_rows() == before
+    bcamp_api.rebuild_notes_fts()
+    assert notes_rows() == before
+    print("  triggers + rebuild + VACUUM: in sync")
+    bcamp_api.BCAMP_DB.close_all()
+
+BENCH_LOG_LINES = [
+    "{time} I #{pid} EPOAgentMgr  Agent handler {host} responded in {ms} ms",
+    "{time} I #{pid} naInet       Connecting to {host}:443 (session {hex})",
+    "{time} W #{pid} naInet       Retrying request {hex}, attempt {n}",
+    "{time} I #{pid} Scheduler    Task {hex} started, next run in {n} min",
+    "{time} E #{pid} UpdaterUI    Failed to download catalog.z from {host}",
+    "{time} I #{pid} McScript     Repository {host} selected, ping {ms} ms",
+    "{time} D #{pid} PolicyMgr    Enforcing policy {hex} for product ENS",
+]
+# (error string, SR indexes) planted in a few logs for 'bench_log_index'.
+BENCH_LOG_ERRORS = [
+    ("Error 0x80070005 Access is denied", (3, 77, 150)),
+    ("STATUS_STACK_BUFFER_OVERRUN in mfehidk", (12,)),
+    ("proxy returned HTTP 407", (40, 41, 42, 43)),
+]
+
+def gen_log_file(path, size, seed, planted=()):
+    '''
+    Writes a synthetic agent log of ~'size' bytes to 'path', with each
+    string of 'planted' on a random line.
+    '''
+    rand = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = rand.choice(BENCH_LOG_LINES).format(
+            time="2021-10-{:02d} {:02d}:{:02d}:{:02d}".format(
+                rand.randint(1, 28), rand.randint(0, 23),
+                rand.randint(0, 59), rand.randint(0, 59)),
+            pid=rand.randint(1000, 9999),
+            host="epo" + str(rand.randint(1, 300)) + ".corp.example.com",
+            hex="{:08x}".format(rand.getrandbits(32)),
+            ms=rand.randint(1, 2000), n=rand.randint(1, 60))
+        lines.append(line)
+        total += len(line) + 1
+    for text in planted:
+        index = rand.randrange(len(lines))
+        lines[index] = lines[index] + " - " + text
+    with open(path, 'w', newline='\n') as log_file:
+        log_file.write("\n".join(lines) + "\n")
+
+def grep_logs(log_dirs, text):
+    '''
+    Returns the paths of every indexed log type under 'log_dirs' that
+    contain 'text' - what finding a string took before the log index.
+    '''
+    text = text.lower()
+    found = set()
+    for log_dir in log_dirs:
+        for root, dirs, files in os.walk(log_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in (
+                        bcamp_api.LOG_INDEX_TYPES):
+                    continue
+                path = os.path.join(root, name)
+                encoding = 'utf-8'
+                with open(path, 'rb') as log_file:
+                    data = log_file.read()
+                if data.startswith(b'\xff\xfe'):
+                    encoding = 'utf-16'
+                if text in data.decode(encoding, errors='replace').lower():
+                    found.add(path)
+    return found
+
+def bench_log_index(case_count, calls, files_per_case=3, file_kb=128):
+    '''
+    Builds a downloads folder of synthetic logs for each SR, and checks the
+    'LogIndexDaemon' index finds the same files as a grep of every log, is
+    incremental, resumable and throttled. Times 'search_logs' vs. the grep.
+    '''
+    db_path = create_bench_db(case_count)
+    db_dir = os.path.dirname(db_path)
+    bcamp_api.LOG_DB.set_path(os.path.join(db_dir, 'bcamp_logs.db'))
+    log_dirs = {}
+    total_bytes = 0
+    for index in range(case_count):
+        sr_number = gen_sr_number(index)
+        log_dir = os.path.join(db_dir, 'downloads', sr_number)
+        os.makedirs(os.path.join(log_dir, 'bundle'))
+        log_dirs[sr_number] = log_dir
+        planted = [text for text, sr_indexes in BENCH_LOG_ERRORS
+            if index in sr_indexes]
+        for count in range(files_per_case):
+            if count == 0:
+                path = os.path.join(log_dir, 'bundle', 'agent_0.log')
+            else:
+                path = os.path.join(log_dir, 'agent_' + str(count) + '.txt')
+            gen_log_file(path, file_kb * 1024, str((index, count)),
+                planted if count == files_per_case - 1 else ())
+            total_bytes += os.path.getsize(path)
+        # Skipped - not a log type.
+        with open(os.path.join(log_dir, 'bundle.zip'), 'wb') as zip_file:
+            zip_file.write(b'PK' + os.urandom(1024))
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.executemany("UPDATE cases SET local_path = (?) "
+            "WHERE sr_number = (?);", [(log_dir, sr_number)
+            for sr_number, log_dir in log_dirs.items()])
+
+    indexer = bcamp_api.LogIndexDaemon(bcamp_api.LOG_DB,
+        max_bytes_per_sec=None)
+    indexer.create_schema()
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = indexer.run()
+    index_bytes = os.path.getsize(bcamp_api.LOG_DB.db_path)
+    print("\n[ Log Index - {} files, {:.1f} MB of logs, index {:.1f} MB ]"
+        .format(report['files'], total_bytes / 1048576,
+        index_bytes / 1048576))
+    print("  full pass {:.2f} sec, {:.1f} MB/sec".format(report['seconds'],
+        total_bytes / 1048576 / report['seconds']))
+    assert report['bytes'] == total_bytes, report
+
+    # Same files as a grep of every log.
+    terms = [text for text, sr_indexes in BENCH_LOG_ERRORS] + [
+        "0x80070005", "http 407", "catalog.z", "no such error string"]
+    for term in terms:
+        found = set(result['path'] for result in bcamp_api.search_logs(
+            term, limit=1000000, max_chunks=1000000))
+        assert found == grep_logs(log_dirs.values(), term), term
+    for text, sr_indexes in BENCH_LOG_ERRORS:
+        assert sorted(bcamp_api.search_log_srs(text)) == [
+            gen_sr_number(index) for index in sr_indexes
+            if index < case_count], text
+    print("  search_logs matches a grep of every log, e.g.",
+        bcamp_api.search_logs(BENCH_LOG_ERRORS[0][0], 1)[0]['snippet'])
+
+    # 'logs:' in the search query language.
+    sql, params = bcamp_api.compile_search_query(
+        'logs:"http 407" -sr:' + gen_sr_number(40))
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases WHERE " + sql, params)
+        assert sorted(row[0] for row in dbshell.fetchall()) == [
+            gen_sr_number(41), gen_sr_number(42), gen_sr_number(43)]
+
+    # Incremental - nothing changed, then an append, a rewrite, a delete.
+    assert indexer.run()['files'] == 0
+    sr_number = gen_sr_number(5)
+    grown = os.path.join(log_dirs[sr_number], 'agent_1.txt')
+    with open(grown, 'a', newline='\n') as log_file:
+        log_file.write("appended line - kangaroo fault\n")
+    os.utime(grown, (time.time() + 5, time.time() + 5))
+    replaced = os.path.join(log_dirs[sr_number], 'bundle', 'agent_0.log')
+    gen_log_file(replaced, 2048, 'replaced', ["wombat fault"])
+    os.remove(os.path.join(log_dirs[gen_sr_number(3)], 'agent_2.txt'))
+    with open(os.path.join(log_dirs[sr_number], 'unicode.log'),
+            'wb') as log_file:
+        log_file.write(b'\xff\xfe' + "utf-16 agent log\r\nquokka fault\r\n"
+            .encode('utf-16-le'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = indexer.run([sr_number, gen_sr_number(3)])
+    assert report['files'] == 3, report
+    assert report['bytes'] < 8192, report
+    for term, expected in (("kangaroo fault", [grown]),
+            ("wombat fault", [replaced]), ("quokka fault",
+            [os.path.join(log_dirs[sr_number], 'unicode.log')])):
+        assert [result['path'] for result in bcamp_api.search_logs(
+            term)] == expected, term
+    assert gen_sr_number(3) not in bcamp_api.search_log_srs(
+        BENCH_LOG_ERRORS[0][0])
+    print("  incremental: 3 changed files, {} bytes read - append, rewrite,"
+        " delete and utf-16 ok".format(report['bytes']))
+
+    # Resumable - stop a pass part way through, then run it again.
+    class Interrupted(Exception):
+        pass
+    sr_number = gen_sr_number(6)
+    big_log = os.path.join(log_dirs[sr_number], 'big.log')
+    gen_log_file(big_log, 1024 * 1024, 'big', ["koala fault"])
+    indexer.batch_chunks = 4
+    reads = [0]
+    def interrupt(nbytes):
+        reads[0] += 1
+        if reads[0] == 10:
+            raise Interrupted()
+    indexer.throttle = interrupt
+    try:
+        indexer.run([sr_number])
+    except Interrupted:
+        pass
+    del indexer.throttle
+    with bcamp_api.LOG_DB.shell() as dbshell:
+        dbshell.execute("SELECT indexed_bytes FROM log_files "
+            "WHERE path = (?);", (big_log,))
+        partial = dbshell.fetchone()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = indexer.run([sr_number])
+    assert report['bytes'] == os.path.getsize(big_log) - partial, report
+    with bcamp_api.LOG_DB.shell() as dbshell:
+        dbshell.execute("""SELECT log_chunks.offset, log_chunks.length
+            FROM log_chunks JOIN log_files USING (file_id)
+            WHERE path = (?) ORDER BY offset;""", (big_log,))
+        end = 0
+        for offset, length in dbshell.fetchall():
+            assert offset == end, (offset, end)
+            end = offset + length
+    assert end == os.path.getsize(big_log)
+    assert [result['path'] for result in bcamp_api.search_logs(
+        "koala fault")] == [big_log]
+    print("  resumable: interrupted at {} bytes, resumed w/o gaps or"
+        " repeats".format(partial))
+
+    # Throttled
+    indexer.max_bytes_per_sec = 4 * 1024 * 1024
+    gen_log_file(os.path.join(log_dirs[sr_number], 'throttled.log'),
+        2 * 1024 * 1024, 'throttled')
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = indexer.run([sr_number])
+    assert report['seconds'] > 0.4, report
+    print("  throttled: 2 MB at 4 MB/sec took {:.2f} sec".format(
+        report['seconds']))
+
+    def grep(index):
+        grep_logs(log_dirs.values(), terms[index % len(terms)])
+    def indexed(index):
+        bcamp_api.search_logs(terms[index % len(terms)])
+    grep_calls = max(1, calls // 1000)
+    print_results("log search - {:.1f} MB of logs".format(
+        total_bytes / 1048576), [
+        ('grep every log', timed(grep, grep_calls), grep_calls),
+        ('search_logs', timed(indexed, calls), calls),
+    ])
+    bcamp_api.LOG_DB.close_all()
+    bcamp_api.BCAMP_DB.close_all()
+
+def legacy_filter_lists(f_set):
+    '''
+    Returns the {category: [SR's]} result lists of the legacy search, before
+    they are intersected.
+    '''
+    def run_search(name, target):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute(bcamp_api.SEARCH_QUERIES[name], (target,))
+            return [row[0] for row in dbshell.fetchall()]
+
+    account_res = []
+    product_res = []
+    tag_res = []
+    for item in f_set['account']:
+        account_res += run_search('account', item)
+    for item in f_set['product']:
+        product_res += run_search('product', item)
+    for item in f_set['tag']:
+        tag_res += run_search('tag', item)
+    # 'custom' strings are search queries now, quoted if they hold spaces.
+    custom_sets = [legacy_custom_search(bcamp_api.search_query_words(item)[0])
+        for item in f_set['custom']]
+    custom_res = []
+    if len(custom_sets) > 1:
+        source = max(enumerate(custom_sets), key=lambda tup: len(tup[1]))
+        custom_sets.pop(source[0])
+        for lst in custom_sets:
+            for item in lst:
+                if item in source[1]:
+                    custom_res.append(item)
+    elif len(custom_sets) == 1:
+        custom_res = custom_sets[0]
+    return {'account': account_res, 'product': product_res, 'tag': tag_res,
+        'custom': custom_res}
+
+def uncached_search_cases(f_set):
+    '''
+    'search_cases' w/o the SEARCH_CACHE, to time the query itself.
+    '''
+    bcamp_api.SEARCH_CACHE.clear()
+    return bcamp_api.search_cases(f_set)
+
+def legacy_search_cases(f_set):
+    '''
+    'search_cases' before 'compile_filterset' - a query per filter value,
+    with the results intersected in Python w/ 'item in list' checks.
+    '''
+    # Empty result lists were skipped, NOT treated as "no matches".
+    lists = [lst for lst in legacy_filter_lists(f_set).values() if lst != []]
+    if lists == []:
+        return []
+    smallest = min(lists, key=len)
+    return [item for item in smallest
+        if all(item in lst for lst in lists)]
+
+def legacy_tileindex(f_set):
+    '''
+    The CaseViewer render order for 'legacy_search_cases' - the matches in
+    'dbget_case_casetiles' order, passed to the 'NEW_build_tileindex_*'
+    method of the 'o_rule'.
+    '''
+    rules = {
+        'default': lambda tile: True,
+        'hasbug': lambda tile: tile[4] != None,
+        'nobug': lambda tile: tile[4] == None,
+        'jiraneedinfo': lambda tile: tile[5] == 'Need Info',
+        'jiranotify': lambda tile: tile[6] == 1,
+        'filenotify': lambda tile: tile[7] == 1,
+    }
+    rule = rules[f_set['o_rule']]
+    search_res = None
+    if f_set['account'] + f_set['product'] + f_set['tag'] + f_set['custom']:
+        search_res = legacy_search_cases(f_set)
+    tiles = [tile for tile in bcamp_api.dbget_case_casetiles()
+        if rule(tile) and (search_res == None or tile[0] in search_res)]
+    return ([tile[0] for tile in tiles if tile[1] == 1]
+        + [tile[0] for tile in tiles if tile[1] != 1])
+
+def gen_filterset(rand):
+    '''
+    Returns a random CaseViewer filterset of BENCH_* values.
+    '''
+    custom_terms = (BENCH_ACCOUNTS + BENCH_PRODUCTS + BENCH_TAGS
+        + ['TSNS-1', 'TSNS-5', 'bank', 'ss', 'e', gen_sr_number(42)])
+    return {
+        'account': rand.sample(BENCH_ACCOUNTS, rand.choice([0, 0, 1, 2])),
+        'product': rand.sample(BENCH_PRODUCTS, rand.choice([0, 0, 1, 2])),
+        'tag': rand.sample(BENCH_TAGS, rand.choice([0, 0, 1, 2])),
+        'custom': [bcamp_api.quote_search_term(term) for term in
+            rand.sample(custom_terms, rand.choice([0, 0, 1, 2]))],
+        'o_rule': rand.choice(list(bcamp_api.FILTERSET_ORDER_RULES)),
+    }
+
+def bench_filterset(case_count, calls):
+    '''
+    Compares CaseViewer searches - 'legacy_search_cases' + the Python
+    'o_rule' ordering vs. ONE 'compile_filterset' query. Both return the
+    same SR's, see 'tests/test_filterset.py'.
+    '''
+    db_path = create_bench_db(case_count)
+    rand = random.Random(7)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("UPDATE cases SET pinned = 1 WHERE rowid % 9 = 0;")
+
+    sample_sets = [gen_filterset(rand) for index in range(50)]
+    def legacy(index):
+        legacy_tileindex(sample_sets[index % len(sample_sets)])
+    # The CaseViewer already holds the tiles, so 'o_rule' ordering was free.
+    def legacy_search(index):
+        legacy_search_cases(sample_sets[index % len(sample_sets)])
+    def compiled(index):
+        uncached_search_cases(sample_sets[index % len(sample_sets)])
+    print_results("CaseViewer search - " + str(case_count) + " cases", [
+        ('legacy lists + o_rule in Python', timed(legacy, calls), calls),
+        ('legacy lists only', timed(legacy_search, calls), calls),
+        ('compile_filterset', timed(compiled, calls), calls),
+    ])
+    bcamp_api.BCAMP_DB.close_all()
+
+def legacy_facet_counts(f_set):
+    '''
+    Counts each facet value with a 'search_cases' per value - the round of
+    queries the CaseViewer would need w/o 'FacetCounts'.
+    '''
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        values = {}
+        for facet in ('account', 'product', 'jira_status'):
+            dbshell.execute("SELECT DISTINCT " + facet + " FROM cases WHERE "
+                + facet + " IS NOT NULL;")
+            values[facet] = [row[0] for row in dbshell.fetchall()]
+        dbshell.execute("SELECT DISTINCT tag FROM tags;")
+        values['tag'] = [row[0] for row in dbshell.fetchall()]
+    result = {}
+    for facet, facet_values in values.items():
+        result[facet] = []
+        for value in facet_values:
+            value_set = copy.deepcopy(f_set)
+            if facet == 'jira_status':
+                value_set['custom'].append('status:='
+                    + bcamp_api.quote_search_term(value))
+            else:
+                value_set[facet] = [value]
+            count = len(uncached_search_cases(value_set))
+            if count > 0:
+                result[facet].append((value, count))
+        result[facet].sort(key=lambda item: (-item[1], str(item[0]).lower()))
+    return result
+
+def bench_facets(case_count, calls):
+    '''
+    Checks 'FacetCounts' against a 'search_cases' per facet value for random
+    filtersets, and that writes invalidate the cached counts. Times the
+    aggregate query, the cache, and the per value searches.
+    '''
+    db_path = create_bench_db(case_count)
+    rand = random.Random(17)
+    f_sets = [{'account': [], 'product': [], 'tag': [], 'custom': [],
+        'o_rule': 'default'}]
+    for count in range(30):
+        f_sets.append(gen_filterset(rand))
+    for f_set in f_sets:
+        assert bcamp_api.FACETS.counts(f_set) == legacy_facet_counts(f_set), (
+            f_set)
+    counts = bcamp_api.FACETS.counts(f_sets[0])
+    print("\n[ Facet counts - " + str(len(f_sets)) + " filtersets match a "
+        "search per value ]")
+    print("  e.g. JIRA status:", ", ".join(["{} ({})".format(value, count)
+        for value, count in counts['jira_status']]))
+
+    # Writes invalidate the cache.
+    before = dict(bcamp_api.FACETS.counts(f_sets[0])['account'])
+    sr_number = gen_sr_number(0)
+    old_account = bcamp_api.query_case(sr_number, 'account')
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.update_case(sr_number, 'account', 'Zanzibar Freight')
+    after = dict(bcamp_api.FACETS.counts(f_sets[0])['account'])
+    assert after['Zanzibar Freight'] == 1
+    assert after.get(old_account, 0) == before[old_account] - 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.insert_tags(sr_number, 'quokka')
+    assert ('quokka', 1) in bcamp_api.FACETS.counts(f_sets[0])['tag']
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.drop_sr(sr_number)
+    assert 'Zanzibar Freight' not in dict(
+        bcamp_api.FACETS.counts(f_sets[0])['account'])
+    print("  update_case, insert_tags and drop_sr invalidate the counts")
+
+    def uncached(index):
+        bcamp_api.FACETS.invalidate()
+        bcamp_api.FACETS.counts(f_sets[index % len(f_sets)])
+    def cached(index):
+        bcamp_api.FACETS.counts(f_sets[index % len(f_sets)])
+    def legacy(index):
+        legacy_facet_counts(f_sets[index % len(f_sets)])
+    legacy_calls = max(1, calls // 100)
+    results = [
+        ('search_cases per value', timed(legacy, legacy_calls),
+            legacy_calls),
+        ('FacetCounts, 1 query', timed(uncached, calls), calls),
+    ]
+    for f_set in f_sets:
+        bcamp_api.FACETS.counts(f_set)
+    results.append(('FacetCounts, cached', timed(cached, calls), calls))
+    print_results("facet counts - " + str(case_count) + " cases", results)
+    print("  ", bcamp_api.FACETS.stats())
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_tile_toggles(rand, count):
+    '''
+    Returns 'count' CaseViewer filtersets, each one tile toggled on or off
+    from the last - like a user clicking through the filter tiles.
+    '''
+    tiles = [('account', BENCH_ACCOUNTS[0]), ('account', BENCH_ACCOUNTS[1]),
+        ('product', BENCH_PRODUCTS[0]), ('tag', BENCH_TAGS[0]),
+        ('tag', BENCH_TAGS[1]), ('custom', 'TSNS-1'),
+        ('o_rule', 'hasbug')]
+    enabled = set()
+    states = []
+    for index in range(count):
+        enabled ^= set([rand.choice(tiles)])
+        f_set = {'account': [], 'product': [], 'tag': [], 'custom': [],
+            'o_rule': 'default'}
+        for category, value in sorted(enabled):
+            if category == 'o_rule':
+                f_set['o_rule'] = value
+            else:
+                f_set[category].append(value)
+        states.append(f_set)
+    return states
+
+def bench_search_cache(case_count, calls, toggles=2000):
+    '''
+    Toggles filter tiles on and off like a CaseViewer user, w/ a write now
+    and then, and reports the SEARCH_CACHE hit rate. Then times cached vs.
+    uncached. That no stale result is served is checked by
+    'tests/test_search_cache.py'.
+    '''
+    db_path = create_bench_db(case_count)
+    bcamp_api.SEARCH_CACHE = bcamp_api.FilterSetCache()
+    rand = random.Random(19)
+
+    states = gen_tile_toggles(rand, toggles)
+    writes = 0
+    for f_set in states:
+        if rand.random() < 0.05:
+            writes += 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                bcamp_api.update_case(gen_sr_number(rand.randrange(
+                    case_count)), 'bug_id', rand.choice([None, 'TSNS-1']))
+        bcamp_api.search_cases(f_set)
+    stats = bcamp_api.SEARCH_CACHE.stats()
+    print("\n[ Search cache - " + str(toggles) + " tile toggles, " + str(writes)
+        + " writes ]")
+    print("  hit rate {:.1%}, {} stale entries dropped"
+        .format(stats['hit_rate'], stats['stale']))
+
+    # A working set of filtersets that fits the cache.
+    recent = {}
+    for f_set in states:
+        recent.setdefault(bcamp_api.filterset_key(f_set), f_set)
+    recent = list(recent.values())[:32]
+    def cached(index):
+        bcamp_api.search_cases(recent[index % len(recent)])
+    def uncached(index):
+        uncached_search_cases(recent[index % len(recent)])
+    print_results("tile toggles - " + str(len(recent)) + " filtersets, "
+        + str(case_count) + " cases", [
+        ('search_cases, no cache', timed(uncached, calls), calls),
+        ('search_cases, SEARCH_CACHE', timed(cached, calls), calls),
+    ])
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_index_queries(rand, count):
+    '''
+    Returns 'count' random search-as-you-type texts - 1-3 prefixes of the
+    BENCH_* values, SR numbers and bug ID's.
+    '''
+    words = [value.lower() for value in
+        BENCH_ACCOUNTS + BENCH_PRODUCTS + BENCH_TAGS] + ['tsns-1', '4-0000']
+    return [" ".join(word[:rand.randint(1, len(word))]
+        for word in rand.sample(words, rand.randint(1, 3)))
+        for index in range(count)]
+
+def bench_case_index(case_count, calls):
+    '''
+    Times the search-as-you-type 'CASE_INDEX' vs. the DB search on <Return>,
+    and reports its size. The index is checked by 'tests/test_case_index.py'.
+    '''
+    db_path = create_bench_db(case_count)
+    index = bcamp_api.CASE_INDEX
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        index.build()
+    build_time = time.perf_counter() - start
+    stats = index.stats()
+    print("\n[ CASE_INDEX - " + str(stats['cases']) + " cases, "
+        + str(stats['tokens']) + " tokens, " + str(stats['entries'])
+        + " entries, ~" + str(stats['bytes'] // 1024) + " KB ]")
+
+    queries = gen_index_queries(random.Random(3), 200)
+    def index_query(count):
+        index.query(queries[count % len(queries)])
+    def db_query(count):
+        uncached_search_cases({'account': [], 'product': [], 'tag': [],
+            'custom': queries[count % len(queries)].split(),
+            'o_rule': 'default'})
+    print_results("search-as-you-type - " + str(case_count) + " cases", [
+        ('CASE_INDEX.build', build_time, 1),
+        ('CASE_INDEX.query', timed(index_query, calls), calls),
+        ('search_cases (DB)', timed(db_query, calls), calls),
+    ])
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_search_query(rand, depth=0):
+    '''
+    Returns a random, valid search query w/ nested groups.
+    '''
+    leaves = [
+        lambda: rand.choice(BENCH_ACCOUNTS).split()[0].lower(),
+        lambda: bcamp_api.quote_search_term(rand.choice(BENCH_ACCOUNTS)),
+        lambda: rand.choice(BENCH_TAGS)[:rand.randint(2, 5)],
+        lambda: "account:" + rand.choice(BENCH_ACCOUNTS).split()[0][:4],
+        lambda: 'account:="' + rand.choice(BENCH_ACCOUNTS) + '"',
+        lambda: "product:" + rand.choice(BENCH_PRODUCTS),
+        lambda: "tag:" + rand.choice(BENCH_TAGS),
+        lambda: "tag:=" + rand.choice(BENCH_TAGS),
+        lambda: "bug:TSNS-" + str(rand.randint(1, 9)),
+        lambda: "sr:" + str(rand.randint(10, 99)),
+        lambda: "notes:" + rand.choice(['reboot', 'proxy', 'cert']),
+        lambda: "jira:" + rand.choice(['crash', 'leak', 'slow']),
+        lambda: "status:" + rand.choice(['open', 'need', 'closed']),
+        lambda: "imported:" + rand.choice(['>', '>=', '<', '<=', ''])
+            + "2021-0" + str(rand.randint(1, 9)) + "-15",
+        lambda: "files:" + rand.choice(['>', '>=', '<', '<=', ''])
+            + str(rand.randint(0, 500)),
+    ]
+    parts = []
+    for count in range(rand.randint(1, 3)):
+        if depth < 2 and rand.random() < 0.3:
+            part = "(" + gen_search_query(rand, depth + 1) + ")"
+        else:
+            part = rand.choice(leaves)()
+        if rand.random() < 0.2:
+            part = "-" + part
+        parts.append(part)
+    joiner = rand.choice([" ", " OR ", " AND "])
+    return joiner.join(parts)
+
+def fill_search_fields(rand):
+    '''
+    Sets random notes, JIRA titles and import times on the cases of the
+    bench DB, for the "notes:", "jira:" and "imported:" search fields.
+    '''
+    notes_words = ['reboot', 'proxy', 'certificate', 'timeout', None]
+    jira_words = ['Crash on boot', 'Memory leak', 'Slow UI', None]
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases;")
+        updates = [(rand.choice(notes_words), rand.choice(jira_words),
+            "2021-{:02d}-{:02d} 12:00:00.000000".format(rand.randint(1, 12),
+            rand.randint(1, 28)), row[0]) for row in dbshell.fetchall()]
+        dbshell.executemany("UPDATE cases SET notes = (?), jira_title = (?),"
+            " import_time = (?) WHERE sr_number = (?);", updates)
+
+def run_search_query(text):
+    '''
+    Returns the set of SR's matched by 'compile_search_query' of 'text'.
+    '''
+    sql, params = bcamp_api.compile_search_query(text)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases WHERE " + sql, params)
+        return set(row[0] for row in dbshell.fetchall())
+
+def run_per_term(node, all_cases):
+    '''
+    Evaluates a 'parse_search_query' tree w/ one query per term, combined in
+    Python sets - 'all_cases' is the set of every SR, for 'not'.
+    '''
+    if node[0] == 'term':
+        text = bcamp_api.quote_search_term(node[3])
+        if node[1] != None:
+            text = node[1] + ":" + (node[2] or "") + text
+        return run_search_query(text)
+    if node[0] == 'not':
+        return all_cases - run_per_term(node[1], all_cases)
+    results = [run_per_term(child, all_cases) for child in node[1]]
+    if node[0] == 'and':
+        return set.intersection(*results)
+    return set.union(*results)
+
+def bench_search_grammar(case_count, calls, samples=300):
+    '''
+    Times random nested search queries compiled into one statement vs. one
+    query per term combined in Python. The parser and the compiled queries
+    are checked by 'tests/test_search_grammar.py'.
+    '''
+    db_path = create_bench_db(case_count)
+    rand = random.Random(11)
+    fill_search_fields(rand)
+    all_cases = set(gen_sr_number(index) for index in range(case_count))
+
+    queries = [gen_search_query(rand) for count in range(samples)]
+    nested = [text for text in queries if "(" in text]
+    trees = [bcamp_api.parse_search_query(text) for text in nested]
+    def parse_only(index):
+        bcamp_api.compile_search_query(nested[index % len(nested)])
+    def per_term(index):
+        run_per_term(trees[index % len(trees)], all_cases)
+    def compiled(index):
+        run_search_query(nested[index % len(nested)])
+    print_results("nested queries - " + str(len(nested)) + " queries, "
+        + str(case_count) + " cases", [
+        ('parse + compile only', timed(parse_only, calls), calls),
+        ('one query per term + Python sets', timed(per_term, calls), calls),
+        ('compile_search_query, 1 statement', timed(compiled, calls),
+            calls),
+    ])
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_account_names(count, seed=5):
+    '''
+    Returns 'count' distinct, made up account names such as "Verolan
+    Bank" - 1 or 2 invented words, often w/ a common industry word.
+    '''
+    rand = random.Random(seed)
+    syllables = ['ka', 'ro', 'ven', 'tal', 'mi', 'sor', 'an', 'qui', 'del',
+        'bra', 'ne', 'lux', 'tor', 'fi', 'gen', 'ha', 'zu', 'pel', 'or', 'cas',
+        'ti', 'mon', 'ur', 'we', 'stra', 'ly', 'dex', 'po', 'nia', 'jo']
+    industries = ['Bank', 'Health', 'Telecom', 'Energy', 'Retail', 'Group',
+        'Insurance', 'Foods', 'Labs', 'Systems', 'Motors', 'Media', 'Corp',
+        'Inc', 'Credit Union', 'Hospital', 'University', 'Airlines']
+    def word():
+        return "".join(rand.choice(syllables)
+            for count in range(rand.randint(2, 3))).capitalize()
+    names = set(BENCH_ACCOUNTS)
+    while len(names) < count:
+        words = [word() for count in range(rand.randint(1, 2))]
+        if rand.random() < 0.6:
+            words.append(rand.choice(industries))
+        names.add(" ".join(words))
+    return sorted(names)
+
+def bench_trigram(case_count, calls, value_count=30000):
+    '''
+    Checks the typo-tolerant 'TrigramIndex' against a brute force scan of
+    'value_count' distinct account names, and times its lookups vs. a
+    "LIKE '%text%'" on the cases table, which misses the near matches.
+    '''
+    values = gen_account_names(value_count)
+    index = bcamp_api.TrigramIndex('account')
+    start = time.perf_counter()
+    index.build(values)
+    build_time = time.perf_counter() - start
+    print("\n[ TrigramIndex - " + str(index.stats()['values']) + " values, "
+        + str(index.stats()['trigrams']) + " trigrams ]")
+
+    for typo in ("US Bank", "USBank", "us-bank", "US Bnak", "usbank"):
+        assert index.lookup(typo, 3)[0][0] == 'US Bank', (typo,
+            index.lookup(typo, 3))
+    print("  'US Bank' is the top hit for USBank, us-bank, US Bnak")
+
+    # Brute force - the same scores for EVERY value.
+    def brute_force(text, limit, threshold):
+        query = index.normalize(text)
+        grams = index.trigrams(query, complete=False)
+        prefix = sorted([value for value in values
+            if index.normalize(value).startswith(query)],
+            key=lambda value: (len(value), value))[:limit]
+        scored = []
+        for value in values:
+            if value in prefix:
+                continue
+            value_grams = index.trigrams(index.normalize(value))
+            shared = len(grams & value_grams)
+            score = shared / (len(grams) + len(value_grams) - shared)
+            if score >= threshold:
+                scored.append((-score, value))
+        scored.sort()
+        return ([(value, 1.0) for value in prefix] + [(value, -score)
+            for score, value in scored])[:limit]
+
+    rand = random.Random(9)
+    queries = []
+    for count in range(30):
+        value = list(rand.choice(values))
+        # Drop, swap or change a char, or cut the value short.
+        position = rand.randrange(len(value))
+        edit = rand.choice(['drop', 'swap', 'change', 'cut'])
+        if edit == 'drop':
+            del value[position]
+        elif edit == 'swap' and position + 1 < len(value):
+            value[position], value[position + 1] = (value[position + 1],
+                value[position])
+        elif edit == 'change':
+            value[position] = rand.choice('abcdefghijklmnopqrstuvwxyz')
+        else:
+            value = value[:max(3, position)]
+        queries.append("".join(value))
+    for text in queries:
+        assert index.lookup(text, 10, 0.3) == brute_force(text, 10, 0.3), text
+    print("  30 random typos match a brute force scan")
+
+    db_path = create_bench_db(case_count)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.executemany("UPDATE cases SET account = (?) "
+            "WHERE rowid = (?);", [(values[rowid % len(values)], rowid)
+            for rowid in range(1, case_count + 1)])
+
+    def trigram_lookup(count):
+        index.lookup(queries[count % len(queries)])
+    def like_lookup(count):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute("SELECT DISTINCT account FROM cases "
+                "WHERE account LIKE (?) LIMIT 10;",
+                ('%' + queries[count % len(queries)] + '%',))
+            dbshell.fetchall()
+    print_results("account lookup - " + str(len(values)) + " values", [
+        ('TrigramIndex.build', build_time, 1),
+        ('TrigramIndex.lookup', timed(trigram_lookup, calls), calls),
+        ('LIKE on ' + str(case_count) + ' cases', timed(like_lookup, calls),
+            calls),
+    ])
+
+    # 'account:~' in the search query language, and the DB hooks.
+    search_index = bcamp_api.VALUE_INDEXES['account']
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.update_case(gen_sr_number(0), 'account', 'US Bank')
+        sql, params = bcamp_api.compile_search_query("account:~usbnak")
+    assert 'US Bank' in params, params
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases WHERE " + sql, params)
+        assert (gen_sr_number(0),) in dbshell.fetchall()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bcamp_api.update_case(gen_sr_number(0), 'account', 'Zanzibar Air')
+    assert not search_index.ready
+    assert bcamp_api.suggest_values('account', 'zanzibra', 1) == [
+        'Zanzibar Air']
+    print("  'account:~usbnak' finds 'US Bank', edits reload the index")
+    bcamp_api.BCAMP_DB.close_all()
+
+def gen_file_tree(root, file_count, files_per_dir=50, seed=1):
+    '''
+    Creates a synthetic, extracted support bundle under 'root' - 'file_count'
+    small files, ~'files_per_dir' per dir, in dirs nested up to 4 deep - and
+    sets every mtime an hour back, like a bundle extracted earlier.
+
+    Returns the list of dir paths, 'root' first.
+    '''
+    rand = random.Random(seed)
+    dirs = [(root, 0)]
+    for index in range(max(1, file_count // files_per_dir) - 1):
+        parent, depth = rand.choice([item for item in dirs[-20:]
+            if item[1] < 4] or dirs[:1])
+        path = os.path.join(parent, "dir" + str(index))
+        os.mkdir(path)
+        dirs.append((path, depth + 1))
+    past = time.time() - 3600
+    for index in range(file_count):
+        path = os.path.join(dirs[index % len(dirs)][0], "file" + str(index)
+            + rand.choice(['.log', '.log', '.txt', '.xml', '.dbg', '.1']))
+        with open(path, 'wb') as file:
+            file.write(b"x" * rand.randint(0, 200))
+        os.utime(path, (past, past))
+    # Dir mtimes last, creating the files above changed them.
+    for path, depth in dirs:
+        os.utime(path, (past, past))
+    return [path for path, depth in dirs]
+
+def legacy_file_scan(root_path):
+    '''
+    The 'Tk_FileBrowser.refresh_file_record' walk before 'scan_file_tree' -
+    every dir is listed, and every entry os.stat()'ed, on each refresh.
+    '''
+    file_record = {}
+    dir_level = [root_path]
+    depth_index = 0
+    while len(dir_level) != 0:
+        next_level = []
+        for path in dir_level:
+            with os.scandir(path) as scanner:
+                for dir_entry in scanner:
+                    file_stats = os.stat(dir_entry.path)
+                    if dir_entry.is_dir():
+                        next_level.append(dir_entry.path)
+                        _type = "dir"
+                    else:
+                        _type = os.path.splitext(dir_entry.path)[1]
+                    file_record[dir_entry.path] = {
+                        'name': os.path.basename(dir_entry.path),
+                        'location': 'remote',
+                        'path': dir_entry.path,
+                        'type': _type,
+                        'size': file_stats.st_size,
+                        'creation_time': file_stats.st_ctime,
+                        'modified_time': file_stats.st_mtime,
+                        'date_range': None,
+                        'favorite': False,
+                        'notes': None,
+                        'depth_index': depth_index
+                    }
+        dir_level = next_level
+        depth_index += 1
+    return file_record
+
+@contextlib.contextmanager
+def count_fs_calls(latency=0, entry_latency=None):
+    '''
+    Counts the os.stat, os.scandir and DirEntry.stat calls made in the
+    'with' block - on a NAS share, each of them is a network round trip.
+    W/ 'latency' (secs) each call also sleeps like one, a stand-in for a
+    high latency SMB share. 'entry_latency' is the delay of DirEntry.stat
+    (default 'latency') - 0 on Windows, where it is served from the listing.
+
+    Yields the {'calls': N, 'round_trips': N, 'max_active': N} dict, updated
+    as the calls are made. 'round_trips' are the calls that slept, and
+    'max_active' is the most calls that were waiting at once.
+    '''
+    if entry_latency == None:
+        entry_latency = latency
+    counts = {'calls': 0, 'round_trips': 0, 'active': 0, 'max_active': 0}
+    lock = threading.Lock()
+    real_stat = os.stat
+    real_scandir = os.scandir
+
+    def round_trip(delay):
+        with lock:
+            counts['calls'] += 1
+            if delay > 0:
+                counts['round_trips'] += 1
+            counts['active'] += 1
+            counts['max_active'] = max(counts['max_active'], counts['active'])
+        if delay > 0:
+            time.sleep(delay)
+        with lock:
+            counts['active'] -= 1
+
+    class CountedEntry:
+        def __init__(self, entry):
+            self.entry = entry
+            self.name = entry.name
+            self.path = entry.path
+        def is_dir(self):
+            return self.entry.is_dir()
+        def stat(self):
+            round_trip(entry_latency)
+            return self.entry.stat()
+
+    @contextlib.contextmanager
+    def counted_scandir(path):
+        round_trip(latency)
+        with real_scandir(path) as scanner:
+            yield (CountedEntry(entry) for entry in scanner)
+    def counted_stat(path, *args, **kwargs):
+        round_trip(latency)
+        return real_stat(path, *args, **kwargs)
+
+    os.stat = counted_stat
+    os.scandir = counted_scandir
+    try:
+        yield counts
+    finally:
+        os.stat = real_stat
+        os.scandir = real_scandir
+
+def bench_file_scan(case_count, calls, file_count=100000):
+    '''
+    Times a full FileBrowser scan of a generated 'file_count' file tree vs.
+    a 'scan_file_tree' rescan where nothing changed. Then checks the diff of
+    a rescan after files are added, removed and rewritten, and that a full
+    scan agrees w/ the incremental one.
+    '''
+    create_bench_db(1)
+    sr_number = gen_sr_number(0)
+    root = os.path.join(tempfile.mkdtemp(prefix='bcamp_bench_'), sr_number)
+    os.mkdir(root)
+    start = time.perf_counter()
+    dirs = gen_file_tree(root, file_count)
+    print("\n[ file scan - " + str(file_count) + " files in " + str(len(dirs))
+        + " dirs, generated in {:.1f}s ]".format(time.perf_counter() - start))
+
+    def scan(full=False):
+        record, diff, snapshot = bcamp_api.scan_file_tree(sr_number, 'remote',
+            root, full=full)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bcamp_api.update_files(sr_number, record, 'remote', snapshot)
+        return record, diff
+
+    repeat = 3
+    legacy_time = timed(lambda index: legacy_file_scan(root), repeat)
+    start = time.perf_counter()
+    record, diff = scan()
+    first_time = time.perf_counter() - start
+    legacy = legacy_file_scan(root)
+    assert len(diff['added']) == len(record) == len(legacy)
+    assert all(legacy[path]['size'] == record[path]['size']
+        and legacy[path]['depth_index'] == record[path]['depth_index']
+        for path in legacy)
+    full_time = timed(lambda index: scan(full=True), repeat)
+    def rescan(index):
+        record, diff = scan()
+        assert diff == {'added': [], 'removed': [], 'modified': []}, diff
+        assert len(record) == len(legacy)
+    rescan_time = timed(rescan, repeat)
+    print_results("refresh_file_record - " + str(file_count) + " files", [
+        ('legacy walk, os.stat per entry', legacy_time, repeat),
+        ('scan_file_tree, first scan + DB', first_time, 1),
+        ('scan_file_tree, full + DB', full_time, repeat),
+        ('scan_file_tree, no-change rescan + DB', rescan_time, repeat),
+    ])
+    with count_fs_calls() as legacy_calls:
+        legacy_file_scan(root)
+    with count_fs_calls() as rescan_calls:
+        scan()
+    print("  file system calls: legacy walk", legacy_calls['calls'],
+        "vs. rescan", rescan_calls['calls'], "- at 1 ms per NAS round trip,"
+        " {:.1f}s vs. {:.1f}s".format(legacy_calls['calls'] / 1000,
+        rescan_calls['calls'] / 1000))
+
+    # Add, remove and rewrite files.
+    added = os.path.join(dirs[7], "new.log")
+    with open(added, 'wb') as file:
+        file.write(b"new")
+    removed = os.path.join(dirs[3], sorted(name for name
+        in os.listdir(dirs[3]) if name.startswith("file"))[0])
+    os.remove(removed)
+    # The deepest dir, away from the dirs above.
+    removed_dir = max([path for path in dirs[10:]
+        if os.path.dirname(path) not in dirs[:10]],
+        key=lambda path: path.count(os.sep))
+    removed_paths = set(path for path in record
+        if path == removed_dir or path.startswith(removed_dir + os.sep))
+    shutil.rmtree(removed_dir)
+    # Rewritten in place - its dir's mtime doesn't change.
+    rewritten = os.path.join(dirs[5], sorted(name for name
+        in os.listdir(dirs[5]) if name.startswith("file"))[0])
+    with open(rewritten, 'ab') as file:
+        file.write(b"more")
+    # Still being written during the scan, like a download.
+    growing = os.path.join(dirs[9], "download.zip")
+    with open(growing, 'wb') as file:
+        file.write(b"part")
+
+    record, diff = scan()
+    assert diff['added'] == [added, growing] or diff['added'] == [growing,
+        added], diff['added']
+    assert set(diff['removed']) == removed_paths | {removed}, diff['removed']
+    # Dirs w/ added or removed entries have a new mtime themselves.
+    assert [path for path in diff['modified']
+        if record[path]['type'] != 'dir'] == [], diff['modified']
+    print("  rescan: added", len(diff['added']), "removed",
+        len(diff['removed']), "modified dirs", len(diff['modified']),
+        "- rewritten files need a full scan")
+
+    with open(growing, 'ab') as file:
+        file.write(b"rest of the download")
+    record, diff = scan()
+    assert diff['modified'] == [growing], diff
+    assert record[growing]['size'] == os.path.getsize(growing)
+    print("  the download still being written is rescanned once it is done")
+
+    record, diff = scan(full=True)
+    assert diff['modified'] == [rewritten], diff
+    assert set(record) == set(legacy_file_scan(root)), "full != legacy"
+    record, diff = scan()
+    assert diff == {'added': [], 'removed': [], 'modified': []}, diff
+    print("  full scan finds the rewritten file, and matches the legacy walk")
+    shutil.rmtree(os.path.dirname(root))
+    bcamp_api.BCAMP_DB.close_all()
+
+def bench_crawler(case_count, calls, file_count=20000, latency=0.005):
+    '''
+    Times cold scans of a generated 'file_count' file tree on a stand-in for
+    a high latency SMB share - every os.stat/os.scandir sleeps 'latency'
+    secs, see 'count_fs_calls' - listing one dir at a time vs. w/ the
+    ParallelCrawler. Checks both find the same entries in the same order,
+    that the per-share limit holds w/ 2 scans at once, and that a cancelled
+    scan stops early w/o a result.
+    '''
+    create_bench_db(1)
+    sr_number = gen_sr_number(0)
+    root = os.path.join(tempfile.mkdtemp(prefix='bcamp_bench_'), sr_number)
+    os.mkdir(root)
+    dirs = gen_file_tree(root, file_count)
+    print("\n[ ParallelCrawler - " + str(file_count) + " files in "
+        + str(len(dirs)) + " dirs, {:.0f} ms per NAS round trip ]".format(
+        latency * 1000))
+
+    def cold_scan(crawler, location='remote', cancel=None, on_entry=None):
+        order = []
+        def record_order(path, record):
+            order.append(path)
+            if on_entry != None:
+                on_entry(path, record)
+        result = bcamp_api.scan_file_tree(sr_number, location, root,
+            record_order, full=True, cancel=cancel, crawler=crawler)
+        return result, order
+
+    serial = bcamp_api.ParallelCrawler(max_workers=1, per_share=1)
+    crawler = bcamp_api.ParallelCrawler(max_workers=16, per_share=8)
+    with count_fs_calls(latency, entry_latency=0) as counts:
+        start = time.perf_counter()
+        serial_result, serial_order = cold_scan(serial)
+        serial_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result, order = cold_scan(crawler)
+        crawler_time = time.perf_counter() - start
+    assert order == serial_order and result[0] == serial_result[0]
+    assert result[1] == serial_result[1]
+    print_results("cold scan - " + str(counts['round_trips'] // 2)
+        + " round trips each", [
+        ('one dir at a time', serial_time, 1),
+        ('ParallelCrawler, 8 per share', crawler_time, 1),
+    ])
+    print("  {:.1f}x faster (target 5x), same entries in the same order"
+        .format(serial_time / crawler_time))
+
+    # 2 scans at once - the remote and local trees of an SR share the NAS.
+    with count_fs_calls(latency, entry_latency=0) as counts:
+        threads = [threading.Thread(target=cold_scan, args=(crawler,
+            location)) for location in ('remote', 'local')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert counts['max_active'] <= crawler.per_share, counts
+    print("  2 scans at once: at most", counts['max_active'],
+        "round trips to the share at a time")
+
+    # Cancel after the first 1000 entries, like closing the FileBrowser.
+    cancel = threading.Event()
+    def cancel_early(path, record):
+        if len(cancel_order) >= 1000:
+            cancel.set()
+        cancel_order.append(path)
+    cancel_order = []
+    with count_fs_calls(latency, entry_latency=0) as counts:
+        start = time.perf_counter()
+        result, order = cold_scan(crawler, cancel=cancel,
+            on_entry=cancel_early)
+        cancel_time = time.perf_counter() - start
+    assert result == None
+    print("  cancelled after {} entries in {:.0f} ms, {} round trips".format(
+        len(cancel_order), cancel_time * 1000, counts['round_trips']))
+    shutil.rmtree(os.path.dirname(root))
+    bcamp_api.BCAMP_DB.close_all()
+
+class BenchTreeview:
+    '''
+    Stand-in for the 'file_tree' ttk.Treeview of Tk_FileBrowser, for
+    'bench_file_tree'. Keeps the rows in a dict, and raises 'tcl_error'
+    where Tk would.
+    '''
+    def __init__(self, tcl_error):
+        self.TclError = tcl_error
+        self.rows = {'': {'parent': None, 'children': [], 'open': True}}
+        self.focused = ''
+        self.stale_inserts = 0
+
+    def insert(self, parent, index, iid=None, text="", values=(), tags=()):
+        if iid in self.rows:
+            raise self.TclError("Item " + iid + " already exists")
+        if parent not in self.rows:
+            raise self.TclError("Item " + parent + " not found")
+        if isinstance(tags, str):
+            tags = (tags,)
+        if 'stale' in tags:
+            self.stale_inserts += 1
+        self.rows[iid] = {'parent': parent, 'children': [], 'open': False,
+            'text': text, 'values': values, 'tags': tags}
+        if index == 'end':
+            self.rows[parent]['children'].append(iid)
+        else:
+            self.rows[parent]['children'].insert(int(index), iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            if iid not in self.rows:
+                raise self.TclError("Item " + iid + " not found")
+            self.rows[self.rows[iid]['parent']]['children'].remove(iid)
+            items = [iid]
+            while items:
+                item = items.pop()
+                items.extend(self.rows.pop(item)['children'])
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def get_children(self, iid=''):
+        return tuple(self.rows[iid]['children'])
+
+    def item(self, iid, option=None, **kw):
+        if iid not in self.rows:
+            raise self.TclError("Item " + iid + " not found")
+        if option != None:
+            return self.rows[iid][option]
+        if isinstance(kw.get('tags'), str):
+            kw['tags'] = (kw['tags'],)
+        self.rows[iid].update(kw)
+
+    def focus(self, iid=None):
+        if iid == None:
+            return self.focused
+        self.focused = iid
+
+# The Tk_FileBrowser attributes 'bench_file_tree' runs as they are.
+FILE_TREE_METHODS = ('TREE_BATCH_ROWS', 'TREE_BATCH_MS', 'LAZY_PLACEHOLDER',
+    'insert_to_tree', 'delete_from_tree', 'insert_to_favtree',
+    'drain_tree_queue', 'on_tree_open', 'on_tree_close', 'evict_closed_dirs',
+    'open_file_record', 'refresh_file_record', 'on_destroy')
+
+class BenchFileBrowser:
+    '''
+    Tk_FileBrowser w/o its widgets, for 'bench_file_tree' - holds the state
+    set by 'Tk_FileBrowser.__init__', a BenchTreeview as its 'file_tree',
+    and runs the 'after' callbacks once per 'tick', like one iteration of
+    the mainloop. The FILE_TREE_METHODS are added by 'file_browser_type'.
+    '''
+    def __init__(self, tcl_error, sr_number, remote_path, local_path,
+            lazy_tree=False, node_budget=20000):
+        self.key_value = sr_number
+        self.sr_remote_path = remote_path
+        self.sr_local_path = local_path
+        self.local_tree = local_path
+        self.time_format = "%m/%d/%y %H:%M"
+        self.scan_cancel = threading.Event()
+        self.tree_queue = queue.Queue()
+        self.tree_iids = set()
+        self.drain_id = None
+        self.stale_iids = set()
+        self.lazy_tree = lazy_tree
+        self.node_budget = node_budget
+        self.loaded_dirs = set([remote_path, local_path])
+        self.closed_dirs = {}
+        self.file_tree = BenchTreeview(tcl_error)
+        # {after id: (ms, func)} of the scheduled callbacks.
+        self.pending = {}
+        self.after_count = 0
+        self.drain_tree_queue()
+
+    def after(self, ms, func):
+        self.after_count += 1
+        after_id = 'after#' + str(self.after_count)
+        self.pending[after_id] = (ms, func)
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.pending[after_id]
+
+    def tick(self):
+        '''
+        Runs the callbacks scheduled so far, and returns their delays.
+        '''
+        due = list(self.pending.items())
+        self.pending.clear()
+        for after_id, (ms, func) in due:
+            func()
+        return [ms for after_id, (ms, func) in due]
+
+    def post_task(self, updated_file_record, mode=None, dir_snapshot=None):
+        # The same write as Tk_FileBrowser.post_task, w/o its thread.
+        bcamp_api.update_files(self.key_value, updated_file_record, mode,
+            dir_snapshot)
+
+def file_browser_type(Basecamp):
+    '''
+    Returns a subclass of BenchFileBrowser w/ the FILE_TREE_METHODS of
+    'Basecamp.Tk_FileBrowser'.
+    '''
+    return type('BenchTkFileBrowser', (BenchFileBrowser,), {name:
+        getattr(Basecamp.Tk_FileBrowser, name) for name in FILE_TREE_METHODS})
+
+def bench_file_tree(case_count, calls, file_count=20000):
+    '''
+    Drives the Tk_FileBrowser tree methods w/o Tk against a generated
+    'file_count' file tree. Checks that...
+    - 'open_file_record' on a worker thread is rendered by
+      'drain_tree_queue' in batches of at most TREE_BATCH_ROWS rows.
+    - 'on_destroy' cancels the scan and the 'after' loop.
+    - A lazy tree loads a dir when opened ('on_tree_open'), evicts a closed
+      dir over the 'node_budget' ('evict_closed_dirs'), and loads it again
+      when it is reopened.
+    - Reopening renders the saved rows as 'stale' first, and the rescan
+      confirms them, and removes the rows of deleted files.
+    '''
+    import Basecamp
+    browser_type = file_browser_type(Basecamp)
+    tcl_error = Basecamp.tk.TclError
+    create_bench_db(1)
+    sr_number = gen_sr_number(0)
+    root = os.path.join(tempfile.mkdtemp(prefix='bcamp_bench_'), sr_number)
+    os.mkdir(root)
+    local_root = os.path.join(os.path.dirname(root), 'downloads', sr_number)
+    dirs = gen_file_tree(root, file_count)
+    print("\n[ FileBrowser tree - " + str(file_count) + " files in "
+        + str(len(dirs)) + " dirs ]")
+
+    def new_browser(lazy_tree=False, node_budget=20000):
+        return browser_type(tcl_error, sr_number, root, local_root,
+            lazy_tree, node_budget)
+
+    def open_browser(browser):
+        '''
+        Runs 'open_file_record' on a worker thread, and ticks the mainloop
+        until every queued row is in the tree. Returns (seconds, max rows
+        per tick, [secs of each tick w/ rows], the 'after' delays used).
+        '''
+        thread = threading.Thread(target=browser.open_file_record,
+            args=['remote'])
+        delays = set()
+        max_rows = 0
+        tick_times = []
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            while thread.is_alive() or not browser.tree_queue.empty():
+                queued = browser.tree_queue.qsize()
+                tick_start = time.perf_counter()
+                delays.update(browser.tick())
+                if queued:
+                    tick_times.append(time.perf_counter() - tick_start)
+                    max_rows = max(max_rows, queued
+                        - browser.tree_queue.qsize())
+                else:
+                    time.sleep(0.001) # Waiting on the scan.
+            thread.join()
+        # Idle once the queue is empty.
+        assert browser.tick() == [50]
+        return time.perf_counter() - start, max_rows, tick_times, delays
+
+    # 1. First open, nothing saved - every row comes from the scan.
+    browser = new_browser()
+    first_time, max_rows, tick_times, delays = open_browser(browser)
+    entries = set(bcamp_api.scan_file_tree(sr_number, 'remote', root,
+        full=True)[0])
+    assert browser.tree_iids == entries
+    assert max_rows <= browser.TREE_BATCH_ROWS, max_rows
+    # Back right away while rows are waiting.
+    assert 1 in delays, delays
+    assert browser.file_tree.stale_inserts == 0
+    tick_times.sort()
+    print("  first open:", len(entries), "rows in", len(tick_times),
+        "ticks, at most", max_rows, "rows per tick, {:.1f} ms median / {:.1f}"
+        " ms max per tick".format(tick_times[len(tick_times) // 2] * 1000,
+        tick_times[-1] * 1000))
+
+    # 2. Closing the FileBrowser mid-scan stops the scan and the loop.
+    browser = new_browser()
+    thread = threading.Thread(target=browser.refresh_file_record,
+        args=['remote', True, True])
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread.start()
+        while browser.tree_queue.qsize() < 100 and thread.is_alive():
+            time.sleep(0.001)
+        browser.tick()
+        browser.on_destroy(types.SimpleNamespace(widget=browser))
+        thread.join()
+    assert browser.scan_cancel.is_set() and browser.pending == {}
+    assert len(browser.tree_iids) < len(entries)
+    print("  on_destroy: scan cancelled after", len(browser.tree_iids),
+        "rows, 'after' loop stopped")
+
+    # 3. Lazy tree - ONLY the top dir is rendered until a dir is opened.
+    browser = new_browser(lazy_tree=True)
+    lazy_time, max_rows, tick_times, delays = open_browser(browser)
+    top = set(os.path.join(root, name) for name in os.listdir(root))
+    assert browser.tree_iids == top
+    placeholder = browser.LAZY_PLACEHOLDER
+
+    def toggle(dir_path, opened):
+        '''
+        Opens or closes 'dir_path' like a click, and ticks the mainloop
+        until an opened dir is loaded.
+        '''
+        browser.file_tree.focus(dir_path)
+        browser.file_tree.item(dir_path, open=opened)
+        if not opened:
+            browser.on_tree_close()
+            return
+        browser.on_tree_open()
+        deadline = time.perf_counter() + 10
+        while (browser.file_tree.exists(placeholder + dir_path)
+                or not browser.tree_queue.empty()):
+            assert time.perf_counter() < deadline, dir_path
+            browser.tick()
+            time.sleep(0.001)
+
+    def children(dir_path):
+        return set(child for child in browser.file_tree.get_children(dir_path)
+            if not child.startswith(placeholder))
+
+    dir_a, dir_b = sorted(path for path in top if os.path.isdir(path))[:2]
+    toggle(dir_a, True)
+    children_a = set(os.path.join(dir_a, name) for name in os.listdir(dir_a))
+    assert children(dir_a) == children_a
+    toggle(dir_a, False)
+    # Room for 'dir_b' ONLY if the closed 'dir_a' is evicted.
+    browser.node_budget = len(browser.tree_iids) + len(os.listdir(dir_b)) - 1
+    toggle(dir_b, True)
+    assert children(dir_a) == set() and dir_a not in browser.loaded_dirs
+    assert browser.file_tree.exists(placeholder + dir_a)
+    assert len(children(dir_b)) == len(os.listdir(dir_b))
+    assert len(browser.tree_iids) <= browser.node_budget
+    browser.node_budget = 20000
+    toggle(dir_a, True)
+    assert children(dir_a) == children_a
+    assert not browser.file_tree.exists(placeholder + dir_a)
+    print("  lazy tree:", len(top), "rows on open, 'dir_a' evicted for",
+        "'dir_b' and loaded again when reopened")
+
+    # 4. Reopen after files were removed and added - the saved rows are
+    # rendered 'stale', then confirmed or removed by the rescan.
+    removed = sorted(path for path in entries if os.path.isfile(path)
+        and os.path.dirname(path) == dirs[1])[:5]
+    for path in removed:
+        os.remove(path)
+    added = os.path.join(dirs[2], "new_file.log")
+    with open(added, 'w') as file:
+        file.write("new")
+    browser = new_browser()
+    reopen_time, max_rows, tick_times, delays = open_browser(browser)
+    assert browser.file_tree.stale_inserts == len(entries)
+    assert browser.stale_iids == set()
+    assert browser.tree_iids == (entries - set(removed)) | set([added])
+    assert not any('stale' in row['tags'] for iid, row
+        in browser.file_tree.rows.items() if iid != '')
+    print("  reopen:", len(entries), "saved rows rendered stale,",
+        len(removed), "removed and 1 added by the rescan")
+
+    print_results("FileBrowser open - " + str(len(entries)) + " files", [
+        ('first open, full tree', first_time, 1),
+        ('first open of a saved tree, lazy', lazy_time, 1),
+        ('reopen, saved rows + rescan', reopen_time, 1),
+    ])
+    shutil.rmtree(os.path.dirname(root))
+    bcamp_api.BCAMP_DB.close_all()
+
+'''
+[ Synthetic Generator + Scale Suite ]
+'''
+# Default case counts for the 'suite', and its raw CaseViewer search bar
+# queries for 'parse_filter_search'.
+SUITE_SCALES = [500, 2000, 5000]
+SUITE_RAW_QUERIES = ["bank", "US Bank", "'US Bank' epo", "TSNS-123 4-0001",
+    "account:tel OR product:epo", "-tag:perf files:>10",
+    "(account:bank OR tag:ssl) -status:closed", "notes:'memory dump'",
+    "(oops", "  proxy   timeout  ", 'imported:>=2021-06-01 "Need Info"']
+
+def zipf_choice(rand, values, exponent=1.1):
+    '''
+    Returns a value of 'values', where the Nth value is picked about 1/N
+    as often as the first - a few common values and a long tail.
+    '''
+    weights = [1 / ((rank + 1) ** exponent) for rank in range(len(values))]
+    return rand.choices(values, weights)[0]
+
+def create_synthetic_db(case_count, db_dir=None, seed=1, files_per_case=0):
+    '''
+    Like 'create_bench_db', but w/ the skew of a real 'basecamp.db' - a few
+    large accounts and many small ones, most cases on a couple of products,
+    a long tail of tags, and Jira statuses for the cases w/ a bug. With
+    'files_per_case', each case also gets rows in the 'files' table through
+    'bcamp_api.update_files'.
+
+    Returns the path of the new DB.
+    '''
+    db_path = create_bench_db(0, db_dir, seed)
+    rand = random.Random(seed)
+    # BENCH_* values first, so they are the common ones.
+    accounts = BENCH_ACCOUNTS + [name for name in
+        gen_account_names(max(len(BENCH_ACCOUNTS), case_count // 8), seed)
+        if name not in BENCH_ACCOUNTS]
+    tags = BENCH_TAGS + ['kb' + str(index).zfill(4)
+        for index in range(max(10, case_count // 25))]
+    jira_weights = {'Open': 35, 'In Progress': 25, 'Need Info': 15,
+        'Closed': 25}
+
+    case_rows = []
+    tag_rows = []
+    for index in range(case_count):
+        sr_number = gen_sr_number(index)
+        bug_id = None
+        jira_status = None
+        if rand.random() < 0.3:
+            bug_id = 'TSNS-' + str(rand.randint(100000, 999999))
+            jira_status = rand.choices(list(jira_weights),
+                list(jira_weights.values()))[0]
+        notes = None
+        if rand.random() < 0.4:
+            notes = rand.choice(BENCH_NOTES)
+        # SR numbers are handed out in order, so older SR's imported first.
+        import_time = "{:%Y-%m-%d %H:%M:%S}.000000".format(
+            datetime.datetime(2021, 1, 1) + datetime.timedelta(
+            minutes=(index * 525600 * 2) // max(1, case_count)))
+        case_rows.append((
+            sr_number,
+            "\\\\bench\\remote\\" + sr_number,
+            "\\\\bench\\downloads\\" + sr_number,
+            int(rand.random() < 0.02),
+            zipf_choice(rand, BENCH_PRODUCTS, 1.5),
+            zipf_choice(rand, accounts),
+            notes,
+            bug_id,
+            import_time,
+            str(int(rand.paretovariate(1.2) * 20)),
+            jira_status,
+            int(rand.random() < 0.05),
+            int(rand.random() < 0.05),
+        ))
+        case_tags = set()
+        for count in range(rand.choice([0, 0, 1, 1, 1, 2, 2, 3, 4])):
+            case_tags.add(zipf_choice(rand, tags))
+        for tag in sorted(case_tags):
+            tag_rows.append((tag, sr_number))
+
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.executemany("""INSERT INTO cases (
+            sr_number,
+            remote_path,
+            local_path,
+            pinned,
+            product,
+            account,
+            notes,
+            bug_id,
+            import_time,
+            last_file_count,
+            jira_status,
+            jira_notify_flag,
+            file_notify_flag)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);""", case_rows)
+        dbshell.executemany("INSERT INTO tags (tag, sr_number) VALUES (?,?);",
+            tag_rows)
+    if files_per_case > 0:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for index in range(case_count):
+                sr_number = gen_sr_number(index)
+                bcamp_api.update_files(sr_number, gen_file_records(sr_number,
+                    files_per_case, seed=seed))
+    return db_path
+
+def suite_filtersets(rand, count=40):
+    '''
+    Returns 'count' CaseViewer filtersets for the synthetic DB - the values
+    are picked from its most used AND its rarest accounts, products and
+    tags, like a user clicking through the filter menu.
+    '''
+    def values(query):
+        with bcamp_api.BCAMP_DB.shell() as dbshell:
+            dbshell.execute(query)
+            ranked = [row[0] for row in dbshell.fetchall()]
+        return ranked[:5] + ranked[-5:]
+    accounts = values("SELECT account FROM cases GROUP BY account "
+        "ORDER BY count(*) DESC, account;")
+    products = values("SELECT product FROM cases GROUP BY product "
+        "ORDER BY count(*) DESC, product;")
+    tags = values("SELECT tag FROM tags GROUP BY tag "
+        "ORDER BY count(*) DESC, tag;")
+    terms = ['bank', 'proxy', 'TSNS-1', 'e', 'kb00', gen_sr_number(42),
+        'account:tel OR product:epo', '-tag:perf']
+
+    filtersets = []
+    for index in range(count):
+        filtersets.append({
+            'account': rand.sample(accounts, rand.choice([0, 0, 1, 2])),
+            'product': rand.sample(products, rand.choice([0, 0, 1])),
+            'tag': rand.sample(tags, rand.choice([0, 0, 1, 2])),
+            'custom': [bcamp_api.quote_search_term(term) if ':' not in term
+                else term for term in rand.sample(terms,
+                rand.choice([0, 0, 1]))],
+            'o_rule': rand.choice(list(bcamp_api.FILTERSET_ORDER_RULES)),
+        })
+    return filtersets
+
+def timed_repeat(func, calls, repeat=5):
+    '''
+    Runs 'timed(func, calls)' 'repeat' times, and returns a result dict w/
+    the best and median us/call. The best run is the stable number to
+    compare between runs, the median shows the noise.
+    '''
+    runs = sorted(timed(func, calls) / calls * 1000000
+        for count in range(repeat))
+    return {
+        'calls': calls,
+        'repeat': repeat,
+        'best_us': round(runs[0], 2),
+        'median_us': round(runs[len(runs) // 2], 2),
+    }
+
+def run_suite_scale(case_count, calls, seed=1, files_per_case=0, repeat=5):
+    '''
+    Builds a synthetic DB w/ 'case_count' cases, and times the CaseViewer
+    search and render path on it -
+    - 'search_cases' for a set of filtersets, uncached and cached.
+    - 'dbget_case_casetiles', which (re)loads EVERY tile.
+    - The 'Tk_CaseViewer.NEW_build_tileindex_*' ordering of each 'o_rule'.
+    - 'parse_filter_search' of SUITE_RAW_QUERIES.
+
+    Calls that scan every case are run 'calls * 50 // case_count' times.
+    Returns {'db': {stats}, 'results': {name: timed_repeat result}}.
+    '''
+    # The ordering methods only read their tiles argument, not 'self'.
+    import Basecamp
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_path = create_synthetic_db(case_count, seed=seed,
+            files_per_case=files_per_case)
+    build_time = time.perf_counter() - start
+    bcamp_api.SEARCH_CACHE.clear()
+    bcamp_api.FACETS.invalidate()
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("""SELECT
+            (SELECT count(*) FROM cases),
+            (SELECT count(DISTINCT account) FROM cases),
+            (SELECT count(DISTINCT tag) FROM tags),
+            (SELECT count(*) FROM tags),
+            (SELECT count(*) FROM files);""")
+        row = dbshell.fetchone()
+    db_stats = {'cases': row[0], 'accounts': row[1], 'distinct_tags': row[2],
+        'tags': row[3], 'files': row[4], 'build_s': round(build_time, 3)}
+
+    scan_calls = max(5, calls * 50 // case_count)
+    filtersets = suite_filtersets(random.Random(seed))
+    results = {}
+    def uncached(index):
+        uncached_search_cases(filtersets[index % len(filtersets)])
+    def cached(index):
+        bcamp_api.search_cases(filtersets[index % len(filtersets)])
+    results['search_cases.uncached'] = timed_repeat(uncached, scan_calls,
+        repeat)
+    results['search_cases.cached'] = timed_repeat(cached, calls, repeat)
+
+    def casetiles(index):
+        bcamp_api.dbget_case_casetiles()
+    results['dbget_case_casetiles'] = timed_repeat(casetiles, scan_calls,
+        repeat)
+
+    # The same tile dict 'Tk_CaseViewer' builds, w/o the widgets.
+    tiles = {}
+    for item in bcamp_api.dbget_case_casetiles():
+        tiles[item[0]] = {'widget': None, 'pinned': item[1],
+            'account': item[2], 'product': item[3], 'bug_id': item[4],
+            'jira_status': item[5], 'jira_notify_flag': item[6],
+            'file_notify_flag': item[7]}
+    for o_rule in bcamp_api.FILTERSET_ORDER_RULES:
+        method = getattr(Basecamp.Tk_CaseViewer, 'NEW_build_tileindex_'
+            + ('age' if o_rule == 'default' else o_rule))
+        def build(index, method=method):
+            method(None, tiles)
+        results['tileindex.' + o_rule] = timed_repeat(build, scan_calls,
+            repeat)
+
+    def parse(index):
+        f_set = {'account': [], 'product': [], 'tag': [], 'custom': [],
+            'o_rule': 'default'}
+        bcamp_api.parse_filter_search(
+            SUITE_RAW_QUERIES[index % len(SUITE_RAW_QUERIES)], f_set)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results['parse_filter_search'] = timed_repeat(parse, calls, repeat)
+    # Closing the last connection checkpoints the WAL into the DB file.
+    bcamp_api.BCAMP_DB.close_all()
+    db_stats['db_kb'] = os.path.getsize(db_path) // 1024
+    return {'db': db_stats, 'results': results}
+
+def compare_suite(report, baseline, threshold=0.2):
+    '''
+    Prints the 'best_us' of every result in 'report' vs. the same scale
+    and name in 'baseline', flagging those 'threshold' (20%) or more
+    slower. Returns the list of (scale, name) regressions.
+    '''
+    regressions = []
+    print("\n[ vs. baseline from", baseline['meta'].get('timestamp'), "]")
+    for key in ('seed', 'files_per_case', 'bcamp_version', 'sqlite'):
+        if baseline['meta'].get(key) != report['meta'][key]:
+            print("  NOTE: '" + key + "' differs -", baseline['meta'].get(key),
+                "vs.", report['meta'][key])
+    for scale, scale_report in report['scales'].items():
+        base_results = baseline['scales'].get(scale, {}).get('results', {})
+        for name, result in scale_report['results'].items():
+            if name not in base_results:
+                continue
+            before = base_results[name]['best_us']
+            ratio = result['best_us'] / before if before > 0 else 1.0
+            flag = ""
+            if ratio >= 1 + threshold:
+                flag = "REGRESSION"
+                regressions.append((scale, name))
+            elif ratio <= 1 - threshold:
+                flag = "faster"
+            print("  {:>6} {:<28} {:>10.1f} -> {:>10.1f} us {:>6.2f}x {}"
+                .format(scale, name, before, result['best_us'], ratio, flag))
+    return regressions
+
+def bench_suite(scales, calls, seed=1, files_per_case=0, json_path=None,
+        baseline_path=None, threshold=0.2):
+    '''
+    Runs 'run_suite_scale' for each case count in 'scales' and prints the
+    results. With 'json_path' the report is saved as JSON, and with
+    'baseline_path' it is compared to an earlier report, see
+    'compare_suite'.
+
+    Returns the list of regressions (empty w/o a baseline).
+    '''
+    report = {
+        'meta': {
+            'bcamp_version': bcamp_api.BCAMP_VERSION,
+            'timestamp': datetime.datetime.now().isoformat(
+                timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': seed,
+            'calls': calls,
+            'files_per_case': files_per_case,
+        },
+        'scales': {},
+    }
+    for case_count in scales:
+        scale_report = run_suite_scale(case_count, calls, seed,
+            files_per_case)
+        report['scales'][str(case_count)] = scale_report
+        db_stats = scale_report['db']
+        print("\n[ suite - {cases} cases, {accounts} accounts, "
+            "{distinct_tags} tags, {files} files, {db_kb} KB, built in "
+            "{build_s}s ]".format(**db_stats))
+        for name, result in scale_report['results'].items():
+            print("  {:<40} {:>9.1f} us best {:>9.1f} us median".format(
+                name, result['best_us'], result['median_us']))
+
+    if json_path != None:
+        with open(json_path, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+        print("\nSaved suite results to", json_path)
+    if baseline_path == None:
+        return []
+    with open(baseline_path, 'r') as json_file:
+        baseline = json.load(json_file)
+    return compare_suite(report, baseline, threshold)
+
+BENCHMARKS = {
+    'connections': bench_connections,
+    'config': bench_config,
+    'files': bench_files_table,
+    'upsert': bench_file_upsert,
+    'caserecord': bench_case_cache,
+    'writer': bench_writer,
+    'plans': bench_query_plans,
+    'querystats': bench_query_stats,
+    'maintenance': bench_maintenance,
+    'jira': bench_jira,
+    'fts': bench_fts,
+    'filterset': bench_filterset,
+    'facets': bench_facets,
+    'searchcache': bench_search_cache,
+    'index': bench_case_index,
+    'grammar': bench_search_grammar,
+    'trigram': bench_trigram,
+    'notes': bench_notes,
+    'logs': bench_log_index,
+    'filescan': bench_file_scan,
+    'crawler': bench_crawler,
+    'filetree': bench_file_tree,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Basecamp DB benchmarks")
+    parser.add_argument('benchmark',
+        choices=list(BENCHMARKS) + ['all', 'suite', 'gen'])
+    parser.add_argument('--cases', type=int, default=500,
+        help="Number of synthetic cases to generate.")
+    parser.add_argument('--calls', type=int, default=5000,
+        help="Number of calls per timed section.")
+    parser.add_argument('--scales', default=",".join(
+        str(scale) for scale in SUITE_SCALES),
+        help="suite: comma seperated case counts.")
+    parser.add_argument('--files', type=int, default=0,
+        help="suite/gen: file records per case in the 'files' table.")
+    parser.add_argument('--seed', type=int, default=1,
+        help="suite/gen: seed of the synthetic DB.")
+    parser.add_argument('--json', default=None,
+        help="suite: save the results to this JSON file.")
+    parser.add_argument('--compare', default=None,
+        help="suite: JSON results of an earlier run to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+        help="suite: slowdown that counts as a regression (0.2 = 20%%).")
+    parser.add_argument('--db-dir', default=None,
+        help="gen: dir. for the new 'basecamp.db' (default a temp. dir.)")
+    args = parser.parse_args()
+
+    if args.benchmark == 'gen':
+        if args.db_dir != None:
+            os.makedirs(args.db_dir, exist_ok=True)
+        db_path = create_synthetic_db(args.cases, args.db_dir, args.seed,
+            args.files)
+        bcamp_api.BCAMP_DB.close_all()
+        print("Synthetic DB w/", args.cases, "cases saved to", db_path)
+        return
+    if args.benchmark == 'suite':
+        scales = [int(scale) for scale in args.scales.split(",")]
+        regressions = bench_suite(scales, args.calls, args.seed, args.files,
+            args.json, args.compare, args.threshold)
+        if regressions != []:
+            print("\n" + str(len(regressions)), "regression(s) over",
+                "{:.0%}".format(args.threshold))
+            sys.exit(1)
+        return
+
+    if args.benchmark == 'all':
+        targets = list(BENCHMARKS)
+    else:
+        targets = [args.benchmark]
+    for target in targets:
+        BENCHMARKS[target](args.cases, args.calls)
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,10 @@ import bcamp_api
 
 #Public Imports
 import os
+import re
+import json
 import time
+import pickle
 import logging
 import pathlib
 import sqlite3
@@ -51,9 +54,14 @@ class CreateDB:
     SHOULD NOT TAKE INPUT FROM USERS. THIS WILL EXPOSE THE DB TO SQL
     INJECTION. 
     '''
-    def __init__(self):
+    def __init__(self, db_path=None):
         self.RPATH = str(pathlib.Path(__file__).parent.absolute()).rpartition('\\')[0]
-        db_path = self.RPATH + "\\core\\basecamp.db"
+        # Defaults to the path used by the API's connection pool. If a
+        # 'db_path' is given, the pool is pointed to it instead.
+        if db_path == None:
+            db_path = bcamp_api.BCAMP_DB.db_path
+        else:
+            bcamp_api.BCAMP_DB.set_path(db_path)
         print("Connecting to 'basecamp.db'...")
         # Try to open exisiting 'datastore.json'
         if os.access(db_path, os.R_OK):
@@ -63,12 +71,19 @@ class CreateDB:
             # Creating .db file
             file = open(db_path, "w+")
             file.close()
+            # Free pages can then be returned w/ 'incremental_vacuum'. This
+            # has to be set BEFORE the DB is switched to WAL, see
+            # 'bcamp_api.DBMaintenanceDaemon' for older DB's.
+            new_db = sqlite3.connect(db_path)
+            new_db.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            new_db.execute("VACUUM;")
+            new_db.close()
             print("Successfully created basecamp.db file")
 
         # Configure Environment Vars
         self.config_env()
         # Connecting to sqlite DB
-        self.db_connection = sqlite3.connect(db_path)
+        self.db_connection = bcamp_api.BCAMP_DB.connect()
         # Create default tables
         self.dbshell = self.db_connection.cursor()
         self.dbshell.execute(self.config_schema())
@@ -77,6 +92,8 @@ class CreateDB:
         self.dbshell.execute(self.tags_schema())
         self.dbshell.execute(self.favorite_files_schema())
         self.dbshell.execute(self.parser_schema())
+        # Bring older DB's up to the current schema version.
+        self.run_migrations()
 
         # Populate bCamp tables with default values
         try:
@@ -116,12 +133,15 @@ class CreateDB:
              ); """
         return query
 
-    def cases_schema(self):
+    def cases_schema(self, table='cases'):
         '''
         Main table that contains all imported SRs with their local data such
         as Notes, Account strings, bug_ids, etc.
+
+        'case_id' is the rowid, kept last so the column index of the other
+        columns doesn't change.
         '''
-        query = """ CREATE TABLE IF NOT EXISTS cases (
+        query = """ CREATE TABLE IF NOT EXISTS """ + table + """ (
                         sr_number TEXT UNIQUE,
                         remote_path TEXT NOT NULL,
                         local_path TEXT NOT NULL,
@@ -150,7 +170,8 @@ class CreateDB:
                         jira_resolution TEXT,
                         jira_fix_ver TEXT,
                         jira_notify_flag INTEGER,
-                        file_notify_flag INTEGER
+                        file_notify_flag INTEGER,
+                        case_id INTEGER PRIMARY KEY
              ); """
         return query
 
@@ -176,24 +197,516 @@ class CreateDB:
              ); """
         return query
     
-    def template_files_schema(self):
+    def files_schema(self):
         '''
-        Defines how each SR's files table should be constructed! 
+        Single table that contains the file records of EVERY imported SR,
+        keyed by 'sr_number'. Replaces the per-SR "filesX" tables. 'file_id'
+        is the rowid.
         '''
-        query = """CREATE TABLE IF NOT EXISTS files_template (
+        query = """CREATE TABLE IF NOT EXISTS files (
+                        sr_number TEXT NOT NULL,
                         name TEXT NOT NULL,
                         location TEXT NOT NULL,
-                        path TEXT UNIQUE NOT NULL,
+                        path TEXT NOT NULL,
                         type TEXT NOT NULL,
                         size TEXT NOT NULL,
                         creation_time TEXT NOT NULL,
                         modified_time TEXT NOT NULL,
-                        date_range TEXT NOT NULL,
+                        date_range TEXT,
                         favorite TEXT NOT NULL,
-                        notes TEXT NOT NULL,
+                        notes TEXT,
+                        depth_index INTEGER NOT NULL,
+                        file_id INTEGER PRIMARY KEY,
+                        UNIQUE(sr_number, location, path) ON CONFLICT IGNORE
         ); """
         return query
 
+    def files_index_schema(self):
+        '''
+        Returns a list of the indexes for the 'files' table. Covers the
+        FileBrowser (sr_number, location, depth_index) and single file
+        (sr_number, path) lookups, plus a partial index of the files that
+        have notes for the notes exports.
+        '''
+        queries = [
+            """CREATE INDEX IF NOT EXISTS idx_files_sr_location_depth
+                ON files (sr_number, location, depth_index);""",
+            """CREATE INDEX IF NOT EXISTS idx_files_sr_path
+                ON files (sr_number, path);""",
+            """CREATE INDEX IF NOT EXISTS idx_files_sr_notes
+                ON files (sr_number) WHERE notes IS NOT NULL;""",
+        ]
+        return queries
+
+    def migrations(self):
+        '''
+        Returns the ORDERED list of schema migrations. The DB's "PRAGMA
+        user_version" is the number of migrations already applied, so a
+        migration at index 0 brings the DB to version 1, and so on.
+
+        NOTE: Only ever APPEND to this list. Each step must be idempotent, as
+        a DB created before versioning existed starts at version 0.
+        '''
+        return [
+            self.migrate_files_tables,        # 1
+            self.migrate_search_indexes,      # 2
+            self.migrate_analyze,             # 3
+            self.migrate_query_stats_config,  # 4
+            self.migrate_jira_tables,         # 5
+            self.migrate_cases_fts,           # 6
+            self.migrate_notes_fts,           # 7
+            self.migrate_change_seq,          # 8
+            self.migrate_dir_snapshots,       # 9
+            self.migrate_lazy_filetree_config, # 10
+        ]
+
+    def run_migrations(self):
+        '''
+        Applies every migration newer than the DB's "user_version". Each step
+        and its version bump run in ONE transaction, so a failed step leaves
+        the DB at the previous version and is retried on the next start.
+        '''
+        self.dbshell.execute("PRAGMA user_version;")
+        db_version = self.dbshell.fetchone()[0]
+        steps = self.migrations()
+        for version in range(db_version + 1, len(steps) + 1):
+            step = steps[version - 1]
+            print("SQLite3: Applying schema migration", version, "-",
+                step.__name__)
+            try:
+                self.dbshell.execute("BEGIN;")
+                step()
+                # 'user_version' is part of the DB header, and is only
+                # written if the transaction is committed.
+                self.dbshell.execute("PRAGMA user_version = "
+                    + str(version) + ";")
+                self.db_connection.commit()
+            except sqlite3.Error:
+                self.db_connection.rollback()
+                raise
+
+    def migrate_files_tables(self):
+        '''
+        Migration 1 - creates the 'files' table and its indexes, then copies
+        the rows of the old per-SR "filesX" tables into it, and drops them.
+        '''
+        self.dbshell.execute(self.files_schema())
+        for query in self.files_index_schema():
+            self.dbshell.execute(query)
+        self.dbshell.execute("""SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name GLOB 'files[0-9]*';""")
+        old_tables = [row[0] for row in self.dbshell.fetchall()]
+        if len(old_tables) == 0:
+            return # Nothing to migrate.
+
+        print("SQLite3: Migrating", len(old_tables),
+            "filesX table(s) to 'files'...")
+        # Map each filesX table to its SR using the 'cases' table.
+        self.dbshell.execute("""SELECT files_table, sr_number FROM cases
+            WHERE files_table IS NOT NULL;""")
+        table_map = dict(self.dbshell.fetchall())
+        for table_name in old_tables:
+            if table_name in table_map:
+                sr_number = table_map[table_name]
+            else:
+                # Orphaned table, rebuild "4-XXX" from "files4XXX".
+                sr_number = table_name[5] + "-" + table_name[6:]
+            self.dbshell.execute("""INSERT OR IGNORE INTO files (
+                sr_number, name, location, path, type, size,
+                creation_time, modified_time, date_range, favorite,
+                notes, depth_index)
+                SELECT ?, name, location, path, type, size,
+                creation_time, modified_time, date_range, favorite,
+                notes, depth_index FROM """ + table_name + ";",
+                (sr_number,))
+            self.dbshell.execute("DROP TABLE " + table_name + ";")
+            self.dbshell.execute("""UPDATE cases SET files_table = 'files'
+                WHERE files_table = (?);""", (table_name,))
+        print("SQLite3: filesX migration complete.")
+
+    def migrate_search_indexes(self):
+        '''
+        Migration 2 - indexes for the columns 'search_cases' filters by. Each
+        index also holds 'sr_number', so the sub-queries are answered from the
+        index alone - including the "LIKE '%x%'" custom searches, which scan
+        the small index instead of every row of 'cases'.
+
+        'tags.tag' is already covered by the UNIQUE(tag, sr_number) index.
+        'bug_id' is NOT indexed - the planner only uses such an index for the
+        "hasbug" and "nobug" filters, where reading it and then sorting by
+        rowid is slower than a scan of 'cases'.
+        '''
+        queries = [
+            """CREATE INDEX IF NOT EXISTS idx_cases_account
+                ON cases (account, sr_number);""",
+            """CREATE INDEX IF NOT EXISTS idx_cases_product
+                ON cases (product, sr_number);""",
+            """CREATE INDEX IF NOT EXISTS idx_tags_sr_number
+                ON tags (sr_number, tag);""",
+        ]
+        for query in queries:
+            self.dbshell.execute(query)
+
+    def migrate_analyze(self):
+        '''
+        Migration 3 - gathers table/index stats, so the query planner picks
+        the indexes above.
+        '''
+        self.dbshell.execute("ANALYZE;")
+
+    def migrate_query_stats_config(self):
+        '''
+        Migration 4 - config columns for the opt-in query instrumentation, see
+        'bcamp_api.QueryStats'.
+        '''
+        self.add_column('bcamp_config', 'dev_query_stats',
+            "TEXT NOT NULL DEFAULT 'False'")
+        self.add_column('bcamp_config', 'dev_slow_query_ms',
+            "TEXT NOT NULL DEFAULT '100'")
+
+    def migrate_jira_tables(self):
+        '''
+        Migration 5 - moves the pickled JIRA comments and linked issues of
+        each case into the 'jira_comments' and 'jira_links' tables, and
+        converts the pickled component/version lists to JSON.
+        '''
+        for query in self.jira_schema():
+            self.dbshell.execute(query)
+        # DB's from before JIRA support are missing these 'cases' columns.
+        for column in ('jira_title', 'jira_status', 'jira_updated',
+                'jira_description', 'jira_sr_owner', 'jira_comments',
+                'jira_last_comment_time', 'jira_linkedissues', 'jira_project',
+                'jira_priority', 'jira_components', 'jira_affected_ver',
+                'jira_resolution', 'jira_fix_ver'):
+            self.add_column('cases', column, "TEXT")
+        self.add_column('cases', 'jira_notify_flag', "INTEGER")
+        self.add_column('cases', 'file_notify_flag', "INTEGER")
+
+        def unpickle(value):
+            if value == None:
+                return None
+            try:
+                return pickle.loads(value)
+            except Exception:
+                return None
+
+        self.dbshell.execute("""SELECT sr_number, jira_comments,
+            jira_linkedissues, jira_components, jira_affected_ver,
+            jira_fix_ver FROM cases;""")
+        for row in self.dbshell.fetchall():
+            sr_number = row[0]
+            comments = unpickle(row[1]) or []
+            self.dbshell.executemany("""INSERT OR IGNORE INTO jira_comments (
+                sr_number, comment_id, comment_index, author, author_email,
+                created, updated, body)
+                VALUES (?,?,?,?,?,?,?,?);""",
+                [bcamp_api.jira_comment_row(sr_number, index, comment)
+                    for index, comment in enumerate(comments)])
+            links = unpickle(row[2]) or []
+            self.dbshell.executemany("""INSERT OR IGNORE INTO jira_links (
+                sr_number, link_key, title, status)
+                VALUES (?,?,?,?);""",
+                [(sr_number, link['key'], link['title'], link['status'])
+                    for link in links])
+            lists = [unpickle(value) for value in row[3:]]
+            self.dbshell.execute("""UPDATE cases SET
+                jira_comments = NULL,
+                jira_linkedissues = NULL,
+                jira_components = (?),
+                jira_affected_ver = (?),
+                jira_fix_ver = (?)
+                WHERE sr_number = (?);""",
+                [None if value == None else json.dumps(value)
+                    for value in lists] + [sr_number])
+
+    def migrate_cases_fts(self):
+        '''
+        Migration 6 - 'cases_fts' full-text index for the CaseViewer custom
+        search, populated from 'cases' and 'tags', and kept in sync by the
+        triggers in 'cases_fts_triggers'.
+
+        Each row is keyed by the 'case_id' of its case. Older DB's have no
+        'case_id', and their 'cases' table is rebuilt w/ it first - a VACUUM
+        may renumber a rowid that is not an INTEGER PRIMARY KEY, which would
+        leave the index pointing at the wrong cases.
+        '''
+        if not self.has_column('cases', 'case_id'):
+            self.rebuild_table('cases', self.cases_schema('cases_rebuild'),
+                'case_id')
+        self.dbshell.execute("DROP TABLE IF EXISTS cases_fts;")
+        try:
+            self.dbshell.execute(self.cases_fts_schema('trigram'))
+        except sqlite3.OperationalError:
+            # SQLite before 3.34 has no trigram tokenizer.
+            self.dbshell.execute(self.cases_fts_schema("unicode61', prefix='2 3"))
+        for query in self.cases_fts_triggers():
+            self.dbshell.execute(query)
+        self.dbshell.execute("INSERT INTO cases_fts (rowid, "
+            + ", ".join(bcamp_api.CASES_FTS_COLUMNS) + ") "
+            + bcamp_api.CASES_FTS_SELECT + ";")
+
+    def cases_fts_schema(self, tokenizer):
+        '''
+        FTS5 table w/ a row for each case, the rowid is its 'case_id'. The
+        'sr_number' is stored, but not indexed - see CASES_FTS_TEXT_COLUMNS.
+        '''
+        query = ("CREATE VIRTUAL TABLE cases_fts USING fts5("
+            + "sr_number UNINDEXED, "
+            + ", ".join(bcamp_api.CASES_FTS_TEXT_COLUMNS)
+            + ", tokenize='" + tokenizer + "');")
+        return query
+
+    def cases_fts_triggers(self):
+        '''
+        Returns the triggers that keep 'cases_fts' in sync with the 'cases'
+        and 'tags' tables.
+        '''
+        tags_of = """(SELECT group_concat(tag, ' ') FROM tags
+            WHERE tags.sr_number = new.sr_number)"""
+        case_values = """(new.case_id, new.sr_number, new.account, new.product,
+            new.bug_id, """ + tags_of + """, new.notes, new.jira_title,
+            new.jira_description)"""
+        columns = "(rowid, " + ", ".join(bcamp_api.CASES_FTS_COLUMNS) + ")"
+        queries = [
+            """CREATE TRIGGER IF NOT EXISTS cases_fts_insert
+                AFTER INSERT ON cases BEGIN
+                INSERT INTO cases_fts """ + columns + """
+                    VALUES """ + case_values + """;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS cases_fts_update
+                AFTER UPDATE OF sr_number, account, product, bug_id, notes,
+                jira_title, jira_description ON cases BEGIN
+                DELETE FROM cases_fts WHERE rowid = old.case_id;
+                INSERT INTO cases_fts """ + columns + """
+                    VALUES """ + case_values + """;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS cases_fts_delete
+                AFTER DELETE ON cases BEGIN
+                DELETE FROM cases_fts WHERE rowid = old.case_id;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS cases_fts_tags_insert
+                AFTER INSERT ON tags BEGIN
+                UPDATE cases_fts SET tags = """ + tags_of + """
+                    WHERE rowid = (SELECT case_id FROM cases
+                        WHERE sr_number = new.sr_number);
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS cases_fts_tags_delete
+                AFTER DELETE ON tags BEGIN
+                UPDATE cases_fts SET tags = (SELECT group_concat(tag, ' ')
+                    FROM tags WHERE tags.sr_number = old.sr_number)
+                    WHERE rowid = (SELECT case_id FROM cases
+                        WHERE sr_number = old.sr_number);
+            END;""",
+        ]
+        return queries
+
+    def migrate_notes_fts(self):
+        '''
+        Migration 7 - 'notes_fts' full-text index of the case notes AND the
+        file notes of every SR, so "search my notes everywhere" is a single
+        query. Kept in sync by the triggers in 'notes_fts_triggers'.
+
+        The 'file_id' of 'files' and 'case_id' of 'cases' overlap, so file
+        notes are stored at "file_id * 2" and case notes at "case_id * 2 + 1".
+        '''
+        self.dbshell.execute("DROP TABLE IF EXISTS notes_fts;")
+        try:
+            self.dbshell.execute(self.notes_fts_schema('trigram'))
+        except sqlite3.OperationalError:
+            # SQLite before 3.34 has no trigram tokenizer.
+            self.dbshell.execute(self.notes_fts_schema("unicode61', prefix='2 3"))
+        for query in self.notes_fts_triggers():
+            self.dbshell.execute(query)
+        self.dbshell.execute(bcamp_api.NOTES_FTS_INSERT + ";")
+
+    def notes_fts_schema(self, tokenizer):
+        '''
+        FTS5 table w/ a row for each non-empty case or file note. 'path' is
+        NULL for case notes.
+        '''
+        query = ("""CREATE VIRTUAL TABLE notes_fts USING fts5(
+            sr_number UNINDEXED, path UNINDEXED, notes, tokenize='"""
+            + tokenizer + "');")
+        return query
+
+    def notes_fts_triggers(self):
+        '''
+        Returns the triggers that keep 'notes_fts' in sync with the 'notes'
+        column of the 'files' and 'cases' tables. Empty notes are removed
+        from the index rather than stored.
+        '''
+        has_notes = "new.notes IS NOT NULL AND trim(new.notes) != ''"
+        file_row = """INSERT INTO notes_fts (rowid, sr_number, path, notes)
+                    SELECT new.file_id * 2, new.sr_number, new.path, new.notes
+                    WHERE """ + has_notes + ";"
+        case_row = """INSERT INTO notes_fts (rowid, sr_number, path, notes)
+                    SELECT new.case_id * 2 + 1, new.sr_number, NULL, new.notes
+                    WHERE """ + has_notes + ";"
+        queries = [
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_files_insert
+                AFTER INSERT ON files WHEN """ + has_notes + """ BEGIN
+                """ + file_row + """
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_files_update
+                AFTER UPDATE OF sr_number, path, notes ON files BEGIN
+                DELETE FROM notes_fts WHERE rowid = old.file_id * 2;
+                """ + file_row + """
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_files_delete
+                AFTER DELETE ON files WHEN old.notes IS NOT NULL BEGIN
+                DELETE FROM notes_fts WHERE rowid = old.file_id * 2;
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_cases_insert
+                AFTER INSERT ON cases WHEN """ + has_notes + """ BEGIN
+                """ + case_row + """
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_cases_update
+                AFTER UPDATE OF sr_number, notes ON cases BEGIN
+                DELETE FROM notes_fts WHERE rowid = old.case_id * 2 + 1;
+                """ + case_row + """
+            END;""",
+            """CREATE TRIGGER IF NOT EXISTS notes_fts_cases_delete
+                AFTER DELETE ON cases WHEN old.notes IS NOT NULL BEGIN
+                DELETE FROM notes_fts WHERE rowid = old.case_id * 2 + 1;
+            END;""",
+        ]
+        return queries
+
+    def migrate_change_seq(self):
+        '''
+        Migration 8 - 'change_seq' counter of the 'cases' and 'tags' tables,
+        bumped by triggers on EVERY write - including the JIRA fields, which
+        are stored in 'cases'. Caches of search results compare it to tell
+        if they are stale, see 'bcamp_api.change_seq'.
+        '''
+        self.dbshell.execute("""CREATE TABLE IF NOT EXISTS change_seq (
+            name TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        );""")
+        self.dbshell.execute("""INSERT OR IGNORE INTO change_seq (name, seq)
+            VALUES ('cases', 0);""")
+        for table in ('cases', 'tags'):
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                self.dbshell.execute("CREATE TRIGGER IF NOT EXISTS "
+                    + "change_seq_" + table + "_" + event.lower()
+                    + " AFTER " + event + " ON " + table + """ BEGIN
+                    UPDATE change_seq SET seq = seq + 1
+                        WHERE name = 'cases';
+                END;""")
+
+    def migrate_dir_snapshots(self):
+        '''
+        Migration 9 - 'dir_snapshots' table, the mtime and child list of each
+        dir of an SR's remote/local folder when it was last scanned. Dirs
+        that have not changed since are not listed again on a rescan, see
+        'bcamp_api.scan_file_tree'.
+
+        'children' is a JSON list of [name, is_dir] pairs.
+        '''
+        self.dbshell.execute("""CREATE TABLE IF NOT EXISTS dir_snapshots (
+            sr_number TEXT NOT NULL,
+            location TEXT NOT NULL,
+            path TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            scan_time REAL NOT NULL,
+            children TEXT NOT NULL,
+            PRIMARY KEY (sr_number, location, path)
+        ) WITHOUT ROWID;""")
+
+    def migrate_lazy_filetree_config(self):
+        '''
+        Migration 10 - config columns for the lazy FileBrowser tree, which
+        only loads a dir when it is opened and drops closed dirs once the
+        tree holds more than 'ui_filetree_node_budget' rows.
+        '''
+        self.add_column('bcamp_config', 'ui_lazy_filetree',
+            "TEXT NOT NULL DEFAULT 'False'")
+        self.add_column('bcamp_config', 'ui_filetree_node_budget',
+            "TEXT NOT NULL DEFAULT '20000'")
+
+    def jira_schema(self):
+        '''
+        Returns the tables for the comments and linked issues of each SR's
+        JIRA issue. Comments are kept in JIRA's order by 'comment_index', so
+        the UI can page through them newest first.
+        '''
+        queries = [
+            """CREATE TABLE IF NOT EXISTS jira_comments (
+                        sr_number TEXT NOT NULL,
+                        comment_id TEXT NOT NULL,
+                        comment_index INTEGER NOT NULL,
+                        author TEXT,
+                        author_email TEXT,
+                        created TEXT,
+                        updated TEXT,
+                        body TEXT,
+                        UNIQUE(sr_number, comment_id) ON CONFLICT IGNORE
+            ); """,
+            """CREATE INDEX IF NOT EXISTS idx_jira_comments_sr_index
+                ON jira_comments (sr_number, comment_index);""",
+            """CREATE TABLE IF NOT EXISTS jira_links (
+                        sr_number TEXT NOT NULL,
+                        link_key TEXT NOT NULL,
+                        title TEXT,
+                        status TEXT,
+                        UNIQUE(sr_number, link_key) ON CONFLICT IGNORE
+            ); """,
+        ]
+        return queries
+
+    def table_columns(self, table):
+        '''
+        Returns the column names of 'table', in schema order.
+        '''
+        self.dbshell.execute("PRAGMA table_info(" + table + ");")
+        return [row[1] for row in self.dbshell.fetchall()]
+
+    def has_column(self, table, column):
+        '''
+        Returns True if 'table' has a column named 'column'.
+        '''
+        return column in self.table_columns(table)
+
+    def add_column(self, table, column, column_def):
+        '''
+        "ALTER TABLE ... ADD COLUMN" that is skipped if 'column' already exists,
+        so migrations that add columns stay idempotent.
+        '''
+        if self.has_column(table, column):
+            return
+        self.dbshell.execute("ALTER TABLE " + table + " ADD COLUMN "
+            + column + " " + column_def + ";")
+
+    def rebuild_table(self, table, schema, rowid_column):
+        '''
+        Replaces 'table' w/ a new table, for schema changes "ALTER TABLE"
+        can't make. 'schema' creates the new table as "<table>_rebuild", and
+        'rowid_column' is its INTEGER PRIMARY KEY - filled from the old
+        rowid's. The indexes and triggers of 'table', and the triggers of
+        other tables that read it, are created again afterwards.
+        '''
+        self.dbshell.execute("""SELECT type, name, tbl_name, sql
+            FROM sqlite_master WHERE type IN ('index', 'trigger')
+            AND sql IS NOT NULL;""")
+        word = re.compile(r'\b' + table + r'\b')
+        objects = [row for row in self.dbshell.fetchall()
+            if row[2] == table or (row[0] == 'trigger' and word.search(row[3]))]
+        # Triggers that read 'table' would fail the rename below.
+        for obj_type, name, tbl_name, sql in objects:
+            if obj_type == 'trigger' and tbl_name != table:
+                self.dbshell.execute("DROP TRIGGER " + name + ";")
+        self.dbshell.execute(schema)
+        columns = ", ".join([column for column in self.table_columns(table)
+            if column in self.table_columns(table + "_rebuild")])
+        self.dbshell.execute("INSERT INTO " + table + "_rebuild ("
+            + rowid_column + ", " + columns + ") SELECT rowid, " + columns
+            + " FROM " + table + ";")
+        self.dbshell.execute("DROP TABLE " + table + ";")
+        self.dbshell.execute("ALTER TABLE " + table + "_rebuild RENAME TO "
+            + table + ";")
+        for obj_type, name, tbl_name, sql in objects:
+            self.dbshell.execute(sql)
+
     def favorite_files_schema(self):
         '''
         Schema that defines a users favorite "logs" and saves
@@ -0,0 +1,39 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Shared fixtures of the Basecamp tests. Every test runs against a SYNTHETIC
+'basecamp.db' in a temp. dir, built by 'bcamp_bench.create_bench_db', so
+the prod. DB is never touched.
+
+Usage (from 'core'):
+    python -m pytest -q tests
+'''
+#Public Imports
+import os
+import sys
+
+import pytest
+
+CORE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CORE_DIR not in sys.path:
+    sys.path.insert(0, CORE_DIR)
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+
+# Cases in the synthetic DB of the 'bench_db' fixture.
+BENCH_CASES = 200
+
+@pytest.fixture
+def bench_db(tmp_path, monkeypatch):
+    '''
+    Points 'bcamp_api.BCAMP_DB' to a new synthetic DB of BENCH_CASES cases,
+    and returns its path. 'SEARCH_CACHE' starts empty, as the DB of every
+    test has the same 'change_seq'.
+    '''
+    monkeypatch.setattr(bcamp_api, 'SEARCH_CACHE', bcamp_api.FilterSetCache())
+    db_path = bcamp_bench.create_bench_db(BENCH_CASES, db_dir=str(tmp_path))
+    yield db_path
+    bcamp_api.BCAMP_DB.close_all()
@@ -0,0 +1,148 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Checks the search-as-you-type 'CaseSearchIndex' against a brute force scan
+of the cases, and that it stays consistent w/ the DB through imports,
+edits, tags and dropped SR's.
+'''
+#Public Imports
+import sys
+import random
+import threading
+
+import pytest
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+
+@pytest.fixture
+def case_index(bench_db, monkeypatch):
+    '''
+    A new, built CaseSearchIndex as 'bcamp_api.CASE_INDEX', so the API
+    writes update it.
+    '''
+    index = bcamp_api.CaseSearchIndex()
+    monkeypatch.setattr(bcamp_api, 'CASE_INDEX', index)
+    index.build()
+    return index
+
+def brute_force(index, text):
+    '''
+    Returns the SR's where every word of 'text' prefixes a token of the case.
+    '''
+    result = set()
+    for sr_number, fields in index.load_cases().items():
+        tokens = index.case_tokens(fields)
+        if all(any(token.startswith(word) for token in tokens)
+                for word in text.lower().split()):
+            result.add(sr_number)
+    return result
+
+def test_queries_match_brute_force(case_index):
+    for text in bcamp_bench.gen_index_queries(random.Random(3), 200):
+        assert case_index.query(text) == brute_force(case_index, text), text
+
+def test_consistent_after_writes(case_index):
+    bcamp_api.update_case_record(bcamp_bench.gen_sr_number(1), {
+        'account_string': 'Zanzibar Freight',
+        'product_string': 'ePO',
+        'bug_string': 'TSNS-777',
+        'important_bool': False,
+        'tags_list': ['quokka', 'perf'],
+    })
+    bcamp_api.insert_tags(bcamp_bench.gen_sr_number(2), 'wombat')
+    bcamp_api.update_case(bcamp_bench.gen_sr_number(4), 'account',
+        'Zanzibar Air')
+    bcamp_api.drop_sr(bcamp_bench.gen_sr_number(3))
+    bcamp_api.new_import({
+        'sr_number': '4-99999999999',
+        'pinned': 0,
+        'tags_list': ['wombat'],
+        'account': 'Zanzibar Rail',
+        'product': 'MWG',
+        'bug_id': None,
+        'workspace': None,
+        'notes': None,
+        'customs_list': None,
+    }, None)
+    assert case_index.query('zanz') == {bcamp_bench.gen_sr_number(1),
+        bcamp_bench.gen_sr_number(4), '4-99999999999'}
+    assert case_index.query('wom') == {bcamp_bench.gen_sr_number(2),
+        '4-99999999999'}
+    assert case_index.query(bcamp_bench.gen_sr_number(3)) == set()
+    assert case_index.check() == []
+
+def test_check_finds_direct_writes(case_index):
+    # Edits behind the index's back are found by 'check'.
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("UPDATE cases SET product = 'XYZ' WHERE sr_number "
+            "= (?);", (bcamp_bench.gen_sr_number(5),))
+    assert case_index.check() == [bcamp_bench.gen_sr_number(5)]
+
+def test_memory_usage_tracked(case_index):
+    # Kept as the index changes, and equal to a walk of the index.
+    bcamp_api.insert_tags(bcamp_bench.gen_sr_number(2), 'wombat')
+    bcamp_api.drop_sr(bcamp_bench.gen_sr_number(3))
+    size = (sys.getsizeof(case_index._postings)
+        + sys.getsizeof(case_index._tokens) + sys.getsizeof(case_index._cases))
+    for token, postings in case_index._postings.items():
+        size += sys.getsizeof(token) + sys.getsizeof(postings)
+    for fields in case_index._cases.values():
+        size += sys.getsizeof(fields)
+    assert case_index.memory_usage() == size
+
+def test_over_budget_disables(case_index):
+    case_index.max_bytes = case_index.memory_usage() // 2
+    case_index.build()
+    assert not case_index.enabled
+    assert case_index.query('bank') == None
+    assert case_index.search('bank') == None
+
+def test_search_falls_back_to_db(bench_db, monkeypatch):
+    index = bcamp_api.CaseSearchIndex()
+    monkeypatch.setattr(bcamp_api, 'CASE_INDEX', index)
+    assert index.query('glob') == None
+    expected = set(bcamp_api.search_cases({'account': ['Globex'],
+        'product': [], 'tag': [], 'custom': [], 'o_rule': 'default'}))
+    assert index.search('glob') == expected
+    index.build()
+    assert index.search('glob') == expected
+
+def test_start_builds_in_background(bench_db, monkeypatch):
+    index = bcamp_api.CaseSearchIndex()
+    monkeypatch.setattr(bcamp_api, 'CASE_INDEX', index)
+    loading = threading.Event()
+    release = threading.Event()
+    load_cases = index.load_cases
+    def slow_load_cases():
+        loading.set()
+        release.wait(5)
+        return load_cases()
+    monkeypatch.setattr(index, 'load_cases', slow_load_cases)
+    index.start()
+    assert loading.wait(5)
+    assert not index.ready
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'CaseSearchIndex':
+            thread.join(5)
+    assert index.ready
+    assert index.check() == []
+
+def test_build_retries_writes_during_load(bench_db, monkeypatch):
+    # A write between loading the cases and installing them is not lost.
+    index = bcamp_api.CaseSearchIndex()
+    monkeypatch.setattr(bcamp_api, 'CASE_INDEX', index)
+    load_cases = index.load_cases
+    def racing_load_cases():
+        cases = load_cases()
+        if not hasattr(racing_load_cases, 'done'):
+            racing_load_cases.done = True
+            bcamp_api.insert_tags(bcamp_bench.gen_sr_number(2), 'wombat')
+        return cases
+    monkeypatch.setattr(index, 'load_cases', racing_load_cases)
+    index.build()
+    assert index.query('wombat') == {bcamp_bench.gen_sr_number(2)}
+    assert index.check() == []
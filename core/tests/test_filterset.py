@@ -0,0 +1,86 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Checks that 'compile_filterset' returns the same SR's, in the same order,
+as the legacy CaseViewer search - see 'bcamp_bench.legacy_tileindex'.
+'''
+#Public Imports
+import random
+
+import pytest
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+
+@pytest.fixture
+def pinned_db(bench_db):
+    '''
+    'bench_db' w/ every 9th case pinned, so the pinned-first order is used.
+    '''
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("UPDATE cases SET pinned = 1 WHERE rowid % 9 = 0;")
+    return bench_db
+
+@pytest.mark.parametrize('seed', range(5))
+def test_filtersets_match_legacy_search(pinned_db, seed):
+    '''
+    The legacy search skipped a filter w/ NO matches (e.g. an account w/ no
+    cases), and could return duplicates. These are the only differences
+    allowed - the compiled query returns no cases for the first.
+    '''
+    rand = random.Random(seed)
+    for index in range(100):
+        f_set = bcamp_bench.gen_filterset(rand)
+        expected = bcamp_bench.legacy_tileindex(f_set)
+        result = bcamp_api.search_cases(f_set)
+        assert len(result) == len(set(result)), f_set
+        lists = bcamp_bench.legacy_filter_lists(f_set)
+        empty_filter = any(f_set[key] != [] and lists[key] == []
+            for key in lists)
+        if empty_filter and result != expected:
+            assert result == [], f_set
+        else:
+            assert result == expected, f_set
+
+def test_empty_filter_matches_nothing(pinned_db):
+    f_set = {'account': ['No Such Account'], 'product': [], 'tag': [],
+        'custom': [], 'o_rule': 'default'}
+    assert bcamp_api.search_cases(f_set) == []
+
+def test_pinned_cases_first(pinned_db):
+    f_set = {'account': [], 'product': [], 'tag': [], 'custom': [],
+        'o_rule': 'default'}
+    result = bcamp_api.search_cases(f_set)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT sr_number FROM cases WHERE pinned = 1"
+            " ORDER BY rowid;")
+        pinned = [row[0] for row in dbshell.fetchall()]
+        dbshell.execute("SELECT count(*) FROM cases;")
+        case_count = dbshell.fetchone()[0]
+    assert pinned != []
+    assert len(result) == case_count
+    assert result[:len(pinned)] == pinned
+
+def fts_data_rows():
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT count(*) FROM cases_fts_data;")
+        return dbshell.fetchone()[0]
+
+def test_merge_fts_keeps_matches(pinned_db):
+    '''
+    Writes of one case at a time fragment 'cases_fts', 'merge_fts' merges the
+    segments back w/o changing what the filtersets match.
+    '''
+    for index in range(50):
+        bcamp_api.update_case(bcamp_bench.gen_sr_number(index), 'account',
+            'Stark Industries')
+    rand = random.Random(11)
+    f_sets = [bcamp_bench.gen_filterset(rand) for index in range(50)]
+    before = [bcamp_bench.uncached_search_cases(f_set) for f_set in f_sets]
+    fragmented = fts_data_rows()
+    bcamp_api.DB_MAINT.merge_fts()
+    assert fts_data_rows() < fragmented
+    assert [bcamp_bench.uncached_search_cases(f_set)
+        for f_set in f_sets] == before
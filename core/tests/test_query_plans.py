@@ -0,0 +1,103 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Checks the schema migrations, and that the 'search_cases' sub-queries use
+the indexes of 'CreateDB.migrate_search_indexes' - see "EXPLAIN QUERY PLAN".
+'''
+#Public Imports
+import pytest
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+import bcamp_setup
+
+EMPTY_FILTERSET = {'account': [], 'product': [], 'tag': [], 'custom': [],
+    'o_rule': 'default'}
+
+# A sample parameter of each query in 'bcamp_api.SEARCH_QUERIES'.
+SEARCH_SAMPLES = {
+    'account': bcamp_bench.BENCH_ACCOUNTS[0],
+    'product': bcamp_bench.BENCH_PRODUCTS[0],
+    'tag': bcamp_bench.BENCH_TAGS[0],
+    'sr_number': '%0042%',
+    'custom': '"' + bcamp_bench.BENCH_ACCOUNTS[0][:4] + '"',
+    'custom_short': '%ba%',
+}
+
+def query_plan(query, params):
+    '''
+    Returns the "EXPLAIN QUERY PLAN" details of 'query'.
+    '''
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("EXPLAIN QUERY PLAN " + query, params)
+        return [row[-1] for row in dbshell.fetchall()]
+
+def unindexed_steps(query, params):
+    '''
+    Returns the plan details of 'query' that are NOT backed by an index - an
+    empty list means the query is fully index-backed.
+
+    'tags' only holds (tag, sr_number), so a SCAN of it reads the same pages
+    as a scan of its covering index, and is allowed. A FTS5 table is only
+    index-backed when queried w/ MATCH - shown as 'INDEX 0:M..'.
+    '''
+    unindexed = []
+    for detail in query_plan(query, params):
+        if detail.startswith('SCAN tags'):
+            continue
+        if 'VIRTUAL TABLE' in detail:
+            if ':M' not in detail:
+                unindexed.append(detail)
+            continue
+        if (detail.startswith('SCAN') or detail.startswith('SEARCH')) and (
+                'INDEX' not in detail and 'PRIMARY KEY' not in detail):
+            unindexed.append(detail)
+    return unindexed
+
+def test_migrations_applied(bench_db):
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT type, name, sql FROM sqlite_master;")
+        schema = dbshell.fetchall()
+    # Running CreateDB again on a current DB must be a no-op.
+    create_db = bcamp_setup.CreateDB(bench_db)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("PRAGMA user_version;")
+        assert dbshell.fetchone()[0] == len(create_db.migrations())
+        dbshell.execute("SELECT type, name, sql FROM sqlite_master;")
+        assert dbshell.fetchall() == schema
+
+@pytest.mark.parametrize('name', sorted(bcamp_api.SEARCH_QUERIES))
+def test_search_queries_use_indexes(bench_db, name):
+    unindexed = unindexed_steps(bcamp_api.SEARCH_QUERIES[name],
+        (SEARCH_SAMPLES[name],))
+    if name == 'custom_short':
+        # Terms under 3 chars are too short for the trigram index.
+        assert unindexed != []
+    else:
+        assert unindexed == []
+
+def test_tags_of_sr_use_index(bench_db):
+    plan = query_plan("SELECT tag FROM tags WHERE sr_number = (?);",
+        (bcamp_bench.gen_sr_number(1),))
+    assert plan == [
+        'SEARCH tags USING COVERING INDEX idx_tags_sr_number (sr_number=?)']
+
+@pytest.mark.parametrize('column, value, index_name', [
+    ('account', bcamp_bench.BENCH_ACCOUNTS[0], 'idx_cases_account'),
+    ('product', bcamp_bench.BENCH_PRODUCTS[0], 'idx_cases_product'),
+])
+def test_filterset_uses_indexes(bench_db, column, value, index_name):
+    query, params = bcamp_api.compile_filterset(
+        dict(EMPTY_FILTERSET, **{column: [value]}))
+    plan = query_plan(query, params)
+    assert plan[0].startswith('SEARCH cases USING INDEX ' + index_name)
+
+@pytest.mark.parametrize('o_rule', ['hasbug', 'nobug'])
+def test_bug_filters_scan(bench_db, o_rule):
+    # 'bug_id' is NOT indexed on purpose, a scan of 'cases' is faster than
+    # an index of it - see 'CreateDB.migrate_search_indexes'.
+    query, params = bcamp_api.compile_filterset(
+        dict(EMPTY_FILTERSET, o_rule=o_rule))
+    assert query_plan(query, params)[0] == 'SCAN cases'
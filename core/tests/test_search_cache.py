@@ -0,0 +1,85 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Checks that 'search_cases' never serves a stale SEARCH_CACHE result - each
+cached result must match a fresh 'compile_filterset' query of the DB.
+'''
+#Public Imports
+import random
+
+import pytest
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+
+EMPTY_FILTERSET = {'account': [], 'product': [], 'tag': [], 'custom': [],
+    'o_rule': 'default'}
+
+# The SR every write below changes.
+WRITE_SR = bcamp_bench.gen_sr_number(2)
+
+# Filtersets that match WRITE_SR before or after one of the WRITES.
+WATCHED = [dict(EMPTY_FILTERSET, account=['Zanzibar Freight']),
+    dict(EMPTY_FILTERSET, account=['Initech']),
+    dict(EMPTY_FILTERSET, tag=['quokka']),
+    dict(EMPTY_FILTERSET, tag=['wombat']),
+    dict(EMPTY_FILTERSET, o_rule='jiraneedinfo'),
+    dict(EMPTY_FILTERSET, custom=['zanzibar']),
+    dict(EMPTY_FILTERSET, custom=[WRITE_SR]),
+    dict(EMPTY_FILTERSET, o_rule='hasbug')]
+
+def fresh_search(f_set):
+    '''
+    Returns the result of 'f_set' straight from the DB.
+    '''
+    query, params = bcamp_api.compile_filterset(f_set)
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute(query, params)
+        return [row[0] for row in dbshell.fetchall()]
+
+def direct_write():
+    # Skips the API helpers, only the triggers see it.
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("UPDATE cases SET account = 'Initech' "
+            "WHERE sr_number = (?);", (WRITE_SR,))
+
+# (name, write) of each kind of write to the cases and tags tables.
+WRITES = [
+    ('update_case_record', lambda: bcamp_api.update_case_record(WRITE_SR,
+        {'account_string': 'Zanzibar Freight', 'product_string': 'ePO',
+        'bug_string': 'TSNS-777', 'important_bool': False,
+        'tags_list': ['quokka']})),
+    ('insert_tags', lambda: bcamp_api.insert_tags(WRITE_SR, 'wombat')),
+    ('update_case', lambda: bcamp_api.update_case(WRITE_SR, 'bug_id', None)),
+    ('jira_update_db', lambda: bcamp_api.jira_update_db(WRITE_SR,
+        bcamp_api.JiraIssue('Proxy drops keepalive', 'Need Info',
+        '2021-10-07', 'Description', 'bench', 'TSNS-777', [], None, [],
+        'P3', [], [], None, [], 'TSNS'))),
+    ('direct write', direct_write),
+    ('drop_sr', lambda: bcamp_api.drop_sr(WRITE_SR)),
+]
+
+def test_tile_toggles_never_stale(bench_db):
+    rand = random.Random(19)
+    for f_set in bcamp_bench.gen_tile_toggles(rand, 1000):
+        if rand.random() < 0.05:
+            bcamp_api.update_case(bcamp_bench.gen_sr_number(rand.randrange(
+                50)), 'bug_id', rand.choice([None, 'TSNS-1']))
+        assert bcamp_api.search_cases(f_set) == fresh_search(f_set), f_set
+    stats = bcamp_api.SEARCH_CACHE.stats()
+    assert stats['hits'] > 0
+    assert stats['stale'] > 0
+
+@pytest.mark.parametrize('name, write', WRITES, ids=[name for name, write
+    in WRITES])
+def test_write_drops_cached_results(bench_db, name, write):
+    # Every write before this one, so the SR matches the watched filtersets.
+    for earlier_name, earlier_write in WRITES[:WRITES.index((name, write))]:
+        earlier_write()
+    before = [bcamp_api.search_cases(f_set) for f_set in WATCHED]
+    write()
+    after = [bcamp_api.search_cases(f_set) for f_set in WATCHED]
+    assert after == [fresh_search(f_set) for f_set in WATCHED]
+    assert after != before
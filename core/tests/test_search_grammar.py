@@ -0,0 +1,198 @@
+# Basecamp 0.2 BETA
+# Written by Collin Spears, Network TSE
+
+'''
+Checks the search query grammar - 'parse_search_query', and that
+'compile_search_query' matches the same SR's as 'query_oracle', a Python
+evaluation of the parsed query over every case.
+'''
+#Public Imports
+import random
+
+import pytest
+
+#Private Imports
+import bcamp_api
+import bcamp_bench
+
+# (query text, expected 'parse_search_query' tree) - None for a ValueError.
+PARSER_CASES = [
+    ("bank", ('term', None, None, 'bank')),
+    ("  US   Bank ", ('and', [('term', None, None, 'US'),
+        ('term', None, None, 'Bank')])),
+    ("'US Bank'", ('term', None, None, 'US Bank')),
+    ('"US Bank" epo', ('and', [('term', None, None, 'US Bank'),
+        ('term', None, None, 'epo')])),
+    ("a OR b", ('or', [('term', None, None, 'a'), ('term', None, None, 'b')])),
+    ("a b OR c", ('and', [('term', None, None, 'a'),
+        ('or', [('term', None, None, 'b'), ('term', None, None, 'c')])])),
+    ("(a OR b) c", ('and', [('or', [('term', None, None, 'a'),
+        ('term', None, None, 'b')]), ('term', None, None, 'c')])),
+    ("a AND b", ('and', [('term', None, None, 'a'),
+        ('term', None, None, 'b')])),
+    ("a or b", ('and', [('term', None, None, 'a'), ('term', None, None, 'or'),
+        ('term', None, None, 'b')])),
+    ("-crash", ('not', ('term', None, None, 'crash'))),
+    ("NOT (a OR b)", ('not', ('or', [('term', None, None, 'a'),
+        ('term', None, None, 'b')]))),
+    ("-'x y'", ('not', ('term', None, None, 'x y'))),
+    ("TSNS-123 4-0001", ('and', [('term', None, None, 'TSNS-123'),
+        ('term', None, None, '4-0001')])),
+    ("account:tel", ('term', 'account', None, 'tel')),
+    ("Account:tel", ('term', 'account', None, 'tel')),
+    ('account:="US Bank"', ('term', 'account', '=', 'US Bank')),
+    ("tag:'a (b)'", ('term', 'tag', None, 'a (b)')),
+    ("files:>100", ('term', 'files', '>', '100')),
+    ("files:<=5", ('term', 'files', '<=', '5')),
+    ("imported:>=2023-01-01", ('term', 'imported', '>=', '2023-01-01')),
+    ("imported:2023", ('term', 'imported', None, '2023')),
+    ("foo:bar", ('term', None, None, 'foo:bar')),
+    ("account:~usbnak", ('term', 'account', '~', 'usbnak')),
+    ("(account:tel OR product:epo) -tag:perf files:>10", ('and', [
+        ('or', [('term', 'account', None, 'tel'),
+            ('term', 'product', None, 'epo')]),
+        ('not', ('term', 'tag', None, 'perf')),
+        ('term', 'files', '>', '10')])),
+    ('"unclosed quote', ('term', None, None, 'unclosed quote')),
+    ('logs:"access denied"', ('term', 'logs', None, 'access denied')),
+    ("", None),
+    ("()", None),
+    ("(a", None),
+    ("a )", None),
+    ("OR a", None),
+    ("a OR", None),
+    ("account:", None),
+    ("account:>tel", None),
+    ("files:many", None),
+    ("imported:01/02/2023", None),
+    ("logs:=crash", None),
+    ("tag:~perf", None),
+]
+
+@pytest.mark.parametrize('text, expected', PARSER_CASES)
+def test_parse_search_query(text, expected):
+    if expected == None:
+        with pytest.raises(ValueError):
+            bcamp_api.parse_search_query(text)
+    else:
+        assert bcamp_api.parse_search_query(text) == expected
+
+@pytest.mark.parametrize('text, expected', [
+    ("  ", []),
+    ("bank 'US Bank'", ['bank', '"US Bank"']),
+    ("account:tel OR x", ["account:tel OR x"]),
+    ("(oops", ['"(oops"']),
+])
+def test_parse_filter_search(text, expected):
+    # Plain words are kept as separate filters.
+    f_set = {'account': [], 'product': [], 'tag': [], 'custom': [],
+        'o_rule': 'default'}
+    assert bcamp_api.parse_filter_search(text, f_set)['custom'] == expected
+
+def test_search_query_words():
+    assert bcamp_api.search_query_words('a "b c"') == ['a', 'b c']
+    assert bcamp_api.search_query_words('a -b') == None
+
+def query_oracle(node, cases):
+    '''
+    Evaluates a 'parse_search_query' tree in Python over {sr: row dict}, and
+    returns the set of matching SR's.
+    '''
+    def contains(value, term):
+        return value != None and term.lower() in str(value).lower()
+
+    kind = node[0]
+    if kind == 'and':
+        result = set(cases)
+        for child in node[1]:
+            result &= query_oracle(child, cases)
+        return result
+    if kind == 'or':
+        result = set()
+        for child in node[1]:
+            result |= query_oracle(child, cases)
+        return result
+    if kind == 'not':
+        return set(cases) - query_oracle(node[1], cases)
+
+    field, operator, value = node[1], node[2], node[3]
+    result = set()
+    for sr_number, row in cases.items():
+        if field == None:
+            match = any(contains(row[column], value)
+                for column in bcamp_api.CASES_FTS_COLUMNS)
+        elif field == 'tag' and operator == '=':
+            match = value in row['tag_list']
+        elif bcamp_api.SEARCH_FIELDS[field]['type'] == 'fts':
+            if operator == '=':
+                match = row[bcamp_api.SEARCH_FIELDS[field]['column']] == value
+            else:
+                match = any(contains(row[column], value)
+                    for column in bcamp_api.SEARCH_FIELDS[field]['fts'])
+        elif bcamp_api.SEARCH_FIELDS[field]['type'] == 'text':
+            column = bcamp_api.SEARCH_FIELDS[field]['column']
+            if operator == '=':
+                match = row[column] == value
+            else:
+                match = contains(row[column], value)
+        elif field == 'imported':
+            stamp = row['import_time']
+            if stamp == None:
+                match = False
+            elif operator in (None, '='):
+                match = stamp.startswith(value)
+            else:
+                day = stamp[:len(value)]
+                match = {'>': day > value, '>=': day >= value,
+                    '<': day < value, '<=': day <= value}[operator]
+        else:
+            count = int(row['last_file_count'])
+            target = int(value)
+            match = {None: count == target, '=': count == target,
+                '>': count > target, '>=': count >= target,
+                '<': count < target, '<=': count <= target}[operator]
+        if match:
+            result.add(sr_number)
+    return result
+
+@pytest.fixture
+def grammar_db(bench_db):
+    '''
+    'bench_db' w/ random notes, JIRA titles and import times. Returns the
+    {sr: row dict} of every case for 'query_oracle'.
+    '''
+    bcamp_bench.fill_search_fields(random.Random(11))
+    cases = {}
+    with bcamp_api.BCAMP_DB.shell() as dbshell:
+        dbshell.execute("SELECT rowid, " + ", ".join(
+            bcamp_api.CASES_FTS_COLUMNS) + " FROM cases_fts;")
+        fts_rows = {row[0]: row[1:] for row in dbshell.fetchall()}
+        dbshell.execute("SELECT case_id, sr_number, jira_status, import_time,"
+            " last_file_count FROM cases;")
+        for row in dbshell.fetchall():
+            case = dict(zip(bcamp_api.CASES_FTS_COLUMNS, fts_rows[row[0]]))
+            case.update({'jira_status': row[2], 'import_time': row[3],
+                'last_file_count': row[4]})
+            case['tag_list'] = bcamp_api.query_tags(row[1])
+            cases[row[1]] = case
+    return cases
+
+@pytest.mark.parametrize('seed', range(3))
+def test_compiled_queries_match_oracle(grammar_db, seed):
+    rand = random.Random(seed)
+    for count in range(100):
+        text = bcamp_bench.gen_search_query(rand)
+        expected = query_oracle(bcamp_api.parse_search_query(text),
+            grammar_db)
+        assert bcamp_bench.run_search_query(text) == expected, text
+
+def test_compiled_queries_match_per_term(grammar_db):
+    # One statement per query vs. one query per term, combined in Python.
+    rand = random.Random(11)
+    nested = [text for text in [bcamp_bench.gen_search_query(rand)
+        for count in range(200)] if "(" in text]
+    assert nested != []
+    for text in nested:
+        tree = bcamp_api.parse_search_query(text)
+        assert bcamp_bench.run_per_term(tree, set(grammar_db)) \
+            == bcamp_bench.run_search_query(text), text